@@ -44,8 +44,9 @@ graph LR;
 * logging with standard warning, info, debug, error levels (+ multi-processing logging support)
 * optional multi-processing built in, configurable maximum number of processes used.
 * optional use of shared memory (for example for large DEMs and Masks) when using multi-processing. 
-This is an optional experimental feature that must be used with great care as it can result in
-memory leaks (requiring a server reboot to free) if shared memory is not correctly closed.
+Each array is loaded once by run_chain.py and shared read-only by all worker processes (see
+`clev2er.utils.shared_resources`). Shared memory segments are unlinked at the end of the run, or
+if it is interrupted, and segments left by a killed run are removed by the next run.
 * algorithm timing (with MP support)
 * chain timing
 * support for breakpoint files (saved as NetCDF4 files) 
@@ -130,6 +131,18 @@ export CS2_UNCERTAINTY_BASE_DIR=/cpnet/mssldba_raid6/cryo-tempo/land_ice/uncerta
 export CT_LOG_DIR=/tmp
 ```
 
+Optionally, set *CLEV2ER_GRID_CACHE_DIR* to a directory of memory mapped caches of the
+DEMs, masks and slope grids, built with `src/clev2er/tools/build_grid_cache.py`. These are
+then memory mapped instead of being decoded from their source files when the chain starts.
+
+```script
+export CLEV2ER_GRID_CACHE_DIR=/cpnet/mssldba_raid6/cpdata/RESOURCES/grid_cache
+```
+
+The cache can also hold median filtered levels of the DEMs (`--dem_levels median7,median3`),
+which the Roemer and LEPTA LRM geolocation then use instead of median filtering the DEM
+segment about each record.
+
 ## Python Requirement
 
 python v3.10 must be installed or available before proceeding.
@@ -294,7 +307,7 @@ be overridden by the relevant command line options.
 | ------- | ------- | ----------- |
 | use_multi_processing | true or false | if true multi-processing is used |
 | max_processes_for_multiprocessing | int | max number of processes to use for multi-processing |
-| use_shared_memory | true or false | if true allow use of shared memory. Experimental feature |
+| use_shared_memory | true or false | load DEM and mask arrays once, shared by all processes |
 | stop_on_error | true or false | stop chain on first error found, or log error and skip |
 
 ### Chain Specific Configuration
@@ -68,6 +68,37 @@ class BaseAlgorithm:
 
         return (True, "")
 
+    @staticmethod
+    def prefilter(  # pylint: disable=unused-argument
+        l1b: Dataset, config: Dict[str, Any], prefilter_dict: dict
+    ) -> Tuple[bool, str]:
+        """Optional fast check of whether this algorithm would skip the L1b file
+
+        Run by run_chain()'s L1b file pre-pass (if config['chain']['prefilter_l1b_files'] is
+        set) before the file is passed to the chain, so that files which are certain to be
+        skipped never reach a worker process. Only cheap reads of the l1b Dataset should be
+        used (global attributes, decimated variables). Values needed by the prefilter()
+        of later algorithms in the chain are stored in prefilter_dict, in the same way as
+        shared_dict is used by Algorithm.process().
+
+        This default keeps every file. The pre-pass stops at the first algorithm in the
+        chain which does not override this function.
+
+        Args:
+            l1b (Dataset): input l1b file dataset (constant)
+            config (dict): chain configuration dictionary
+            prefilter_dict (dict): data passed between the prefilter() of each algorithm
+
+        Returns:
+            Tuple : (True,'') to continue with the next algorithm's prefilter,
+            (False,'SKIP_OK..') if Algorithm.process() is certain to skip the file, which
+            removes the file from the chain's input list, or
+            (False,'error string') to stop the pre-pass and keep the file, so that the
+            error is found and reported by the full chain.
+            If in doubt, the file must be kept.
+        """
+        return (True, "")
+
     def set_log(self, thislog: logging.Logger) -> None:
         """function to set the logger to use within this algorithm
 
@@ -94,7 +125,8 @@ class BaseAlgorithm:
     @Timer(name=__name__, text="", logger=None)
     def process_setup(self, l1b: Dataset) -> Tuple[bool, str]:
         """common pre-processor which tests the L1b Dataset is valid
-           and also runs BaseAlgorithm.init() if in multi-processing mode
+           and also runs BaseAlgorithm.init() if in multi-processing mode and
+           the algorithm has not yet been initialized in this worker process
            This should be run as a first step inside Algorithm.process()
 
             `success, error_str = self.process_setup(l1b)`
@@ -110,10 +142,12 @@ class BaseAlgorithm:
         """
 
         # When using multi-processing it is faster to initialize the algorithm
-        # within each Algorithm.process(), rather than once in the main process's
-        # Algorithm.__init__().
-        # This avoids having to pickle the initialized data arrays (which is very slow)
-        if self.config["chain"]["use_multi_processing"]:
+        # within the worker process's first Algorithm.process(), rather than once in
+        # the main process's Algorithm.__init__().
+        # This avoids having to pickle the initialized data arrays (which is very slow).
+        # Workers are persistent, so init() is only run for the first file processed
+        # by each worker, and finalize() is run when the worker exits.
+        if self.config["chain"]["use_multi_processing"] and not self.initialized:
             rval, error_str = self.init()
             if not rval:
                 return (rval, error_str)
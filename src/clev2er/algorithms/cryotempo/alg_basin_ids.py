@@ -58,10 +58,10 @@ class Algorithm(BaseAlgorithm):
 
         # Add initialization steps here
 
-        # Check for special case where we create a shared memory
-        # version of the DEM's arrays. Note this _init_shared_mem config setting is set by
-        # run_chain.py and should not be included in the config files
-        init_shared_mem = "_init_shared_mem" in self.config
+        # When shared memory is enabled, the DEM and mask arrays are loaded once by
+        # run_chain.py into the run's shared resources (see clev2er.utils.shared_resources)
+        # and each worker process attaches to them read-only
+        use_shared_memory = self.config["chain"].get("use_shared_memory", False)
 
         # ---------------------------------------------------------------------------------
         # Load Basin Masks required to create 'basin_id' netCDF variable
@@ -100,7 +100,7 @@ class Algorithm(BaseAlgorithm):
             self.zwally_basin_mask_ant = Mask(
                 "antarctic_grounded_and_floating_2km_grid_mask",
                 mask_path=mask_paths["antarctic_grounded_and_floating_2km_grid_mask"],
-                store_in_shared_memory=init_shared_mem,
+                store_in_shared_memory=use_shared_memory,
                 thislog=self.log,
             )  # source: Zwally 2012, ['unknown','1',..'27']
 
@@ -111,7 +111,7 @@ class Algorithm(BaseAlgorithm):
         self.zwally_basin_mask_grn = Mask(
             "greenland_icesheet_2km_grid_mask",
             mask_path=mask_paths["greenland_icesheet_2km_grid_mask"],
-            store_in_shared_memory=init_shared_mem,
+            store_in_shared_memory=use_shared_memory,
             thislog=self.log,
         )
 
@@ -128,7 +128,7 @@ class Algorithm(BaseAlgorithm):
             self.rignot_basin_mask_ant = Mask(
                 "antarctic_icesheet_2km_grid_mask_rignot2016",
                 mask_path=mask_paths["antarctic_icesheet_2km_grid_mask_rignot2016"],
-                store_in_shared_memory=init_shared_mem,
+                store_in_shared_memory=use_shared_memory,
                 thislog=self.log,
             )
 
@@ -138,7 +138,7 @@ class Algorithm(BaseAlgorithm):
         self.rignot_basin_mask_grn = Mask(
             "greenland_icesheet_2km_grid_mask_rignot2016",
             mask_path=mask_paths["greenland_icesheet_2km_grid_mask_rignot2016"],
-            store_in_shared_memory=init_shared_mem,
+            store_in_shared_memory=use_shared_memory,
             thislog=self.log,
         )
 
@@ -57,10 +57,10 @@ class Algorithm(BaseAlgorithm):
         self.log.info("Algorithm %s initializing", self.alg_name)
 
         # Add initialization steps here
-        # Check for special case where we create a shared memory
-        # version of the DEM's arrays. Note this _init_shared_mem config setting is set by
-        # run_chain.py and should not be included in the config files
-        init_shared_mem = "_init_shared_mem" in self.config
+        # When shared memory is enabled, the DEM and mask arrays are loaded once by
+        # run_chain.py into the run's shared resources (see clev2er.utils.shared_resources)
+        # and each worker process attaches to them read-only
+        use_shared_memory = self.config["chain"].get("use_shared_memory", False)
 
         # Greenland dilated coastal mask (ie includes Greenland + 10km out to ocean)
         try:
@@ -78,7 +78,7 @@ class Algorithm(BaseAlgorithm):
         self.greenland_dilated_mask = Mask(
             "greenland_iceandland_dilated_10km_grid_mask",
             mask_path=mask_file,
-            store_in_shared_memory=init_shared_mem,
+            store_in_shared_memory=use_shared_memory,
             thislog=self.log,
         )
         # Antarctic dilated coastal mask (ie includes Antarctica (grounded+floating)
@@ -102,7 +102,7 @@ class Algorithm(BaseAlgorithm):
             self.antarctic_dilated_mask = Mask(
                 "antarctica_iceandland_dilated_10km_grid_mask",
                 mask_path=mask_file,
-                store_in_shared_memory=init_shared_mem,
+                store_in_shared_memory=use_shared_memory,
                 thislog=self.log,
             )
 
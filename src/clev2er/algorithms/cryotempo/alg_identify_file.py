@@ -100,23 +100,60 @@ class Algorithm(BaseAlgorithm):
 
         shared_dict["num_20hz_records"] = number_20hz_records
 
-        error_str = ""
-        try:
-            if "LRM" in l1b.sir_op_mode:
-                shared_dict["instr_mode"] = "LRM"
-            elif "SARIN" in l1b.sir_op_mode:
-                shared_dict["instr_mode"] = "SIN"
-            elif "SAR" in l1b.sir_op_mode:
-                shared_dict["instr_mode"] = "SAR"
-            else:
-                error_str = f"Invalid mode attribute .sir_op_mode in L1b file {l1b.sir_op_mode}"
-        except AttributeError:
-            error_str = "Missing attribute .sir_op_mode in L1b file"
-
+        instr_mode, error_str = get_instr_mode(l1b)
         if error_str:
             self.log.error("%s", error_str)
             return (False, error_str)
 
+        shared_dict["instr_mode"] = instr_mode
+
+        return (True, "")
+
+    @staticmethod
+    def prefilter(  # pylint: disable=unused-argument
+        l1b: Dataset, config: dict, prefilter_dict: dict
+    ) -> Tuple[bool, str]:
+        """Fast pre-pass version of process(): find the instrument mode from the L1b
+           global attributes
+
+        Args:
+            l1b (Dataset): input l1b file dataset (constant)
+            config (dict): chain configuration dictionary
+            prefilter_dict (dict): data passed between the prefilter() of each algorithm
+
+        Returns:
+            Tuple : (True,'') or (False,'error string') if process() would fail
+        """
+        if "lat_20_ku" not in l1b.variables:
+            return (False, "lat_20_ku could not be read")
+
+        instr_mode, error_str = get_instr_mode(l1b)
+        if error_str:
+            return (False, error_str)
+
+        prefilter_dict["instr_mode"] = instr_mode
+
         return (True, "")
 
     # No finalize() required
+
+
+def get_instr_mode(l1b: Dataset) -> Tuple[str, str]:
+    """find the instrument mode of a CryoSat L1b file from its sir_op_mode attribute
+
+    Args:
+        l1b (Dataset): input l1b file dataset
+
+    Returns:
+        Tuple[str,str]: (instrument mode 'LRM', 'SIN' or 'SAR', '') or ('', error string)
+    """
+    try:
+        if "LRM" in l1b.sir_op_mode:
+            return ("LRM", "")
+        if "SARIN" in l1b.sir_op_mode:
+            return ("SIN", "")
+        if "SAR" in l1b.sir_op_mode:
+            return ("SAR", "")
+        return ("", f"Invalid mode attribute .sir_op_mode in L1b file {l1b.sir_op_mode}")
+    except AttributeError:
+        return ("", "Missing attribute .sir_op_mode in L1b file")
@@ -22,6 +22,7 @@ from clev2er.utils.time.grain import Grain
 # pylint: disable=too-many-locals
 # pylint: disable=too-many-branches
 # pylint: disable=too-many-statements
+# pylint: disable=too-many-arguments
 
 
 def cnes_cycle_to_subcycle(cycle_number: int, rel_orbit_number: int) -> tuple[int, int]:
@@ -66,6 +67,87 @@ def get_current_commit_hash(log: logging.Logger) -> str:
         return ""
 
 
+def get_product_path(
+    config: dict,
+    hemisphere: str,
+    start_utc: datetime,
+    end_utc: datetime,
+    cycle_number: int,
+    rel_orbit_number: int,
+) -> tuple[str, str]:
+    """Form the path of the L2 Cryo-TEMPO product of an L1b file
+
+    Product directory:
+        <product_base_dir>/<baseline>/<version:03>/LAND_ICE/<ANTARC,GREENL>/<YYYY>/<MM>
+    Filename requirements: CS_OFFL_SIR_TDP_LI_<ANTARC,GREENL>_<STARTTIME>_
+                           <ENDTIME>_<CC>_<OOOOO>_<BVVV>.nc
+        <STARTTIME>, <ENDTIME>=yyyymmddThhmmss
+
+    Args:
+        config (dict): chain configuration dictionary
+        hemisphere (str): 'north' or 'south'
+        start_utc (datetime): UTC time of first L1b record
+        end_utc (datetime): UTC time of last L1b record
+        cycle_number (int): ESA CS2 cycle number from L1b
+        rel_orbit_number (int): CS2 relative orbit within ESA cycle
+
+    Returns:
+        tuple[str, str]: product directory, product file path
+    """
+    zone_str = "GREENL"
+    if hemisphere == "south":
+        zone_str = "ANTARC"
+    product_dir = (
+        f"{config['product_base_dir']}/{config['baseline'].upper()}/"
+        f"{config['version']:03d}/LAND_ICE/{zone_str}/{start_utc.year}/{start_utc.month:02d}"
+    )
+
+    # Form <STARTTIME> string
+    start_seconds = start_utc.second
+    start_minutes = start_utc.minute
+    start_hours = start_utc.hour
+    start_microsecs = start_utc.microsecond
+    if start_microsecs > 500000:
+        start_seconds += 1
+        if start_seconds == 60:
+            start_seconds = 0
+            start_minutes += 1
+            if start_minutes == 60:
+                start_minutes = 0
+                start_hours += 1
+
+    start_time_str = (
+        f"{start_utc.year:4d}{start_utc.month:02d}{start_utc.day:02d}"
+        f"T{start_hours:02d}{(start_minutes):02d}{start_seconds:02d}"
+    )
+
+    # Form <ENDTIME> string
+    end_seconds = end_utc.second
+    end_minutes = end_utc.minute
+    end_hours = end_utc.hour
+    end_microsecs = end_utc.microsecond
+    if end_microsecs > 500000:
+        end_seconds += 1
+        if end_seconds == 60:
+            end_seconds = 0
+            end_minutes += 1
+            if end_minutes == 60:
+                end_minutes = 0
+                end_hours += 1
+
+    end_time_str = (
+        f"{end_utc.year:4d}{end_utc.month:02d}{end_utc.day:02d}"
+        f"T{end_hours:02d}{(end_minutes):02d}{end_seconds:02d}"
+    )
+
+    product_filename = (
+        f"{product_dir}/CS_OFFL_SIR_TDP_LI_{zone_str}_{start_time_str}_{end_time_str}_"
+        f"{cycle_number:02d}_{rel_orbit_number:05d}_"
+        f"{config['baseline'].upper()}{config['version']:03d}.nc"
+    )
+    return product_dir, product_filename
+
+
 class Algorithm(BaseAlgorithm):
     """Algorithm to write L2 CryoTEMPO output files
 
@@ -182,16 +264,20 @@ class Algorithm(BaseAlgorithm):
         self.log.info("start month %d %d", start_month, start_year)
 
         # ---------------------------------------------------------------------
-        #  Form product directory path
-        #    <base_dir>/<baseline>/<version:03>/LAND_ICE/<ANTARC,GREENL>/<YYYY>/<MM>
+        #  Form product directory path and filename
         # ---------------------------------------------------------------------
 
-        zone_str = "GREENL"
-        if shared_dict["hemisphere"] == "south":
-            zone_str = "ANTARC"
-        product_dir = (
-            f"{self.config['product_base_dir']}/{self.config['baseline'].upper()}/"
-            f"{self.config['version']:03d}/LAND_ICE/{zone_str}/{start_year}/{start_month:02d}"
+        cycle_number = l1b.cycle_number
+        abs_orbit_number = l1b.abs_orbit_number
+        rel_orbit_number = l1b.rel_orbit_number
+
+        product_dir, product_filename = get_product_path(
+            self.config,
+            shared_dict["hemisphere"],
+            time_utc_dt[0],
+            time_utc_dt[-1],
+            cycle_number,
+            rel_orbit_number,
         )
 
         self.log.info("product dir: %s", product_dir)
@@ -209,61 +295,6 @@ class Algorithm(BaseAlgorithm):
                     self.log.error("could not create %s : %s", product_dir, exc)
                     return (False, f"could not create {product_dir} {exc}")
 
-        # ---------------------------------------------------------------------
-        #  Form product filename
-        #  Filename requirements: CS_OFFL_SIR_TDP_LI_<ANTARC,GREENL>_<STARTTIME>_
-        #                        <ENDTIME>_<CC>_<OOOOO>_<BVVV>.nc
-        #     <STARTTIME>, <ENDTIME>=yyyymmddThhmmss
-        # ---------------------------------------------------------------------
-
-        cycle_number = l1b.cycle_number
-        abs_orbit_number = l1b.abs_orbit_number
-        rel_orbit_number = l1b.rel_orbit_number
-
-        # Form <STARTTIME> string
-        start_seconds = time_utc_dt[0].second
-        start_minutes = time_utc_dt[0].minute
-        start_hours = time_utc_dt[0].hour
-        start_microsecs = time_utc_dt[0].microsecond
-        if start_microsecs > 500000:
-            start_seconds += 1
-            if start_seconds == 60:
-                start_seconds = 0
-                start_minutes += 1
-                if start_minutes == 60:
-                    start_minutes = 0
-                    start_hours += 1
-
-        start_time_str = (
-            f"{time_utc_dt[0].year:4d}{time_utc_dt[0].month:02d}{time_utc_dt[0].day:02d}"
-            f"T{start_hours:02d}{(start_minutes):02d}{start_seconds:02d}"
-        )
-
-        # Form <ENDTIME> string
-        end_seconds = time_utc_dt[-1].second
-        end_minutes = time_utc_dt[-1].minute
-        end_hours = time_utc_dt[-1].hour
-        end_microsecs = time_utc_dt[-1].microsecond
-        if end_microsecs > 500000:
-            end_seconds += 1
-            if end_seconds == 60:
-                end_seconds = 0
-                end_minutes += 1
-                if end_minutes == 60:
-                    end_minutes = 0
-                    end_hours += 1
-
-        end_time_str = (
-            f"{time_utc_dt[-1].year:4d}{time_utc_dt[-1].month:02d}{time_utc_dt[-1].day:02d}"
-            f"T{end_hours:02d}{(end_minutes):02d}{end_seconds:02d}"
-        )
-
-        product_filename = (
-            f"{product_dir}/CS_OFFL_SIR_TDP_LI_{zone_str}_{start_time_str}_{end_time_str}_"
-            f"{cycle_number:02d}_{rel_orbit_number:05d}_"
-            f"{self.config['baseline'].upper()}{self.config['version']:03d}.nc"
-        )
-
         self.log.info("product filename=%s", os.path.basename(product_filename))
         self.log.info("product path=%s", product_filename)
 
@@ -343,6 +374,11 @@ class Algorithm(BaseAlgorithm):
 
         dset.sw_version = get_current_commit_hash(self.log)
 
+        # Record the key of the inputs this product was made from, used to skip making
+        # it again if they have not changed (see alg_skip_up_to_date_product)
+        if shared_dict.get("processing_key"):
+            dset.processing_key = shared_dict["processing_key"]
+
         # Add CNES sub-cycle. Need to check what to do after orbit change in Jul 2020
         cnes_subcycle, cnes_track = cnes_cycle_to_subcycle(cycle_number, rel_orbit_number)
         dset.cnes_subcycle = np.int32(cnes_subcycle)
@@ -59,10 +59,10 @@ class Algorithm(BaseAlgorithm):
         # Add initialization steps here
 
         # Load DEMs for Antarctica and Greenland
-        # Check for special case where we create a shared memory
-        # version of the DEM's arrays. Note this _init_shared_mem config setting is set by
-        # run_chain.py and should not be included in the config files
-        init_shared_mem = "_init_shared_mem" in self.config
+        # When shared memory is enabled, the DEM and mask arrays are loaded once by
+        # run_chain.py into the run's shared resources (see clev2er.utils.shared_resources)
+        # and each worker process attaches to them read-only
+        use_shared_memory = self.config["chain"].get("use_shared_memory", False)
 
         if "grn_only" in self.config and self.config["grn_only"]:
             self.dem_ant = None
@@ -70,14 +70,14 @@ class Algorithm(BaseAlgorithm):
             self.dem_ant = Dem(
                 "rema_ant_1km",
                 config=self.config,
-                store_in_shared_memory=init_shared_mem,
+                store_in_shared_memory=use_shared_memory,
                 thislog=self.log,
             )
 
         self.dem_grn = Dem(
             "arcticdem_1km",
             config=self.config,
-            store_in_shared_memory=init_shared_mem,
+            store_in_shared_memory=use_shared_memory,
             thislog=self.log,
         )
         # Important Note :
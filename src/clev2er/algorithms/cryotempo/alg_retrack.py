@@ -37,7 +37,9 @@ class Algorithm(BaseAlgorithm):
             thislog: logging.Logger | None: initial logger instance to use or
                                             None (use root logger)
 
-    Tuning thresholds are set in config.
+    Tuning thresholds are set in config. If config["tcog_retracker"]["analytic_crossings"] or
+    config["mc_retracker"]["analytic_crossings"] is True, the waveforms' threshold crossings are
+    found analytically instead of by oversampling the waveforms (default False).
 
     **Contribution to shared dictionary**
 
@@ -115,6 +117,10 @@ class Algorithm(BaseAlgorithm):
         waveforms_to_include = shared_dict["waveforms_to_include"]
         n_waveforms_to_include = np.count_nonzero(waveforms_to_include)
 
+        # (n_waveforms, 2) arrays of leading edge bin number and normalised amplitude
+        leading_edge_start: np.ndarray
+        leading_edge_stop: np.ndarray
+
         if shared_dict["instr_mode"] == "SIN":
             self.log.debug("noise_threshold=%f", self.config["mc_retracker"]["noise_threshold"])
 
@@ -161,6 +167,7 @@ class Algorithm(BaseAlgorithm):
                 coherence_smoothing_width=self.config["mc_retracker"][
                     "coherence_smoothing_width"
                 ],  # define coherence boxcar average smoothing width
+                analytic_crossings=self.config["mc_retracker"].get("analytic_crossings", False),
                 include_measurements_array=waveforms_to_include,
             )  # if not None, pass a boolean array to indicate which waveforms to retrack
 
@@ -211,6 +218,7 @@ class Algorithm(BaseAlgorithm):
                     "le_dp_threshold"
                 ],  # define threshold on normalised amplitude change which is required to
                 # be accepted as lead edge
+                analytic_crossings=self.config["tcog_retracker"].get("analytic_crossings", False),
                 include_measurements_array=waveforms_to_include,
             )  # if not None, pass a boolean array to indicate which waveforms to retrack
 
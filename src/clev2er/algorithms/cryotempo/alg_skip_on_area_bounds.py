@@ -1,6 +1,8 @@
 """ clev2er.algorithms.cryotempo.alg_skip_on_area_bounds """
+from functools import lru_cache
 from typing import Tuple
 
+import numpy as np
 from codetiming import Timer
 from netCDF4 import Dataset  # pylint:disable=E0611
 
@@ -11,6 +13,10 @@ from clev2er.utils.masks.masks import Mask  # CPOM Cryosphere area masks
 
 # Too many return statements, pylint: disable=R0911
 # pylint: disable=too-many-branches
+# pylint: disable=too-many-locals
+
+# Number of records between the decimated nadir locations read by Algorithm.prefilter()
+PREFILTER_STEP = 20
 
 
 class Algorithm(BaseAlgorithm):
@@ -120,33 +126,12 @@ class Algorithm(BaseAlgorithm):
                 error_str,
             )
 
-        # If it is LRM then there are are no passes over Ant or Grn that also
-        # have first records between 62N and 69S
-        if shared_dict["instr_mode"] == "LRM" and (62.0 > first_record_lat > -69.0):
-            self.log.info(
-                "File Skipping as LRM file outside cryosphere, [%.2fN -> %.2fN]",
-                first_record_lat,
-                last_record_lat,
-            )
-            return (
-                False,
-                (
-                    "SKIP_OK, file outside cryosphere, "
-                    f"[{first_record_lat:.2f}N -> {last_record_lat:.2f}N]"
-                ),
-            )
-
-        # If it is SIN then there are are no passes over Ant or Grn that also have first
-        # records between 58N and 59S
-        if shared_dict["instr_mode"] == "SIN" and (58.0 > first_record_lat > -59.0):
-            self.log.info("Skipping file as SIN file outside cryosphere")
-            return (
-                False,
-                (
-                    "SKIP_OK, file outside cryosphere, "
-                    f"[{first_record_lat:.2f}N -> {last_record_lat:.2f}N]"
-                ),
-            )
+        success, error_str = check_first_record_lat(
+            shared_dict["instr_mode"], first_record_lat, last_record_lat
+        )
+        if not success:
+            self.log.info("Skipping file as %s file outside cryosphere", shared_dict["instr_mode"])
+            return (False, error_str)
 
         # Get nadir latitude and longitude from L1b file
         lat_20_ku = l1b["lat_20_ku"][:].data
@@ -214,5 +199,117 @@ class Algorithm(BaseAlgorithm):
         # Return success (True,'')
         return (True, "")
 
+    @staticmethod
+    def prefilter(l1b: Dataset, config: dict, prefilter_dict: dict) -> Tuple[bool, str]:
+        """Fast pre-pass version of process(), using the L1b global attributes and
+           decimated nadir locations (every PREFILTER_STEP records)
+
+        Only returns SKIP_OK if process() is certain to skip the file:
+
+        - the hemisphere is only decided if no decimated location is within the maximum
+          latitude step between decimated locations of the other hemisphere's 55 deg limit
+        - the Greenland rectangular mask is padded by twice the maximum x,y distance between
+          decimated locations, so that no full rate location inside the mask can be missed
+
+        Args:
+            l1b (Dataset): input l1b file dataset (constant)
+            config (dict): chain configuration dictionary
+            prefilter_dict (dict): data passed between the prefilter() of each algorithm,
+                                   must contain 'instr_mode'
+
+        Returns:
+            Tuple : (True,'') or (False,'SKIP_OK..') or (False,'error string')
+        """
+        try:
+            first_record_lat = l1b.first_record_lat / 1e6
+            last_record_lat = l1b.last_record_lat / 1e6
+        except AttributeError:
+            return (False, "Missing attribute .first_record_lat in L1b file")
+
+        if "instr_mode" not in prefilter_dict:
+            return (False, "instr_mode missing from prefilter dict")
+
+        success, error_str = check_first_record_lat(
+            prefilter_dict["instr_mode"], first_record_lat, last_record_lat
+        )
+        if not success:
+            return (False, error_str)
+
+        # Decimated nadir locations, always including the last record
+        num_records = l1b["lat_20_ku"].size
+        if num_records < 2:
+            return (True, "")
+        indices = np.unique(np.append(np.arange(0, num_records, PREFILTER_STEP), num_records - 1))
+        lats = l1b["lat_20_ku"][indices].data
+        lons = l1b["lon_20_ku"][indices].data % 360.0
+
+        # A full rate location between two decimated locations is within max_lat_step of them
+        max_lat_step = np.max(np.abs(np.diff(lats)))
+        north_possible = np.any(lats > 55.0 - max_lat_step)
+        south_possible = np.any(lats < -55.0 + max_lat_step)
+
+        if np.any(lats > 55.0) and not south_possible:  # process() finds northern hemisphere
+            greenland_mask = get_greenland_mask()
+            x, y = greenland_mask.latlon_to_xy(lats, lons)  # pylint: disable=E0633
+            pad = 2.0 * np.max(np.hypot(np.diff(x), np.diff(y)))
+            near_mask = (
+                (x >= greenland_mask.xlimits[0] - pad)
+                & (x <= greenland_mask.xlimits[1] + pad)
+                & (y >= greenland_mask.ylimits[0] - pad)
+                & (y <= greenland_mask.ylimits[1] + pad)
+            )
+            if not np.any(near_mask):
+                return (False, "SKIP_OK, No locations within Greenland rectangular mask ")
+            return (True, "")
+
+        if np.any(lats < -55.0) and not north_possible:  # process() finds southern hemisphere
+            if "grn_only" in config:
+                if config["grn_only"]:
+                    return (False, "SKIP_OK, grn_only specificed ")
+
+        return (True, "")
+
 
 # No finalize() required by this algorithm
+
+
+@lru_cache(maxsize=1)
+def get_greenland_mask() -> Mask:
+    """return the Greenland rectangular mask used by Algorithm.prefilter()
+
+    The mask is only created once in each process
+
+    Returns:
+        Mask: Mask("greenland_area_xylimits_mask")
+    """
+    return Mask("greenland_area_xylimits_mask")
+
+
+def check_first_record_lat(
+    instr_mode: str, first_record_lat: float, last_record_lat: float
+) -> Tuple[bool, str]:
+    """check whether a file can pass over Antarctica or Greenland from its first record latitude
+
+    Args:
+        instr_mode (str): 'LRM' or 'SIN'
+        first_record_lat (float): latitude of first record in file (degs N)
+        last_record_lat (float): latitude of last record in file (degs N)
+
+    Returns:
+        Tuple[bool,str]: (True,'') or (False,'SKIP_OK, file outside cryosphere..')
+    """
+    # If it is LRM then there are are no passes over Ant or Grn that also
+    # have first records between 62N and 69S
+    # If it is SIN then there are are no passes over Ant or Grn that also have first
+    # records between 58N and 59S
+    if (instr_mode == "LRM" and (62.0 > first_record_lat > -69.0)) or (
+        instr_mode == "SIN" and (58.0 > first_record_lat > -59.0)
+    ):
+        return (
+            False,
+            (
+                "SKIP_OK, file outside cryosphere, "
+                f"[{first_record_lat:.2f}N -> {last_record_lat:.2f}N]"
+            ),
+        )
+    return (True, "")
@@ -91,27 +91,65 @@ class Algorithm(BaseAlgorithm):
         # \/    down the chain in the 'shared_dict' dict     \/
         # -------------------------------------------------------------------
 
-        try:
-            if shared_dict["instr_mode"] == "SAR":
-                self.log.info("skipping as SAR mode not required")
-                return (False, "SKIP_OK: SAR mode file not required")
-        except KeyError:
-            self.log.error("instr_mode not in shared_dict")
-            return (False, "instr_mode not in shared_dict")
-
-        if "lrm_only" in self.config:
-            if self.config["lrm_only"]:
-                if shared_dict["instr_mode"] != "LRM":
-                    self.log.info("skipping as config:lrm_only specified and mode not LRM")
-                    return (False, "SKIP_OK: config:lrm_only specified")
-        if "sin_only" in self.config:
-            if self.config["sin_only"]:
-                if shared_dict["instr_mode"] != "SIN":
-                    self.log.info("skipping as config:sin_only specified and mode not SIN")
-                    return (False, "SKIP_OK: config:sin_only specified")
+        success, error_str = check_mode(self.config, shared_dict)
+        if not success:
+            if "SKIP_OK" in error_str:
+                self.log.info("skipping file, %s", error_str)
+            else:
+                self.log.error("%s", error_str)
+            return (False, error_str)
 
         # --------------------------------------------------------
 
         return (True, "")
 
+    @staticmethod
+    def prefilter(  # pylint: disable=unused-argument
+        l1b: Dataset, config: dict, prefilter_dict: dict
+    ) -> Tuple[bool, str]:
+        """Fast pre-pass version of process(): skip files of modes not required, using
+           the instrument mode found by alg_identify_file.prefilter()
+
+        Args:
+            l1b (Dataset): input l1b file dataset (constant)
+            config (dict): chain configuration dictionary
+            prefilter_dict (dict): data passed between the prefilter() of each algorithm
+
+        Returns:
+            Tuple : (True,'') or (False,'SKIP_OK..') or (False,'error string')
+        """
+        return check_mode(config, prefilter_dict)
+
     # No finalize() required by algorithm
+
+
+def check_mode(config: dict, shared_dict: dict) -> Tuple[bool, str]:
+    """check whether the L1b file's instrument mode is required by the chain
+
+    SAR mode files are never required. LRM or SIN only files are selected by
+    config['lrm_only'] or config['sin_only']
+
+    Args:
+        config (dict): chain configuration dictionary
+        shared_dict (dict): shared_dict (or prefilter_dict) containing 'instr_mode'
+
+    Returns:
+        Tuple[bool,str]: (True,''), (False,'SKIP_OK: reason') if file not required, or
+        (False,'error string')
+    """
+    try:
+        if shared_dict["instr_mode"] == "SAR":
+            return (False, "SKIP_OK: SAR mode file not required")
+    except KeyError:
+        return (False, "instr_mode not in shared_dict")
+
+    if "lrm_only" in config:
+        if config["lrm_only"]:
+            if shared_dict["instr_mode"] != "LRM":
+                return (False, "SKIP_OK: config:lrm_only specified")
+    if "sin_only" in config:
+        if config["sin_only"]:
+            if shared_dict["instr_mode"] != "SIN":
+                return (False, "SKIP_OK: config:sin_only specified")
+
+    return (True, "")
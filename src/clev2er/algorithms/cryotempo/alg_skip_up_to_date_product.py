@@ -0,0 +1,150 @@
+""" clev2er.algorithms.cryotempo.alg_skip_up_to_date_product """
+
+import os
+from typing import Tuple
+
+from codetiming import Timer
+from netCDF4 import Dataset  # pylint:disable=E0611
+
+from clev2er.algorithms.base.base_alg import BaseAlgorithm
+from clev2er.algorithms.cryotempo.alg_product_output import get_product_path
+from clev2er.utils.journal.processing_key import code_hash, processing_key
+from clev2er.utils.journal.run_journal import config_hash
+from clev2er.utils.time.grain import Grain
+
+# Similar lines in 2 files, pylint: disable=R0801
+
+
+class Algorithm(BaseAlgorithm):
+    """**Algorithm to skip L1b files whose product is already up to date**
+
+    Forms the processing key of the L1b file from the L1b file's name, modification time
+    and size, the chain configuration and algorithm list, and the chain's source code
+    (see clev2er.utils.journal.processing_key). This is written to the product's
+    processing_key global attribute by alg_product_output.
+
+    If config['chain']['skip_up_to_date_products'] is True (run_chain.py --incremental),
+    and the product of this L1b file already exists with the same processing key,
+    return (False,"SKIP_OK...") so that the product is not made again.
+
+    Must be run after alg_skip_on_area_bounds, which sets shared_dict['hemisphere'].
+
+    **Contribution to shared dictionary**
+
+    shared_dict['processing_key']: (str), processing key of the L1b file
+    shared_dict['product_filename']: (str), path of the existing L2 product, if the
+                                     file is skipped
+
+    CLEV2ER Algorithm: inherits from BaseAlgorithm
+
+    BaseAlgorithm __init__(config,thislog)
+        Args:
+            config: Dict[str, Any]: chain configuration dictionary
+            thislog: logging.Logger | None: initial logger instance to use or
+                                            None (use root logger)
+    """
+
+    # Note: __init__() is in BaseAlgorithm. See required parameters above
+    # init() below is called by __init__() at a time dependent on whether
+    # sequential or multi-processing mode is in operation
+
+    def init(self) -> Tuple[bool, str]:
+        """Algorithm initialization
+
+        Add steps in this function that are run once at the beginning of the chain
+        (for example loading a DEM or Mask)
+
+        Returns:
+            (bool,str) : success or failure, error string
+
+        Raises:
+            KeyError : keys not in config
+            FileNotFoundError :
+            OSError :
+
+        Note: raise and Exception rather than just returning False
+        """
+        self.alg_name = __name__
+        self.log.info("Algorithm %s initializing", self.alg_name)
+
+        # hashes of the configuration and source code are the same for every L1b file.
+        # The configuration hash is the run journal's, of the config and the algorithm list
+        # (set in config['chain']['algorithm_list'] by run_chain.py)
+        self.config_hash = config_hash(self.config, self.config["chain"]["algorithm_list"])
+        self.code_hash = code_hash(self.config["chain"]["chain_name"])
+
+        self.skip_up_to_date = self.config["chain"].get("skip_up_to_date_products", False)
+        if self.skip_up_to_date:
+            # Used to convert the L1b time to UTC, to find the product file name
+            self.grain = Grain(leap_second_filename=self.config["leap_seconds"])
+
+        return (True, "")
+
+    @Timer(name=__name__, text="", logger=None)
+    def process(self, l1b: Dataset, shared_dict: dict) -> Tuple[bool, str]:
+        """Main algorithm processing function
+
+        Args:
+            l1b (Dataset): input l1b file dataset (constant)
+            shared_dict (dict): shared_dict data passed between algorithms
+
+        Returns:
+            Tuple : (success (bool), failure_reason (str))
+            ie
+            (False,'error string'), or (True,'')
+
+        **IMPORTANT NOTE:** when logging within the Algorithm.process() function you must use
+        the self.log.info(),error(),debug() logger and NOT log.info(), log.error(), log.debug :
+
+        `self.log.error("your message")`
+
+        """
+
+        # This is required to support logging during multi-processing
+        success, error_str = self.process_setup(l1b)
+        if not success:
+            return (False, error_str)
+
+        # -------------------------------------------------------------------
+        # Perform the algorithm processing, store results that need to be passed
+        # \/    down the chain in the 'shared_dict' dict     \/
+        # -------------------------------------------------------------------
+
+        shared_dict["processing_key"] = processing_key(
+            shared_dict["l1b_file_name"], self.config_hash, self.code_hash
+        )
+
+        if not self.skip_up_to_date or not shared_dict["processing_key"]:
+            return (True, "")
+
+        # Find the path of this L1b file's product, as formed by alg_product_output
+        time_20_ku = l1b["time_20_ku"][:].data
+        _, product_filename = get_product_path(
+            self.config,
+            shared_dict["hemisphere"],
+            self.grain.tai2utc(time_20_ku[0]),
+            self.grain.tai2utc(time_20_ku[-1]),
+            l1b.cycle_number,
+            l1b.rel_orbit_number,
+        )
+
+        if not os.path.isfile(product_filename):
+            return (True, "")
+
+        try:
+            with Dataset(product_filename) as product:
+                product_key = getattr(product, "processing_key", "")
+        except OSError:
+            product_key = ""  # unreadable product, so make it again
+
+        if product_key != shared_dict["processing_key"]:
+            self.log.info("product %s is out of date", product_filename)
+            return (True, "")
+
+        shared_dict["product_filename"] = product_filename
+
+        # --------------------------------------------------------
+
+        return (False, f"SKIP_OK: product {os.path.basename(product_filename)} is up to date")
+
+    # No finalize() required by algorithm
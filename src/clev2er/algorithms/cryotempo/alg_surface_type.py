@@ -92,10 +92,10 @@ class Algorithm(BaseAlgorithm):
         self.alg_name = __name__
         self.log.info("Algorithm %s initializing", self.alg_name)
 
-        # Check for special case where we create a shared memory
-        # version of the DEM's arrays. Note this _init_shared_mem config setting is set by
-        # run_chain.py and should not be included in the config files
-        init_shared_mem = "_init_shared_mem" in self.config
+        # When shared memory is enabled, the DEM and mask arrays are loaded once by
+        # run_chain.py into the run's shared resources (see clev2er.utils.shared_resources)
+        # and each worker process attaches to them read-only
+        use_shared_memory = self.config["chain"].get("use_shared_memory", False)
 
         if "grn_only" in self.config and self.config["grn_only"]:
             self.antarctic_surface_mask = None
@@ -113,7 +113,7 @@ class Algorithm(BaseAlgorithm):
             self.antarctic_surface_mask = Mask(
                 "antarctica_bedmachine_v2_grid_mask",
                 mask_path=mask_file,
-                store_in_shared_memory=init_shared_mem,
+                store_in_shared_memory=use_shared_memory,
                 thislog=self.log,
             )
         # Greenland surface type mask from BedMachine v3
@@ -129,7 +129,7 @@ class Algorithm(BaseAlgorithm):
         self.greenland_surface_mask = Mask(
             "greenland_bedmachine_v3_grid_mask",
             mask_path=mask_file,
-            store_in_shared_memory=init_shared_mem,
+            store_in_shared_memory=use_shared_memory,
             thislog=self.log,
         )
 
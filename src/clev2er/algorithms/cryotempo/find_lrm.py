@@ -9,6 +9,7 @@ from typing import List
 from netCDF4 import Dataset  # pylint: disable=E0611
 
 from clev2er.algorithms.base.base_finder import BaseFinder
+from clev2er.utils.cs2.l1b_index.l1b_index import L1bIndex
 
 # pylint: disable=R0801
 # pylint: disable=too-many-instance-attributes
@@ -60,6 +61,8 @@ class FileFinder(BaseFinder):
         self.years   # list of years to find
     Set by config file settings:
         config["l1b_base_dir"]
+        config["l1b_index_file"] : optional path of L1b index file (see
+                                   clev2er.utils.cs2.l1b_index) to use for the grn_only filter
 
     """
 
@@ -135,10 +138,18 @@ class FileFinder(BaseFinder):
             else:
                 num_processes = 1
 
-            with ProcessPoolExecutor(max_workers=num_processes) as executor:
-                results = list(executor.map(test_nc_file_in_greenland, file_list))
+            if self.config.get("l1b_index_file"):
+                # Use the persistent L1b index, which only needs to read files that are new
+                # or modified since they were indexed
+                with L1bIndex(self.config["l1b_index_file"], self.log) as index:
+                    num_indexed = index.update(file_list, num_processes=num_processes)
+                    self.log.info("%d files added to L1b index", num_indexed)
+                    grn_file_list = index.query(paths=file_list, greenland=True)
+            else:
+                with ProcessPoolExecutor(max_workers=num_processes) as executor:
+                    results = list(executor.map(test_nc_file_in_greenland, file_list))
 
-            grn_file_list = [result for result in results if result is not None]
+                grn_file_list = [result for result in results if result is not None]
 
             file_list = grn_file_list
             self.log.info(
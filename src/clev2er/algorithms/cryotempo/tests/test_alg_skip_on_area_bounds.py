@@ -77,3 +77,41 @@ def test_alg_skip_on_area_bounds() -> None:
     success, _ = thisalg.process(l1b, shared_dict)
 
     assert success, f"should pass as L1b file {l1b_file} passes over Greenland"
+
+
+def test_alg_skip_on_area_bounds_prefilter() -> None:
+    """test that Algorithm.prefilter() in clev2er.algorithms.cryotempo.alg_skip_on_area_bounds.py
+    only skips files that Algorithm.process() also skips, with the same reason
+    """
+
+    base_dir = os.environ["CLEV2ER_BASE_DIR"]
+    assert base_dir is not None
+
+    # Load merged config file for chain
+    config, _, _, _, _ = load_config_files("cryotempo")
+
+    # Set to Sequential Processing
+    config["chain"]["use_multi_processing"] = False
+
+    thisalg = Algorithm(config, log)
+
+    for l1b_name, grn_only, expected_skip in [
+        # outside cryosphere (first record latitude)
+        ("CS_OFFL_SIR_LRM_1B_20200930T191158_20200930T191302_D001.nc", False, True),
+        # passes over Greenland
+        ("CS_LTA__SIR_LRM_1B_20200930T235609_20200930T235758_E001.nc", False, False),
+        ("CS_LTA__SIR_LRM_1B_20200930T235609_20200930T235758_E001.nc", True, False),
+        # Antarctic pass
+        ("CS_OFFL_SIR_LRM_1B_20200930T212240_20200930T212500_D001.nc", False, False),
+        ("CS_OFFL_SIR_LRM_1B_20200930T212240_20200930T212500_D001.nc", True, True),
+    ]:
+        l1b_file = f"{base_dir}/testdata/cs2/l1bfiles/{l1b_name}"
+        thisalg.config["grn_only"] = grn_only
+        with Dataset(l1b_file) as l1b:
+            success, error_str = thisalg.process(l1b, {"instr_mode": "LRM"})
+            pf_success, pf_error_str = Algorithm.prefilter(
+                l1b, thisalg.config, {"instr_mode": "LRM"}
+            )
+        assert success is not expected_skip, f"{l1b_name} grn_only={grn_only}"
+        assert pf_success is success, f"{l1b_name} grn_only={grn_only}"
+        assert pf_error_str == error_str
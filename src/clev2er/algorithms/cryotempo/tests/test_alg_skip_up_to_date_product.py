@@ -0,0 +1,106 @@
+"""pytest of algorithm
+   clev2er.algorithms.cryotempo.alg_skip_up_to_date_product.py
+"""
+
+import logging
+import os
+from typing import Any
+
+from netCDF4 import Dataset  # pylint: disable=E0611
+
+from clev2er.algorithms.cryotempo.alg_product_output import get_product_path
+from clev2er.algorithms.cryotempo.alg_skip_up_to_date_product import Algorithm
+from clev2er.utils.time.grain import Grain
+
+# pylint: disable=too-many-locals
+
+log = logging.getLogger(__name__)
+
+
+def test_alg_skip_up_to_date_product(tmp_path) -> None:
+    """test of Algorithm in clev2er.algorithms.cryotempo.alg_skip_up_to_date_product.py
+
+    Run Algorithm.process() on a Greenland LRM L1b file:
+    - with no existing product, should return (True,'')
+    - with a product with a matching processing_key, should return (False,'SKIP_OK..')
+    - with a product with a different processing_key, should return (True,'')
+    """
+
+    base_dir = os.environ["CLEV2ER_BASE_DIR"]
+    l1b_file = (
+        f"{base_dir}/testdata/cs2/l1bfiles/"
+        "CS_LTA__SIR_LRM_1B_20200930T235609_20200930T235758_E001.nc"
+    )
+
+    # leap seconds file, with the TAI-UTC offset since 1-Jan-2017
+    leap_seconds_file = tmp_path / "leap-seconds.list"
+    leap_seconds_file.write_text("# test leap seconds\n3692217600\t37\t# 1 Jan 2017\n")
+
+    config: dict[str, Any] = {
+        "chain": {
+            "chain_name": "cryotempo",
+            "use_multi_processing": False,
+            "skip_up_to_date_products": True,
+            "algorithm_list": ["alg_skip_on_area_bounds", "alg_skip_up_to_date_product"],
+        },
+        "leap_seconds": str(leap_seconds_file),
+        "product_base_dir": str(tmp_path / "products"),
+        "baseline": "C",
+        "version": 1,
+    }
+
+    thisalg = Algorithm(config, log)
+
+    with Dataset(l1b_file) as l1b:
+        # No product yet
+        shared_dict = {"l1b_file_name": l1b_file, "hemisphere": "north"}
+        success, error_str = thisalg.process(l1b, shared_dict)
+        assert success, f"Algorithm.process failed due to {error_str}"
+        key = shared_dict["processing_key"]
+        assert len(key) > 0
+
+        # Create the product, as made by alg_product_output
+        grain = Grain(leap_second_filename=str(leap_seconds_file))
+        time_20_ku = l1b["time_20_ku"][:].data
+        product_dir, product_filename = get_product_path(
+            config,
+            "north",
+            grain.tai2utc(time_20_ku[0]),
+            grain.tai2utc(time_20_ku[-1]),
+            l1b.cycle_number,
+            l1b.rel_orbit_number,
+        )
+        os.makedirs(product_dir)
+        with Dataset(product_filename, "w") as product:
+            product.processing_key = key
+
+        shared_dict = {"l1b_file_name": l1b_file, "hemisphere": "north"}
+        success, error_str = thisalg.process(l1b, shared_dict)
+        assert not success
+        assert "SKIP_OK" in error_str
+        assert shared_dict["product_filename"] == product_filename
+
+        # Product made with a different configuration or code
+        with Dataset(product_filename, "a") as product:
+            product.processing_key = "another key"
+
+        shared_dict = {"l1b_file_name": l1b_file, "hemisphere": "north"}
+        success, error_str = thisalg.process(l1b, shared_dict)
+        assert success, f"Algorithm.process failed due to {error_str}"
+
+    # A change to the configuration changes the processing key
+    thisalg = Algorithm(config | {"version": 2}, log)
+    with Dataset(l1b_file) as l1b:
+        shared_dict = {"l1b_file_name": l1b_file, "hemisphere": "north"}
+        thisalg.process(l1b, shared_dict)
+        assert shared_dict["processing_key"] != key
+
+    # Adding an algorithm to the chain changes the processing key
+    algorithm_list = config["chain"]["algorithm_list"] + ["alg_retrack"]
+    thisalg = Algorithm(
+        config | {"chain": config["chain"] | {"algorithm_list": algorithm_list}}, log
+    )
+    with Dataset(l1b_file) as l1b:
+        shared_dict = {"l1b_file_name": l1b_file, "hemisphere": "north"}
+        thisalg.process(l1b, shared_dict)
+        assert shared_dict["processing_key"] != key
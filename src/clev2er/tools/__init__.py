@@ -8,6 +8,12 @@ This directory contains command-line tools required to run the chains.
 ### Tools List ###
 
 - `clev2er.tools.run_chain`
+- `clev2er.tools.build_l1b_index` : build or update the persistent L1b file footprint index
+  used by the cryotempo finders (set `l1b_index_file` in the chain config)
+- `clev2er.tools.build_grid_cache` : build memory mapped caches of DEM, mask and slope grids,
+  used when `CLEV2ER_GRID_CACHE_DIR` is set
+- `clev2er.tools.work_queue_report` : report the progress, per host run summaries and
+  errors of a `run_chain.py --work_queue` work queue, and requeue failed or abandoned files
 
 ### Example of Running the Chain
 
@@ -45,5 +51,13 @@ To find all the current command line options for *run_chain.py*, type:
 | --month | -m | [Optional, int] month number (1,12) to use to select L1b files. The month number is used by the chain's finder algorithms if they support month selections |
 | --conf_opts | -co | [Optional, str,str,..]  Comma separated list of key:key:value pairs to pass to the chain. The number of keys is dependent on the configuration levels. If value is a boolean then use key:true or key:false. Single level keys without a value equate to true. Example that changes two settings: -co chain:use_multi_processing:false,lrm_only |
 | --cs2testdir | -ct | [Optional] for quick CS2 tests, uses default CS2 L1b directory: $CLEV2ER_BASE_DIR/testdata/cs2/l1bfiles |
+| --trace | -tr | [Optional, str] directory to write a processing trace to: a Chrome trace-event JSON file of every algorithm init/process/finalize and L1b file open/close (view in chrome://tracing or ui.perfetto.dev), and a CSV file of timings per L1b file |
+| --prefilter | -pf | [Optional] run a fast pre-pass over the L1b files using each algorithm's prefilter() (attributes and decimated locations only) to remove files the chain would skip, before processing starts. Overrides chain:prefilter_l1b_files in main config |
+| --longest_first | -lf | [Optional] when multi-processing, start the L1b files with the highest estimated processing cost first (from file size and instrument mode, or --cost_history). Overrides chain:order_files_by_cost in main config |
+| --cost_history | -ch | [Optional, str] path of a per L1b file CSV from a previous --trace run, or a directory of these, used to estimate file processing costs for --longest_first |
+| --incremental | -inc | [Optional] skip L1b files whose product already exists and was made from the same L1b file, chain configuration and algorithm code (checked by the product's processing_key global attribute). Overrides chain:skip_up_to_date_products in main config |
+| --journal | -jn | [Optional, str] path of the journal file recording each completed L1b file. Default is <log dir>/<chain_name>_journal.jsonl |
+| --resume | -rs | [Optional] resume an interrupted run, skipping L1b files already processed or skipped in the journal whose modification time and chain configuration are unchanged |
+| --work_queue | -wq | [Optional, str] path of a SQLite work queue on storage shared between hosts. The selected L1b files are added to the queue and then claimed from it until none are pending, so that runs on several hosts with the same queue share the files. Log files are named per host and process unless --logstring is set |
 
 """
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command line tool to benchmark Mask.points_inside() and Mask.grid_mask_values() of a
+grid mask against finding the grid cell of each point separately
+
+The points are a full 20Hz track (20000 points by default, ~7000km at ~350m spacing)
+crossing the mask grid diagonally. By default the mask is a synthetic grid mask with the
+dimensions of antarctica_bedmachine_v2_grid_mask (13333x13333 cells of 500m, values 0..4),
+so no mask data files are required. For each method, the best run time of the per point
+reference and of the Mask method are reported, and the results are compared. The tool exits
+with status 1 if any results differ.
+
+Example usage:
+
+    Benchmark a synthetic 13333x13333 grid mask
+
+    `python benchmark_masks.py`
+
+    Benchmark a loaded grid mask (requires the mask's data file), with 100000 points
+
+    `python benchmark_masks.py --mask greenland_bedmachine_v3_grid_mask --n_points 100000`
+"""
+
+import argparse
+import logging
+import sys
+import time
+from typing import Any, Callable
+
+import numpy as np
+
+from clev2er.utils.masks.masks import Mask
+
+log = logging.getLogger(__name__)
+
+
+def synthetic_grid_mask(num_cells: int = 13333, binsize: int = 500) -> Mask:
+    """create a grid mask in memory, without loading a mask file
+
+    Args:
+        num_cells (int, optional): number of cells in x and y. Defaults to 13333.
+        binsize (int, optional): cell size (m). Defaults to 500.
+
+    Returns:
+        Mask: grid mask of random values 0..4, centred on x,y = 0,0
+    """
+    rng = np.random.default_rng(0)
+    thismask = Mask.__new__(Mask)
+    thismask.nomask = False
+    thismask.mask_name = "synthetic_grid_mask"
+    thismask.mask_type = "grid"
+    thismask.basin_numbers = None
+    thismask.minxm = -(num_cells // 2) * binsize
+    thismask.minym = -(num_cells // 2) * binsize
+    thismask.binsize = binsize
+    thismask.num_x = num_cells
+    thismask.num_y = num_cells
+    thismask.mask_grid = rng.integers(0, 5, size=(num_cells, num_cells), dtype=np.uint8)
+    return thismask
+
+
+def track_points(thismask: Mask, n_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """create the x,y points of a track crossing a grid mask diagonally
+
+    The track starts and ends 10km outside the grid, so that it includes points
+    outside the mask.
+
+    Args:
+        thismask (Mask): grid mask
+        n_points (int): number of points
+
+    Returns:
+        (np.ndarray, np.ndarray): x, y (m) of each point
+    """
+    minx = thismask.minxm - 10000
+    maxx = thismask.minxm + thismask.num_x * thismask.binsize + 10000
+    miny = thismask.minym - 10000
+    maxy = thismask.minym + thismask.num_y * thismask.binsize + 10000
+    along_track = np.linspace(0.0, 1.0, n_points)
+    wobble = 20000.0 * np.sin(along_track * 40.0)
+    return minx + along_track * (maxx - minx) + wobble, miny + along_track * (maxy - miny)
+
+
+def points_inside_per_point(
+    thismask: Mask, x: np.ndarray, y: np.ndarray, basin_numbers: list[int] | None = None
+) -> tuple[np.ndarray, int]:
+    """reference Mask.points_inside() of a grid mask, finding each point's grid cell
+    separately
+
+    Args:
+        thismask (Mask): grid mask
+        x (np.ndarray): x values (m) in mask coordinate system
+        y (np.ndarray): y values (m) in mask coordinate system
+        basin_numbers (list[int], optional): list of basin numbers. Defaults to None.
+
+    Returns:
+        (np.ndarray, int): True where each point is inside the mask, number inside mask
+    """
+    inmask = np.zeros(x.size, np.bool_)
+    n_inside = 0
+    for i in range(x.size):
+        ii = int(np.around((x[i] - thismask.minxm) / thismask.binsize))
+        jj = int(np.around((y[i] - thismask.minym) / thismask.binsize))
+
+        if ii < 0 or ii >= thismask.num_x:
+            continue
+        if jj < 0 or jj >= thismask.num_y:
+            continue
+
+        if basin_numbers:
+            for basin in basin_numbers:
+                if thismask.mask_grid[jj, ii] == basin:
+                    inmask[i] = True
+                    n_inside += 1
+        else:
+            if thismask.mask_grid[jj, ii] > 0:
+                inmask[i] = True
+                n_inside += 1
+    return inmask, n_inside
+
+
+def grid_mask_values_per_point(
+    thismask: Mask, x: np.ndarray, y: np.ndarray, unknown_value: int = 0
+) -> np.ndarray:
+    """reference Mask.grid_mask_values(), finding each point's grid cell separately
+
+    Args:
+        thismask (Mask): grid mask
+        x (np.ndarray): x values (m) in mask coordinate system
+        y (np.ndarray): y values (m) in mask coordinate system
+        unknown_value (int, optional): value returned for points outside mask. Defaults to 0.
+
+    Returns:
+        np.ndarray: grid mask value at each point
+    """
+    mask_values = np.full(x.size, unknown_value, dtype=np.uint8)
+    for i in range(x.size):
+        ii = int(np.around((x[i] - thismask.minxm) / thismask.binsize))
+        jj = int(np.around((y[i] - thismask.minym) / thismask.binsize))
+
+        if ii < 0 or ii >= thismask.num_x:
+            continue
+        if jj < 0 or jj >= thismask.num_y:
+            continue
+        mask_values[i] = thismask.mask_grid[jj, ii]
+    return mask_values
+
+
+def best_time(func: Callable[[], Any], repeats: int) -> tuple[float, Any]:
+    """run a function repeatedly and return its best run time
+
+    Args:
+        func (Callable): function to run, without arguments
+        repeats (int): number of runs
+
+    Returns:
+        (float, Any): best run time (s), result of the last run
+    """
+    times = []
+    result = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start_time)
+    return min(times), result
+
+
+def results_equal(expected: Any, result: Any) -> bool:
+    """compare the results of a per point reference and a Mask method
+
+    Args:
+        expected (Any): per point reference result, np.ndarray or (np.ndarray, int)
+        result (Any): Mask method result, np.ndarray or (np.ndarray, int)
+
+    Returns:
+        bool: True if the results are equal
+    """
+    if isinstance(expected, tuple):
+        return bool(np.array_equal(expected[0], result[0]) and expected[1] == result[1])
+    return bool(np.array_equal(expected, result))
+
+
+def benchmark_mask(
+    thismask: Mask, n_points: int, basin_numbers: list[int], repeats: int
+) -> dict[str, tuple[float, float, bool]]:
+    """benchmark Mask.points_inside() and Mask.grid_mask_values() against the per point
+    references
+
+    Args:
+        thismask (Mask): grid mask
+        n_points (int): number of track points
+        basin_numbers (list[int]): basin numbers of points_inside() with basins
+        repeats (int): number of runs of each method
+
+    Returns:
+        dict[str, tuple[float, float, bool]]: for each method, the best per point time (s),
+        best Mask method time (s), and whether the results are equal
+    """
+    x, y = track_points(thismask, n_points)
+    methods = {
+        "points_inside": (
+            lambda: points_inside_per_point(thismask, x, y),
+            lambda: thismask.points_inside(x, y, inputs_are_xy=True),
+        ),
+        "points_inside (basins)": (
+            lambda: points_inside_per_point(thismask, x, y, basin_numbers),
+            lambda: thismask.points_inside(x, y, basin_numbers=basin_numbers, inputs_are_xy=True),
+        ),
+        "grid_mask_values": (
+            lambda: grid_mask_values_per_point(thismask, x, y),
+            lambda: thismask.grid_mask_values(x, y, inputs_are_xy=True),
+        ),
+    }
+
+    results = {}
+    for name, (per_point, vectorized) in methods.items():
+        per_point_time, expected = best_time(per_point, repeats)
+        vectorized_time, result = best_time(vectorized, repeats)
+        results[name] = (per_point_time, vectorized_time, results_equal(expected, result))
+    return results
+
+
+def main() -> None:
+    """main function for tool"""
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--mask",
+        "-m",
+        help=(
+            "[Optional] name of grid mask to load. Default is a synthetic 13333x13333 grid " "mask"
+        ),
+    )
+    parser.add_argument(
+        "--n_points",
+        "-n",
+        help="[Optional] number of track points. Default is 20000",
+        type=int,
+        default=20000,
+    )
+    parser.add_argument(
+        "--basins",
+        "-b",
+        help="[Optional] basin numbers of points_inside() with basins. Default is 2 3",
+        type=int,
+        nargs="+",
+        default=[2, 3],
+    )
+    parser.add_argument(
+        "--repeats",
+        "-r",
+        help="[Optional] number of runs of each method. Default is 3",
+        type=int,
+        default=3,
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)-2s] : %(asctime)s : %(message)s")
+
+    if args.mask:
+        thismask = Mask(args.mask)
+        if thismask.mask_type != "grid":
+            sys.exit(f"ERROR: {args.mask} is not a grid mask")
+    else:
+        thismask = synthetic_grid_mask()
+
+    log.info(
+        "%s: %dx%d grid, %d points",
+        thismask.mask_name,
+        thismask.num_x,
+        thismask.num_y,
+        args.n_points,
+    )
+
+    passed = True
+    for name, (per_point_time, vectorized_time, equal) in benchmark_mask(
+        thismask, args.n_points, args.basins, args.repeats
+    ).items():
+        log.info(
+            "%s: per point %.1f ms, Mask %.1f ms (%.0fx), results equal: %s",
+            name,
+            per_point_time * 1000,
+            vectorized_time * 1000,
+            per_point_time / vectorized_time,
+            equal,
+        )
+        if not equal:
+            log.error("%s: results differ", name)
+            passed = False
+
+    if args.mask:
+        thismask.clean_up()
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command line tool to benchmark the retrackers' analytic threshold crossings against their
+oversampled waveform search
+
+Each L1b file's waveforms are retracked twice, by searching the waveforms oversampled by
+wf_oversampling_factor (the default), and with analytic_crossings=True. LRM waveforms
+are retracked by the TCOG retracker, SIN waveforms by the TCOG and Maximum Coherence
+retrackers. For each, the run times, the number of waveforms whose retracker flags differ,
+and the differences of the retracking points and leading edges (in bins) are reported.
+
+A retracking point differs if its flags differ, or its bin differs by more than
+the tolerance. The tool exits with status 1 if more than --max_differing of the waveforms
+of any file differ.
+
+Example usage:
+
+    Benchmark the test L1b files in $CLEV2ER_BASE_DIR/testdata/cs2/l1bfiles
+
+    `python benchmark_retrackers.py`
+
+    Benchmark other L1b files, with a tolerance of 0.02 bins
+
+    `python benchmark_retrackers.py --files /path/to/CS_*SIR_SIN_1B_*.nc --tolerance 0.02`
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from typing import Any, Callable
+
+import numpy as np
+from netCDF4 import Dataset  # pylint: disable=E0611
+
+from clev2er.utils.cs2.retrackers.cs2_sin_max_coherence_retracker import (
+    retrack_cs2_sin_max_coherence,
+)
+from clev2er.utils.cs2.retrackers.cs2_tcog_retracker import retrack_tcog_waveforms_cs2
+
+log = logging.getLogger(__name__)
+
+
+def compare_retracking(  # pylint: disable=too-many-locals
+    retracker, tolerance: float, **kwargs
+) -> dict[str, float | int]:
+    """retrack waveforms with oversampled and analytic threshold crossings, and compare
+    the results
+
+    Args:
+        retracker (Callable): retrack_tcog_waveforms_cs2 or retrack_cs2_sin_max_coherence
+        tolerance (float): maximum difference of retracking points (bins) to count as equal
+        **kwargs: arguments of the retracker (ie waveforms, coherence)
+
+    Returns:
+        dict[str, float | int]: comparison results: num_waveforms, oversampled_time,
+        analytic_time (seconds), num_flags_differ, num_differ (flags differ or
+        retracking points differ by more than tolerance), max_retrack_difference,
+        p99_retrack_difference, max_leading_edge_difference (bins)
+    """
+    start_time = time.time()
+    oversampled = retracker(**kwargs)
+    oversampled_time = time.time() - start_time
+
+    start_time = time.time()
+    analytic = retracker(analytic_crossings=True, **kwargs)
+    analytic_time = time.time() - start_time
+
+    flags_differ = np.any(oversampled[6] != analytic[6], axis=1)
+    both_retracked = ~np.isnan(oversampled[0]) & ~np.isnan(analytic[0])
+    retrack_difference = np.abs(oversampled[0] - analytic[0])[both_retracked]
+    leading_edge_difference = np.abs(
+        np.concatenate(
+            [oversampled[2][:, 0] - analytic[2][:, 0], oversampled[3][:, 0] - analytic[3][:, 0]]
+        )
+    )
+    leading_edge_difference = leading_edge_difference[~np.isnan(leading_edge_difference)]
+
+    num_differ = np.count_nonzero(flags_differ)
+    num_differ += np.count_nonzero(retrack_difference > tolerance)
+
+    return {
+        "num_waveforms": len(flags_differ),
+        "oversampled_time": oversampled_time,
+        "analytic_time": analytic_time,
+        "num_flags_differ": int(np.count_nonzero(flags_differ)),
+        "num_differ": int(num_differ),
+        "max_retrack_difference": (
+            float(retrack_difference.max()) if retrack_difference.size > 0 else 0.0
+        ),
+        "p99_retrack_difference": (
+            float(np.percentile(retrack_difference, 99)) if retrack_difference.size > 0 else 0.0
+        ),
+        "max_leading_edge_difference": (
+            float(leading_edge_difference.max()) if leading_edge_difference.size > 0 else 0.0
+        ),
+    }
+
+
+def main() -> None:
+    """main function for tool"""
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--files",
+        "-f",
+        help=(
+            "[Optional] L1b files to benchmark. Default is the LRM and SIN files in "
+            "$CLEV2ER_BASE_DIR/testdata/cs2/l1bfiles"
+        ),
+        nargs="+",
+    )
+    parser.add_argument(
+        "--tolerance",
+        "-t",
+        help=(
+            "[Optional] maximum difference of retracking points in bins to count as equal. "
+            "Default is 0.05"
+        ),
+        type=float,
+        default=0.05,
+    )
+    parser.add_argument(
+        "--max_differing",
+        "-md",
+        help=(
+            "[Optional] maximum fraction of each file's waveforms which may differ. "
+            "Default is 0.01"
+        ),
+        type=float,
+        default=0.01,
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)-2s] : %(asctime)s : %(message)s")
+
+    if args.files:
+        l1b_files = args.files
+    else:
+        if "CLEV2ER_BASE_DIR" not in os.environ:
+            sys.exit("ERROR: CLEV2ER_BASE_DIR not set, and no --files given")
+        l1b_dir = f"{os.environ['CLEV2ER_BASE_DIR']}/testdata/cs2/l1bfiles"
+        l1b_files = sorted(
+            glob.glob(f"{l1b_dir}/CS_*SIR_LRM_1B_*.nc")
+            + glob.glob(f"{l1b_dir}/CS_*SIR_SIN_1B_*.nc")
+        )
+    if not l1b_files:
+        sys.exit("ERROR: no L1b files found")
+
+    passed = True
+    for l1b_file in l1b_files:
+        with Dataset(l1b_file) as nc:
+            waveforms = nc.variables["pwr_waveform_20_ku"][:].data
+            retrackers: dict[str, tuple[Callable[..., Any], dict[str, Any]]] = {
+                "TCOG": (retrack_tcog_waveforms_cs2, {"waveforms": waveforms})
+            }
+            if "SIR_SIN_1B" in l1b_file:
+                retrackers["MC"] = (
+                    retrack_cs2_sin_max_coherence,
+                    {
+                        "waveforms": waveforms,
+                        "coherence": nc.variables["coherence_waveform_20_ku"][:].data,
+                    },
+                )
+
+        for name, (retracker, kwargs) in retrackers.items():
+            results = compare_retracking(retracker, args.tolerance, **kwargs)
+            log.info(
+                "%s %s: %d waveforms, oversampled %.3fs, analytic %.3fs, flags differ: %d, "
+                "differ: %d, retrack point difference max %.4f p99 %.4f bins, leading edge "
+                "difference max %.4f bins",
+                os.path.basename(l1b_file),
+                name,
+                results["num_waveforms"],
+                results["oversampled_time"],
+                results["analytic_time"],
+                results["num_flags_differ"],
+                results["num_differ"],
+                results["max_retrack_difference"],
+                results["p99_retrack_difference"],
+                results["max_leading_edge_difference"],
+            )
+            if results["num_differ"] > args.max_differing * results["num_waveforms"]:
+                log.error("%s %s: too many waveforms differ", os.path.basename(l1b_file), name)
+                passed = False
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Command line tool to build the memory mapped grid caches of DEMs, masks and slope grids
+
+    Each resource is loaded from its source file as normal, and its grid arrays written to
+    <cache_dir>/<name>.bin with a <name>.json sidecar (see clev2er.utils.grid_cache).
+    Resources which already have a cache that is up to date with their source file are
+    not written again.
+
+    The Dem, Mask and Slopes classes use the caches when the environment variable
+    CLEV2ER_GRID_CACHE_DIR is set to the cache directory.
+
+    Median filtered and/or downsampled levels of the DEMs (see Dem.get_level()) can also be
+    cached, with --dem_levels. The Roemer and LEPTA LRM geolocation use the median filtered
+    level (median7 and median3 respectively) when it is cached, instead of median filtering
+    the DEM segment about each record.
+
+    Example usage:
+
+        Build the caches of the DEMs and masks used by the cryotempo chain
+
+        `python build_grid_cache.py --cache_dir /path/to/grid_cache \
+            --dems rema_ant_1km,arcticdem_1km \
+            --masks antarctica_bedmachine_v2_grid_mask,greenland_bedmachine_v3_grid_mask`
+
+        Build the caches of a DEM and its levels used by the Roemer and LEPTA geolocation
+
+        `python build_grid_cache.py --cache_dir /path/to/grid_cache \
+            --dems rema_ant_1km --dem_levels median7,median3`
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+
+from clev2er.utils.dems.dems import Dem, dem_list
+from clev2er.utils.grid_cache.grid_cache import GRID_CACHE_DIR_ENV
+from clev2er.utils.masks.masks import Mask, mask_list
+from clev2er.utils.slopes.slopes import Slopes, all_slope_scenarios
+
+log = logging.getLogger(__name__)
+
+
+def parse_dem_level(level: str) -> tuple[int, int]:
+    """parse a DEM level name
+
+    Args:
+        level (str): median<size>, x<factor> or median<size>_x<factor>
+
+    Returns:
+        tuple[int, int]: (median filter size, downsample factor)
+
+    Raises:
+        ValueError: if level is not a valid level name
+    """
+    match = re.fullmatch(r"(?:median(\d+))?(?:(?<=\d)_)?(?:x(\d+))?", level)
+    if not level or match is None:
+        raise ValueError(f"invalid DEM level {level}, must be median<size>_x<factor>")
+    return int(match.group(1) or 0), int(match.group(2) or 1)
+
+
+def cache_dem_levels(dem: Dem, dem_levels: list[tuple[int, int]]) -> None:
+    """write the grid caches of levels of a DEM, unless already up to date
+
+    Args:
+        dem (Dem): loaded DEM
+        dem_levels (list[tuple[int, int]]): (median filter size, downsample factor) of each
+                                            level, from parse_dem_level()
+    """
+    for median_filter_size, downsample_factor in dem_levels:
+        level = dem.get_level(median_filter_size, downsample_factor)
+        if level is None or level is dem:
+            continue
+        level_name = f"{dem.name}{level.level_suffix}"
+        if level.grid_cache_file:
+            log.info("grid cache of %s is up to date : %s", level_name, level.grid_cache_file)
+        else:
+            log.info("wrote grid cache of %s : %s", level_name, level.write_grid_cache())
+
+
+def main() -> None:
+    """main function for tool"""
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--cache_dir",
+        "-c",
+        help=(
+            f"[Optional] grid cache directory. Created if it does not exist. "
+            f"Default is ${GRID_CACHE_DIR_ENV}"
+        ),
+        default=os.environ.get(GRID_CACHE_DIR_ENV, ""),
+    )
+    parser.add_argument(
+        "--dems",
+        "-d",
+        help=f"[Optional] comma separated list of DEM names, from {dem_list}",
+        default="",
+    )
+    parser.add_argument(
+        "--dem_levels",
+        "-l",
+        help=(
+            "[Optional] comma separated list of levels of each DEM to cache, each "
+            "median<size>, x<factor> or median<size>_x<factor>, ie median7,median3"
+        ),
+        default="",
+    )
+    parser.add_argument(
+        "--masks",
+        "-m",
+        help="[Optional] comma separated list of grid mask names",
+        default="",
+    )
+    parser.add_argument(
+        "--slopes",
+        "-s",
+        help=f"[Optional] comma separated list of slope scenarios, from {all_slope_scenarios}",
+        default="",
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)-2s] : %(asctime)s : %(message)s")
+
+    if not args.cache_dir:
+        sys.exit(f"ERROR: --cache_dir or ${GRID_CACHE_DIR_ENV} must be set")
+
+    # The Dem, Mask and Slopes classes find their cache from the environment
+    os.environ[GRID_CACHE_DIR_ENV] = args.cache_dir
+
+    for mask_name in filter(None, args.masks.split(",")):
+        if mask_name not in mask_list:
+            sys.exit(f"ERROR: {mask_name} not in supported mask list")
+
+    try:
+        dem_levels = [parse_dem_level(level) for level in args.dem_levels.split(",") if level]
+    except ValueError as exc:
+        sys.exit(f"ERROR: {exc}")
+
+    start_time = time.time()
+
+    resources = (
+        [(name, lambda name: Dem(name, thislog=log)) for name in args.dems.split(",") if name]
+        + [(name, lambda name: Mask(name, thislog=log)) for name in args.masks.split(",") if name]
+        + [(name, Slopes) for name in args.slopes.split(",") if name]
+    )
+
+    for name, resource_class in resources:
+        resource = resource_class(name)
+        if getattr(resource, "mask_type", "grid") != "grid":
+            log.info("%s is not a grid mask, so is not cached", name)
+        elif resource.grid_cache_file:
+            log.info("grid cache of %s is up to date : %s", name, resource.grid_cache_file)
+        else:
+            log.info("wrote grid cache of %s : %s", name, resource.write_grid_cache())
+        if isinstance(resource, Dem):
+            cache_dem_levels(resource, dem_levels)
+        if hasattr(resource, "clean_up"):
+            resource.clean_up()
+
+    log.info("completed in %.2f seconds", time.time() - start_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Command line tool to build or update a persistent index of CryoSat L1b file footprints
+
+    The index (see clev2er.utils.cs2.l1b_index) is used by the cryotempo file finders
+    when l1b_index_file is set in the chain config. Only L1b files which are not yet in the
+    index, or have been modified since they were indexed, are read.
+
+    Example usage:
+
+        Index all LRM and SIN L1b files for 2021 in <l1b_base_dir>/<LRM,SIN>/<YYYY>/<MM>/
+
+        `python build_l1b_index.py --index /path/to/l1b_index.sqlite \
+            --l1b_base_dir $CPDATA_DIR/SATS/RA/CRY/L1B --year 2021 --nprocs 8`
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+from clev2er.utils.cs2.l1b_index.l1b_index import L1bIndex
+
+log = logging.getLogger(__name__)
+
+
+def find_l1b_files(
+    l1b_base_dir: str, modes: list[str], years: list[int], months: list[int]
+) -> list[str]:
+    """find L1b files in <l1b_base_dir>/<MODE>/<YYYY>/<MM>/CS_*SIR_<MODE>_1B_*.nc
+
+    Args:
+        l1b_base_dir (str): L1b base directory
+        modes (list[str]): instrument modes, ie ['LRM','SIN']
+        years (list[int]): years (YYYY) to search. If empty, all years are searched
+        months (list[int]): months (1-12) to search. If empty, all months are searched
+
+    Returns:
+        list[str]: L1b file paths
+    """
+    year_patterns = [f"{year:4d}" for year in years] if years else ["[0-9][0-9][0-9][0-9]"]
+    month_patterns = [f"{month:02d}" for month in months] if months else ["[0-9][0-9]"]
+
+    l1b_files = []
+    for mode in modes:
+        for year_pattern in year_patterns:
+            for month_pattern in month_patterns:
+                l1b_files.extend(
+                    glob.glob(
+                        f"{l1b_base_dir}/{mode}/{year_pattern}/{month_pattern}"
+                        f"/CS_*SIR_{mode}_1B_*.nc"
+                    )
+                )
+    return sorted(l1b_files)
+
+
+def main() -> None:
+    """main function for tool"""
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--index",
+        "-i",
+        help="path of L1b index file (SQLite). Created if it does not exist",
+        required=True,
+    )
+    parser.add_argument(
+        "--l1b_base_dir",
+        "-d",
+        help="L1b base directory, containing <MODE>/<YYYY>/<MM>/ directories",
+        required=True,
+    )
+    parser.add_argument(
+        "--modes",
+        "-md",
+        help="[Optional] comma separated list of instrument modes to index. Default is LRM,SIN",
+        default="LRM,SIN",
+    )
+    parser.add_argument(
+        "--year",
+        "-y",
+        help="[Optional] year (YYYY) to index. Default is all years",
+        type=int,
+    )
+    parser.add_argument(
+        "--month",
+        "-m",
+        help="[Optional] month number (1,12) to index. Default is all months",
+        type=int,
+    )
+    parser.add_argument(
+        "--nprocs",
+        "-np",
+        help="[Optional] number of processes to use to read L1b files. Default is 1",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--remove_missing",
+        "-rm",
+        help="[Optional] remove files from the index which no longer exist",
+        action="store_const",
+        const=1,
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)-2s] : %(asctime)s : %(message)s")
+
+    if not os.path.isdir(args.l1b_base_dir):
+        sys.exit(f"ERROR: {args.l1b_base_dir} directory not found")
+
+    start_time = time.time()
+
+    l1b_files = find_l1b_files(
+        args.l1b_base_dir,
+        args.modes.split(","),
+        [args.year] if args.year else [],
+        [args.month] if args.month else [],
+    )
+    log.info("Number of L1b files found: %d", len(l1b_files))
+
+    with L1bIndex(args.index, log) as index:
+        if args.remove_missing:
+            log.info("Removed %d missing files from index", index.remove_missing())
+        num_indexed = index.update(l1b_files, num_processes=args.nprocs)
+        log.info("Number of L1b files (re)indexed: %d", num_indexed)
+        log.info("Total number of L1b files in index %s: %d", args.index, len(index))
+
+    log.info("completed in %.2f seconds", time.time() - start_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -39,25 +39,39 @@ import logging
 import multiprocessing as mp
 import os
 import re
+import sqlite3
 import sys
 import time
 import traceback
 import types
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
 from logging.handlers import QueueHandler
-from math import ceil
 from multiprocessing import Process, Queue, current_process
-from typing import Any, List, Optional, Type
+from queue import Empty
+from typing import Any, Callable, Iterable, List, Optional, Type
 
-import numpy as np
 from codetiming import Timer
 from netCDF4 import Dataset  # pylint: disable=E0611
 
+from clev2er.algorithms.base.base_alg import BaseAlgorithm
 from clev2er.utils.breakpoints.breakpoint_files import write_breakpoint_file
 from clev2er.utils.config.load_config_settings import (
     load_algorithm_list,
     load_config_files,
 )
+from clev2er.utils.journal.run_journal import RunJournal, config_hash
 from clev2er.utils.logging_funcs import get_logger
+from clev2er.utils.projections.projection_cache import clear_projection_cache
+from clev2er.utils.scheduling.file_cost import order_files_by_cost
+from clev2er.utils.shared_resources.shared_resources import (
+    get_shared_resources,
+    start_shared_resources,
+    stop_shared_resources,
+)
+from clev2er.utils.trace.chain_trace import ChainTrace
+from clev2er.utils.work_queue.work_queue import WorkQueue, get_worker_id
 
 # pylint: disable=too-many-locals
 # pylint: disable=too-many-branches
@@ -186,10 +200,11 @@ def run_chain_on_single_file(
     rval_queue: Optional[Queue],
     filenum: int,
     breakpoint_alg_name: str = "",
-) -> tuple[bool, str, str]:
+    trace: Optional[ChainTrace] = None,
+) -> dict:
     """Runs the algorithm chain on a single L1b file.
 
-       This function is run in a separate process if multi-processing is enabled.
+       This function is run within a worker process if multi-processing is enabled.
 
     Args:
         l1b_file (str): path of L1b file to process
@@ -199,21 +214,46 @@ def run_chain_on_single_file(
         rval_queue (Queue) : Queue for multi-processing results
         filenum (int) : file number being processed
         breakpoint_alg_name (str) : if not '', name of algorithm to break after.
+        trace (ChainTrace|None) : if not None, trace to record the timing of each
+                                  processing step in
 
     Returns:
-        Tuple(bool,str,str):
-        : algorithms success (True) or Failure (False),
-        : '' or error string
-        : path of breakpoint file or ''
-        for multi-processing return values are instead queued -> rval_queue for this process
+        dict: file result, containing
+        : filenum (int), l1b_file (str)
+        : success (bool), algorithms success (True) or Failure (False)
+        : error_str (str), '' or error string
+        : status (str), 'processed', 'skipped' or 'error'
+        : instr_mode (str), num_20hz_records (int), product_filename (str), from the
+          shared_dict if set by the chain, or '' or 0 if not
+        : wall_time (float), time in seconds to process the file
+        : timers (dict), Timer.timers of this file only, ie timers['alg_name']=seconds
+        : trace_events (list), trace events recorded for this file
+        : breakpoint_file (str), path of breakpoint file or ''
+        for multi-processing the file result is also queued -> rval_queue, as soon as
+        the file is completed
     """
 
     bp_filename = ""  # break point file path
 
+    if trace is None:
+        trace = ChainTrace(enabled=False)
+
+    # lat,lon -> x,y transforms cached by the previous file's algorithms are not reused
+    clear_projection_cache()
+
+    start_time = time.time()
+    # Timer.timers is cumulative within a process, so record its starting values to
+    # return only this file's algorithm timings
+    start_timers = dict(Timer.timers)
+
     # Setup logging either for multi-processing or standard (single process)
     if config["chain"]["use_multi_processing"]:
         # create a logger
         logger = logging.getLogger("mp")
+        # remove any handler left from a previous file processed by this (persistent)
+        # worker process, so that each message is only queued once, with the current [fN]
+        for old_handler in list(logger.handlers):
+            logger.removeHandler(old_handler)
         # add a handler that uses the shared queue
         if log_queue is not None:
             handler = QueueHandler(log_queue)
@@ -233,75 +273,207 @@ def run_chain_on_single_file(
 
     thislog.info("Processing file %d: %s", filenum, l1b_file)
 
-    try:  # and open the NetCDF file
-        with Dataset(l1b_file) as nc:
-            # ------------------------------------------------------------------------
-            # Run each algorithms .process() function in order
-            # ------------------------------------------------------------------------
+    success = True
+    error_str = ""
+    shared_dict = {"l1b_file_name": l1b_file}
+    l1b_name = os.path.basename(l1b_file)
 
-            shared_dict = {"l1b_file_name": l1b_file}
+    with trace.span(l1b_name, "file", filenum=filenum, l1b_file=l1b_file) as file_trace:
+        try:  # and open the NetCDF file
+            with trace.span(l1b_name, "open", filenum=filenum):
+                nc = Dataset(l1b_file)
+            try:
+                # --------------------------------------------------------------------
+                # Run each algorithms .process() function in order
+                # --------------------------------------------------------------------
 
-            for alg_obj in alg_object_list:
-                alg_obj.set_filenum(filenum)
-                alg_obj.set_log(thislog)
-                # Run the Algorithm's process() function. Note that for multi-processing
-                # the process() function also calls the init() function first
+                for alg_obj in alg_object_list:
+                    alg_obj.set_filenum(filenum)
+                    alg_obj.set_log(thislog)
+                    # Algorithm.alg_name may not be set until init(), so use the module name
+                    alg_short_name = alg_obj.__module__.rsplit(".", maxsplit=1)[-1]
+
+                    # For multi-processing each Algorithm is initialized on the first file
+                    # processed by the worker. This is normally done within process(), but is
+                    # run first here so that the init() time is recorded separately
+                    if config["chain"]["use_multi_processing"] and not alg_obj.initialized:
+                        with trace.span(alg_short_name, "init", filenum=filenum):
+                            success, error_str = alg_obj.init()
+                        if success:
+                            alg_obj.initialized = True
+
+                    # Run the Algorithm's process() function
+                    if success:
+                        with trace.span(alg_short_name, "process", filenum=filenum):
+                            success, error_str = alg_obj.process(nc, shared_dict)
+
+                    if not success:
+                        if "SKIP_OK" in error_str:
+                            thislog.debug(
+                                "Processing of L1b file %d : %s SKIPPED because %s",
+                                filenum,
+                                l1b_file,
+                                error_str,
+                            )
+                        else:
+                            thislog.error(
+                                "Processing of L1b file %d : %s stopped because %s",
+                                filenum,
+                                l1b_file,
+                                error_str,
+                            )
+                        break
 
-                success, error_str = alg_obj.process(nc, shared_dict)
-                if not success:
-                    if "SKIP_OK" in error_str:
-                        thislog.debug(
-                            "Processing of L1b file %d : %s SKIPPED because %s",
-                            filenum,
-                            l1b_file,
-                            error_str,
-                        )
-                    else:
-                        thislog.error(
-                            "Processing of L1b file %d : %s stopped because %s",
-                            filenum,
-                            l1b_file,
-                            error_str,
+                    if alg_obj.alg_name.rsplit(".", maxsplit=1)[-1] == breakpoint_alg_name:
+                        thislog.debug("breakpoint reached at algorithm %s", alg_obj.alg_name)
+                        bp_filename = write_breakpoint_file(
+                            config, shared_dict, thislog, breakpoint_alg_name
                         )
+                        break
+            finally:
+                with trace.span(l1b_name, "close", filenum=filenum):
+                    nc.close()
+
+        except (IOError, ValueError, KeyError):
+            success = False
+            error_str = f"Error processing {l1b_file}: {traceback.format_exc()}"
+            thislog.error(error_str)
+
+        if success:
+            file_trace["status"] = "processed"
+        elif "SKIP_OK" in error_str:
+            file_trace["status"] = "skipped"
+        else:
+            file_trace["status"] = "error"
+        file_trace["instr_mode"] = shared_dict.get("instr_mode", "")
+
+    file_result = {
+        "filenum": filenum,
+        "l1b_file": l1b_file,
+        "success": success,
+        "error_str": error_str,
+        "status": file_trace["status"],
+        "instr_mode": shared_dict.get("instr_mode", ""),
+        "num_20hz_records": shared_dict.get("num_20hz_records", 0),
+        "product_filename": shared_dict.get("product_filename", ""),
+        "wall_time": time.time() - start_time,
+        "timers": {
+            name: value - start_timers.get(name, 0.0)
+            for name, value in Timer.timers.items()
+            if value != start_timers.get(name, 0.0)
+        },
+        "trace_events": [],
+        "breakpoint_file": bp_filename,
+    }
 
-                    if config["chain"]["use_multi_processing"]:
-                        if rval_queue is not None:
-                            rval_queue.put((False, error_str, Timer.timers))
-                        # Free up resources by running the Algorithm.finalize() on each
-                        # algorithm instance
-                        for alg_obj in alg_object_list:
-                            if alg_obj.initialized:
-                                alg_obj.finalize(stage=5)
-                    return (False, error_str, bp_filename)
-
-                if alg_obj.alg_name.rsplit(".", maxsplit=1)[-1] == breakpoint_alg_name:
-                    thislog.debug("breakpoint reached at algorithm %s", alg_obj.alg_name)
-                    bp_filename = write_breakpoint_file(
-                        config, shared_dict, thislog, breakpoint_alg_name
-                    )
-                    break
+    if config["chain"]["use_multi_processing"]:
+        if rval_queue is not None:
+            # pass the file result back to the parent process via the shared queue
+            file_result["trace_events"] = trace.pop_events()
+            rval_queue.put(file_result)
+    return file_result
 
-            if config["chain"]["use_multi_processing"]:
-                # Free up resources by running the Algorithm.finalize() on each
-                # algorithm instance
-                for alg_obj in alg_object_list:
-                    if alg_obj.initialized:
-                        alg_obj.finalize(stage=6)
 
-    except (IOError, ValueError, KeyError):
-        error_str = f"Error processing {l1b_file}: {traceback.format_exc()}"
-        thislog.error(error_str)
-        if config["chain"]["use_multi_processing"]:
-            if rval_queue is not None:
-                rval_queue.put((False, error_str, Timer.timers))  # pass the function return values
-                # back to the parent process
-                # via a queue
-        return (False, error_str, bp_filename)
+def mp_chain_worker_process(
+    job_queue: Queue,
+    rval_queue: Queue,
+    log_queue: Queue,
+    alg_object_list: list[Any],
+    config: dict,
+    breakpoint_alg_name: str = "",
+) -> None:
+    """persistent worker process used when multi-processing
 
-    if config["chain"]["use_multi_processing"]:
-        if rval_queue is not None:
-            rval_queue.put((True, "", Timer.timers))
-    return (True, "", bp_filename)
+       Each worker pulls the next (filenum, l1b_file) job from the shared job_queue as soon
+       as it has finished its previous file, so a slow file only occupies one worker while
+       the others carry on with the rest of the list. The worker exits when it reads the
+       None sentinel from the job queue.
+
+       If config["chain"]["work_queue"] is set, the worker instead claims each file from
+       that shared (multi-host) WorkQueue, records its result there, and exits when no
+       files are pending.
+
+       Exactly one file result dict (see run_chain_on_single_file()) is put on rval_queue
+       for every job taken, as soon as the file is completed.
+
+       Each Algorithm is initialized once, on the first file this worker processes, and
+       its finalize() is run once when the worker exits. If tracing is enabled
+       (config["chain"]["trace_dir"] is set), the trace events of the finalize() calls are
+       returned in a final {"filenum": None, "trace_events": [..]} dict.
+
+    Args:
+        job_queue (Queue): shared queue of (filenum, l1b_file) jobs, terminated by None
+        rval_queue (Queue): shared queue for the results of each job
+        log_queue (Queue): Queue for multi-processing logging
+        alg_object_list (list[Algorithm]): list of Algorithm objects
+        config (dict): chain configuration dictionary
+        breakpoint_alg_name (str) : if not '', name of algorithm to break after.
+    """
+    trace = ChainTrace(enabled=bool(config["chain"].get("trace_dir")))
+
+    work_queue = None
+    worker_id = get_worker_id()
+    if config["chain"].get("work_queue"):
+        work_queue = WorkQueue(config["chain"]["work_queue"])
+
+    while True:
+        if work_queue is not None:
+            job = work_queue.claim(worker_id)
+        else:
+            job = job_queue.get()
+        if job is None:
+            break
+        filenum, l1b_file = job
+
+        start_time = time.time()
+        try:
+            file_result = run_chain_on_single_file(
+                l1b_file,
+                alg_object_list,
+                config,
+                logging.getLogger("mp"),
+                log_queue,
+                rval_queue,
+                filenum,
+                breakpoint_alg_name,
+                trace,
+            )
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Any other exception must still return a result, or the parent would wait
+            # for it forever
+            error_str = f"Error processing {l1b_file}: {traceback.format_exc()}"
+            logging.getLogger("mp").error(error_str)
+            file_result = {
+                "filenum": filenum,
+                "l1b_file": l1b_file,
+                "success": False,
+                "error_str": error_str,
+                "status": "error",
+                "instr_mode": "",
+                "num_20hz_records": 0,
+                "product_filename": "",
+                "wall_time": time.time() - start_time,
+                "timers": {},
+                "trace_events": trace.pop_events(),
+                "breakpoint_file": "",
+            }
+            rval_queue.put(file_result)
+
+        if work_queue is not None:
+            work_queue.complete(file_result, worker_id)
+
+    if work_queue is not None:
+        work_queue.close()
+
+    # The algorithms are initialized once per worker (on its first file), so they are
+    # only finalized when the worker has no more files to process
+    for alg_obj in alg_object_list:
+        if alg_obj.initialized:
+            with trace.span(alg_obj.__module__.rsplit(".", maxsplit=1)[-1], "finalize"):
+                alg_obj.finalize(stage=5)
+
+    if trace.enabled:
+        rval_queue.put({"filenum": None, "trace_events": trace.pop_events()})
 
 
 def mp_logger_process(queue, config) -> None:
@@ -351,12 +523,178 @@ def mp_logger_process(queue, config) -> None:
         logger.handle(message)
 
 
+def prefilter_l1b_file(l1b_file: str, config: dict, algorithm_list: list[str]) -> tuple[bool, str]:
+    """run the Algorithm.prefilter() of each algorithm in the chain on a single L1b file
+
+    The pre-pass runs each algorithm's prefilter() in chain order, stopping at the first
+    algorithm which does not provide one (see BaseAlgorithm.prefilter()).
+
+    Args:
+        l1b_file (str): path of L1b file
+        config (dict): chain configuration dictionary
+        algorithm_list (list[str]): list of algorithm names in the chain
+
+    Returns:
+        tuple[bool, str]: (keep file (bool), '' or 'SKIP_OK..' reason the file is not kept)
+    """
+    prefilter_dict = {"l1b_file_name": l1b_file}
+    try:
+        with Dataset(l1b_file) as nc:
+            for alg in algorithm_list:
+                module = importlib.import_module(
+                    f"clev2er.algorithms.{config['chain']['chain_name']}.{alg}"
+                )
+                if module.Algorithm.prefilter is BaseAlgorithm.prefilter:
+                    break
+                success, error_str = module.Algorithm.prefilter(nc, config, prefilter_dict)
+                if not success:
+                    # only skip files that the chain would skip. Any other error is left for
+                    # the chain to find and report
+                    if "SKIP_OK" in error_str:
+                        return (False, error_str)
+                    break
+    except (IOError, ValueError, KeyError, AttributeError, IndexError):
+        pass  # keep the file, so that the error is reported by the chain
+    return (True, "")
+
+
+def prefilter_l1b_files(
+    l1b_file_list: list[str], config: dict, algorithm_list: list[str], log: logging.Logger
+) -> list[str]:
+    """remove L1b files which the chain would skip, using each algorithm's fast prefilter()
+
+    If multi-processing is enabled the files are checked in parallel, using up to
+    config['chain']['max_processes_for_multiprocessing'] processes
+
+    Args:
+        l1b_file_list (list[str]): list of L1b file paths
+        config (dict): chain configuration dictionary
+        algorithm_list (list[str]): list of algorithm names in the chain
+        log (logging.Logger): log instance to use
+
+    Returns:
+        list[str]: L1b files to pass to the chain
+    """
+    if config["chain"]["use_multi_processing"] and len(l1b_file_list) > 1:
+        num_processes = min(
+            config["chain"]["max_processes_for_multiprocessing"], len(l1b_file_list)
+        )
+        with ProcessPoolExecutor(max_workers=num_processes) as executor:
+            results = list(
+                executor.map(
+                    prefilter_l1b_file,
+                    l1b_file_list,
+                    repeat(config),
+                    repeat(algorithm_list),
+                    chunksize=max(1, len(l1b_file_list) // (num_processes * 4)),
+                )
+            )
+    else:
+        results = [
+            prefilter_l1b_file(l1b_file, config, algorithm_list) for l1b_file in l1b_file_list
+        ]
+
+    kept_files = []
+    for l1b_file, (keep, reason) in zip(l1b_file_list, results):
+        if keep:
+            kept_files.append(l1b_file)
+        else:
+            log.debug("Prefilter skipped %s : %s", l1b_file, reason)
+
+    log.info(
+        "Prefilter: %d of %d L1b files skipped before processing",
+        len(l1b_file_list) - len(kept_files),
+        len(l1b_file_list),
+    )
+    return kept_files
+
+
+def handle_file_result(
+    file_result: dict,
+    counts: dict,
+    n_files: int,
+    start_time: float,
+    log: logging.Logger,
+    on_result: Optional[Callable[[dict], None]] = None,
+) -> None:
+    """update the run's counts with the result of a single completed L1b file, log the
+       progress of the run, and pass the result on to the optional on_result hook
+
+       Called in the main process as each file is completed, in order of completion
+       (which may differ from file number order when multi-processing)
+
+    Args:
+        file_result (dict): file result from run_chain_on_single_file()
+        counts (dict): run totals to update, with keys completed, processed, skipped, errors
+        n_files (int): number of files in the run
+        start_time (float): time.time() at the start of processing the files
+        log (logging.Logger): log instance to use
+        on_result (Callable[[dict], None] | None, optional): function called with each
+            file result. Defaults to None.
+    """
+    counts["completed"] += 1
+    counts["processed"] += 1
+    if file_result["status"] == "skipped":
+        counts["skipped"] += 1
+    elif file_result["status"] == "error":
+        counts["errors"] += 1
+
+    elapsed = time.time() - start_time
+    log.info(
+        "Completed %d of %d files (%d skipped, %d errors) : f%d %s in %.2f s, "
+        "elapsed %.0f s, estimated remaining %.0f s",
+        counts["completed"],
+        n_files,
+        counts["skipped"],
+        counts["errors"],
+        file_result["filenum"],
+        file_result["status"],
+        file_result["wall_time"],
+        elapsed,
+        elapsed * (n_files - counts["completed"]) / counts["completed"],
+    )
+
+    if on_result is not None:
+        on_result(file_result)
+
+
+def write_trace_files(trace: ChainTrace, config: dict, log: logging.Logger) -> None:
+    """write the chain processing trace to config["chain"]["trace_dir"]
+
+    Writes <chain_name>_trace_<YYYYMMDDTHHMMSS>.json (Chrome trace-event format) and
+    <chain_name>_trace_<YYYYMMDDTHHMMSS>_files.csv (one row per L1b file), and logs the
+    slowest files and algorithms
+
+    Args:
+        trace (ChainTrace): trace containing the events from all processes
+        config (dict): chain configuration dictionary
+        log (logging.Logger): log instance to use
+    """
+    trace_dir = config["chain"]["trace_dir"]
+    try:
+        os.makedirs(trace_dir, exist_ok=True)
+        trace_name = f"{config['chain']['chain_name']}_trace_{time.strftime('%Y%m%dT%H%M%S')}"
+        trace_file = os.path.join(trace_dir, f"{trace_name}.json")
+        trace.write_chrome_trace(trace_file)
+        csv_file = os.path.join(trace_dir, f"{trace_name}_files.csv")
+        trace.write_file_csv(csv_file)
+    except OSError as exc:
+        log.error("Could not write trace files to %s : %s", trace_dir, exc)
+        return
+
+    log.info("\n%sProcessing Trace%s", "-" * 20, "-" * 20)
+    log.info("trace file (Chrome trace-event format): %s", trace_file)
+    log.info("trace file (per L1b file): %s", csv_file)
+    trace.log_summary(log)
+
+
 def run_chain(
     l1b_file_list: list[str],
     config: dict,
     algorithm_list: list[str],
     log: logging.Logger,
     breakpoint_alg_name: str = "",
+    on_result: Optional[Callable[[dict], None]] = None,
 ) -> tuple[bool, int, int, int, str]:
     """Run the algorithm chain in algorithm_list on each L1b file in l1b_file_list
        using the configuration settings in config
@@ -369,6 +707,10 @@ def run_chain(
         log (logging.Logger): log instance to use
         breakpoint_alg_name (str): name of algorithm to set break point after.
                                    Default='' (no breakpoint set here)
+        on_result (Callable[[dict], None] | None): function called in this process with
+                                   the result dict of each L1b file as soon as it is
+                                   completed (see run_chain_on_single_file()).
+                                   Default=None
 
     Returns:
         tuple(bool,int,int, int,str) : (chain success or failure, number_of_errors,
@@ -379,6 +721,13 @@ def run_chain(
     n_files = len(l1b_file_list)
     breakpoint_filename = ""
 
+    # The algorithm list is hashed with the configuration by the run journal and by
+    # algorithms forming product processing keys (see run_journal.config_hash())
+    config["chain"]["algorithm_list"] = algorithm_list
+
+    # Optional timeline of the processing steps, written to config["chain"]["trace_dir"]
+    trace = ChainTrace(enabled=bool(config["chain"].get("trace_dir")))
+
     # -------------------------------------------------------------------------------------------
     # Load the dynamic algorithm modules from clev2er/algorithms/<algorithm_name>.py
     #   - runs each algorithm object's __init__() function
@@ -388,6 +737,13 @@ def run_chain(
     # duplicate list used to call initialization
     # of shared memory resources where used.
 
+    # With shared memory, this process owns the registry of shared resources (large DEM and
+    # mask arrays). Each is loaded once, by the second instances of the algorithms below, and
+    # the worker processes attach to it. Its segments are unlinked by stop_shared_resources(),
+    # or if this process exits, is interrupted or terminated before then.
+    if config["chain"]["use_multi_processing"] and config["chain"]["use_shared_memory"]:
+        start_shared_resources(log)
+
     log.info("Dynamically importing and initializing algorithms from list...")
 
     for alg in algorithm_list:
@@ -400,6 +756,7 @@ def run_chain(
             )
         except ImportError as exc:
             log.error("Could not import algorithm %s, %s", alg, exc)
+            stop_shared_resources()
             return (False, 1, 0, 0, breakpoint_filename)
 
         # --------------------------------------------------------------------
@@ -409,9 +766,11 @@ def run_chain(
 
         # Load/Initialize algorithm
         try:
-            alg_obj = module.Algorithm(config, log)
+            with trace.span(alg, "init"):
+                alg_obj = module.Algorithm(config, log)
         except (FileNotFoundError, IOError, KeyError, ValueError):
             log.error("Could not initialize algorithm %s, %s", alg, traceback.format_exc())
+            stop_shared_resources()
             return (False, 1, 0, 0, breakpoint_filename)
 
         alg_object_list.append(alg_obj)
@@ -422,7 +781,7 @@ def run_chain(
         #   - runs its __init__(config) function
         # Note that the .process() function is never run for this instance
         # We merge  {"_init_shared_mem": True} to the config so that the
-        # Algorithm knows to run any shared memory initialization
+        # Algorithm runs its init() in this process, loading its shared resources
         # --------------------------------------------------------------------
 
         if config["chain"]["use_multi_processing"] and config["chain"]["use_shared_memory"]:
@@ -439,6 +798,7 @@ def run_chain(
                 for alg_obj_shm in shared_mem_alg_object_list:
                     if alg_obj_shm.initialized:
                         alg_obj_shm.finalize(stage=4)
+                stop_shared_resources()
 
                 return (False, 1, 0, 0, breakpoint_filename)
 
@@ -454,9 +814,85 @@ def run_chain(
     #    - Note that choice of MP method is due to logging reliability constraints, which
     #      caused problems with simpler more modern pool.starmap methods
     # -------------------------------------------------------------------------------------------
-    num_errors = 0
-    num_files_processed = 0
-    num_skipped = 0
+    # run totals, updated by handle_file_result() as each file is completed
+    counts = {"completed": 0, "processed": 0, "skipped": 0, "errors": 0}
+
+    # Optional work queue shared with run_chain runs on other hosts. This run's file list
+    # is added to the queue, and its (worker) processes then claim files from the queue
+    # until none are pending, rather than processing the list themselves
+    work_queue = None
+    worker_id = get_worker_id()
+    if config["chain"].get("work_queue"):
+        try:
+            work_queue = WorkQueue(config["chain"]["work_queue"], log)
+        except sqlite3.Error as exc:
+            log.error("Could not open work queue %s : %s", config["chain"]["work_queue"], exc)
+            stop_shared_resources()
+            return (False, 1, 0, 0, breakpoint_filename)
+
+    # Optional journal of completed files, so that an interrupted run can be resumed.
+    # Not used for breakpoint runs, as these do not complete the chain.
+    journal = None
+    if config["chain"].get("journal_file") and not breakpoint_alg_name:
+        try:
+            journal = RunJournal(
+                config["chain"]["journal_file"], config_hash(config, algorithm_list), log
+            )
+        except OSError as exc:
+            log.error("Could not open journal file %s : %s", config["chain"]["journal_file"], exc)
+    if config["chain"].get("resume"):
+        if journal is not None:
+            # files already completed are not processed again, or counted in this run
+            l1b_file_list = journal.filter_completed(l1b_file_list)
+            n_files = len(l1b_file_list)
+        else:
+            log.error("Can not resume without a journal file, processing all files")
+
+    def result_hook(file_result: dict) -> None:
+        """record each completed file in the journal, and pass it on to on_result"""
+        if journal is not None:
+            journal.record(file_result)
+        if on_result is not None:
+            on_result(file_result)
+
+    # Optional fast pre-pass to remove files that are certain to be skipped by the chain,
+    # before they are passed to a (worker) process. These count as processed and skipped.
+    if config["chain"].get("prefilter_l1b_files"):
+        prefilter_algorithm_list = algorithm_list
+        if breakpoint_alg_name in algorithm_list:
+            prefilter_algorithm_list = algorithm_list[
+                : algorithm_list.index(breakpoint_alg_name) + 1
+            ]
+        kept_files = prefilter_l1b_files(l1b_file_list, config, prefilter_algorithm_list, log)
+        if journal is not None:
+            kept_set = set(kept_files)
+            for l1b_file in l1b_file_list:
+                if l1b_file not in kept_set:
+                    journal.record({"l1b_file": l1b_file, "status": "skipped"})
+        l1b_file_list = kept_files
+        counts["processed"] += n_files - len(l1b_file_list)
+        counts["skipped"] += n_files - len(l1b_file_list)
+        n_files = len(l1b_file_list)
+
+    # Optionally start the most expensive files first when multi-processing, so that they
+    # are not left running on their own at the end of the run
+    if config["chain"]["use_multi_processing"] and config["chain"].get("order_files_by_cost"):
+        l1b_file_list = order_files_by_cost(
+            l1b_file_list, config["chain"].get("cost_history", ""), log
+        )
+        log.info("L1b files ordered by estimated processing cost, longest first")
+
+    if work_queue is not None:
+        num_added = work_queue.add_files(l1b_file_list)
+        n_files = work_queue.num_pending()
+        log.info(
+            "Work queue %s : %d new L1b files added, %d files pending",
+            work_queue.queue_file,
+            num_added,
+            n_files,
+        )
+
+    start_time = time.time()
 
     # --------------------------------------------------------------------------------------------
     # Parallel Processing (optional)
@@ -477,74 +913,94 @@ def run_chain(
         logger_p = Process(target=mp_logger_process, args=(log_queue, config))
         logger_p.start()
 
-        # Divide up the input files in to chunks equal to maximum number of processes
-        # allowed == config["chain"]["max_processes_for_multiprocessing"]
+        # Start a pool of persistent worker processes which share a single job queue.
+        # Each worker takes the next L1b file from the queue as soon as it is free, so
+        # that a slow file does not hold up the other workers (as happens when processing
+        # the list in fixed chunks of max_processes_for_multiprocessing files)
+
+        num_workers = min(config["chain"]["max_processes_for_multiprocessing"], n_files)
 
         log.info(
             "Using multi-processing with max %d processes",
             config["chain"]["max_processes_for_multiprocessing"],
         )
-
-        num_chunks = ceil(n_files / config["chain"]["max_processes_for_multiprocessing"])
-
-        file_indices_chunks = np.array_split(list(range(n_files)), num_chunks)
-
-        for chunk_num, file_indices in enumerate(file_indices_chunks):
-            chunked_l1b_file_list = np.array(l1b_file_list)[file_indices]
-            log.debug(f"mp chunk_num {chunk_num}: chunked_l1b_file_list={chunked_l1b_file_list}")
-
-            num_procs = len(chunked_l1b_file_list)
-
-            log.info(
-                "Running process set %d of %d (containing %d processes)",
-                chunk_num + 1,
-                num_chunks,
-                num_procs,
+        log.info("Starting %d worker processes for %d L1b files", num_workers, n_files)
+
+        job_queue: Queue = Queue()
+        if work_queue is None:  # otherwise workers claim files from the work queue
+            for filenum, l1b_file in enumerate(l1b_file_list):
+                job_queue.put((filenum, l1b_file))
+            # one sentinel per worker to tell it to exit when the job queue is empty
+            for _ in range(num_workers):
+                job_queue.put(None)
+
+        # single shared queue to handle function return values from all workers
+        rval_queue: Queue = Queue()
+
+        # configure and start the worker processes
+        workers = [
+            Process(
+                target=mp_chain_worker_process,
+                args=(
+                    job_queue,
+                    rval_queue,
+                    log_queue,
+                    alg_object_list,
+                    config,
+                    breakpoint_alg_name,
+                ),
             )
+            for _ in range(num_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # stream the result of each file from the results queue as it completes.
+        # With a work queue the number of files this run will complete is not known, so
+        # results are read until all the workers have exited
+        while work_queue is not None or counts["completed"] < n_files:
+            try:
+                file_result = rval_queue.get(timeout=1.0)
+            except Empty:
+                # Check that the workers have not all exited (ie crashed) without
+                # returning results, otherwise we would wait forever
+                if not any(worker.is_alive() for worker in workers) and rval_queue.empty():
+                    if work_queue is None:
+                        log.error(
+                            "All worker processes exited with %d files not completed",
+                            n_files - counts["completed"],
+                        )
+                        counts["errors"] += n_files - counts["completed"]
+                    break
+                continue
+            trace.extend(file_result["trace_events"])
+            if file_result["filenum"] is None:
+                # a worker's finalize() trace events, not a file result
+                continue
+            # file_result["timers"] contains the Timer.timers of the file's algorithm
+            # process() functions, ie timers['alg_name']= the number of seconds elapsed
+            for key, value in file_result["timers"].items():
+                Timer.timers.add(key, value)
+            if work_queue is not None:
+                # this file, plus the files still to complete by all the runs sharing the queue
+                n_files = counts["completed"] + 1 + work_queue.num_pending(include_running=True)
+            handle_file_result(file_result, counts, n_files, start_time, log, result_hook)
+
+        # when tracing, each worker returns its finalize() trace events before it exits
+        if trace.enabled:
+            while any(worker.is_alive() for worker in workers) or not rval_queue.empty():
+                try:
+                    trace.extend(rval_queue.get(timeout=0.5)["trace_events"])
+                except Empty:
+                    continue
 
-            # Create separate queue for each new process to handle function return values
-            rval_queues: List[Queue] = [Queue() for _ in range(num_procs)]
-
-            # configure child processes
-            processes = [
-                Process(
-                    target=run_chain_on_single_file,
-                    args=(
-                        chunked_l1b_file_list[i],
-                        alg_object_list,
-                        config,
-                        None,
-                        log_queue,
-                        rval_queues[i],
-                        file_indices[i],
-                        breakpoint_alg_name,
-                    ),
-                )
-                for i in range(num_procs)
-            ]
-            # start child processes
-            for process in processes:
-                process.start()
-
-            # wait for child processes to finish
-            for i, process in enumerate(processes):
-                process.join()
-                # retrieve return values of each process function from queue
-                # rval=(bool, str, Timer.timers)
-                while not rval_queues[i].empty():
-                    rval = rval_queues[i].get()
-                    if not rval[0] and "SKIP_OK" not in rval[1]:
-                        num_errors += 1
-                    if "SKIP_OK" in rval[1]:
-                        num_skipped += 1
-                    num_files_processed += 1
-                    # rval[2] returns the Timer.timers dict for algorithms process() function
-                    # ie a dict containing timers['alg_name']= the number of seconds elapsed
-                    for key, value in rval[2].items():
-                        if key in Timer.timers:
-                            Timer.timers.add(key, value)
-                        else:
-                            Timer.timers.add(key, value)
+        # wait for the worker processes to exit
+        for worker in workers:
+            worker.join()
+            if work_queue is not None and worker.exitcode != 0:
+                # its claimed file is left running in the work queue, and can be
+                # requeued with work_queue_report.py --requeue_stale
+                log.error("Worker process %s exited with code %s", worker.name, worker.exitcode)
 
         # shutdown the queue correctly
         log_queue.put(None)
@@ -554,10 +1010,17 @@ def run_chain(
     # Sequential Processing
     # --------------------------------------------------------------------------------------------
     else:  # Normal sequential processing (when multi-processing is disabled)
+        jobs: Iterable[tuple[int, str]] = enumerate(l1b_file_list)
+        if work_queue is not None:
+            jobs = iter(partial(work_queue.claim, worker_id), None)
+        fnum = -1
         try:
-            for fnum, l1b_file in enumerate(l1b_file_list):
+            for fnum, l1b_file in jobs:
+                if work_queue is not None:
+                    # includes this file, which is running
+                    n_files = counts["completed"] + work_queue.num_pending(include_running=True)
                 log.info("\n%sProcessing file %d of %d%s", "-" * 20, fnum, n_files, "-" * 20)
-                success, error_str, breakpoint_filename = run_chain_on_single_file(
+                file_result = run_chain_on_single_file(
                     l1b_file,
                     alg_object_list,
                     config,
@@ -566,15 +1029,17 @@ def run_chain(
                     None,
                     fnum,
                     breakpoint_alg_name,
+                    trace,
                 )
-                num_files_processed += 1
-                if not success and "SKIP_OK" in error_str:
+                breakpoint_filename = file_result["breakpoint_file"]
+                if work_queue is not None:
+                    work_queue.complete(file_result, worker_id)
+                    n_files = counts["completed"] + 1 + work_queue.num_pending(include_running=True)
+                handle_file_result(file_result, counts, n_files, start_time, log, result_hook)
+                if file_result["status"] == "skipped":
                     log.debug("Skipping file")
-                    num_skipped += 1
                     continue
-                if not success:
-                    num_errors += 1
-
+                if file_result["status"] == "error":
                     if config["chain"]["stop_on_error"]:
                         log.error(
                             "Chain stopped because of error processing L1b file %s",
@@ -589,6 +1054,9 @@ def run_chain(
                     continue
         except KeyboardInterrupt as exc:
             log.error("KeyboardInterrupt detected", exc)
+            if work_queue is not None:
+                # return the interrupted file to the work queue
+                work_queue.release([fnum])
 
     # -----------------------------------------------------------------------------
     # Run each algorithms .finalize() function in order
@@ -598,11 +1066,22 @@ def run_chain(
 
     for alg_obj_shm in shared_mem_alg_object_list:
         if alg_obj_shm.initialized:
-            alg_obj_shm.finalize(stage=2)
+            with trace.span(alg_obj_shm.__module__.rsplit(".", maxsplit=1)[-1], "finalize"):
+                alg_obj_shm.finalize(stage=2)
+
+    shared_resources = get_shared_resources()
+    if shared_resources is not None:
+        status = shared_resources.status()
+        if status["refcounts"]:
+            log.warning(
+                "Shared resources not released by finalize() : %s", list(status["refcounts"])
+            )
+        stop_shared_resources()
 
     for alg_obj in alg_object_list:
         if alg_obj.initialized:
-            alg_obj.finalize(stage=3)
+            with trace.span(alg_obj.__module__.rsplit(".", maxsplit=1)[-1], "finalize"):
+                alg_obj.finalize(stage=3)
 
     # Elapsed time for each algorithm.
     # Note if multi-processing, process times are added for each algorithm
@@ -616,11 +1095,30 @@ def run_chain(
     for algname, cumulative_time in Timer.timers.items():
         log.info("%s %.3f s", algname, cumulative_time)
 
-    if num_errors > 0:
-        return (False, num_errors, num_files_processed, num_skipped, breakpoint_filename)
+    if trace.enabled:
+        write_trace_files(trace, config, log)
+
+    if journal is not None:
+        log.info("journal of completed files: %s", journal.journal_file)
+        journal.close()
+
+    if work_queue is not None:
+        # this run's file counts and algorithm times, for work_queue_report.py
+        work_queue.record_run(worker_id, counts, dict(Timer.timers), start_time)
+        log.info("work queue: %s", work_queue.queue_file)
+        work_queue.close()
+
+    if counts["errors"] > 0:
+        return (
+            False,
+            counts["errors"],
+            counts["processed"],
+            counts["skipped"],
+            breakpoint_filename,
+        )
 
     # Completed successfully, so return True with no error msg
-    return (True, num_errors, num_files_processed, num_skipped, breakpoint_filename)
+    return (True, 0, counts["processed"], counts["skipped"], breakpoint_filename)
 
 
 def main() -> None:
@@ -862,6 +1360,102 @@ def main() -> None:
         type=str,
     )
 
+    parser.add_argument(
+        "--trace",
+        "-tr",
+        help=(
+            "[Optional, str] trace_dir : record the wall time of each algorithm's init(), "
+            "process() and finalize() call and of each L1b file open/close, and write them "
+            "to this directory as a Chrome trace-event JSON file (viewable in "
+            "chrome://tracing or ui.perfetto.dev) and a CSV file with one row per L1b file"
+        ),
+        type=str,
+    )
+
+    parser.add_argument(
+        "--prefilter",
+        "-pf",
+        help=(
+            "[Optional] run a fast pre-pass over the L1b files using each algorithm's "
+            "prefilter() (reading only attributes and decimated locations), to remove "
+            "files that the chain would skip before processing starts. "
+            "Overrides chain:prefilter_l1b_files setting in main config file"
+        ),
+        action="store_const",
+        const=1,
+    )
+
+    parser.add_argument(
+        "--longest_first",
+        "-lf",
+        help=(
+            "[Optional] when multi-processing, start the L1b files with the highest estimated "
+            "processing cost first (estimated from file size and instrument mode, or from "
+            "--cost_history). Overrides chain:order_files_by_cost setting in main config file"
+        ),
+        action="store_const",
+        const=1,
+    )
+
+    parser.add_argument(
+        "--cost_history",
+        "-ch",
+        help=(
+            "[Optional, str] path of a per L1b file CSV written by a previous --trace run, or a "
+            "directory of these files, used to estimate the processing cost of each L1b file "
+            "for --longest_first"
+        ),
+        type=str,
+    )
+
+    parser.add_argument(
+        "--incremental",
+        "-inc",
+        help=(
+            "[Optional] skip L1b files whose product already exists and was made from the "
+            "same L1b file, chain configuration and algorithm code (checked by the product's "
+            "processing_key global attribute). Overrides chain:skip_up_to_date_products "
+            "setting in main config file"
+        ),
+        action="store_const",
+        const=1,
+    )
+
+    parser.add_argument(
+        "--work_queue",
+        "-wq",
+        help=(
+            "[Optional, str] path of a SQLite work queue on storage shared between hosts. "
+            "The L1b files selected by this run are added to the queue, and files are then "
+            "claimed from the queue until none are pending, so that runs started on several "
+            "hosts with the same queue share the files. Log files are named per host and "
+            "process unless --logstring is set. See work_queue_report.py for a combined report"
+        ),
+        type=str,
+    )
+
+    parser.add_argument(
+        "--journal",
+        "-jn",
+        help=(
+            "[Optional, str] path of the journal file which records each completed L1b file, "
+            "used by --resume. Default is <log dir>/<chain_name>_journal.jsonl"
+        ),
+        type=str,
+    )
+
+    parser.add_argument(
+        "--resume",
+        "-rs",
+        help=(
+            "[Optional] resume an interrupted run: skip L1b files already processed (or "
+            "skipped) in the journal, whose modification time and chain configuration "
+            "are unchanged. Files which failed are processed again"
+        ),
+        action="store_const",
+        const=1,
+    )
+
     # read arguments from the command line
     args = parser.parse_args()
 
@@ -958,6 +1552,33 @@ def main() -> None:
 
     config["chain"]["chain_name"] = args.name
 
+    if args.trace:
+        config["chain"]["trace_dir"] = args.trace
+        modified_args.append(f"trace_dir={args.trace}")
+
+    if args.prefilter:
+        config["chain"]["prefilter_l1b_files"] = True
+        modified_args.append("prefilter_l1b_files=True")
+
+    if args.longest_first:
+        config["chain"]["order_files_by_cost"] = True
+        modified_args.append("order_files_by_cost=True")
+
+    if args.cost_history:
+        config["chain"]["cost_history"] = args.cost_history
+        modified_args.append(f"cost_history={args.cost_history}")
+
+    if args.work_queue:
+        config["chain"]["work_queue"] = args.work_queue
+        modified_args.append(f"work_queue={args.work_queue}")
+        # each run sharing the queue writes its own log files
+        if not args.logstring:
+            args.logstring = get_worker_id().replace(":", "_")
+
+    if args.incremental:
+        config["chain"]["skip_up_to_date_products"] = True
+        modified_args.append("skip_up_to_date_products=True")
+
     if args.stop_on_error:
         config["chain"]["stop_on_error"] = True
         modified_args.append("stop_on_error=True")
@@ -1067,6 +1688,18 @@ def main() -> None:
     config["log_files"]["info"] = log_file_info_name
     config["log_files"]["debug"] = log_file_debug_name
 
+    # Journal of completed L1b files, used to resume an interrupted run
+    if args.journal:
+        config["chain"]["journal_file"] = args.journal
+        modified_args.append(f"journal_file={args.journal}")
+    else:
+        config["chain"]["journal_file"] = os.path.join(
+            os.path.dirname(log_file_info_name), f"{args.name}_journal.jsonl"
+        )
+    if args.resume:
+        config["chain"]["resume"] = True
+        modified_args.append("resume=True")
+
     log = get_logger(
         default_log_level=logging.DEBUG if args.debug else logging.INFO,
         log_file_error=log_file_error_name,
@@ -0,0 +1,29 @@
+"""pytest functions to test
+        src/clev2er/tools/run_chain.py: handle_file_result()
+"""
+
+import logging
+import time
+
+from clev2er.tools.run_chain import handle_file_result
+
+log = logging.getLogger(__name__)
+
+
+def test_handle_file_result():
+    """test that streamed file results update the run counts and are passed to on_result"""
+    counts = {"completed": 0, "processed": 1, "skipped": 1, "errors": 0}  # 1 prefiltered
+    received = []
+
+    for filenum, status in ((2, "processed"), (0, "error"), (1, "skipped")):
+        file_result = {
+            "filenum": filenum,
+            "l1b_file": f"/dir/l1b_{filenum}.nc",
+            "status": status,
+            "wall_time": 0.1,
+        }
+        handle_file_result(file_result, counts, 3, time.time(), log, received.append)
+
+    assert counts == {"completed": 3, "processed": 4, "skipped": 2, "errors": 1}
+    # results are passed on in order of completion
+    assert [file_result["filenum"] for file_result in received] == [2, 0, 1]
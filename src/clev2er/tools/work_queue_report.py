@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" Command line tool to report on a run_chain.py work queue, shared by runs on several hosts
+
+    Reports the number of files of each status in the queue, a summary of each run which
+    took files from the queue, the process() times of each algorithm summed over all runs,
+    and the files which failed. Optionally returns failed files, or files claimed by runs
+    which were killed, to the queue so that they are processed by the next run.
+
+    Example usage:
+
+        `python work_queue_report.py --work_queue /shared/cryotempo_2020.sqlite`
+
+        Requeue files which failed, or were claimed more than 6 hours ago and not completed:
+
+        `python work_queue_report.py -q /shared/cryotempo_2020.sqlite -re -rs 6`
+"""
+
+import argparse
+import csv
+import logging
+import os
+import sys
+
+from clev2er.utils.work_queue.work_queue import WorkQueue
+
+# pylint: disable=too-many-locals
+
+log = logging.getLogger(__name__)
+
+
+def merge_run_timers(runs: list[dict]) -> dict[str, float]:
+    """sum the cumulative algorithm times of several runs
+
+    Args:
+        runs (list[dict]): run summaries from WorkQueue.runs()
+
+    Returns:
+        dict[str, float]: total process() time (s) of each algorithm, keyed by module name
+    """
+    total_timers: dict[str, float] = {}
+    for run in runs:
+        for alg_name, alg_time in run["timers"].items():
+            total_timers[alg_name] = total_timers.get(alg_name, 0.0) + alg_time
+    return total_timers
+
+
+def main() -> None:
+    """main function for tool"""
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--work_queue",
+        "-q",
+        help="path of work queue file (SQLite), as passed to run_chain.py --work_queue",
+        required=True,
+    )
+    parser.add_argument(
+        "--requeue_errors",
+        "-re",
+        help="[Optional] return files which failed to the queue",
+        action="store_const",
+        const=1,
+    )
+    parser.add_argument(
+        "--requeue_stale",
+        "-rs",
+        help=(
+            "[Optional, float] return files claimed more than this number of hours ago and "
+            "not completed (ie by a run which was killed) to the queue"
+        ),
+        type=float,
+    )
+    parser.add_argument(
+        "--csv",
+        "-c",
+        help="[Optional, str] path of CSV file to write the queue's file records to",
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)-2s] : %(asctime)s : %(message)s")
+
+    if not os.path.isfile(args.work_queue):
+        sys.exit(f"ERROR: {args.work_queue} not found")
+
+    with WorkQueue(args.work_queue, log) as queue:
+        if args.requeue_errors or args.requeue_stale is not None:
+            num_requeued = queue.requeue(
+                errors=bool(args.requeue_errors), stale_hours=args.requeue_stale
+            )
+            log.info("Number of files returned to queue: %d", num_requeued)
+
+        status_counts = queue.status_counts()
+        log.info("Number of files in queue: %d", sum(status_counts.values()))
+        for status, count in sorted(status_counts.items()):
+            log.info("  %-10s: %d", status, count)
+
+        runs = queue.runs()
+        log.info("Runs completed: %d", len(runs))
+        for run in runs:
+            log.info(
+                "  %-30s: processed %d, skipped %d, errors %d in %.1f s",
+                run["worker"],
+                run["processed"],
+                run["skipped"],
+                run["errors"],
+                run["finished"] - run["started"],
+            )
+
+        total_timers = merge_run_timers(runs)
+        total_time = sum(total_timers.values())
+        if total_time > 0.0:
+            log.info("Cumulative algorithm process() times over all runs:")
+            for alg_name, alg_time in sorted(
+                total_timers.items(), key=lambda item: item[1], reverse=True
+            ):
+                log.info(
+                    "  %-60s: %.2f s (%.1f%%)", alg_name, alg_time, 100.0 * alg_time / total_time
+                )
+
+        for file_record in queue.files(status="error"):
+            log.error(
+                "  error: %s (%s) : %s",
+                file_record["l1b_file"],
+                file_record["worker"],
+                file_record["error_str"],
+            )
+
+        if args.csv:
+            file_records = queue.files()
+            with open(args.csv, "w", encoding="utf-8", newline="") as csv_file:
+                writer = csv.DictWriter(
+                    csv_file,
+                    fieldnames=list(file_records[0]) if file_records else ["filenum"],
+                )
+                writer.writeheader()
+                writer.writerows(file_records)
+            log.info("File records written to %s", args.csv)
+
+
+if __name__ == "__main__":
+    main()
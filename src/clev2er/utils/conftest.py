@@ -0,0 +1,44 @@
+"""pytest fixtures shared by the tests of clev2er.utils
+"""
+
+from typing import Callable
+
+import numpy as np
+import pytest
+
+from clev2er.utils.grid_cache.grid_cache import GRID_CACHE_DIR_ENV
+
+
+@pytest.fixture
+def synthetic_awi_ant_dem(tmp_path, monkeypatch) -> Callable[[int, int], tuple[dict, np.ndarray]]:
+    """factory of synthetic awi_ant_1km_grounded DEM files, so that Dem objects can be loaded
+    without the DEM data
+
+    $CPDATA_DIR and the grid cache directory are set to directories in tmp_path.
+
+    Returns:
+        Callable: make_dem(ncols, nrows), which writes a DEM of random heights (m) on a grid
+                  of ncols x nrows 1km cells, centred on x,y = 0,0, and returns
+                  (config, zdem): the Dem config dict and the DEM's heights
+    """
+    monkeypatch.setenv("CPDATA_DIR", str(tmp_path))
+    monkeypatch.setenv(GRID_CACHE_DIR_ENV, str(tmp_path / "cache"))
+    dem_dir = tmp_path / "dems"
+    dem_dir.mkdir()
+
+    def make_dem(ncols: int, nrows: int) -> tuple[dict, np.ndarray]:
+        xdem = np.linspace(-(ncols // 2) * 1000.0, (ncols // 2) * 1000.0, ncols)
+        ydem = np.linspace((nrows // 2) * 1000.0, -(nrows // 2) * 1000.0, nrows)
+        zdem = np.random.default_rng(0).uniform(0.0, 3000.0, size=(nrows, ncols))
+        np.savez(
+            dem_dir / "ant_awi_2013_dem_grounded.npz",
+            zdem=zdem,
+            xdem=xdem,
+            ydem=ydem,
+            mindemx=xdem.min(),
+            mindemy=ydem.min(),
+            binsize=1000,
+        )
+        return {"dem_dirs": {"awi_ant_1km_grounded": str(dem_dir)}}, zdem
+
+    return make_dem
@@ -7,14 +7,21 @@ from datetime import datetime, timedelta  # date and time functions
 from typing import Tuple
 
 import numpy as np
-import pyproj
 from netCDF4 import Dataset  # pylint: disable=no-name-in-module
-from pyproj import Transformer
-from scipy.ndimage import median_filter
 
+from clev2er.utils.cs2.geolocate.geolocate_roemer import (
+    MAX_BATCH_POINTS,
+    median_filter_segments,
+)
 from clev2er.utils.cs2.geolocate.lrm_slope import slope_doppler
 from clev2er.utils.dems.dems import Dem
 from clev2er.utils.dhdt_data.dhdt import Dhdt
+from clev2er.utils.projections.projection_cache import transform_lonlat
+from clev2er.utils.projections.transformer_cache import (
+    WGS84_ECEF,
+    WGS84_LLA,
+    get_transformer,
+)
 
 # pylint: disable=too-many-arguments,too-many-locals,too-many-branches,too-many-statements,R0801
 
@@ -59,6 +66,68 @@ def calculate_distances(
     return distances  # Convert back to a regular Python list
 
 
+def calculate_distances_batch(
+    xy_distances_squared: np.ndarray, z1_coord: np.ndarray, z2_array: np.ndarray
+) -> np.ndarray:
+    """calculate_distances() for a batch of reference points, each with its own set of
+    other points, from the squared horizontal distances between them
+
+    Args:
+        xy_distances_squared (np.ndarray): squared x,y distances between each ref point and
+                                           its points, shape (n, m)
+        z1_coord (np.ndarray): z coordinate of each ref point, shape (n,)
+        z2_array (np.ndarray): z coordinates of the points of each ref point, shape (n, m)
+
+    Returns:
+        np.ndarray: distances between each ref point and its points, shape (n, m)
+    """
+    # z2 - z1 is computed at the precision calculate_distances() uses for a scalar z1
+    z_diff = np.subtract(
+        z2_array, z1_coord[:, None], dtype=np.result_type(z2_array, z1_coord.dtype.type(0))
+    )
+    return np.sqrt(xy_distances_squared + z_diff**2)
+
+
+def mean_of_valid(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """mean of the valid values of each row of a 2d array
+
+    Args:
+        values (np.ndarray): values, shape (n, m)
+        valid (np.ndarray): True where values are included, shape (n, m)
+
+    Returns:
+        np.ndarray: mean of each row, Nan where a row has no valid values
+    """
+    num_valid = valid.sum(axis=1)
+    sums = np.sum(np.where(valid, values, 0.0), axis=1, dtype=np.float64)
+    return np.divide(sums, num_valid, out=np.full(values.shape[0], np.nan), where=num_valid > 0)
+
+
+def median_of_valid(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """median of the valid values of each row of a 2d array, as np.median() of each row's
+    valid values
+
+    Args:
+        values (np.ndarray): values, shape (n, m)
+        valid (np.ndarray): True where values are included, shape (n, m)
+
+    Returns:
+        np.ndarray: median of each row, Nan where a row has no valid values
+    """
+    medians = np.full(values.shape[0], np.nan)
+    if values.shape[1] == 0:
+        return medians
+    num_valid = valid.sum(axis=1)
+    sorted_values = np.sort(np.where(valid, values, np.inf), axis=1)
+    rows = np.arange(values.shape[0])
+    middle_values = (
+        sorted_values[rows, np.maximum(num_valid - 1, 0) // 2]
+        + sorted_values[rows, np.minimum(num_valid // 2, values.shape[1] - 1)]
+    ) / 2
+    medians[num_valid > 0] = middle_values[num_valid > 0]
+    return medians
+
+
 def datetime2year(date_dt):
     """calculate decimal year from datetime
 
@@ -75,6 +144,44 @@ def datetime2year(date_dt):
     return date_dt.year + year_part / year_length
 
 
+def median_dem_heights_around_points(
+    thisdem: Dem, xpos: np.ndarray, ypos: np.ndarray, pulse_limited_footprint_size: int
+) -> np.ndarray:
+    """Find the median DEM height in a rectangle of width
+    pulse_limited_footprint_size around each of a set of x,y points
+
+    Args:
+        thisdem (Dem): Dem object used for Roemer/LEPTA correction
+        xpos (np.ndarray): x locations of points in m
+        ypos (np.ndarray): y locations of points in m
+        pulse_limited_footprint_size (int): pulse limited footprint size in m
+
+    Returns:
+        np.ndarray: median DEM heights, Nan where a rectangle has no valid DEM heights
+    """
+    # get the grid index ranges of the rectangular bounds of the pulse limited footprint
+    # about each point
+    half_width = pulse_limited_footprint_size / 2 + thisdem.binsize
+    segment_indices = thisdem.get_segment_indices(
+        xpos - half_width, xpos + half_width, ypos - half_width, ypos + half_width
+    )
+    segment_cells = np.maximum(segment_indices[:, 1] - segment_indices[:, 0], 0) * np.maximum(
+        segment_indices[:, 3] - segment_indices[:, 2], 0
+    )
+    batch_size = max(1, MAX_BATCH_POINTS // max(int(segment_cells.max(initial=1)), 1))
+
+    medians = np.full(len(segment_indices), np.nan)
+    for batch_start in range(0, len(segment_indices), batch_size):
+        batch = slice(batch_start, batch_start + batch_size)
+        _, _, zdem = thisdem.get_segments_by_indices(segment_indices[batch])
+        zdem = zdem.reshape(zdem.shape[0], -1)
+
+        # Only use DEM heights which are valid and in a sensible range
+        # this step removes DEM values set to fill_value (a high number)
+        medians[batch] = median_of_valid(zdem, zdem < 5000.0)
+    return medians
+
+
 def median_dem_height_around_a_point(
     thisdem: Dem, xpos: float, ypos: float, pulse_limited_footprint_size: int
 ):
@@ -90,45 +197,18 @@ def median_dem_height_around_a_point(
     Returns:
         float|None
     """
-    # get the rectangular bounds of the pulse limited footprint
-    # about the point
-
     if thisdem is None:
         raise ValueError("no Dem passed to median_dem_height_around_a_point")
 
-    x_min = xpos - (pulse_limited_footprint_size / 2 + thisdem.binsize)
-    x_max = xpos + (pulse_limited_footprint_size / 2 + thisdem.binsize)
-    y_min = ypos - (pulse_limited_footprint_size / 2 + thisdem.binsize)
-    y_max = ypos + (pulse_limited_footprint_size / 2 + thisdem.binsize)
-
-    segment = [(x_min, x_max), (y_min, y_max)]
-
-    # Extract the rectangular segment from the DEM
-    try:
-        _, _, zdem = thisdem.get_segment(segment, grid_xy=True, flatten=False)
-    except (IndexError, ValueError, TypeError, AttributeError, MemoryError):
-        return None
-    except Exception:  # pylint: disable=W0718
-        return None
-
-    # Check DEM segment for bad values and remove
-    nan_mask = np.isnan(zdem)
-    include_only_good_zdem_indices = np.where(~nan_mask)[0]
-    if len(include_only_good_zdem_indices) < 1:
+    median_height = median_dem_heights_around_points(
+        thisdem,
+        np.array([xpos], dtype=float),
+        np.array([ypos], dtype=float),
+        pulse_limited_footprint_size,
+    )[0]
+    if np.isnan(median_height):
         return None
-
-    zdem = zdem[include_only_good_zdem_indices]
-
-    # Only keep DEM heights which are in a sensible range
-    # this step removes DEM values set to fill_value (a high number)
-    valid_dem_heights = np.where(zdem < 5000.0)[0]
-    if len(valid_dem_heights) < 1:
-        return None
-
-    zdem = zdem[valid_dem_heights]
-
-    # smoothed_zdem = median_filter(zdem, size=3)
-    return np.nanmedian(zdem)
+    return median_height
 
 
 def geolocate_lepta(
@@ -201,6 +281,18 @@ def geolocate_lepta(
     # Additional options
     include_dhdt_correction = config["lrm_lepta_geolocation"]["include_dhdt_correction"]
 
+    if not (use_full_leading_edge or use_window_around_retracking_point):
+        raise ValueError("No LEPTA window method selected")
+    if not (use_mean_xy_in_window or use_xy_at_min_dem_to_sat_distance):
+        raise ValueError("no method selected for LEPTA POCA(x,y)")
+    if not (
+        use_mean_z_in_window
+        or use_median_z_in_window
+        or use_z_at_min_dem_to_sat_distance
+        or use_median_height_around_point
+    ):
+        raise ValueError("no method selected for LEPTA POCA(z)")
+
     # ------------------------------------------------------------------------------------
 
     # Get nadir latitude, longitude and satellite altitude from L1b
@@ -209,9 +301,7 @@ def geolocate_lepta(
     altitudes = l1b["alt_20_ku"][:].data
 
     # Transform to X,Y locs in DEM projection
-    nadir_x, nadir_y = thisdem.lonlat_to_xy_transformer.transform(
-        lon_20_ku, lat_20_ku
-    )  # pylint: disable=unpacking-non-sequence
+    nadir_x, nadir_y = transform_lonlat(thisdem.lonlat_to_xy_transformer, lon_20_ku, lat_20_ku)
 
     # Interpolate DEM heights at nadir locations
     heights_at_nadir = thisdem.interp_dem(nadir_x, nadir_y)
@@ -225,6 +315,7 @@ def geolocate_lepta(
     height_20_ku = np.full_like(nadir_x, dtype=float, fill_value=np.nan)
 
     # if using a dh/dt correction to the DEM we need to calculate the time diff in years
+    year_difference = 0.0
     if include_dhdt_correction:
         time_20_ku = l1b["time_20_ku"][:].data[0]
 
@@ -237,263 +328,196 @@ def geolocate_lepta(
 
         year_difference = track_year - thisdem.reference_year
 
+    # Grid index ranges of the rectangular DEM segment about each record, from bounds
+    # adjusted for across track beam width and the dem posting
+    half_width = across_track_beam_width / 2 + thisdem.binsize
+    segment_indices = thisdem.get_segment_indices(
+        nadir_x - half_width, nadir_x + half_width, nadir_y - half_width, nadir_y + half_width
+    )
+
+    # Take the segments from the median filtered level of the DEM if it is in the grid
+    # cache (see Dem.get_level()), rather than median filtering each record's segment
+    median_filter_segment = config["lrm_lepta_geolocation"]["median_filter"]
+    search_dem = thisdem
+    if median_filter_segment and not thisdem.tiled:
+        level = thisdem.get_level(median_filter_size=3, cached_only=True)
+        if level is not None:
+            search_dem = level
+            median_filter_segment = False
+
     # ------------------------------------------------------------------------------------
-    #  Loop through each track record
+    #  Search the DEM segments of the included track records, in batches of records
     # ------------------------------------------------------------------------------------
 
-    for i, _ in enumerate(nadir_x):
-        # By default, set POCA x,y to nadir, and height to Nan
-        poca_x[i] = nadir_x[i]
-        poca_y[i] = nadir_y[i]
-        poca_z[i] = np.nan
-
-        # if record is excluded due to previous checks, then skip
-        if not waveforms_to_include[i]:
-            continue
-
-        # get the rectangular bounds about the track, adjusted for across track beam width and
-        # the dem posting
-        x_min = nadir_x[i] - (across_track_beam_width / 2 + thisdem.binsize)
-        x_max = nadir_x[i] + (across_track_beam_width / 2 + thisdem.binsize)
-        y_min = nadir_y[i] - (across_track_beam_width / 2 + thisdem.binsize)
-        y_max = nadir_y[i] + (across_track_beam_width / 2 + thisdem.binsize)
-
-        segment = [(x_min, x_max), (y_min, y_max)]
-
-        # Extract the rectangular segment from the DEM
-        try:
-            xdem, ydem, zdem = thisdem.get_segment(segment, grid_xy=True, flatten=False)
-        except (IndexError, ValueError, TypeError, AttributeError, MemoryError):
-            slope_ok[i] = False
-            continue
-        except Exception:  # pylint: disable=W0718
-            slope_ok[i] = False
-            continue
-
-        if config["lrm_lepta_geolocation"]["median_filter"]:
-            smoothed_zdem = median_filter(zdem, size=3)
-        else:
-            smoothed_zdem = zdem
+    # By default, set POCA x,y to nadir, and height to Nan
+    poca_x[:] = nadir_x
+    poca_y[:] = nadir_y
 
-        xdem = xdem.flatten()
-        ydem = ydem.flatten()
-        zdem = smoothed_zdem.flatten()
+    if use_full_leading_edge:
+        leading_edge_start_bins = np.array([le[0] for le in leading_edge_start], dtype=float)
+        leading_edge_stop_bins = np.array([le[0] for le in leading_edge_stop], dtype=float)
 
-        # Compute distance between each dem location and nadir in (x,y,z)
-        dem_to_nadir_dists = calculate_distances(
-            nadir_x[i], nadir_y[i], heights_at_nadir[i], xdem, ydem, zdem
+    included_records = np.flatnonzero(waveforms_to_include)
+    segment_cells = np.maximum(segment_indices[:, 1] - segment_indices[:, 0], 0) * np.maximum(
+        segment_indices[:, 3] - segment_indices[:, 2], 0
+    )
+    batch_size = max(1, MAX_BATCH_POINTS // max(int(segment_cells.max(initial=1)), 1))
+
+    for batch_start in range(0, len(included_records), batch_size):
+        batch = included_records[batch_start : batch_start + batch_size]
+
+        # Extract the rectangular segments from the DEM, stacked as (records, rows, cols)
+        xdem, ydem, zdem = search_dem.get_segments_by_indices(segment_indices[batch])
+        if median_filter_segment:
+            zdem = median_filter_segments(zdem, segment_indices[batch], 3)
+        xdem = xdem.reshape(len(batch), -1)
+        ydem = ydem.reshape(len(batch), -1)
+        zdem = zdem.reshape(len(batch), -1)
+
+        # Compute distance between each dem location and nadir in (x,y,z), and find where
+        # it is within beam (ie extract circular area), with DEM heights in a sensible
+        # range (this step removes DEM values set to fill_value, a high number)
+        xy_distances_squared = (xdem - nadir_x[batch, None]) ** 2 + (
+            ydem - nadir_y[batch, None]
+        ) ** 2
+        dem_to_nadir_dists = calculate_distances_batch(
+            xy_distances_squared, heights_at_nadir[batch], zdem
         )
+        in_beam = (dem_to_nadir_dists < (across_track_beam_width / 2.0)) & (zdem < 5000.0)
 
-        # find where dem_to_nadir_dists is within beam. ie extract circular area
-        include_dem_indices = np.where(
-            np.array(dem_to_nadir_dists) < (across_track_beam_width / 2.0)
-        )[0]
-        if len(include_dem_indices) == 0:
-            slope_ok[i] = False
-            continue
-
-        xdem = xdem[include_dem_indices]
-        ydem = ydem[include_dem_indices]
-        zdem = zdem[include_dem_indices]
-
-        # Check DEM segment for bad values and remove
-        nan_mask = np.isnan(zdem)
-        include_only_good_zdem_indices = np.where(~nan_mask)[0]
-        if len(include_only_good_zdem_indices) < 1:
-            slope_ok[i] = False
-            continue
-
-        xdem = xdem[include_only_good_zdem_indices]
-        ydem = ydem[include_only_good_zdem_indices]
-        zdem = zdem[include_only_good_zdem_indices]
-
-        # Only keep DEM heights which are in a sensible range
-        # this step removes DEM values set to fill_value (a high number)
-        valid_dem_heights = np.where(zdem < 5000.0)[0]
-        if len(valid_dem_heights) < 1:
-            slope_ok[i] = False
-            continue
-
-        xdem = xdem[valid_dem_heights]
-        ydem = ydem[valid_dem_heights]
-        zdem = zdem[valid_dem_heights]
-
-        # Correct DEM elevations for dh/dt changes
-        if include_dhdt_correction:
-            if thisdhdt is not None:
-                # find dh/dt * year_difference at each DEM location
-                zdem += thisdhdt.interp_dhdt(xdem, ydem) * year_difference
+        # Correct DEM elevations for dh/dt changes, interpolating dh/dt once for the batch
+        if include_dhdt_correction and thisdhdt is not None:
+            zdem[in_beam] += thisdhdt.interp_dhdt(xdem[in_beam], ydem[in_beam]) * year_difference
 
         # Compute distance between each remaining dem location and satellite
-        dem_to_sat_dists = calculate_distances(
-            nadir_x[i], nadir_y[i], altitudes[i], xdem, ydem, zdem
-        )
+        dem_to_sat_dists = calculate_distances_batch(xy_distances_squared, altitudes[batch], zdem)
 
-        # ----------------------------------------------------------------------------------------
+        # ----------------------------------------------------------------------------------
         #   Limit DEM points by finding those that would be within a range window
-        #   defined by the retracking point +/- delta_range_offset (defined by Li as 1.25m)
-        # ----------------------------------------------------------------------------------------
-
-        # range_to_window_start = (
-        #     geo_corrected_tracker_range[i] - (reference_bin_index) * range_bin_size
-        # )
-        # range_to_window_end = (
-        #     geo_corrected_tracker_range[i] + (num_bins - reference_bin_index) * range_bin_size
-        # )
-
-        # --------------------------------------------------------------------------------------
-        # Find locations in DEM to Satellite distances are within the range of the full
-        # width of the leading edge
-        # --------------------------------------------------------------------------------------
+        # ----------------------------------------------------------------------------------
+
         if use_full_leading_edge:
-            range_to_le_start = (
-                geo_corrected_tracker_range[i]
-                - (reference_bin_index - leading_edge_start[i][0]) * range_bin_size
+            # range window of the full width of the leading edge
+            range_start = (
+                geo_corrected_tracker_range[batch]
+                - (reference_bin_index - leading_edge_start_bins[batch]) * range_bin_size
             )
-            range_to_le_end = (
-                geo_corrected_tracker_range[i]
-                + (leading_edge_stop[i][0] - reference_bin_index) * range_bin_size
+            range_end = (
+                geo_corrected_tracker_range[batch]
+                + (leading_edge_stop_bins[batch] - reference_bin_index) * range_bin_size
+            )
+            in_window = (
+                in_beam
+                & (dem_to_sat_dists >= range_start[:, None])
+                & (dem_to_sat_dists <= range_end[:, None])
+            )
+        else:
+            # range window of the retracking point +/- delta_range_offset (defined by Li as
+            # 1.25m)
+            range_to_retracking_point = (
+                geo_corrected_tracker_range[batch] + retracker_correction[batch]
             )
-
-            indices_within_range_window = np.where(
-                np.logical_and(
-                    dem_to_sat_dists >= range_to_le_start,
-                    dem_to_sat_dists <= range_to_le_end,
-                )
-            )[0]
-
-        # --------------------------------------------------------------------------------------
-        # Find locations in DEM to Satellite distances are within the range of the
-        # retracking point +/- an offset
-        # --------------------------------------------------------------------------------------
-        elif use_window_around_retracking_point:
-            range_to_retracking_point = geo_corrected_tracker_range[i] + retracker_correction[i]
             range_start = range_to_retracking_point - delta_range_offset
             range_end = range_to_retracking_point + delta_range_offset
+            in_window = (
+                in_beam
+                & (dem_to_sat_dists >= range_start[:, None])
+                & (dem_to_sat_dists <= range_end[:, None])
+            )
 
-            indices_within_range_window = np.where(
-                np.logical_and(
-                    dem_to_sat_dists >= range_start,
-                    dem_to_sat_dists <= range_end,
+            # where the window is empty, move it to start at the closest DEM point
+            empty = ~in_window.any(axis=1)
+            if np.any(empty):
+                closest_dem_to_sat_distance = np.min(
+                    np.where(in_beam[empty], dem_to_sat_dists[empty], np.inf), axis=1
+                )
+                diff = closest_dem_to_sat_distance - range_start[empty]
+                range_start = range_start[empty] + diff
+                range_end = range_end[empty] + diff
+                in_window[empty] = (
+                    in_beam[empty]
+                    & (dem_to_sat_dists[empty] >= range_start[:, None])
+                    & (dem_to_sat_dists[empty] <= range_end[:, None])
                 )
-            )[0]
-
-            if len(indices_within_range_window) == 0:
-                closest_dem_to_sat_distance = np.min(dem_to_sat_dists)
-                diff = closest_dem_to_sat_distance - range_start
-                range_start += diff
-                range_end += diff
-
-                indices_within_range_window = np.where(
-                    np.logical_and(
-                        dem_to_sat_dists >= range_start,
-                        dem_to_sat_dists <= range_end,
-                    )
-                )[0]
-        else:
-            raise ValueError("No LEPTA window method selected")
-        # --------------------------------------------------------------------------------------
-
-        if len(indices_within_range_window) == 0:
-            log.debug("No points found in DEM using LEPTA delta range offset")
-            slope_ok[i] = False
-            continue
-
-        # Reduce DEM points to those found within range window
-        xdem = xdem[indices_within_range_window]
-        ydem = ydem[indices_within_range_window]
-        zdem = zdem[indices_within_range_window]
-        dem_to_sat_dists = np.array(dem_to_sat_dists)[indices_within_range_window]
 
-        # --------------------------------------------------------------------------------------
+        has_window = in_window.any(axis=1)
+        if not np.all(has_window):
+            log.debug(
+                "No points found in DEM using LEPTA delta range offset for %d records",
+                np.count_nonzero(~has_window),
+            )
+            slope_ok[batch[~has_window]] = False
+        batch = batch[has_window]
+        xdem = xdem[has_window]
+        ydem = ydem[has_window]
+        zdem = zdem[has_window]
+        in_window = in_window[has_window]
+        dem_to_sat_dists = dem_to_sat_dists[has_window]
+        records = np.arange(len(batch))
+
+        # ----------------------------------------------------------------------------------
         #  Find Location of POCA x,y
-        # --------------------------------------------------------------------------------------
-        index_of_closest = None
+        # ----------------------------------------------------------------------------------
+        index_of_closest = np.argmin(np.where(in_window, dem_to_sat_dists, np.inf), axis=1)
 
         if use_mean_xy_in_window:
             # use the mean location as per Li et al (2022):https://doi.org/10.5194/tc-16-2225-2022
             # section 3.13
-            poca_x[i] = np.mean(xdem)
-            poca_y[i] = np.mean(ydem)
-        elif use_xy_at_min_dem_to_sat_distance:
-            index_of_closest = np.argmin(dem_to_sat_dists)
-            if index_of_closest < 0 or index_of_closest > (len(xdem) - 1):
-                slope_ok[i] = False
-                continue
-            poca_x[i] = xdem[index_of_closest]
-            poca_y[i] = ydem[index_of_closest]
+            poca_x[batch] = mean_of_valid(xdem, in_window)
+            poca_y[batch] = mean_of_valid(ydem, in_window)
         else:
-            raise ValueError("no method selected for LEPTA POCA(x,y)")
+            poca_x[batch] = xdem[records, index_of_closest]
+            poca_y[batch] = ydem[records, index_of_closest]
 
-        # --------------------------------------------------------------------------------------
+        # ----------------------------------------------------------------------------------
         #  Find Location of POCA z
-        # --------------------------------------------------------------------------------------
+        # ----------------------------------------------------------------------------------
 
         if use_mean_z_in_window:
-            poca_z[i] = np.mean(zdem)
+            poca_z[batch] = mean_of_valid(zdem, in_window)
         elif use_median_z_in_window:
-            poca_z[i] = np.median(zdem)
-
+            poca_z[batch] = median_of_valid(zdem, in_window)
         elif use_z_at_min_dem_to_sat_distance:
-            # Find index of minimum range (ie heighest point) in remaining DEM points
-            # and assign this as POCA
-            if index_of_closest is None:
-                index_of_closest = np.argmin(dem_to_sat_dists)
-                if index_of_closest < 0 or index_of_closest > (len(xdem) - 1):
-                    slope_ok[i] = False
-                    continue
-            poca_z[i] = zdem[index_of_closest]
-
-        elif use_median_height_around_point:
-            poca_z[i] = median_dem_height_around_a_point(
+            # the heighest point in the window
+            poca_z[batch] = zdem[records, index_of_closest]
+        else:
+            poca_z[batch] = median_dem_heights_around_points(
                 thisdem,
-                poca_x[i],
-                poca_y[i],
+                poca_x[batch],
+                poca_y[batch],
                 pulse_limited_footprint_size_lrm,
             )
-        else:
-            raise ValueError("no method selected for LEPTA POCA(z)")
 
-        # --------------------------------------------------------------------------------------
+        # ----------------------------------------------------------------------------------
         #  Calculate Slope Correction
-        # --------------------------------------------------------------------------------------
+        # ----------------------------------------------------------------------------------
 
-        dem_to_sat_dists = calculate_distances(
-            nadir_x[i], nadir_y[i], altitudes[i], [poca_x[i]], [poca_y[i]], [poca_z[i]]
+        dem_to_sat_dists = np.sqrt(
+            (poca_x[batch] - nadir_x[batch]) ** 2
+            + (poca_y[batch] - nadir_y[batch]) ** 2
+            + (poca_z[batch] - altitudes[batch]) ** 2
         )
 
         # Calculate the slope correction to height
-        slope_correction[i] = dem_to_sat_dists[0] + poca_z[i] - altitudes[i]
+        slope_correction[batch] = dem_to_sat_dists + poca_z[batch] - altitudes[batch]
 
     # Transform all POCA x,y to lon,lat
     lon_poca_20_ku, lat_poca_20_ku = thisdem.xy_to_lonlat_transformer.transform(poca_x, poca_y)
 
-    # Calculate height as altitude-(corrected range)+slope_correction
+    # Calculate height as altitude-(corrected range)+slope_correction, for grounded ice only
     height_20_ku = np.full_like(lat_20_ku, np.nan)
+    has_height = np.isfinite(geo_corrected_tracker_range) & slope_ok & (surface_type_20_ku == 1)
+    height_20_ku[has_height] = (
+        altitudes[has_height]
+        - (geo_corrected_tracker_range[has_height] + retracker_correction[has_height])
+        + slope_correction[has_height]
+    )
 
-    num_measurements = len(lat_20_ku)
-    for i in range(num_measurements):
-        if np.isfinite(geo_corrected_tracker_range[i]):
-            if slope_ok[i] and surface_type_20_ku[i] == 1:  # grounded ice type only
-                height_20_ku[i] = (
-                    altitudes[i]
-                    - (geo_corrected_tracker_range[i] + retracker_correction[i])
-                    + slope_correction[i]
-                )
-            else:
-                height_20_ku[i] = np.nan
-        else:
-            height_20_ku[i] = np.nan
-        # Set POCA lat,lon to nadir if no slope correction
-
-        if (
-            (not np.isfinite(lat_poca_20_ku[i]))
-            or (not np.isfinite(lon_poca_20_ku[i]))
-            or (not slope_ok[i])
-        ):
-            lat_poca_20_ku[i] = lat_20_ku[i]
-            lon_poca_20_ku[i] = lon_20_ku[i]
-            height_20_ku[i] = np.nan
+    # Set POCA lat,lon to nadir if no slope correction
+    no_poca = ~np.isfinite(lat_poca_20_ku) | ~np.isfinite(lon_poca_20_ku) | ~slope_ok
+    lat_poca_20_ku[no_poca] = lat_20_ku[no_poca]
+    lon_poca_20_ku[no_poca] = lon_20_ku[no_poca]
+    height_20_ku[no_poca] = np.nan
 
     # ----------------------------------------------------------------
     # Doppler Slope Correction
@@ -502,9 +526,7 @@ def geolocate_lepta(
     if config["lrm_lepta_geolocation"]["include_slope_doppler_correction"]:
         idx = np.where(np.isfinite(height_20_ku))[0]
         if len(idx) > 0:
-            ecef = pyproj.Proj(proj="geocent", ellps="WGS84", datum="WGS84")
-            lla = pyproj.Proj(proj="latlong", ellps="WGS84", datum="WGS84")
-            this_transform = Transformer.from_proj(lla, ecef, always_xy=True)
+            this_transform = get_transformer(WGS84_LLA, WGS84_ECEF, always_xy=True)
 
             (  # pylint: disable=unpacking-non-sequence
                 sat_x,
@@ -5,11 +5,14 @@ import math
 from typing import Tuple
 
 import numpy as np
-import pyproj
 from netCDF4 import Dataset  # pylint:disable=E0611
-from pyproj import Transformer
 
 from clev2er.utils.cs2.geolocate import lrm_slope
+from clev2er.utils.projections.transformer_cache import (
+    WGS84_ECEF,
+    WGS84_LLA,
+    get_transformer,
+)
 
 # too-many-statements, pylint: disable=R0915
 # too-many-locals, pylint: disable=R0914
@@ -134,9 +137,7 @@ def geolocate_lrm(
     idx = np.where(do_sdop)[0]
 
     if len(idx) > 0:
-        ecef = pyproj.Proj(proj="geocent", ellps="WGS84", datum="WGS84")
-        lla = pyproj.Proj(proj="latlong", ellps="WGS84", datum="WGS84")
-        trans = Transformer.from_proj(lla, ecef, always_xy=True)
+        trans = get_transformer(WGS84_LLA, WGS84_ECEF, always_xy=True)
 
         sat_x, sat_y, sat_z = trans.transform(  # pylint: disable=E0633
             xx=l1b["lon_20_ku"][idx],
@@ -12,15 +12,18 @@ from datetime import datetime, timedelta  # date and time functions
 from typing import Tuple
 
 import numpy as np
-import pyproj
 from netCDF4 import Dataset  # pylint: disable=no-name-in-module
-from pyproj import Transformer
-from scipy.interpolate import interpn
 from scipy.ndimage import generic_filter, median_filter
 
 from clev2er.utils.cs2.geolocate.lrm_slope import slope_doppler
-from clev2er.utils.dems.dems import Dem
+from clev2er.utils.dems.dems import Dem, interp_regular_grid_lattice
 from clev2er.utils.dhdt_data.dhdt import Dhdt
+from clev2er.utils.projections.projection_cache import transform_lonlat
+from clev2er.utils.projections.transformer_cache import (
+    WGS84_ECEF,
+    WGS84_LLA,
+    get_transformer,
+)
 
 # pylint: disable=too-many-arguments,too-many-locals,too-many-branches,too-many-statements
 
@@ -28,6 +31,10 @@ log = logging.getLogger(__name__)
 
 EARTH_RADIUS = 6378137.0
 
+# maximum number of DEM points searched at once, which limits the number of track records
+# in each batch of the POCA search
+MAX_BATCH_POINTS = 1_000_000
+
 
 def calculate_distances3d(
     x1_coord: float,
@@ -184,6 +191,304 @@ def find_poca(
     )
 
 
+def find_poca_batch(
+    zdem: np.ndarray,
+    xdem: np.ndarray,
+    ydem: np.ndarray,
+    nadir_x: np.ndarray,
+    nadir_y: np.ndarray,
+    alt_pt: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """find_poca() for a batch of records, each with its own set of DEM points
+
+    Args:
+        zdem (np.ndarray): DEM height values, shape (records, points), Nan where not a
+                           point of the record
+        xdem (np.ndarray): x locations of DEM points (m), shape (records, points)
+        ydem (np.ndarray): y locations of DEM points (m), shape (records, points)
+        nadir_x (np.ndarray): x location of nadir of each record (m)
+        nadir_y (np.ndarray): y location of nadir of each record (m)
+        alt_pt (np.ndarray): altitude at nadir of each record (m)
+
+    Returns:
+        (np.ndarray,np.ndarray,np.ndarray,np.ndarray,np.ndarray): poca_x, poca_y, poca_z,
+        slope_correction_to_height, flg_success (False where a record has no DEM points)
+    """
+    records = np.arange(zdem.shape[0])
+    if zdem.shape[1] == 0:
+        no_poca = np.full(len(records), np.nan)
+        return no_poca, no_poca, no_poca, no_poca, np.zeros(len(records), dtype=bool)
+
+    dem_dx_vec = xdem - nadir_x[:, None]
+    dem_dy_vec = ydem - nadir_y[:, None]
+    dem_dmag_squared = dem_dx_vec**2 + dem_dy_vec**2
+
+    # zdem - alt_pt is computed at the precision find_poca() uses for a scalar alt_pt
+    dem_height_diff = np.subtract(
+        zdem, alt_pt[:, None], dtype=np.result_type(zdem, alt_pt.dtype.type(0))
+    )
+    dem_dz_vec = dem_height_diff - dem_dmag_squared / (2.0 * EARTH_RADIUS)
+    dem_range_vec = np.sqrt(dem_dmag_squared + (dem_dz_vec) ** 2)
+
+    # find range to, and indices of, closest dem pixel of each record
+    dem_range_vec[np.isnan(dem_range_vec)] = np.inf
+    dempoca_ind = np.argmin(dem_range_vec, axis=1)
+    dem_rpoca = dem_range_vec[records, dempoca_ind]
+    poca_z = zdem[records, dempoca_ind]
+    flg_success = np.isfinite(dem_rpoca) & (poca_z != -9999)
+
+    return (
+        xdem[records, dempoca_ind],
+        ydem[records, dempoca_ind],
+        poca_z,
+        dem_rpoca + poca_z - alt_pt,
+        flg_success,
+    )
+
+
+def median_filter_segments(
+    zdem: np.ndarray, segment_indices: np.ndarray, median_filter_width: int
+) -> np.ndarray:
+    """median filter each of a stack of DEM segments, as median_filter(segment) would
+
+    Args:
+        zdem (np.ndarray): segments, shape (n, rows, cols), from Dem.get_segments_by_indices()
+        segment_indices (np.ndarray): [row_start, row_end, col_start, col_end] of each
+                                      segment, shape (n, 4)
+        median_filter_width (int): width of median filter
+
+    Returns:
+        np.ndarray: filtered segments. Padding (beyond the size of each segment) is Nan.
+    """
+    nrows = np.maximum(segment_indices[:, 1] - segment_indices[:, 0], 0)
+    ncols = np.maximum(segment_indices[:, 3] - segment_indices[:, 2], 0)
+    full_size = (nrows == zdem.shape[1]) & (ncols == zdem.shape[2])
+
+    filtered = np.full_like(zdem, np.nan)
+    if np.any(full_size) and zdem[0].size > 0:
+        filtered[full_size] = median_filter(
+            zdem[full_size], size=(1, median_filter_width, median_filter_width)
+        )
+    # segments clipped at the edge of the DEM are filtered at their own size
+    for i in np.flatnonzero(~full_size & (nrows > 0) & (ncols > 0)):
+        filtered[i, : nrows[i], : ncols[i]] = median_filter(
+            zdem[i, : nrows[i], : ncols[i]], size=median_filter_width
+        )
+    return filtered
+
+
+def sliding_window_poca_batch(
+    zdem: np.ndarray,
+    xdem: np.ndarray,
+    ydem: np.ndarray,
+    nadir_x: np.ndarray,
+    nadir_y: np.ndarray,
+    alt_pt: np.ndarray,
+    window_size: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """find the POCA of each of a batch of records as the first corner of the window of
+       the DEM segment with the smallest mean distance to the satellite
+
+    The window means are found from summed-area tables of the distances, instead of
+    averaging each window. Windows containing a Nan distance are not used.
+
+    Args:
+        zdem (np.ndarray): DEM segments, shape (records, rows, cols)
+        xdem (np.ndarray): x locations of DEM segments (m), Nan where zdem is Nan
+        ydem (np.ndarray): y locations of DEM segments (m), Nan where zdem is Nan
+        nadir_x (np.ndarray): x location of nadir of each record (m)
+        nadir_y (np.ndarray): y location of nadir of each record (m)
+        alt_pt (np.ndarray): altitude at nadir of each record (m)
+        window_size (int): width of window in grid cells
+
+    Returns:
+        (np.ndarray,np.ndarray,np.ndarray,np.ndarray): poca_x, poca_y, poca_z,
+        slope_correction_to_height. Where a record has no window without Nan, the POCA is
+        the first cell of its segment.
+    """
+    nrecords, nrows, ncols = zdem.shape
+    records = np.arange(nrecords)
+    height_dtype = np.result_type(zdem, alt_pt.dtype.type(0))
+    distances = np.sqrt(
+        (xdem - nadir_x[:, None, None]) ** 2
+        + (ydem - nadir_y[:, None, None]) ** 2
+        + np.subtract(zdem, alt_pt[:, None, None], dtype=height_dtype) ** 2
+    )
+
+    min_position = np.zeros((nrecords, 2), dtype=np.intp)
+    if 0 < window_size <= min(nrows, ncols):
+        # distances relative to the smallest of each segment, to keep the sums precise
+        has_distance = np.isfinite(distances)
+        reference = np.min(np.where(has_distance, distances, np.inf), axis=(1, 2))
+        reference[~np.isfinite(reference)] = 0.0
+
+        def window_sums(values: np.ndarray) -> np.ndarray:
+            table = np.zeros((nrecords, nrows + 1, ncols + 1))
+            table[:, 1:, 1:] = values.cumsum(axis=1).cumsum(axis=2)
+            return (
+                table[:, window_size:, window_size:]
+                - table[:, :-window_size, window_size:]
+                - table[:, window_size:, :-window_size]
+                + table[:, :-window_size, :-window_size]
+            )
+
+        mean_distances = window_sums(
+            np.where(has_distance, distances - reference[:, None, None], 0.0)
+        ) / (window_size * window_size)
+        mean_distances[window_sums(~has_distance) > 0.5] = np.inf
+
+        best_window = np.argmin(mean_distances.reshape(nrecords, -1), axis=1)
+        found = np.isfinite(mean_distances.reshape(nrecords, -1)[records, best_window])
+        min_position[found] = np.column_stack(
+            np.unravel_index(best_window[found], mean_distances.shape[1:])
+        )
+
+    rows, cols = min_position[:, 0], min_position[:, 1]
+    if nrows == 0 or ncols == 0:
+        no_poca = np.full(nrecords, np.nan)
+        return no_poca, no_poca, no_poca, no_poca
+    poca_x = xdem[records, rows, cols]
+    poca_y = ydem[records, rows, cols]
+    poca_z = zdem[records, rows, cols]
+
+    poca_z = poca_z.astype(np.float64)
+    dem_to_sat_dists = np.sqrt(
+        (poca_x - nadir_x) ** 2 + (poca_y - nadir_y) ** 2 + (poca_z - alt_pt) ** 2
+    )
+    return poca_x, poca_y, poca_z, dem_to_sat_dists + poca_z - alt_pt
+
+
+def fine_search_batch(
+    thisdem_fine: Dem,
+    approx_poca_x: np.ndarray,
+    approx_poca_y: np.ndarray,
+    segment_half_width: float,
+    search_radius: float,
+    fine_grid_sampling: float,
+    nadir_x: np.ndarray,
+    nadir_y: np.ndarray,
+    alt_pt: np.ndarray,
+    thisdhdt: Dhdt | None = None,
+    year_difference: float = 0.0,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """refine the approximate POCAs of a batch of records, by finding the POCA of each
+       in its segment of the fine DEM, linearly resampled to fine_grid_sampling
+
+    Args:
+        thisdem_fine (Dem): fine DEM
+        approx_poca_x (np.ndarray): x of approximate POCA of each record (m)
+        approx_poca_y (np.ndarray): y of approximate POCA of each record (m)
+        segment_half_width (float): half width of the square DEM segment about each
+                                    approximate POCA (m)
+        search_radius (float): radius about each approximate POCA to search (m)
+        fine_grid_sampling (float): resampled grid spacing (m)
+        nadir_x (np.ndarray): x location of nadir of each record (m)
+        nadir_y (np.ndarray): y location of nadir of each record (m)
+        alt_pt (np.ndarray): altitude at nadir of each record (m)
+        thisdhdt (Dhdt|None, optional): dh/dt to correct DEM elevations with.
+                                        Defaults to None.
+        year_difference (float, optional): years from DEM reference year to track.
+                                           Defaults to 0.0.
+
+    Returns:
+        (np.ndarray,np.ndarray,np.ndarray,np.ndarray,np.ndarray): poca_x, poca_y, poca_z,
+        slope_correction_to_height, flg_success
+    """
+    nrecords = len(approx_poca_x)
+    poca_x = np.full(nrecords, np.nan)
+    poca_y = np.full(nrecords, np.nan)
+    poca_z = np.full(nrecords, np.nan)
+    slope_correction = np.full(nrecords, np.nan)
+    flg_success = np.zeros(nrecords, dtype=bool)
+
+    x_min = approx_poca_x - segment_half_width
+    x_max = approx_poca_x + segment_half_width
+    y_min = approx_poca_y - segment_half_width
+    y_max = approx_poca_y + segment_half_width
+
+    # extent of each record's segment of the fine DEM, outside which resampling gives Nan
+    row_start, row_end, col_start, col_end = thisdem_fine.get_segment_indices(
+        x_min, x_max, y_min, y_max
+    ).T
+    has_segment = (row_end > row_start) & (col_end > col_start)
+    segment_x_min = thisdem_fine.xdem[col_start]
+    segment_x_max = thisdem_fine.xdem[np.maximum(col_end - 1, 0)]
+    segment_y_min = thisdem_fine.ydem[np.maximum(row_end - 1, 0)]
+    segment_y_max = thisdem_fine.ydem[row_start]
+
+    # number of fine grid x,y values of each record, as np.mgrid[x_min:x_max:sampling]
+    num_x = np.ceil((x_max - x_min) / (fine_grid_sampling * 1.0)).astype(int)
+    num_y = np.ceil((y_max - y_min) / (fine_grid_sampling * 1.0)).astype(int)
+
+    for grid_num_x, grid_num_y in set(zip(num_x.tolist(), num_y.tolist())):
+        same_grid_size = np.flatnonzero((num_x == grid_num_x) & (num_y == grid_num_y))
+        grid_points = max(grid_num_x * grid_num_y, 1)
+        batch_size = max(1, MAX_BATCH_POINTS // grid_points)
+        x_offsets = np.arange(grid_num_x, dtype=np.float64) * fine_grid_sampling
+        y_offsets = np.arange(grid_num_y, dtype=np.float64) * fine_grid_sampling
+
+        for batch_start in range(0, len(same_grid_size), batch_size):
+            batch = same_grid_size[batch_start : batch_start + batch_size]
+
+            # fine grid about each approx POCA, as np.mgrid[x_min:x_max:fine_grid_sampling,
+            # y_min:y_max:fine_grid_sampling], flattened
+            grid_x_values = x_offsets + x_min[batch, None]
+            grid_y_values = y_offsets + y_min[batch, None]
+            grid_shape = (len(batch), grid_num_x, grid_num_y)
+            grid_x = np.broadcast_to(grid_x_values[:, :, None], grid_shape).reshape(len(batch), -1)
+            grid_y = np.broadcast_to(grid_y_values[:, None, :], grid_shape).reshape(len(batch), -1)
+
+            # resample the fine DEM, within each record's segment of it
+            new_z = interp_regular_grid_lattice(
+                thisdem_fine.xdem,
+                thisdem_fine.ydem,
+                thisdem_fine.zdem,
+                grid_x_values,
+                grid_y_values,
+            ).transpose(0, 2, 1)
+            new_z[
+                ~has_segment[batch, None, None]
+                | (grid_x_values < segment_x_min[batch, None])[:, :, None]
+                | (grid_x_values > segment_x_max[batch, None])[:, :, None]
+                | (grid_y_values < segment_y_min[batch, None])[:, None, :]
+                | (grid_y_values > segment_y_max[batch, None])[:, None, :]
+            ] = np.nan
+            new_z = new_z.reshape(len(batch), -1)
+
+            # keep the points within search_radius of the approx POCA, with heights in a
+            # sensible range
+            dem_to_poca_dists = np.sqrt(
+                (grid_x - approx_poca_x[batch, None]) ** 2
+                + (grid_y - approx_poca_y[batch, None]) ** 2
+            )
+            in_plf = (dem_to_poca_dists < search_radius) & (np.abs(new_z) < 5000.0)
+
+            # only the grid points within the search radius of any record are searched
+            in_any_plf = np.flatnonzero(in_plf.any(axis=0))
+            in_plf = in_plf[:, in_any_plf]
+            grid_x = grid_x[:, in_any_plf]
+            grid_y = grid_y[:, in_any_plf]
+            new_z = np.where(in_plf, new_z[:, in_any_plf], np.nan)
+
+            # Correct DEM elevations for dh/dt changes
+            if thisdhdt is not None:
+                new_z[in_plf] += (
+                    thisdhdt.interp_dhdt(grid_x[in_plf], grid_y[in_plf]) * year_difference
+                )
+
+            (
+                poca_x[batch],
+                poca_y[batch],
+                poca_z[batch],
+                slope_correction[batch],
+                flg_success[batch],
+            ) = find_poca_batch(
+                new_z, grid_x, grid_y, nadir_x[batch], nadir_y[batch], alt_pt[batch]
+            )
+
+    return poca_x, poca_y, poca_z, slope_correction, flg_success
+
+
 def datetime2year(date_dt):
     """calculate decimal year from datetime
 
@@ -248,6 +553,7 @@ def geolocate_roemer(
     fine_grid_sampling = config["lrm_roemer_geolocation"]["fine_grid_sampling"]
 
     dual_search_method = config["lrm_roemer_geolocation"]["dual_search"]
+    use_sliding_window = config["lrm_roemer_geolocation"]["use_sliding_window"]
 
     median_filter_dem_segment = config["lrm_roemer_geolocation"]["median_filter"]
     median_filter_width = 7  # Adjusted to be close to CS2 PLF width of 1600m. TODO : add to config
@@ -260,9 +566,7 @@ def geolocate_roemer(
     altitudes = l1b["alt_20_ku"][:].data
 
     # Transform to X,Y locs in DEM projection
-    nadir_x, nadir_y = thisdem.lonlat_to_xy_transformer.transform(
-        lon_20_ku, lat_20_ku
-    )  # pylint: disable=unpacking-non-sequence
+    nadir_x, nadir_y = transform_lonlat(thisdem.lonlat_to_xy_transformer, lon_20_ku, lat_20_ku)
 
     # Create working parameter arrays
     poca_x = np.full_like(nadir_x, dtype=float, fill_value=np.nan)
@@ -273,6 +577,7 @@ def geolocate_roemer(
     height_20_ku = np.full_like(nadir_x, dtype=float, fill_value=np.nan)
 
     # if using a dh/dt correction to the DEM we need to calculate the time diff in years
+    year_difference = 0.0
     if include_dhdt_correction:
         time_20_ku = l1b["time_20_ku"][:].data[0]
 
@@ -285,281 +590,138 @@ def geolocate_roemer(
 
         year_difference = track_year - thisdem.reference_year
 
+    # Grid index ranges of the rectangular DEM segment about each record, from bounds
+    # adjusted for across track beam width and the dem posting
+    half_width = across_track_beam_width / 2 + thisdem.binsize
+    segment_indices = thisdem.get_segment_indices(
+        nadir_x - half_width, nadir_x + half_width, nadir_y - half_width, nadir_y + half_width
+    )
+
+    # Take the segments from the median filtered level of the DEM if it is in the grid
+    # cache (see Dem.get_level()), rather than median filtering each record's segment
+    search_dem = thisdem
+    if median_filter_dem_segment and not thisdem.tiled:
+        level = thisdem.get_level(median_filter_size=median_filter_width, cached_only=True)
+        if level is not None:
+            search_dem = level
+            median_filter_dem_segment = False
+
+    if dual_search_method and use_sliding_window:
+        raise ValueError(
+            "lrm_roemer_geolocation: dual_search and use_sliding_window can not both be set"
+        )
+
     # ------------------------------------------------------------------------------------
-    #  Loop through each track record
+    #  Search the DEM segments of the included track records, in batches of records
     # ------------------------------------------------------------------------------------
 
-    for i, _ in enumerate(nadir_x):
-        # By default, set POCA x,y to nadir, and height to Nan
-        poca_x[i] = nadir_x[i]
-        poca_y[i] = nadir_y[i]
-        poca_z[i] = np.nan
-
-        # if record is excluded due to previous checks, then skip
-        if not waveforms_to_include[i]:
-            continue
-
-        # get the rectangular bounds about the track, adjusted for across track beam width and
-        # the dem posting
-        x_min = nadir_x[i] - (across_track_beam_width / 2 + thisdem.binsize)
-        x_max = nadir_x[i] + (across_track_beam_width / 2 + thisdem.binsize)
-        y_min = nadir_y[i] - (across_track_beam_width / 2 + thisdem.binsize)
-        y_max = nadir_y[i] + (across_track_beam_width / 2 + thisdem.binsize)
-
-        segment = [(x_min, x_max), (y_min, y_max)]
-
-        # Extract the rectangular segment from the DEM
-        try:
-            xdem, ydem, zdem = thisdem.get_segment(segment, grid_xy=True, flatten=False)
-        except (IndexError, ValueError, TypeError, AttributeError, MemoryError):
-            slope_ok[i] = False
-            continue
-        except Exception:  # pylint: disable=W0718
-            slope_ok[i] = False
-            continue
+    # By default, set POCA x,y to nadir, and height to Nan
+    poca_x[:] = nadir_x
+    poca_y[:] = nadir_y
+
+    included_records = np.flatnonzero(waveforms_to_include)
+    segment_cells = np.maximum(segment_indices[:, 1] - segment_indices[:, 0], 0) * np.maximum(
+        segment_indices[:, 3] - segment_indices[:, 2], 0
+    )
+    batch_size = max(1, MAX_BATCH_POINTS // max(int(segment_cells.max(initial=1)), 1))
+
+    for batch_start in range(0, len(included_records), batch_size):
+        batch = included_records[batch_start : batch_start + batch_size]
 
+        # Extract the rectangular segments from the DEM, stacked as (records, rows, cols)
+        xdem, ydem, zdem = search_dem.get_segments_by_indices(segment_indices[batch])
         if median_filter_dem_segment:
-            # smoothed_zdem = median_filter(replace_nan_with_median(zdem), size=median_filter_width)
-            smoothed_zdem = median_filter(zdem, size=median_filter_width)
-            zdem = smoothed_zdem
+            zdem = median_filter_segments(zdem, segment_indices[batch], median_filter_width)
 
         if dual_search_method:
             # Step 1: find the DEM points within a circular area centred on the nadir
-            # point corresponding to a radius of half the beam width
-            xdem = xdem.flatten()
-            ydem = ydem.flatten()
-            zdem = zdem.flatten()
-
-            # Compute 2d distance between each dem location and nadir in (x,y)
-            dem_to_nadir_dists = calculate_distances2d(nadir_x[i], nadir_y[i], xdem, ydem)
-
-            # find where dem_to_nadir_dists is within beam. ie extract circular area
-            include_dem_indices = np.where(
-                np.array(dem_to_nadir_dists) < (across_track_beam_width / 2.0)
-            )[0]
-            if len(include_dem_indices) == 0:
-                slope_ok[i] = False
-                continue
-
-            xdem = xdem[include_dem_indices]
-            ydem = ydem[include_dem_indices]
-            zdem = zdem[include_dem_indices]
-
-            # Check remaining DEM points for bad height values and remove
-            nan_mask = np.isnan(zdem)
-            include_only_good_zdem_indices = np.where(~nan_mask)[0]
-            if len(include_only_good_zdem_indices) < 1:
-                slope_ok[i] = False
-                continue
-
-            xdem = xdem[include_only_good_zdem_indices]
-            ydem = ydem[include_only_good_zdem_indices]
-            zdem = zdem[include_only_good_zdem_indices]
-
-            # Only keep DEM heights which are in a sensible range
-            # this step removes DEM values set to most fill_values
-            valid_dem_heights = np.where(np.abs(zdem) < 5000.0)[0]
-            if len(valid_dem_heights) < 1:
-                slope_ok[i] = False
-                continue
-
-            xdem = xdem[valid_dem_heights]
-            ydem = ydem[valid_dem_heights]
-            zdem = zdem[valid_dem_heights]
+            # point corresponding to a radius of half the beam width, and with heights
+            # in a sensible range (this removes most fill_values)
+            xdem = xdem.reshape(len(batch), -1)
+            ydem = ydem.reshape(len(batch), -1)
+            zdem = zdem.reshape(len(batch), -1)
+            dem_to_nadir_dists = np.sqrt(
+                (xdem - nadir_x[batch, None]) ** 2 + (ydem - nadir_y[batch, None]) ** 2
+            )
+            in_beam = (dem_to_nadir_dists < (across_track_beam_width / 2.0)) & (
+                np.abs(zdem) < 5000.0
+            )
+            zdem = np.where(in_beam, zdem, np.nan)
 
             # Correct DEM elevations for dh/dt changes
-            if include_dhdt_correction:
-                if thisdhdt is not None:
-                    # find dh/dt * year_difference at each DEM location
-                    zdem += thisdhdt.interp_dhdt(xdem, ydem) * year_difference
+            if include_dhdt_correction and thisdhdt is not None:
+                zdem[in_beam] += (
+                    thisdhdt.interp_dhdt(xdem[in_beam], ydem[in_beam]) * year_difference
+                )
 
             # Find the POCA location and slope correction to height
             (
-                this_poca_x,
-                this_poca_y,
-                this_poca_z,
-                slope_correction_to_height,
+                batch_poca_x,
+                batch_poca_y,
+                batch_poca_z,
+                batch_slope_correction,
                 flg_success,
-            ) = find_poca(zdem, xdem, ydem, nadir_x[i], nadir_y[i], altitudes[i])
-
-            if not flg_success:
-                slope_ok[i] = False
-                continue
-            poca_x[i] = this_poca_x
-            poca_y[i] = this_poca_y
-            poca_z[i] = this_poca_z
+            ) = find_poca_batch(zdem, xdem, ydem, nadir_x[batch], nadir_y[batch], altitudes[batch])
+            slope_ok[batch[~flg_success]] = False
+            batch = batch[flg_success]
+            poca_x[batch] = batch_poca_x[flg_success]
+            poca_y[batch] = batch_poca_y[flg_success]
+            poca_z[batch] = batch_poca_z[flg_success]
+            batch_slope_correction = batch_slope_correction[flg_success]
 
             if fine_grid_sampling > 0:
-                # Create finer grid resolution around poca
-                # -------------------------------------
-
-                # get the rectangular bounds around the approx POCA,
-                # adjusted for pulse limited width and the dem posting
-
-                x_min = poca_x[i] - (pulse_limited_footprint_size_lrm / 2 + thisdem.binsize)
-                x_max = poca_x[i] + (pulse_limited_footprint_size_lrm / 2 + thisdem.binsize)
-                y_min = poca_y[i] - (pulse_limited_footprint_size_lrm / 2 + thisdem.binsize)
-                y_max = poca_y[i] + (pulse_limited_footprint_size_lrm / 2 + thisdem.binsize)
-
-                segment = [(x_min, x_max), (y_min, y_max)]
-
-                # Extract the rectangular segment from the DEM
-                try:
-                    xdem, ydem, zdem = thisdem_fine.get_segment(
-                        segment, grid_xy=False, flatten=False
-                    )
-                except (IndexError, ValueError, TypeError, AttributeError, MemoryError):
-                    slope_ok[i] = False
-                    continue
-                except Exception:  # pylint: disable=W0718
-                    slope_ok[i] = False
-                    continue
-
-                # Define new grid for finer resolution
-                grid_x, grid_y = np.mgrid[
-                    x_min:x_max:fine_grid_sampling, y_min:y_max:fine_grid_sampling
-                ]
-                grid_x = grid_x.flatten()
-                grid_y = grid_y.flatten()
-
-                new_z = interpn(
-                    (np.flip(ydem.copy()), xdem),
-                    np.flip(zdem.copy(), 0),
-                    (grid_y, grid_x),
-                    method="linear",
-                    bounds_error=False,
-                    fill_value=np.nan,
-                )
-
-                # Compute distance between dem points and the approximate POCA in (x,y,z)
-                dem_to_poca_dists = calculate_distances2d(poca_x[i], poca_y[i], grid_x, grid_y)
-
-                # find where dem_to_poca_dists is within PLF. ie extract circular area
-                include_dem_indices = np.where(
-                    np.array(dem_to_poca_dists) < (pulse_limited_footprint_size_lrm / 2.0)
-                )[0]
-                if len(include_dem_indices) == 0:
-                    slope_ok[i] = False
-                    continue
-
-                xdem = grid_x[include_dem_indices]
-                ydem = grid_y[include_dem_indices]
-                zdem = new_z[include_dem_indices]
-
-                # Check remaining DEM points for bad height values and remove
-                nan_mask = np.isnan(zdem)
-                include_only_good_zdem_indices = np.where(~nan_mask)[0]
-                if len(include_only_good_zdem_indices) < 1:
-                    slope_ok[i] = False
-                    continue
-
-                xdem = xdem[include_only_good_zdem_indices]
-                ydem = ydem[include_only_good_zdem_indices]
-                zdem = zdem[include_only_good_zdem_indices]
-
-                # Only keep DEM heights which are in a sensible range
-                # this step removes DEM values set to most fill_values
-                valid_dem_heights = np.where(np.abs(zdem) < 5000.0)[0]
-                if len(valid_dem_heights) < 1:
-                    slope_ok[i] = False
-                    continue
-
-                xdem = xdem[valid_dem_heights]
-                ydem = ydem[valid_dem_heights]
-                zdem = zdem[valid_dem_heights]
-
-                # Correct DEM elevations for dh/dt changes
-                if include_dhdt_correction:
-                    if thisdhdt is not None:
-                        # find dh/dt * year_difference at each DEM location
-                        zdem += thisdhdt.interp_dhdt(xdem, ydem) * year_difference
-
-                # Find the POCA location and slope correction to height
+                # Step 2: find the POCA in the fine DEM, resampled to a finer grid, within
+                # the pulse limited footprint around the approx POCA
                 (
-                    this_poca_x,
-                    this_poca_y,
-                    this_poca_z,
-                    slope_correction_to_height,
+                    batch_poca_x,
+                    batch_poca_y,
+                    batch_poca_z,
+                    batch_slope_correction,
                     flg_success,
-                ) = find_poca(zdem, xdem, ydem, nadir_x[i], nadir_y[i], altitudes[i])
-                if not flg_success:
-                    slope_ok[i] = False
-                    continue
-                poca_x[i] = this_poca_x
-                poca_y[i] = this_poca_y
-                poca_z[i] = this_poca_z
-
-                # print(f"2nd poca: {this_poca_x} {this_poca_y} {this_poca_z}")
-
-            slope_correction[i] = slope_correction_to_height
-            dist_reloc = np.sqrt((this_poca_x - nadir_x[i]) ** 2 + (this_poca_y - nadir_y[i]) ** 2)
-            if dist_reloc > max_poca_reloc_distance:
-                slope_ok[i] = False
-
-        if config["lrm_roemer_geolocation"]["use_sliding_window"]:
-            # Step 1: Calculate all distances once
-            all_distances_flat = calculate_distances3d(
-                x1_coord=nadir_x[i],
-                y1_coord=nadir_y[i],
-                z1_coord=altitudes[i],
-                x2_array=xdem.flatten(),
-                y2_array=ydem.flatten(),
-                z2_array=zdem.flatten(),
-                squared_only=False,
+                ) = fine_search_batch(
+                    thisdem_fine,
+                    poca_x[batch],
+                    poca_y[batch],
+                    pulse_limited_footprint_size_lrm / 2 + thisdem.binsize,
+                    pulse_limited_footprint_size_lrm / 2.0,
+                    fine_grid_sampling,
+                    nadir_x[batch],
+                    nadir_y[batch],
+                    altitudes[batch],
+                    thisdhdt if include_dhdt_correction else None,
+                    year_difference,
+                )
+                slope_ok[batch[~flg_success]] = False
+                batch = batch[flg_success]
+                poca_x[batch] = batch_poca_x[flg_success]
+                poca_y[batch] = batch_poca_y[flg_success]
+                poca_z[batch] = batch_poca_z[flg_success]
+                batch_slope_correction = batch_slope_correction[flg_success]
+
+            slope_correction[batch] = batch_slope_correction
+            dist_reloc = np.sqrt(
+                (poca_x[batch] - nadir_x[batch]) ** 2 + (poca_y[batch] - nadir_y[batch]) ** 2
             )
+            slope_ok[batch[dist_reloc > max_poca_reloc_distance]] = False
 
-            all_distances = np.array(all_distances_flat).reshape(xdem.shape)
-
-            # Step 2: Slide the window over the pre-calculated distance grid
-            min_distance = np.inf
-            min_position = (0, 0)
-            window_size = (int)(pulse_limited_footprint_size_lrm / thisdem.binsize)
-
-            for ii in range(all_distances.shape[0] - window_size + 1):
-                for jj in range(all_distances.shape[1] - window_size + 1):
-                    # Extract the current window of distances
-                    window = all_distances[ii : ii + window_size, jj : jj + window_size]
-
-                    # Calculate the mean distance within the window
-                    mean_distance = np.mean(window)
-
-                    # Update the minimum mean and position if a new minimum is found
-                    if mean_distance < min_distance:
-                        min_distance = mean_distance
-                        min_position = (ii, jj)
-
-            # min_position is the position of the window with the smallest mean distance
-            # print(f"min_distance={min_distance} at {min_position}")
-
-            # --------------------------------------------------------------------------------------
-            #  Find Location of POCA x,y
-            # --------------------------------------------------------------------------------------
-
-            poca_x[i] = xdem[min_position]
-            poca_y[i] = ydem[min_position]
-
-            # --------------------------------------------------------------------------------------
-            #  Find Location of POCA z
-            # --------------------------------------------------------------------------------------
-
-            poca_z[i] = zdem[min_position]
-
-            # --------------------------------------------------------------------------------------
-            #  Calculate Slope Correction
-            # --------------------------------------------------------------------------------------
-
-            dem_to_sat_dists = calculate_distances3d(
-                nadir_x[i],
-                nadir_y[i],
-                altitudes[i],
-                [poca_x[i]],
-                [poca_y[i]],
-                [poca_z[i]],
+        elif use_sliding_window:
+            # POCA at the window of the pulse limited footprint's width with the smallest
+            # mean distance to the satellite
+            (
+                poca_x[batch],
+                poca_y[batch],
+                poca_z[batch],
+                slope_correction[batch],
+            ) = sliding_window_poca_batch(
+                zdem,
+                xdem,
+                ydem,
+                nadir_x[batch],
+                nadir_y[batch],
+                altitudes[batch],
+                int(pulse_limited_footprint_size_lrm / thisdem.binsize),
             )
 
-            # Calculate the slope correction to height
-            slope_correction[i] = dem_to_sat_dists[0] + poca_z[i] - altitudes[i]
-
     # Transform all POCA x,y to lon,lat
     lon_poca_20_ku, lat_poca_20_ku = thisdem.xy_to_lonlat_transformer.transform(poca_x, poca_y)
 
@@ -596,9 +758,7 @@ def geolocate_roemer(
     if config["lrm_roemer_geolocation"]["include_slope_doppler_correction"]:
         idx = np.where(np.isfinite(height_20_ku))[0]
         if len(idx) > 0:
-            ecef = pyproj.Proj(proj="geocent", ellps="WGS84", datum="WGS84")
-            lla = pyproj.Proj(proj="latlong", ellps="WGS84", datum="WGS84")
-            this_transform = Transformer.from_proj(lla, ecef, always_xy=True)
+            this_transform = get_transformer(WGS84_LLA, WGS84_ECEF, always_xy=True)
 
             (  # pylint: disable=unpacking-non-sequence
                 sat_x,
@@ -4,7 +4,6 @@
 import logging
 
 import numpy as np
-from scipy.optimize import OptimizeWarning
 
 from clev2er.utils.cs2.geolocate import sarin_phase
 from clev2er.utils.cs2.geolocate.lrm_slope import ecef_to_llh_pyproj, llh_to_ecef_pyproj
@@ -229,6 +228,132 @@ def phase_to_angle(
     return angle
 
 
+def solve_eqns(aaa, bbb, base_vec, crf_centre):
+    """solve_eqn() for arrays of records
+
+    Args:
+        aaa (np.ndarray): shape (..., n)
+        bbb (np.ndarray): shape (..., n)
+        base_vec (np.ndarray): interferometer baseline vectors, shape (n, 3)
+        crf_centre (np.ndarray): shape (..., n, 3)
+
+    Returns:
+        np.ndarray: CRF points, shape (..., n, 3)
+    """
+    crf_point = np.zeros(crf_centre.shape)
+
+    base_x = base_vec[:, 0]
+    base_z = base_vec[:, 2]
+
+    d_befosqrt = 4.0 * np.power(bbb, 2.0) * np.power(base_x, 2.0) / np.power(base_z, 4.0)
+    d_befosqrt -= (
+        4.0
+        * (np.power(base_x, 2.0) / np.power(base_z, 2.0) + 1.0)
+        * (np.power(bbb, 2.0) / np.power(base_z, 2.0) - aaa)
+    )
+    d_sqrt = np.sqrt(d_befosqrt)
+    d_denominator = 2.0 * (np.power(base_x, 2.0) / np.power(base_z, 2.0) + 1.0)
+
+    d_xplus = (2.0 * bbb * base_x / np.power(base_z, 2.0) + d_sqrt) / d_denominator
+    d_xminus = (2.0 * bbb * base_x / np.power(base_z, 2.0) - d_sqrt) / d_denominator
+
+    d_xxplus = d_xplus + crf_centre[..., 0]
+    d_xxminus = d_xminus + crf_centre[..., 0]
+    d_zzplus = (bbb - base_x * d_xplus) / base_z + crf_centre[..., 2]
+    d_zzminus = (bbb - base_x * d_xminus) / base_z + crf_centre[..., 2]
+
+    plus = d_xxplus > d_xxminus
+    minus = d_xxminus > d_xxplus
+    crf_point[..., 0] = np.where(plus, d_xxplus, np.where(minus, d_xxminus, 0.0))
+    crf_point[..., 2] = np.where(plus, d_zzplus, np.where(minus, d_zzminus, 0.0))
+
+    return crf_point
+
+
+def get_crfs_in_efc(lon, lat, alt, vel_vec):
+    """get_crf_in_efc() for arrays of records. The nadir and satellite positions of all
+    records are transformed to ECEF in one call.
+
+    Args:
+        lon (np.ndarray): nadir longitudes, shape (n,)
+        lat (np.ndarray): nadir latitudes, shape (n,)
+        alt (np.ndarray): satellite altitudes, shape (n,)
+        vel_vec (np.ndarray): satellite velocity vectors, shape (n, 3)
+
+    Returns:
+        (np.ndarray, np.ndarray): crf_axis, the CRF axes (as columns) of each record,
+        shape (n, 3, 3), and efc_cog, the satellite positions in ECEF, shape (n, 3)
+    """
+    num_records = len(lat)
+    efc_x, efc_y, efc_z = llh_to_ecef_pyproj(
+        np.concatenate((lat, lat)),
+        np.concatenate((lon, lon)),
+        np.concatenate((np.zeros(num_records), alt)),
+    )
+    efc = np.stack((efc_x, efc_y, efc_z), axis=1)
+    nad = efc[:num_records]
+    efc_cog = efc[num_records:]
+
+    sat_nad_vec = nad - efc_cog
+
+    ad_crf_axis1 = sat_nad_vec / np.linalg.norm(sat_nad_vec, axis=1)[:, None]
+    ad_efc_nv = vel_vec / np.linalg.norm(vel_vec, axis=1)[:, None]
+
+    scal_prod = np.einsum("ni,ni->n", ad_crf_axis1, ad_efc_nv)
+    ad_temp_vect = ad_efc_nv - ad_crf_axis1 * scal_prod[:, None]
+
+    ad_crf_axis2 = ad_temp_vect / np.linalg.norm(ad_temp_vect, axis=1)[:, None]
+    ad_crf_axis3 = np.cross(ad_crf_axis2, ad_crf_axis1)
+
+    crf_axis = np.stack((ad_crf_axis1, ad_crf_axis2, ad_crf_axis3), axis=2)
+
+    return crf_axis, efc_cog
+
+
+def angles_to_poca(angles, lat, lon, alt, cor_range, vel_vec, base_vec):
+    """angle_to_poca() for arrays of records, and any number of angles per record (ie the
+    wrapped and unwrapped angles). The CRF frames of the records are computed once for all
+    angles, and the POCAs are transformed to lat,lon in one call.
+
+    Args:
+        angles (np.ndarray): angles, shape (..., n)
+        lat (np.ndarray): nadir latitudes, shape (n,)
+        lon (np.ndarray): nadir longitudes, shape (n,)
+        alt (np.ndarray): satellite altitudes, shape (n,)
+        cor_range (np.ndarray): corrected ranges, shape (n,)
+        vel_vec (np.ndarray): satellite velocity vectors, shape (n, 3)
+        base_vec (np.ndarray): interferometer baseline vectors, shape (n, 3)
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): lat_poca, lon_poca, elev_poca, each of the
+        shape of angles
+    """
+    angles = np.asarray(angles)
+
+    crf_centre = base_vec * (cor_range * np.sin(angles))[..., None]
+    radius = cor_range * np.cos(angles)
+
+    aaa = np.power(radius, 2) - np.power(crf_centre[..., 1], 2)
+    bbb = base_vec[:, 1] * crf_centre[..., 1]
+
+    crf_point = solve_eqns(aaa, bbb, base_vec, crf_centre)
+
+    crf_axis, efc_cog = get_crfs_in_efc(lon, lat, alt, vel_vec)
+
+    # rotation_matrix(crf_axis) is crf_axis
+    efc_point = np.einsum("nij,...nj->...ni", crf_axis, crf_point) + efc_cog
+
+    lat_poca, lon_poca, elev_poca = ecef_to_llh_pyproj(
+        efc_point[..., 0].ravel(), efc_point[..., 1].ravel(), efc_point[..., 2].ravel()
+    )
+    lat_poca = np.reshape(lat_poca, angles.shape)
+    lon_poca = np.reshape(lon_poca, angles.shape)
+    elev_poca = np.reshape(elev_poca, angles.shape)
+    lon_poca[lon_poca > 180.0] -= 360.0
+
+    return lat_poca, lon_poca, elev_poca
+
+
 def geolocate_sin(l1b, config, dem_ant, dem_grn, range_cor_20_ku, ind_wfm_retrack_20_ku):
     """djb to document
 
@@ -265,19 +390,14 @@ def geolocate_sin(l1b, config, dem_ant, dem_grn, range_cor_20_ku, ind_wfm_retrac
     nrec = len(lat_20_ku)
 
     # Allocate arrays for intermediate aand output parameters
-    height_20_ku = np.zeros(nrec)
-    final_lat_20_ku = np.zeros(nrec)
-    final_lon_20_ku = np.zeros(nrec)
+    height_20_ku = np.full(nrec, np.nan)
+    final_lat_20_ku = np.full(nrec, np.nan)
+    final_lon_20_ku = np.full(nrec, np.nan)
 
-    angle_20_ku = np.zeros(nrec)
+    phase_20_ku = np.full(nrec, np.nan)
 
-    lat_initial_20_ku = np.zeros(nrec)
-    lon_initial_20_ku = np.zeros(nrec)
     lat_unwrap_20_ku = np.zeros(nrec)
     lon_unwrap_20_ku = np.zeros(nrec)
-    dem_unwrap_20_ku = np.zeros(nrec)
-    angle_unwrap_20_ku = np.zeros(nrec)
-    delta_unwrap_h = np.zeros(nrec)
     height_unwrap_20_ku = np.zeros(nrec)
 
     config_fitter = config["sin_geolocation"]["phase_method"]
@@ -303,7 +423,7 @@ def geolocate_sin(l1b, config, dem_ant, dem_grn, range_cor_20_ku, ind_wfm_retrac
     log.info("Phase unwrapping is %s", str(config["sin_geolocation"]["unwrap"]))
 
     # ------------------------------------------------------------------------------
-    # Process each record
+    # Get the phase of each record
     # ------------------------------------------------------------------------------
 
     for i in range(nrec):
@@ -312,17 +432,13 @@ def geolocate_sin(l1b, config, dem_ant, dem_grn, range_cor_20_ku, ind_wfm_retrac
         if complete >= log_completed:
             log_completed = log_completed + 10
             log.info("Completed %d%%", int(complete))
-        try:
-            # Check if inputs are OK
-            if ind_wfm_retrack_20_ku[i] == -32768:  # This is the fill value used in stage1
-                height_20_ku[i] = np.nan
-                final_lat_20_ku[i] = np.nan
-                final_lon_20_ku[i] = np.nan
-                continue
 
-            # Get the phase
+        # Check if inputs are OK
+        if ind_wfm_retrack_20_ku[i] == -32768:  # This is the fill value used in stage1
+            continue
 
-            phase, bad_1, bad_2, bad_3 = fitter(
+        try:
+            phase_20_ku[i], bad_1, bad_2, bad_3 = fitter(
                 ph_diff_waveform_20_ku[i],
                 coherence_waveform_20_ku[i],
                 ind_wfm_retrack_20_ku[i],
@@ -331,71 +447,57 @@ def geolocate_sin(l1b, config, dem_ant, dem_grn, range_cor_20_ku, ind_wfm_retrac
                 bad_3,
                 config,
             )
-            if np.isnan(phase):
-                raise sarin_phase.SINLocateError("Phase retrieval failed")
-            if np.abs(phase) > np.pi:
-                raise sarin_phase.SINLocateError("Phase out of bounds")
-            # Get angle
-            angle = phase_to_angle(phase)
-            angle_20_ku[i] = angle
-
-            # Calculate the POCA location and height
-            log.debug("-- GEOLOCATING  --")
-            lat_poca, lon_poca, elev_poca = angle_to_poca(
-                angle,
-                lat_20_ku[i],
-                lon_20_ku[i],
-                alt_20_ku[i],
-                range_cor_20_ku[i],
-                sat_vel_vec_20_ku[i],
-                inter_base_vec_20_ku[i],
-            )
-            final_lat_20_ku[i] = lat_poca
-            final_lon_20_ku[i] = lon_poca
-            height_20_ku[i] = elev_poca
-
-            if config["sin_geolocation"]["unwrap"]:
-                if phase > 0:
-                    unwrap_phase = -2.0 * np.pi + phase
-                else:
-                    unwrap_phase = 2.0 * np.pi + phase
-
-                angle_unwrap_20_ku[i] = phase_to_angle(unwrap_phase)
-                log.debug("-- GEOLOCATING  unwrapped --")
-                lat_poca, lon_poca, elev_poca = angle_to_poca(
-                    angle_unwrap_20_ku[i],
-                    lat_20_ku[i],
-                    lon_20_ku[i],
-                    alt_20_ku[i],
-                    range_cor_20_ku[i],
-                    sat_vel_vec_20_ku[i],
-                    inter_base_vec_20_ku[i],
-                )
-                lat_unwrap_20_ku[i] = lat_poca
-                lon_unwrap_20_ku[i] = lon_poca
-                height_unwrap_20_ku[i] = elev_poca
-            else:
-                lat_unwrap_20_ku[i] = np.nan
-                lon_unwrap_20_ku[i] = np.nan
-                dem_unwrap_20_ku[i] = np.nan
-                delta_unwrap_h[i] = np.nan
-
-            if (
-                height_20_ku[i] > config["sin_geolocation"]["height_max"]
-                or height_20_ku[i] < config["sin_geolocation"]["height_min"]
-            ):
-                raise sarin_phase.SINLocateError("Height out of bounds")
-        except OptimizeWarning as exc:
-            # Here to catch them for debugging but currently handled before here
-            # by defaulting results
-            # Doesn't indicate an error, indicates the model not fitting the data
-            raise exc
         except sarin_phase.SINLocateError as exc:
             log.debug("Defaulting results. Reason is %s", exc.msg)
-            final_lat_20_ku[i] = np.nan
-            final_lon_20_ku[i] = np.nan
-            height_20_ku[i] = np.nan
-            # raise e
+
+    # Records where phase retrieval failed, or the phase is out of bounds, are not geolocated
+    located = np.flatnonzero(~np.isnan(phase_20_ku) & (np.abs(phase_20_ku) <= np.pi))
+    log.debug(
+        "Phase retrieval failed or out of bounds for %d records",
+        np.count_nonzero(ind_wfm_retrack_20_ku != -32768) - len(located),
+    )
+
+    # ------------------------------------------------------------------------------
+    # Calculate the POCA locations and heights of all records, from the phase and
+    # the unwrapped phase together
+    # ------------------------------------------------------------------------------
+
+    phase = phase_20_ku[located]
+    angles = [phase_to_angle(phase)]
+    if config["sin_geolocation"]["unwrap"]:
+        unwrap_phase = np.where(phase > 0, -2.0 * np.pi + phase, 2.0 * np.pi + phase)
+        angles.append(phase_to_angle(unwrap_phase))
+
+    log.debug("-- GEOLOCATING  --")
+    if located.size > 0:
+        # records without a real solution get Nan heights
+        with np.errstate(invalid="ignore"):
+            lat_poca, lon_poca, elev_poca = angles_to_poca(
+                np.array(angles),
+                lat_20_ku[located],
+                lon_20_ku[located],
+                alt_20_ku[located],
+                range_cor_20_ku[located],
+                sat_vel_vec_20_ku[located],
+                inter_base_vec_20_ku[located],
+            )
+        final_lat_20_ku[located] = lat_poca[0]
+        final_lon_20_ku[located] = lon_poca[0]
+        height_20_ku[located] = elev_poca[0]
+
+        if config["sin_geolocation"]["unwrap"]:
+            lat_unwrap_20_ku[located] = lat_poca[1]
+            lon_unwrap_20_ku[located] = lon_poca[1]
+            height_unwrap_20_ku[located] = elev_poca[1]
+
+    out_of_bounds = (height_20_ku > config["sin_geolocation"]["height_max"]) | (
+        height_20_ku < config["sin_geolocation"]["height_min"]
+    )
+    log.debug("Height out of bounds for %d records", np.count_nonzero(out_of_bounds))
+    final_lat_20_ku[out_of_bounds] = np.nan
+    final_lon_20_ku[out_of_bounds] = np.nan
+    height_20_ku[out_of_bounds] = np.nan
+
     #
     # --------------------------------------------------------------------------
     # --------------------------------------------------------------------------
@@ -425,9 +527,6 @@ def geolocate_sin(l1b, config, dem_ant, dem_grn, range_cor_20_ku, ind_wfm_retrac
             )
         )[0]
 
-        lat_initial_20_ku[:] = final_lat_20_ku[:]
-        lon_initial_20_ku[:] = final_lon_20_ku[:]
-
         # Use the alternate solution if better
         if len(idx) > 0:
             height_20_ku[idx] = height_unwrap_20_ku[idx]
@@ -436,6 +535,6 @@ def geolocate_sin(l1b, config, dem_ant, dem_grn, range_cor_20_ku, ind_wfm_retrac
             log.info("Phase unwrapping replaced %d measurements", len(idx))
 
     log.debug("bad counts 1=%d 2=%d 3=%d", bad_1, bad_2, bad_3)
-    log.info("Processed %d records", i + 1)
+    log.info("Processed %d records", nrec)
 
     return height_20_ku, final_lat_20_ku, final_lon_20_ku
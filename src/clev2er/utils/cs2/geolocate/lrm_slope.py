@@ -5,8 +5,12 @@ import math
 import struct
 
 import numpy as np
-import pyproj
-from pyproj import Transformer
+
+from clev2er.utils.projections.transformer_cache import (
+    WGS84_ECEF,
+    WGS84_LLA,
+    get_transformer,
+)
 
 # too-many-arguments, pylint: disable=R0913
 # too-many-locals, pylint: disable=R0914
@@ -31,10 +35,7 @@ def llh_to_ecef_pyproj(lat, lon, alt):
     Returns:
         _type_: _description_
     """
-    ecef = pyproj.Proj(proj="geocent", ellps="WGS84", datum="WGS84")
-    lla = pyproj.Proj(proj="latlong", ellps="WGS84", datum="WGS84")
-
-    trans = Transformer.from_proj(lla, ecef, always_xy=True)
+    trans = get_transformer(WGS84_LLA, WGS84_ECEF, always_xy=True)
 
     x, y, z = trans.transform(xx=lon, yy=lat, zz=alt, radians=False)  # pylint: disable=E0633
 
@@ -52,10 +53,7 @@ def ecef_to_llh_pyproj(x, y, z):
     Returns:
         _type_: _description_
     """
-    ecef = pyproj.Proj(proj="geocent", ellps="WGS84", datum="WGS84")
-    lla = pyproj.Proj(proj="latlong", ellps="WGS84", datum="WGS84")
-
-    trans = Transformer.from_proj(ecef, lla, always_xy=True)
+    trans = get_transformer(WGS84_ECEF, WGS84_LLA, always_xy=True)
 
     lon, lat, height = trans.transform(xx=x, yy=y, zz=z, radians=False)  # pylint: disable=E0633
 
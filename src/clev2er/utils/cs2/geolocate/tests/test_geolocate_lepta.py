@@ -0,0 +1,84 @@
+"""pytest tests of the batched functions of clev2er.utils.cs2.geolocate.geolocate_lepta"""
+
+import numpy as np
+
+from clev2er.utils.cs2.geolocate.geolocate_lepta import (
+    calculate_distances,
+    calculate_distances_batch,
+    mean_of_valid,
+    median_dem_height_around_a_point,
+    median_dem_heights_around_points,
+    median_of_valid,
+)
+from clev2er.utils.dems.dems import Dem
+
+
+def test_reductions_of_valid_values():
+    """test the mean and median of the valid values of each row against numpy's"""
+    rng = np.random.default_rng(0)
+    values = rng.uniform(1000.0, 2000.0, size=(50, 40)).astype(np.float32)
+    valid = rng.uniform(size=values.shape) < 0.3
+    valid[0] = False
+    valid[1] = True
+
+    medians = median_of_valid(values, valid)
+    means = mean_of_valid(values, valid)
+    assert np.isnan(medians[0]) and np.isnan(means[0])
+    for i in range(1, len(values)):
+        assert medians[i] == np.median(values[i][valid[i]])
+        np.testing.assert_allclose(means[i], np.mean(values[i][valid[i]], dtype=np.float64))
+
+
+def test_calculate_distances_batch():
+    """test that batched distances are as calculate_distances() for each ref point"""
+    rng = np.random.default_rng(1)
+    x2_array = rng.uniform(-5000.0, 5000.0, size=(5, 100))
+    y2_array = rng.uniform(-5000.0, 5000.0, size=(5, 100))
+    z2_array = rng.uniform(1000.0, 2000.0, size=(5, 100)).astype(np.float32)
+    x1_coord = rng.uniform(-100.0, 100.0, 5)
+    y1_coord = rng.uniform(-100.0, 100.0, 5)
+    z1_coord = rng.uniform(717000.0, 720000.0, 5)
+
+    distances = calculate_distances_batch(
+        (x2_array - x1_coord[:, None]) ** 2 + (y2_array - y1_coord[:, None]) ** 2,
+        z1_coord,
+        z2_array,
+    )
+    for i in range(5):
+        np.testing.assert_array_equal(
+            distances[i],
+            calculate_distances(
+                x1_coord[i], y1_coord[i], z1_coord[i], x2_array[i], y2_array[i], z2_array[i]
+            ),
+        )
+
+
+def test_median_dem_heights_around_points():
+    """test the median DEM heights around points, including points near the DEM edge and
+    void values, against the median of the valid heights of each DEM segment"""
+    rng = np.random.default_rng(2)
+    thisdem = Dem.__new__(Dem)
+    thisdem.binsize = 100.0
+    thisdem.xdem = np.arange(-5000.0, 5001.0, 100.0)
+    thisdem.ydem = np.arange(5000.0, -5001.0, -100.0)
+    thisdem.zdem = rng.uniform(1000.0, 2000.0, size=(101, 101)).astype(np.float32)
+    thisdem.zdem[rng.uniform(size=thisdem.zdem.shape) < 0.1] = np.nan
+    thisdem.zdem[:20, :20] = 9999.0  # fill values
+
+    xpos = np.array([0.0, 1234.0, -4950.0, 4990.0, -4500.0, 8000.0])
+    ypos = np.array([0.0, -2345.0, 100.0, -4990.0, 4500.0, 0.0])
+    medians = median_dem_heights_around_points(thisdem, xpos, ypos, 1600)
+    for i, (x, y) in enumerate(zip(xpos, ypos)):
+        half_width = 1600 / 2 + thisdem.binsize
+        _, _, zdem = thisdem.get_segment(
+            [(x - half_width, x + half_width), (y - half_width, y + half_width)],
+            grid_xy=True,
+            flatten=True,
+        )
+        zdem = zdem[zdem < 5000.0]
+        if len(zdem) == 0:
+            assert np.isnan(medians[i])
+            assert median_dem_height_around_a_point(thisdem, x, y, 1600) is None
+        else:
+            assert medians[i] == np.median(zdem)
+            assert median_dem_height_around_a_point(thisdem, x, y, 1600) == medians[i]
@@ -0,0 +1,95 @@
+"""pytest tests of the batched POCA search functions of
+clev2er.utils.cs2.geolocate.geolocate_roemer, against the per record equivalents
+"""
+
+import numpy as np
+from scipy.ndimage import median_filter
+
+from clev2er.utils.cs2.geolocate.geolocate_roemer import (
+    find_poca,
+    find_poca_batch,
+    median_filter_segments,
+    sliding_window_poca_batch,
+)
+
+
+def test_find_poca_batch():  # pylint: disable=too-many-locals
+    """test that the POCA of each record of a batch is as find_poca() finds it"""
+    rng = np.random.default_rng(0)
+    nrecords, npoints = 20, 300
+    xdem = rng.uniform(-7500.0, 7500.0, size=(nrecords, npoints))
+    ydem = rng.uniform(-7500.0, 7500.0, size=(nrecords, npoints))
+    zdem = rng.uniform(1000.0, 1200.0, size=(nrecords, npoints)).astype(np.float32)
+    zdem[rng.uniform(size=zdem.shape) < 0.2] = np.nan
+    zdem[3] = np.nan  # a record without DEM points
+    nadir_x = rng.uniform(-100.0, 100.0, nrecords)
+    nadir_y = rng.uniform(-100.0, 100.0, nrecords)
+    alt_pt = rng.uniform(717000.0, 720000.0, nrecords)
+
+    poca_x, poca_y, poca_z, slope_correction, flg_success = find_poca_batch(
+        zdem, xdem, ydem, nadir_x, nadir_y, alt_pt
+    )
+    assert not flg_success[3]
+    for i in np.flatnonzero(np.arange(nrecords) != 3):
+        points = ~np.isnan(zdem[i])
+        expected = find_poca(
+            zdem[i][points], xdem[i][points], ydem[i][points], nadir_x[i], nadir_y[i], alt_pt[i]
+        )
+        assert flg_success[i]
+        assert (poca_x[i], poca_y[i], poca_z[i], slope_correction[i]) == expected[:4]
+
+
+def test_sliding_window_poca_batch():  # pylint: disable=too-many-locals
+    """test that the sliding window POCA matches the mean distance of each window"""
+    rng = np.random.default_rng(1)
+    nrecords, nrows, ncols, window_size = 6, 17, 15, 4
+    xgrid, ygrid = np.meshgrid(np.arange(ncols) * 1000.0, np.arange(nrows) * -1000.0)
+    zdem = rng.uniform(1000.0, 1500.0, size=(nrecords, nrows, ncols)).astype(np.float32)
+    zdem[1, 2:5, 3:6] = np.nan
+    zdem[2] = np.nan  # no window without Nan
+    xdem = np.where(np.isnan(zdem), np.nan, xgrid)
+    ydem = np.where(np.isnan(zdem), np.nan, ygrid)
+    nadir_x = np.full(nrecords, 7000.0)
+    nadir_y = np.full(nrecords, -8000.0)
+    alt_pt = rng.uniform(717000.0, 720000.0, nrecords)
+
+    poca_x, poca_y, poca_z, slope_correction = sliding_window_poca_batch(
+        zdem, xdem, ydem, nadir_x, nadir_y, alt_pt, window_size
+    )
+    for i in range(nrecords):
+        distances = np.sqrt(
+            (xdem[i] - nadir_x[i]) ** 2 + (ydem[i] - nadir_y[i]) ** 2 + (zdem[i] - alt_pt[i]) ** 2
+        )
+        min_distance, min_position = np.inf, (0, 0)
+        for row in range(nrows - window_size + 1):
+            for col in range(ncols - window_size + 1):
+                mean_distance = np.mean(distances[row : row + window_size, col : col + window_size])
+                if mean_distance < min_distance:
+                    min_distance, min_position = mean_distance, (row, col)
+        np.testing.assert_array_equal(
+            [poca_x[i], poca_y[i], poca_z[i]],
+            [xdem[i][min_position], ydem[i][min_position], zdem[i][min_position]],
+        )
+        if i != 2:
+            expected_distance = np.sqrt(
+                (poca_x[i] - nadir_x[i]) ** 2
+                + (poca_y[i] - nadir_y[i]) ** 2
+                + (np.float64(poca_z[i]) - alt_pt[i]) ** 2
+            )
+            assert slope_correction[i] == expected_distance + poca_z[i] - alt_pt[i]
+
+
+def test_median_filter_segments():
+    """test that stacked segments, including one clipped at the DEM edge, are filtered as
+    median_filter() filters each segment"""
+    rng = np.random.default_rng(2)
+    zdem = rng.uniform(0.0, 100.0, size=(3, 12, 10))
+    segment_indices = np.array([[0, 12, 0, 10], [5, 17, 20, 30], [0, 9, 3, 10]])
+    zdem[2, 9:, :] = np.nan
+    zdem[2, :, 7:] = np.nan
+
+    filtered = median_filter_segments(zdem, segment_indices, 7)
+    np.testing.assert_array_equal(filtered[0], median_filter(zdem[0], size=7))
+    np.testing.assert_array_equal(filtered[1], median_filter(zdem[1], size=7))
+    np.testing.assert_array_equal(filtered[2, :9, :7], median_filter(zdem[2, :9, :7], size=7))
+    assert np.isnan(filtered[2, 9:, :]).all()
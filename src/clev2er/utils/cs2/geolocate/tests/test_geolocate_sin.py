@@ -0,0 +1,60 @@
+"""pytest tests of the array functions of clev2er.utils.cs2.geolocate.geolocate_sin"""
+
+import numpy as np
+
+from clev2er.utils.cs2.geolocate.geolocate_sin import (
+    angle_to_poca,
+    angles_to_poca,
+    phase_to_angle,
+)
+
+
+def synthetic_track(num_records: int) -> dict[str, np.ndarray]:
+    """create the per record inputs of angle_to_poca() for a synthetic track over Greenland
+
+    Args:
+        num_records (int): number of records
+
+    Returns:
+        dict[str, np.ndarray]: lat, lon, alt, cor_range, vel_vec, base_vec of each record
+    """
+    rng = np.random.default_rng(0)
+    alt = rng.uniform(717000.0, 720000.0, num_records)
+    base_vec = np.tile([0.0, 0.0, 1.0], (num_records, 1)) + rng.uniform(
+        -0.01, 0.01, (num_records, 3)
+    )
+    return {
+        "lat": np.linspace(69.0, 69.5, num_records),
+        "lon": np.linspace(-45.0, -44.8, num_records),
+        "alt": alt,
+        "cor_range": alt - rng.uniform(0.0, 3000.0, num_records),
+        "vel_vec": np.tile([1000.0, -3000.0, 6500.0], (num_records, 1))
+        + rng.uniform(-50.0, 50.0, (num_records, 3)),
+        "base_vec": base_vec / np.linalg.norm(base_vec, axis=1)[:, None],
+    }
+
+
+def test_angles_to_poca():
+    """test that POCAs of wrapped and unwrapped angles of a track are as angle_to_poca() for
+    each record and angle"""
+    num_records = 50
+    track = synthetic_track(num_records)
+    phase = np.random.default_rng(1).uniform(-np.pi, np.pi, num_records)
+    angles = np.array(
+        [
+            phase_to_angle(phase),
+            phase_to_angle(np.where(phase > 0, -2.0 * np.pi + phase, 2.0 * np.pi + phase)),
+        ]
+    )
+
+    lat_poca, lon_poca, elev_poca = angles_to_poca(angles, **track)
+
+    assert lat_poca.shape == angles.shape
+    assert np.all(np.isfinite(elev_poca))
+    for j, record_angles in enumerate(angles):
+        for i, angle in enumerate(record_angles):
+            expected = angle_to_poca(angle, **{name: value[i] for name, value in track.items()})
+            np.testing.assert_allclose(
+                (lat_poca[j, i], lon_poca[j, i]), expected[:2], rtol=0, atol=1e-9
+            )
+            np.testing.assert_allclose(elev_poca[j, i], expected[2], rtol=0, atol=1e-5)
@@ -0,0 +1,12 @@
+"""**CS2 L1b file index**
+
+Persistent SQLite index of CryoSat L1b file footprints (mode, time range, bounding box,
+hemisphere, number of records), so that L1b files can be selected by area without
+re-opening every file on each run.
+
+The index is updated incrementally: only files that are new, or whose modification
+time or size has changed, are read.
+
+Used by the cryotempo file finders when `l1b_index_file` is set in the chain config,
+and built or updated in advance with the `clev2er.tools.build_l1b_index` tool.
+"""
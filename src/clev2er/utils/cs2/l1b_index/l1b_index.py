@@ -0,0 +1,314 @@
+"""clev2er.utils.cs2.l1b_index.l1b_index.py
+
+class L1bIndex: persistent SQLite index of CryoSat L1b file footprints
+
+For each indexed L1b file the following are stored:
+
+- path, modification time and size (used to detect changed files)
+- instr_mode ('LRM','SIN','SAR'), from the sir_op_mode global attribute
+- baseline character, start_time, end_time, year and month, from the file name
+- first and last record latitude, longitude, from the global attributes (degs)
+- min_lat, max_lat, min_lon, max_lon of the nadir locations (lat_20_ku, lon_20_ku)
+  (longitudes are in the range -180..180E)
+- hemisphere: 'north' or 'south' if the first nadir location beyond 55 degs latitude is
+  in the northern or southern hemisphere, or '' if there is none
+- num_20hz_records
+
+Example:
+
+    with L1bIndex("/path/to/l1b_index.sqlite") as index:
+        index.update(l1b_file_list, num_processes=8)  # only reads new or changed files
+        files = index.query(instr_mode="SIN", years=[2021], months=[3], greenland=True)
+"""
+
+import logging
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Optional
+
+import numpy as np
+from netCDF4 import Dataset  # pylint: disable=E0611
+
+# pylint: disable=too-many-arguments
+
+log = logging.getLogger(__name__)
+
+# Columns of the l1b_files table, in order
+INDEX_COLUMNS = {
+    "path": "TEXT PRIMARY KEY",
+    "mtime": "REAL",
+    "size": "INTEGER",
+    "instr_mode": "TEXT",
+    "baseline": "TEXT",
+    "start_time": "TEXT",
+    "end_time": "TEXT",
+    "year": "INTEGER",
+    "month": "INTEGER",
+    "first_record_lat": "REAL",
+    "first_record_lon": "REAL",
+    "last_record_lat": "REAL",
+    "last_record_lon": "REAL",
+    "min_lat": "REAL",
+    "max_lat": "REAL",
+    "min_lon": "REAL",
+    "max_lon": "REAL",
+    "hemisphere": "TEXT",
+    "num_20hz_records": "INTEGER",
+}
+
+
+def read_l1b_footprint(l1b_file: str) -> Optional[dict[str, Any]]:
+    """read the footprint of a CryoSat L1b file, for storing in the index
+
+    Args:
+        l1b_file (str): path of L1b file
+
+    Returns:
+        dict|None: dict of INDEX_COLUMNS values, or None if the file could not be read
+    """
+    match = re.search(
+        r"_(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})(\d{2})"
+        r"_(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})(\d{2})_([A-Z])\d{3}\.nc$",
+        os.path.basename(l1b_file),
+    )
+    if not match:
+        return None
+    fields = match.groups()
+
+    try:
+        stat = os.stat(l1b_file)
+        with Dataset(l1b_file) as nc:
+            if "LRM" in nc.sir_op_mode:
+                instr_mode = "LRM"
+            elif "SARIN" in nc.sir_op_mode:
+                instr_mode = "SIN"
+            elif "SAR" in nc.sir_op_mode:
+                instr_mode = "SAR"
+            else:
+                return None
+            first_record_lat = nc.first_record_lat / 1e6
+            first_record_lon = nc.first_record_lon / 1e6
+            last_record_lat = nc.last_record_lat / 1e6
+            last_record_lon = nc.last_record_lon / 1e6
+            lats = nc["lat_20_ku"][:].data
+            lons = nc["lon_20_ku"][:].data
+    except (IOError, AttributeError, KeyError, IndexError):
+        return None
+
+    if lats.size == 0:
+        return None
+
+    # same hemisphere definition as alg_skip_on_area_bounds
+    polar_indices = np.flatnonzero(np.abs(lats) > 55.0)
+    if polar_indices.size > 0:
+        hemisphere = "north" if lats[polar_indices[0]] > 0.0 else "south"
+    else:
+        hemisphere = ""
+
+    lons = ((lons + 180.0) % 360.0) - 180.0  # -180..180E
+
+    return {
+        "path": l1b_file,
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "instr_mode": instr_mode,
+        "baseline": fields[12],
+        "start_time": "-".join(fields[0:3]) + "T" + ":".join(fields[3:6]),
+        "end_time": "-".join(fields[6:9]) + "T" + ":".join(fields[9:12]),
+        "year": int(fields[0]),
+        "month": int(fields[1]),
+        "first_record_lat": first_record_lat,
+        "first_record_lon": first_record_lon,
+        "last_record_lat": last_record_lat,
+        "last_record_lon": last_record_lon,
+        "min_lat": float(np.min(lats)),
+        "max_lat": float(np.max(lats)),
+        "min_lon": float(np.min(lons)),
+        "max_lon": float(np.max(lons)),
+        "hemisphere": hemisphere,
+        "num_20hz_records": int(lats.size),
+    }
+
+
+class L1bIndex:
+    """class to create, update and query a persistent SQLite index of L1b file footprints"""
+
+    def __init__(self, index_file: str, thislog: logging.Logger | None = None) -> None:
+        """class initialization. Opens (or creates) the index file
+
+        Args:
+            index_file (str): path of SQLite index file
+            thislog (logging.Logger|None, optional): log instance to use. Defaults to None.
+        """
+        self.index_file = index_file
+        self.log = thislog if thislog is not None else log
+
+        # timeout allows several processes to share (and update) the same index
+        self.conn = sqlite3.connect(index_file, timeout=60.0)
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in INDEX_COLUMNS.items())
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS l1b_files ({columns})")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS l1b_files_mode_time "
+                "ON l1b_files (instr_mode, year, month)"
+            )
+
+    def __enter__(self) -> "L1bIndex":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """close the index file"""
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM l1b_files").fetchone()[0]
+
+    def update(self, l1b_files: Iterable[str], num_processes: int = 1) -> int:
+        """add L1b files to the index, reading only files which are not yet indexed or
+        whose modification time or size has changed since they were indexed
+
+        Args:
+            l1b_files (Iterable[str]): paths of L1b files
+            num_processes (int, optional): number of processes to use to read files.
+                                           Defaults to 1.
+
+        Returns:
+            int: number of files read and (re)indexed
+        """
+        indexed = {
+            path: (mtime, size)
+            for path, mtime, size in self.conn.execute("SELECT path, mtime, size FROM l1b_files")
+        }
+
+        files_to_read = []
+        for l1b_file in l1b_files:
+            try:
+                stat = os.stat(l1b_file)
+            except OSError:
+                continue
+            if indexed.get(l1b_file) != (stat.st_mtime, stat.st_size):
+                files_to_read.append(l1b_file)
+
+        if len(files_to_read) == 0:
+            return 0
+
+        self.log.info("Indexing %d new or modified L1b files", len(files_to_read))
+
+        if num_processes > 1 and len(files_to_read) > 1:
+            with ProcessPoolExecutor(max_workers=num_processes) as executor:
+                footprints = list(
+                    executor.map(
+                        read_l1b_footprint,
+                        files_to_read,
+                        chunksize=max(1, len(files_to_read) // (num_processes * 4)),
+                    )
+                )
+        else:
+            footprints = [read_l1b_footprint(l1b_file) for l1b_file in files_to_read]
+
+        rows = [
+            tuple(footprint[name] for name in INDEX_COLUMNS)
+            for footprint in footprints
+            if footprint is not None
+        ]
+        if len(rows) < len(files_to_read):
+            self.log.warning(
+                "%d L1b files could not be read for the index", len(files_to_read) - len(rows)
+            )
+
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO l1b_files ({', '.join(INDEX_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(INDEX_COLUMNS))})",
+                rows,
+            )
+        return len(rows)
+
+    def remove_missing(self) -> int:
+        """remove files from the index which no longer exist
+
+        Returns:
+            int: number of files removed
+        """
+        missing = [
+            (path,)
+            for (path,) in self.conn.execute("SELECT path FROM l1b_files")
+            if not os.path.isfile(path)
+        ]
+        with self.conn:
+            self.conn.executemany("DELETE FROM l1b_files WHERE path = ?", missing)
+        return len(missing)
+
+    def query(
+        self,
+        paths: Optional[list[str]] = None,
+        instr_mode: str = "",
+        years: Optional[list[int]] = None,
+        months: Optional[list[int]] = None,
+        hemisphere: str = "",
+        greenland: bool = False,
+        min_lat: Optional[float] = None,
+        max_lat: Optional[float] = None,
+    ) -> list[str]:
+        """find indexed L1b files matching all of the given selections
+
+        Args:
+            paths (list[str], optional): only select from these files, and return them in
+                this order. Defaults to None (all indexed files, sorted by start time)
+            instr_mode (str, optional): 'LRM', 'SIN' or 'SAR'. Defaults to "" (any).
+            years (list[int], optional): years (YYYY) of file start times. Defaults to None.
+            months (list[int], optional): months (1-12) of file start times. Defaults to None.
+            hemisphere (str, optional): 'north' or 'south'. Defaults to "" (any).
+            greenland (bool, optional): select files whose first record is in the area
+                used by the finders' grn_only filter (first_record_lat >= 0 and
+                -90 <= first_record_lon <= 10). Defaults to False.
+            min_lat (float, optional): select files with nadir locations north of this
+                latitude. Defaults to None.
+            max_lat (float, optional): select files with nadir locations south of this
+                latitude. Defaults to None.
+
+        Returns:
+            list[str]: paths of selected L1b files
+        """
+        conditions = []
+        params: list[Any] = []
+        if instr_mode:
+            conditions.append("instr_mode = ?")
+            params.append(instr_mode)
+        if years:
+            conditions.append(f"year IN ({', '.join('?' * len(years))})")
+            params.extend(years)
+        if months:
+            conditions.append(f"month IN ({', '.join('?' * len(months))})")
+            params.extend(months)
+        if hemisphere:
+            conditions.append("hemisphere = ?")
+            params.append(hemisphere)
+        if greenland:
+            conditions.append(
+                "first_record_lat >= 0.0 AND first_record_lon >= -90.0 "
+                "AND first_record_lon <= 10.0"
+            )
+        if min_lat is not None:
+            conditions.append("max_lat > ?")
+            params.append(min_lat)
+        if max_lat is not None:
+            conditions.append("min_lat < ?")
+            params.append(max_lat)
+
+        sql = "SELECT path FROM l1b_files"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY start_time, path"
+
+        selected = [path for (path,) in self.conn.execute(sql, params)]
+
+        if paths is None:
+            return selected
+        selected_set = set(selected)
+        return [path for path in paths if path in selected_set]
@@ -0,0 +1,58 @@
+"""pytest tests of clev2er.utils.cs2.l1b_index.l1b_index
+"""
+
+import glob
+import os
+import shutil
+
+from clev2er.algorithms.cryotempo import find_lrm
+from clev2er.utils.cs2.l1b_index.l1b_index import L1bIndex
+
+
+def test_l1b_index(tmp_path):
+    """test creating, incrementally updating and querying an L1b index"""
+
+    base_dir = os.environ["CLEV2ER_BASE_DIR"]
+    assert base_dir is not None
+
+    # copy the test L1b files so that one can be modified
+    l1b_files = []
+    for l1b_file in sorted(glob.glob(f"{base_dir}/testdata/cs2/l1bfiles/CS_*_1B_*.nc")):
+        l1b_files.append(shutil.copy(l1b_file, tmp_path))
+    assert len(l1b_files) > 1
+
+    index_file = str(tmp_path / "l1b_index.sqlite")
+
+    with L1bIndex(index_file) as index:
+        assert index.update(l1b_files) == len(l1b_files)
+        assert len(index) == len(l1b_files)
+
+        # nothing to do if files have not changed
+        assert index.update(l1b_files) == 0
+
+        # the greenland selection matches the finders' grn_only filter
+        assert index.query(greenland=True) == [
+            l1b_file for l1b_file in l1b_files if find_lrm.test_nc_file_in_greenland(l1b_file)
+        ]
+
+        lrm_files = index.query(instr_mode="LRM")
+        assert len(lrm_files) > 0
+        assert all("_SIR_LRM_1B_" in l1b_file for l1b_file in lrm_files)
+        assert index.query(instr_mode="SIN") == []
+
+        # results follow the order of the paths argument
+        assert index.query(paths=lrm_files[::-1]) == lrm_files[::-1]
+
+        assert index.query(years=[2020], months=[9]) == [
+            l1b_file for l1b_file in lrm_files if "_1B_202009" in l1b_file
+        ]
+        for l1b_file in index.query(hemisphere="south"):
+            assert index.query(paths=[l1b_file], max_lat=-55.0) == [l1b_file]
+
+    # files modified since they were indexed are read again, and deleted files removed
+    os.utime(l1b_files[0], (0, 0))
+    os.remove(l1b_files[1])
+    with L1bIndex(index_file) as index:
+        assert index.update(l1b_files) == 1
+        assert index.remove_missing() == 1
+        assert len(index) == len(l1b_files) - 1
@@ -59,7 +59,7 @@ retrack measurement number 312 (index count from 0)
 """
 
 import logging  # logging functions
-from typing import List, Tuple, Union
+from typing import Callable, List, Tuple, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -70,6 +70,12 @@ from scipy.signal import savgol_filter
 from clev2er.utils.cs2.retrackers.fastsmooth import (  # waveform smoothing filter (option 2)
     fastsmooth,
 )
+from clev2er.utils.cs2.retrackers.waveform_search import (
+    LinearWaveforms,
+    OversampledWaveforms,
+    find_leading_edges,
+    find_leading_edges_linear,
+)
 
 # too-many-arguments,too-many-locals, too-many-statements pylint: disable=R0912,R0913,R0914,R0915
 # too-many-nested-blocks, pylint: disable=R1702
@@ -101,15 +107,9 @@ def retrack_cs2_sin_max_coherence(
     le_id_threshold: float = 0.05,
     le_dp_threshold: float = 0.20,
     coherence_smoothing_width=9,
-) -> Tuple[
-    np.ndarray,
-    np.ndarray,
-    List[List[float]],
-    List[List[float]],
-    np.ndarray,
-    int,
-    List[List[int]],
-]:
+    max_waveforms_per_chunk: int = 1000,
+    analytic_crossings: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, int, np.ndarray]:
     """
     % SUMMARY
     %   Retracking of CS2 SIN waveforms using Max Coherence Retracker
@@ -121,6 +121,11 @@ def retrack_cs2_sin_max_coherence(
     %   over Antarctica)
     % ------------------------------------------------------------------------
 
+    Waveforms are retracked in chunks of up to max_waveforms_per_chunk, each processed
+    together as a (n, waveform_numbins) matrix with its coherence waveforms. The oversampled
+    waveforms are searched with clev2er.utils.cs2.retrackers.waveform_search, which finds the
+    same samples as searching complete oversampled waveforms, without creating them.
+
     Args:
         l1b_file (str) : file name of L1b file
         waveforms (np.ndarray): instead of reading from L1b file, you can pass in a
@@ -151,23 +156,29 @@ def retrack_cs2_sin_max_coherence(
         le_dp_threshold (float, def=0.2): define threshold on normalised amplitude change which is
                                           required to be accepted as lead edge
         coherence_smoothing_width (int, def-9): coherence boxcar average smoothing width
+        max_waveforms_per_chunk (int, def=1000): maximum number of waveforms retracked together,
+                                                 to limit memory use
+        analytic_crossings (bool, def=False): if True, find the leading edge and the bins 50%
+                                              up it on the waveforms interpolated linearly
+                                              between bins, instead of searching the waveforms
+                                              oversampled by wf_oversampling_factor
 
 
     Returns:
         Tuple: (dr_bin_mc, dr_meters_mc, leading_edge_start, leading_edge_stop,pwr_at_rtrk_point_mc,
                 n_retrack_mc_failed, retrack_flag)
-                dr_bin_mc (List[float]) : max coherence epoch relative to nominal tracking point
+                dr_bin_mc (np.ndarray) : max coherence epoch relative to nominal tracking point
                                           in bins
-                dr_meters_mc (List[float]) : max coherence epoch relative to nominal tracking point
+                dr_meters_mc (np.ndarray) : max coherence epoch relative to nominal tracking point
                                           in meters
-                leading_edge_start (List[List[float]]): leading edge start coordinates
+                leading_edge_start (np.ndarray): leading edge start coordinates, shape (t, 2)
                                                     column 1 = bin  |  column 2 = normalised power
-                leading_edge_stop (List[List[float]]): leading edge stop coordinates
+                leading_edge_stop (np.ndarray): leading edge stop coordinates, shape (t, 2)
                                                     column 1 = bin  |  column 2 = normalised power
-                pwr_at_rtrk_point_mc (List[float]): power in counts at retracking point
+                pwr_at_rtrk_point_mc (np.ndarray): power in counts at retracking point
                 n_retrack_mc_failed (int): number of waveforms were retracking failed
-                retrack_flag (List[List[int]]): returned retracker flags for each waveform indicate
-                            how retracking failed | 6 x t |
+                retrack_flag (np.ndarray): returned retracker flags for each waveform indicate
+                            how retracking failed | t x 6 |
                                 column 1 (index 0): 0 or 1 max amplitude is 0 so skippings
                                                     or mean noise above a predefined threshold
                                 column 2 (index 1): 0 or 1 if no samples are sufficiently above the
@@ -183,6 +194,9 @@ def retrack_cs2_sin_max_coherence(
     if l1b_file and waveforms:
         raise ValueError("Must have either l1b_file or waveforms, not both as input to function")
 
+    if max_waveforms_per_chunk < 1:
+        raise ValueError(f"max_waveforms_per_chunk {max_waveforms_per_chunk} must be at least 1")
+
     # -------------------------
     # Find if input file is LRM or SIN. Only SIN allowed
     # -------------------------
@@ -246,47 +260,44 @@ def retrack_cs2_sin_max_coherence(
                     must be same dimensions as number of waveforms {n_waveforms}"
             )
 
-    # preallocate output arrays (list for each waveform)
-    leading_edge_start = [[np.nan for _ in range(2)] for _ in range(n_waveforms)]
-    leading_edge_stop = [[np.nan for _ in range(2)] for _ in range(n_waveforms)]
-    retrack_point_mc = [[np.nan for _ in range(3)] for _ in range(n_waveforms)]
-    retrack_flag = [[0 for _ in range(6)] for _ in range(n_waveforms)]
-
-    # Process each waveform
-    for i, waveform in enumerate(wfs):
-        # Special case for debugging individual measurements
-        if measurement_index:
-            if i != measurement_index:
-                continue
+    # preallocate output arrays (row for each waveform)
+    leading_edge_start = np.full((n_waveforms, 2), np.nan)
+    leading_edge_stop = np.full((n_waveforms, 2), np.nan)
+    retrack_point_mc = np.full((n_waveforms, 3), np.nan)
+    retrack_flag = np.zeros((n_waveforms, 6), dtype=int)
 
-        # log.debug('retracking measurment: {} '.format(i))
+    # Waveforms to retrack
+    if include_measurements_array is not None:
+        included = np.flatnonzero(include_measurements_array)
+    else:
+        included = np.arange(n_waveforms)
 
-        # skip waveform if include_measurements_array[i] is set to False
-        if include_measurements_array is not None:
-            if not include_measurements_array[i]:
-                log.debug("skip waveform as include_measurements_array[i] is set to False")
-                continue
+    # Special case for debugging individual measurements
+    if measurement_index:
+        included = included[included == measurement_index]
 
-        log.debug("retracking waveform %d of %d", i, n_waveforms)
+    # Process the waveforms in chunks, each as rows of a (n, waveform_size) matrix
+    for chunk_start in range(0, len(included), max_waveforms_per_chunk):
+        rows = included[chunk_start : chunk_start + max_waveforms_per_chunk]
+        log.debug("retracking waveforms %d to %d of %d", rows[0], rows[-1], n_waveforms)
 
         # compute max amplitude
-        wf_max = np.max(waveform)
+        wf_max = np.max(wfs[rows], axis=1)
 
-        if wf_max == 0.0:
-            log.debug("wf_max is 0 so skipping")
-            # set flag
-            retrack_flag[i][0] = 1
-            continue
+        # set flag where wf_max is 0, and skip
+        retrack_flag[rows[wf_max == 0.0], 0] = 1
+        rows = rows[wf_max != 0.0]
+        wf_max = wf_max[wf_max != 0.0]
 
         # normalise so that max amplitude is 1
-        wfnorm = waveform / wf_max
+        wfnorm = wfs[rows] / wf_max[:, None]
 
         # ---------
-        # smooth waveform
+        # smooth waveforms
         # ---------
 
-        # Apply 1-d Savitsky-Golay filter, to smooth waveform
-        wfnorm_sm = savgol_filter(wfnorm, sm_width, sm_polynomial_order)
+        # Apply 1-d Savitsky-Golay filter, to smooth each waveform
+        wfnorm_sm = savgol_filter(wfnorm, sm_width, sm_polynomial_order, axis=1)
 
         # switch end values from 0 to nan
         wfnorm_sm[wfnorm_sm == 0] = np.nan  # COMMENT : sets any 0 to Nan, not just end points?
@@ -296,14 +307,15 @@ def retrack_cs2_sin_max_coherence(
         # ---------------------
         if noise_definition == "first_bins":
             # estimate noise based on first samples of waveform
-            wf_noise_mean = np.mean(wfnorm[0:noise_sample_limit])
+            wf_noise_mean = np.mean(wfnorm[:, 0:noise_sample_limit], axis=1)
 
         elif noise_definition == "min_power":
-            # alternatively sort power values of unsmoothed waveform in ascending order
-            wfsort = sorted(wfnorm)
+            # alternatively find the lowest 6 power values of the unsmoothed waveform, in
+            # ascending order
+            wfsort = np.sort(np.partition(wfnorm, 5, axis=1)[:, 0:6], axis=1)
 
             # estimate noise based on lowest 6 samples
-            wf_noise_mean = np.mean(wfsort[0:6])
+            wf_noise_mean = np.mean(wfsort, axis=1)
         else:
             raise ValueError(f"noise definition {noise_definition} unsupported")
 
@@ -311,317 +323,178 @@ def retrack_cs2_sin_max_coherence(
         # quality check 1 - if mean noise above a predefined threshold
         # ------------------------------------------------------------
 
-        if (wf_noise_mean > noise_threshold) or np.isnan(wf_noise_mean):
-            # set flag
-            retrack_flag[i][0] = 1
-
-            log.debug("quality check 1 FAILED : mean noise above a predefined threshold")
-
-            # do not attempt retracking and leave as nan
-
-        else:  # continue with retracking
-            # ------------------------
-            # Over Sample the waveform
-            # ------------------------
-            wf_bin_num = np.linspace(0, waveform_size - 1, waveform_size)
-
-            # create oversampled waveform bin indices
-            wf_bin_numi = np.linspace(0, waveform_size - 1, waveform_size * wf_oversampling_factor)
-
-            # Oversample normalised waveform
-            wfi = np.interp(wf_bin_numi, wf_bin_num, wfnorm)
-
-            # Oversample smoothed normalised waveform
-            wfi_sm = np.interp(wf_bin_numi, wf_bin_num, wfnorm_sm)
-
-            # ------------------
-            # compute derivative
-            # ------------------
-
-            # compute first derivative of smoothed waveform using central difference which is
-            # calculated between i-1:i+1
-            d_wf_sm = np.gradient(wfi_sm, (1 / wf_oversampling_factor))
-
-            # ------------------------------------
-            # initiate leading edge identification
-            # ------------------------------------
-
-            # initiate parameters for iteratively finding leading edge with amplitude above
-            # predefined threshold
-            previous_le_ind = 0
-            le_dp = 0
-            count = 1
-            # -------------------------------------------------------------------------------
-            # loop through leading edges until minimum amplitude requirement met or the end of
-            # the waveform is reached
-            # -------------------------------------------------------------------------------
-
-            # searches for leading edge greater than the amplitude threshold
-            while le_dp < le_dp_threshold:
-                # Find the first index of the waveform wfi_sm that satifies the criteria:
-                #    > (wf_noise_mean + le_id_threshold)
-                #    d_wf_sm > 0
-                #    index > previous_le_ind
-
-                le_index = np.where((wfi_sm > (wf_noise_mean + le_id_threshold)) & (d_wf_sm > 0))[0]
-
-                if le_index.size > 0:
-                    le_index = le_index[le_index > (previous_le_ind + wf_oversampling_factor)]
-
-                # ----------------------------------------------------------------------
-                # quality check 2 - if no samples are sufficiently above the noise floor
-                # ----------------------------------------------------------------------
-
-                if le_index.size == 0:
-                    # set flag
-                    retrack_flag[i][1] = 1
-                    log.debug(
-                        "quality check 2 FAILED :no samples are sufficiently above the noise floor"
-                    )
-                    # exit search for leading edge
-                    break
-
-                # Select the first leading edge index found
-                le_index = le_index[0]
-
-                # ----------------------------------------------------------
-                # leading edge exists so find position and amplitude of peak
-                # ----------------------------------------------------------
-
-                # find where the gradient first becomes negative after the power threshold is
-                # exceeded
-                first_peak_indices = np.where(
-                    (d_wf_sm <= 0) & (wf_bin_numi > wf_bin_numi[le_index])
-                )[0]
-                # Select the first one
-                if first_peak_indices.size > 0:
-                    first_peak_ind = int(first_peak_indices[0])
-
-                    # calculate the amplitude of the peak above the identified start point of
-                    # the leading edge
-                    le_dp = wfi_sm[first_peak_ind] - wfi_sm[le_index]
-
-                    # update previously identified peak to the current one in case the while
-                    # loop continues
-                    previous_le_ind = first_peak_ind
-
-                    # if reached end of waveform
-                    if previous_le_ind > (wf_bin_numi.size - wf_oversampling_factor - 1):
-                        # set flag
-                        retrack_flag[i][3] = 1
-                        # exit search for leading edge
-                        break
-                else:
-                    # ---------------------------------------------------------------------
-                    # quality check 3 - if no waveform peak can be identified after the
-                    # leading edge starts
-                    # ---------------------------------------------------------------------
-                    # first_peak_ind array is empty so set flag
-                    retrack_flag[i][2] = 1
-                    log.debug(
-                        "quality check 3 FAILED :no waveform peak can be identified after \
-                            the leading edge starts"
-                    )
-                    # exit search for leading edge
-                    break
-
-                # update count of how many iterations through loop
-                count = count + 1
-
-            # ----------------------
-            # find retracking point
-            # ----------------------
-
-            # only compute retracking points if no flags set
-
-            if np.sum(retrack_flag[i]) > 0:
-                log.debug("Retracker flags set, so not continuing to find retracking point")
+        noisy = (wf_noise_mean > noise_threshold) | np.isnan(wf_noise_mean)
+        # set flag, do not attempt retracking and leave as nan
+        retrack_flag[rows[noisy], 0] = 1
+        log.debug(
+            "quality check 1 FAILED : mean noise above a predefined threshold: %d",
+            np.count_nonzero(noisy),
+        )
+
+        # continue with retracking
+        rows = rows[~noisy]
+        wf_max = wf_max[~noisy]
+        wf_noise_mean = wf_noise_mean[~noisy]
+
+        # -----------------------------------------------------------------------------------
+        # Over Sample the waveforms, and compute first derivative of smoothed waveforms using
+        # central difference. The oversampled waveforms are searched without being stored.
+        # -----------------------------------------------------------------------------------
+
+        # With analytic_crossings, the waveforms are searched as interpolated linearly
+        # between bins instead.
+        wfi: LinearWaveforms | OversampledWaveforms
+        wfi_sm: LinearWaveforms | OversampledWaveforms
+        if analytic_crossings:
+            wfi = LinearWaveforms(wfnorm[~noisy])
+            wfi_sm = LinearWaveforms(wfnorm_sm[~noisy])
+        else:
+            wfi = OversampledWaveforms(wfnorm[~noisy], wf_oversampling_factor)
+            wfi_sm = OversampledWaveforms(wfnorm_sm[~noisy], wf_oversampling_factor)
+            wf_bin_numi = wfi.positions
+
+        # -------------------------------------------------------------------------------
+        # loop through leading edges until minimum amplitude requirement met or the end of
+        # the waveform is reached
+        # -------------------------------------------------------------------------------
+
+        if isinstance(wfi_sm, LinearWaveforms):
+            le_index, first_peak_ind, le_dp, le_flags = find_leading_edges_linear(
+                wfi_sm, wf_noise_mean, le_id_threshold, le_dp_threshold
+            )
+        else:
+            le_index, first_peak_ind, le_dp, le_flags = find_leading_edges(
+                wfi_sm, wf_noise_mean, le_id_threshold, le_dp_threshold
+            )
+        retrack_flag[rows, 1:4] = le_flags
+        log.debug(
+            "quality checks 2,3 FAILED : no samples are sufficiently above the noise floor: %d"
+            ", no waveform peak can be identified after the leading edge starts: %d"
+            ", reached end of waveform: %d",
+            *np.count_nonzero(le_flags, axis=0),
+        )
+
+        # ----------------------
+        # find retracking point
+        # ----------------------
+
+        # only compute retracking points if no flags set
+        ok = ~le_flags.any(axis=1)
+        rows = rows[ok]
+        if rows.size == 0:
+            continue
+        retracking = np.flatnonzero(ok)
+        le_index = le_index[ok]
+        first_peak_ind = first_peak_ind[ok]
+        le_dp = le_dp[ok]
+        wf_max = wf_max[ok]
+
+        # ----------------------------------------------------------------------------
+        # find Max Coherence retracking point for SIN waveforms
+        # ----------------------------------------------------------------------------
+
+        # Smooth the coherence waveforms using a running average window
+        # Coherence waveform is not oversampled
+        if coherence is None:
+            raise ValueError("coherence is None instead of np.ndarray")
+        coherence_sm = fastsmooth(coherence[rows], coherence_smoothing_width)
+
+        # Find bins of 50% up the leading edge to start search for max coherence
+        #  where WFnorm [ns...ne] > 0.5 * LEamp + LEmin_energy, between le_index and
+        #  first_peak_ind
+        retracked_wfi = wfi_sm if retrack_smooth_wf else wfi
+        if isinstance(retracked_wfi, LinearWaveforms):
+            top_of_le_bins = retracked_wfi.rounded_bins(
+                retracking,
+                le_index,
+                first_peak_ind,
+                retracked_wfi.values_at(retracking, le_index[:, None])[:, 0] + 0.5 * le_dp,
+            )
+        else:
+            le_values = np.zeros(wfi.values.shape[0])
+            le_values[retracking] = retracked_wfi.values_at(retracking, le_index[:, None])[:, 0]
+            half_le_dp = np.zeros(wfi.values.shape[0])
+            half_le_dp[retracking] = 0.5 * le_dp
+            top_of_le_bins = retracked_wfi.rounded_bins(
+                retracking,
+                le_index,
+                first_peak_ind,
+                _above_level(retracked_wfi, le_values, half_le_dp),
+            )
+
+        found = top_of_le_bins.any(axis=1)
+        retrack_flag[rows[~found], 5] = 1
+
+        # find the index of maximum coherence in wf indices
+        index_of_max_coherence = np.argmax(
+            np.where(top_of_le_bins[found], coherence_sm[found], -np.inf), axis=1
+        )
+        mc_rows = rows[found]
+
+        if retrack_smooth_wf and analytic_crossings:
+            retrack_point_mc[mc_rows, 0] = index_of_max_coherence
+            retrack_point_mc[mc_rows, 1] = wfi_sm.values[retracking[found], index_of_max_coherence]
+            retrack_point_mc[mc_rows, 2] = retrack_point_mc[mc_rows, 1] * wf_max[found]
+        elif retrack_smooth_wf:
+            retrack_point_mc[mc_rows, 0] = index_of_max_coherence
+            retrack_point_mc[mc_rows, 1] = wfi_sm.values_at(
+                retracking[found], index_of_max_coherence[:, None] * wf_oversampling_factor
+            )[:, 0]
+            retrack_point_mc[mc_rows, 2] = retrack_point_mc[mc_rows, 1] * wf_max[found]
+        else:
+            retrack_point_mc[mc_rows, 0] = index_of_max_coherence
+            retrack_point_mc[mc_rows, 1] = wfs[mc_rows, index_of_max_coherence] / wf_max[found]
+            retrack_point_mc[mc_rows, 2] = wfs[mc_rows, index_of_max_coherence]
+
+        zero_power = retrack_point_mc[mc_rows, 2] == 0
+        retrack_point_mc[mc_rows[zero_power]] = np.nan
+        log.debug("zero power found at retracking point: %d", np.count_nonzero(zero_power))
+        retrack_flag[mc_rows[zero_power], 5] = 1
+
+        if plot_flag:
+            if analytic_crossings:
+                # plot at the nearest oversampled samples
+                plot_indices = np.rint(
+                    np.array([le_index[found], first_peak_ind[found]])
+                    * (waveform_size * wf_oversampling_factor - 1)
+                    / (waveform_size - 1)
+                ).astype(int)
             else:
-                # ----------------------------------------------------------------------------
-                # find Max Coherence retracking point for SIN waveforms
-                # ----------------------------------------------------------------------------
-
-                # Smooth the coherence waveform using a running average window
-                # Coherence waveform is not oversampled
-                if coherence is not None:
-                    coherence_sm = fastsmooth(coherence[i], coherence_smoothing_width)
-                else:
-                    raise ValueError("coherence is None instead of np.ndarray")
-                # Find indices of 50% up the leading edge to start search for max coherence
-                #  where WFnorm [ns...ne] > 0.5 * LEamp + LEmin_energy
-                if retrack_smooth_wf:
-                    top_of_le_indices = np.where((wfi_sm - wfi_sm[le_index]) > 0.5 * le_dp)[0]
-                else:
-                    top_of_le_indices = np.where((wfi - wfi[le_index]) > 0.5 * le_dp)[0]
-                # Restrict to between le_index and first_peak_ind
-                top_of_le_indices = np.unique(
-                    np.rint(
-                        wf_bin_numi[
-                            top_of_le_indices[
-                                (top_of_le_indices >= le_index)
-                                & (top_of_le_indices <= first_peak_ind)
-                            ]
-                        ]
-                    ).astype(int)
+                plot_indices = np.array([le_index[found], first_peak_ind[found]])
+            for i, row, (le_ind, peak_ind), top_bins, max_coherence_ind in zip(
+                mc_rows,
+                retracking[found],
+                plot_indices.T,
+                top_of_le_bins[found],
+                index_of_max_coherence,
+            ):
+                plot_mc_retracking(
+                    f"{mode_str} Waveform Retracking for Measurement Number : {i}",
+                    wfi.values[row],
+                    wfi_sm.values[row],
+                    wf_oversampling_factor,
+                    le_ind,
+                    peak_ind,
+                    np.flatnonzero(top_bins)[[0, -1]],
+                    max_coherence_ind,
+                    wf_noise_mean[row],
                 )
 
-                if len(top_of_le_indices) < 1:
-                    retrack_flag[i][5] = 1
-                else:
-                    mc_start_index = top_of_le_indices[0]
-                    mc_end_index = top_of_le_indices[-1]
-                    # find the index of maximum coherence in wf indices
-                    index_of_max_coherence = top_of_le_indices[
-                        np.argmax(coherence_sm[top_of_le_indices])
-                    ]
-
-                    if retrack_smooth_wf:
-                        retrack_point_mc[i][0] = index_of_max_coherence
-                        retrack_point_mc[i][1] = wfi_sm[
-                            index_of_max_coherence * wf_oversampling_factor
-                        ]
-                        retrack_point_mc[i][2] = (
-                            wfi_sm[index_of_max_coherence * wf_oversampling_factor] * wf_max
-                        )
-                    else:
-                        retrack_point_mc[i][0] = index_of_max_coherence
-                        retrack_point_mc[i][1] = waveform[index_of_max_coherence] / wf_max
-                        retrack_point_mc[i][2] = waveform[index_of_max_coherence]
-
-                    if retrack_point_mc[i][2] == 0:
-                        retrack_point_mc[i][0] = np.nan
-                        retrack_point_mc[i][1] = np.nan
-                        retrack_point_mc[i][2] = np.nan
-                        log.debug("zero power found at retracking point")
-                        retrack_flag[i][5] = 1
-
-                if plot_flag:
-                    # Plot echo with retracking points
-                    fig = plt.figure(figsize=(15, 6))
-                    this_gridspec = gridspec.GridSpec(1, 2, width_ratios=[2.5, 1])
-                    ax1 = plt.subplot(this_gridspec[0])
-                    ax2 = plt.subplot(this_gridspec[1])
-
-                    ax1.plot(
-                        wf_bin_numi,
-                        wfi,
-                        color="green",
-                        marker=".",
-                        label="oversampled waveform",
-                    )
-                    ax1.plot(
-                        wf_bin_numi,
-                        wfi_sm,
-                        color="blue",
-                        marker=".",
-                        label="oversampled smoothed waveform",
-                    )
-                    ax1.plot(wf_bin_numi, d_wf_sm, color="lightgray", label="gradient")
-                    ax1.set_xlabel("Waveform bin number")
-                    ax1.set_ylabel("Normalised power")
-                    ax1.set_title(f"{mode_str} Waveform Retracking for Measurement Number : {i}")
-                    ax1.xaxis.grid()
-                    ax1.yaxis.grid()
-                    ax1.axvline(
-                        x=wf_bin_numi[first_peak_ind],
-                        color="grey",
-                        linestyle="-.",
-                        label="1st peak index",
-                    )
-                    ax1.axvline(
-                        x=float(wf_bin_numi[le_index]),
-                        color="grey",
-                        linestyle="--",
-                        label="LE index",
-                    )
-
-                    ax1.axhline(
-                        y=wf_noise_mean,
-                        color="yellow",
-                        linestyle="--",
-                        label="Mean Noise in noise gates",
-                        linewidth=2,
-                    )
-
-                    ax1.legend()
-
-                    # Create 2nd subplot,and display waveform around the leading edge
-                    # find indices around leading edge
-                    plot_start_index = int(le_index - int(wf_bin_numi.size / 80))
-                    plot_start_index = max(plot_start_index, 0)
-                    plot_end_index = first_peak_ind + int(wf_bin_numi.size / 80)
-                    if plot_end_index > (wf_bin_numi.size - 1):
-                        plot_end_index = wf_bin_numi.size - 1
-
-                    ax2.plot(
-                        wf_bin_numi[plot_start_index:plot_end_index],
-                        wfi[plot_start_index:plot_end_index],
-                        color="green",
-                        marker=".",
-                        label="oversampled waveform",
-                    )
-                    ax2.plot(
-                        wf_bin_numi[plot_start_index:plot_end_index],
-                        wfi_sm[plot_start_index:plot_end_index],
-                        color="blue",
-                        marker=".",
-                        label="oversampled smoothed waveform",
-                    )
-                    ax2.axvline(
-                        x=wf_bin_numi[first_peak_ind],
-                        color="grey",
-                        linestyle="-.",
-                        linewidth=4,
-                        label="1st peak index",
-                    )
-                    ax2.axvline(
-                        x=float(wf_bin_numi[le_index]),
-                        color="grey",
-                        linestyle="--",
-                        label="LE index",
-                    )
-
-                    ax2.axvline(x=mc_start_index, color="pink", linestyle="-.", label="MC Start")
-                    ax2.axvline(x=mc_end_index, color="pink", linestyle="-.", label="MC End")
-                    ax2.axvline(
-                        x=index_of_max_coherence,
-                        color="pink",
-                        linestyle="-",
-                        linewidth=4,
-                        label="MC retrack point",
-                    )
-
-                    ax2.axhline(
-                        y=wf_noise_mean,
-                        color="yellow",
-                        linestyle="--",
-                        label="Mean Noise in noise gates",
-                        linewidth=2,
-                    )
-
-                    ax2.set_ylim(ymin=0.0, ymax=1.0)
-                    ax2.set_title("Around Leading Edge")
-                    fig.tight_layout()
-                    plt.show(block=True)
-
-                # ------------------------------
-                # store leading edge coordinates
-                # ------------------------------
-
-                # columns give bin number, normalised amplitude value, original amplitude value
-                leading_edge_start[i][0] = wf_bin_numi[le_index].item()
-                leading_edge_start[i][1] = wfi_sm[le_index].item()
-                leading_edge_stop[i][0] = wf_bin_numi[first_peak_ind]
-                leading_edge_stop[i][1] = wfi_sm[first_peak_ind]
-
-                # ----------------------------
-                # store retracking coordinates
-                # ----------------------------
-
-                if retrack_flag[i][5]:
-                    log.debug("No retracking point retrieved for Max Coherence")
-
-    # Completed retracking loop over waveforms
+        # ------------------------------
+        # store leading edge coordinates
+        # ------------------------------
+
+        # columns give bin number, normalised amplitude value, original amplitude value
+        if analytic_crossings:
+            leading_edge_start[rows, 0] = le_index
+            leading_edge_stop[rows, 0] = first_peak_ind
+        else:
+            leading_edge_start[rows, 0] = wf_bin_numi[le_index]
+            leading_edge_stop[rows, 0] = wf_bin_numi[first_peak_ind]
+        leading_edge_start[rows, 1] = wfi_sm.values_at(retracking, le_index[:, None])[:, 0]
+        leading_edge_stop[rows, 1] = wfi_sm.values_at(retracking, first_peak_ind[:, None])[:, 0]
+
+    # Completed retracking of waveforms
 
     # --------------------------------------------
     # compute retracker offsets for all waveforms
@@ -629,27 +502,17 @@ def retrack_cs2_sin_max_coherence(
 
     # compute range offsets from reference to retracked bins
     # tip: for CS2 SIN, ref_bin_ind_sin=512
-    dr_bin_mc = np.array(retrack_point_mc)[:, 0] - ref_bin_ind_sin
+    dr_bin_mc = retrack_point_mc[:, 0] - ref_bin_ind_sin
 
     # convert offsets to meters
     dr_meters_mc = dr_bin_mc * rbin_size_sin
 
     # Store power in counts at retracking point (used for backscatter calculation)
 
-    pwr_at_rtrk_point_mc = np.array(retrack_point_mc)[:, 2]
-
-    n_retrack_mc_failed = 0
+    pwr_at_rtrk_point_mc = retrack_point_mc[:, 2]
 
-    for i in range(n_waveforms):
-        # Check MC retracker flags
-        if (
-            retrack_flag[i][5]
-            or retrack_flag[i][3]
-            or retrack_flag[i][2]
-            or retrack_flag[i][1]
-            or retrack_flag[i][0]
-        ):
-            n_retrack_mc_failed += 1
+    # Check MC retracker flags
+    n_retrack_mc_failed = int(np.count_nonzero(retrack_flag[:, [0, 1, 2, 3, 5]].any(axis=1)))
 
     log.debug("Number of waveforms = %d", n_waveforms)
     if include_measurements_array is not None:
@@ -668,3 +531,163 @@ def retrack_cs2_sin_max_coherence(
         n_retrack_mc_failed,
         retrack_flag,
     )
+
+
+def _above_level(
+    waveforms: OversampledWaveforms, level: np.ndarray, height: np.ndarray
+) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    """get an OversampledWaveforms.rounded_bins() condition, True where the samples of each
+    waveform are more than height above level
+
+    Args:
+        waveforms (OversampledWaveforms): waveforms searched
+        level (np.ndarray): level of each waveform, shape (n_waveforms,)
+        height (np.ndarray): height above level of each waveform, shape (n_waveforms,)
+
+    Returns:
+        Callable: condition(rows, samples)
+    """
+    return (
+        lambda rows, samples: (waveforms.values_at(rows, samples) - level[rows, None])
+        > height[rows, None]
+    )
+
+
+def plot_mc_retracking(
+    title: str,
+    wfnorm: np.ndarray,
+    wfnorm_sm: np.ndarray,
+    wf_oversampling_factor: int,
+    le_index: int,
+    first_peak_ind: int,
+    mc_start_end_index: np.ndarray,
+    index_of_max_coherence: int,
+    wf_noise_mean: float,
+):
+    """plot a waveform with its leading edge and maximum coherence retracking point, for testing
+
+    Args:
+        title (str): plot title
+        wfnorm (np.ndarray): normalised waveform
+        wfnorm_sm (np.ndarray): smoothed normalised waveform
+        wf_oversampling_factor (int): waveform oversampling factor
+        le_index (int): oversampled index of leading edge start
+        first_peak_ind (int): oversampled index of leading edge stop
+        mc_start_end_index (np.ndarray): first and last bins of the maximum coherence search
+        index_of_max_coherence (int): bin of maximum coherence (retracking point)
+        wf_noise_mean (float): mean noise of normalised waveform
+    """
+    waveform_size = len(wfnorm)
+
+    # Over Sample the waveform
+    wf_bin_num = np.linspace(0, waveform_size - 1, waveform_size)
+    wf_bin_numi = np.linspace(0, waveform_size - 1, waveform_size * wf_oversampling_factor)
+    wfi = np.interp(wf_bin_numi, wf_bin_num, wfnorm)
+    wfi_sm = np.interp(wf_bin_numi, wf_bin_num, wfnorm_sm)
+    d_wf_sm = np.gradient(wfi_sm, (1 / wf_oversampling_factor))
+
+    # Plot echo with retracking points
+    fig = plt.figure(figsize=(15, 6))
+    this_gridspec = gridspec.GridSpec(1, 2, width_ratios=[2.5, 1])
+    ax1 = plt.subplot(this_gridspec[0])
+    ax2 = plt.subplot(this_gridspec[1])
+
+    ax1.plot(
+        wf_bin_numi,
+        wfi,
+        color="green",
+        marker=".",
+        label="oversampled waveform",
+    )
+    ax1.plot(
+        wf_bin_numi,
+        wfi_sm,
+        color="blue",
+        marker=".",
+        label="oversampled smoothed waveform",
+    )
+    ax1.plot(wf_bin_numi, d_wf_sm, color="lightgray", label="gradient")
+    ax1.set_xlabel("Waveform bin number")
+    ax1.set_ylabel("Normalised power")
+    ax1.set_title(title)
+    ax1.xaxis.grid()
+    ax1.yaxis.grid()
+    ax1.axvline(
+        x=wf_bin_numi[first_peak_ind],
+        color="grey",
+        linestyle="-.",
+        label="1st peak index",
+    )
+    ax1.axvline(
+        x=float(wf_bin_numi[le_index]),
+        color="grey",
+        linestyle="--",
+        label="LE index",
+    )
+
+    ax1.axhline(
+        y=wf_noise_mean,
+        color="yellow",
+        linestyle="--",
+        label="Mean Noise in noise gates",
+        linewidth=2,
+    )
+
+    ax1.legend()
+
+    # Create 2nd subplot,and display waveform around the leading edge
+    # find indices around leading edge
+    plot_start_index = int(le_index - int(wf_bin_numi.size / 80))
+    plot_start_index = max(plot_start_index, 0)
+    plot_end_index = min(first_peak_ind + int(wf_bin_numi.size / 80), wf_bin_numi.size - 1)
+
+    ax2.plot(
+        wf_bin_numi[plot_start_index:plot_end_index],
+        wfi[plot_start_index:plot_end_index],
+        color="green",
+        marker=".",
+        label="oversampled waveform",
+    )
+    ax2.plot(
+        wf_bin_numi[plot_start_index:plot_end_index],
+        wfi_sm[plot_start_index:plot_end_index],
+        color="blue",
+        marker=".",
+        label="oversampled smoothed waveform",
+    )
+    ax2.axvline(
+        x=wf_bin_numi[first_peak_ind],
+        color="grey",
+        linestyle="-.",
+        linewidth=4,
+        label="1st peak index",
+    )
+    ax2.axvline(
+        x=float(wf_bin_numi[le_index]),
+        color="grey",
+        linestyle="--",
+        label="LE index",
+    )
+
+    ax2.axvline(x=mc_start_end_index[0], color="pink", linestyle="-.", label="MC Start")
+    ax2.axvline(x=mc_start_end_index[1], color="pink", linestyle="-.", label="MC End")
+    ax2.axvline(
+        x=index_of_max_coherence,
+        color="pink",
+        linestyle="-",
+        linewidth=4,
+        label="MC retrack point",
+    )
+
+    ax2.axhline(
+        y=wf_noise_mean,
+        color="yellow",
+        linestyle="--",
+        label="Mean Noise in noise gates",
+        linewidth=2,
+    )
+
+    ax2.set_ylim(ymin=0.0, ymax=1.0)
+    ax2.set_title("Around Leading Edge")
+    fig.tight_layout()
+    plt.show(block=True)
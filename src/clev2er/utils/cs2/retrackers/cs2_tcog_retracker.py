@@ -63,7 +63,6 @@ Baseline-D L1b file
 """
 
 import logging  # logging functions
-from math import sqrt
 from typing import List, Tuple, Union
 
 import matplotlib.pyplot as plt
@@ -75,6 +74,12 @@ from scipy.signal import savgol_filter  # waveform smoothing filter
 from clev2er.utils.cs2.retrackers.fastsmooth import (  # waveform smoothing filter (option 2)
     fastsmooth,
 )
+from clev2er.utils.cs2.retrackers.waveform_search import (
+    LinearWaveforms,
+    OversampledWaveforms,
+    find_leading_edges,
+    find_leading_edges_linear,
+)
 
 # too-many-arguments,too-many-locals, too-many-statements pylint: disable=R0912,R0913,R0914,R0915
 # too-many-nested-blocks, pylint: disable=R1702
@@ -109,21 +114,19 @@ def retrack_tcog_waveforms_cs2(
     noise_threshold: float = 0.3,
     le_id_threshold: float = 0.05,
     le_dp_threshold: float = 0.20,
-) -> Tuple[
-    np.ndarray,
-    np.ndarray,
-    List[List[float]],
-    List[List[float]],
-    np.ndarray,
-    int,
-    List[List[int]],
-]:
+    analytic_crossings: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, int, np.ndarray]:
     """
     Purpose:
         Retracking of CS2 LRM and SIN waveforms TCOG
         Reference: CryoSat-2 Product Handbook Baseline D1.1, C2-LI-ACS-ESL-5319.
         This is an adapted python port of Matlab original by M.McMillan
 
+        All waveforms are retracked together, as a (num_measurements, waveform_numbins)
+        matrix. The oversampled waveforms are searched with
+        clev2er.utils.cs2.retrackers.waveform_search, which finds the same samples as
+        searching complete oversampled waveforms, without creating them.
+
     Args:
         l1b_file(str,def=None): l1b .nc file (must be Baseline-D, NetCDF format)
                                 LRM or SIN, file names must contain SIR_SIN_1B, or SIR_LRM_1B
@@ -157,22 +160,27 @@ def retrack_tcog_waveforms_cs2(
                                           identified as a leading edge
         le_dp_threshold(float, def=0.20): define threshold on normalised amplitude change which
                                           is required to be accepted as lead edge
+        analytic_crossings(bool, def=False): if True, find the leading edge and retracking
+                                             point on the waveforms interpolated linearly
+                                             between bins, instead of searching the waveforms
+                                             oversampled by wf_oversampling_factor. Bin numbers
+                                             are then not rounded to oversampled samples.
 
     Returns:
         Tuple (dr_bin_tcog, dr_meters_tcog, leading_edge_start, leading_edge_stop,
         pwr_at_rtrk_point_tcog,n_retracker_failures,retrack_flag):
-            dr_bin_tcog (List[float]) : tcog epoch relative to nominal tracking point
+            dr_bin_tcog (np.ndarray) : tcog epoch relative to nominal tracking point
                                           in bins
-            dr_meters_tcog (List[float]) : tcog epoch relative to nominal tracking point
+            dr_meters_tcog (np.ndarray) : tcog epoch relative to nominal tracking point
                                         in meters
-            leading_edge_start (List[List[float]]): leading edge start coordinates
+            leading_edge_start (np.ndarray): leading edge start coordinates, shape (n, 2)
                                                 column 1 = bin  |  column 2 = normalised power
-            leading_edge_stop (List[List[float]]): leading edge stop coordinates
+            leading_edge_stop (np.ndarray): leading edge stop coordinates, shape (n, 2)
                                                 column 1 = bin  |  column 2 = normalised power
-            pwr_at_rtrk_point_tcog (List[float]): power in counts at retracking point
+            pwr_at_rtrk_point_tcog (np.ndarray): power in counts at retracking point
             n_retracker_failures (int): number of waveforms were retracking failed
-            retrack_flag : returned retracker flags for each waveform indicate how
-                           retracking failed
+            retrack_flag (np.ndarray): returned retracker flags for each waveform, shape (n, 6),
+                           indicate how retracking failed
                            col 1 (index 0): 0 or 1 if noise > threshold in noise gates
                            col 2 (index 1): 0 or 1 if no samples are sufficiently above
                                             the noise floor
@@ -284,433 +292,248 @@ def retrack_tcog_waveforms_cs2(
         include_measurements_array = [False for i in range(n_waveforms)]
         include_measurements_array[measurement_index] = True
 
-    # preallocate output arrays (list for each waveform)
-    leading_edge_start = [[np.nan for _ in range(2)] for _ in range(n_waveforms)]
-    leading_edge_stop = [[np.nan for _ in range(2)] for _ in range(n_waveforms)]
-    retrack_point_tcog = [[np.nan for _ in range(3)] for _ in range(n_waveforms)]
-    retrack_flag = [[0 for _ in range(6)] for _ in range(n_waveforms)]
-
-    # Process each waveform
-    for i, waveform in enumerate(wfs):
-        # Special case for debugging individual measurements
-        if measurement_index:
-            if i != measurement_index:
-                continue
-
-        # skip waveform if include_measurements_array[i] is set to False
-        if include_measurements_array is not None:
-            if not include_measurements_array[i]:
-                log.debug("Skipping as include_measurements_array is false")
-                continue
-
-        log.debug("retracking waveform %d of %d", i, n_waveforms)
-
-        # compute max amplitude
-        wf_max = np.max(waveform)
-        if debug_flag:
-            print("maximum amplitude=", wf_max)
+    # preallocate output arrays (row for each waveform)
+    leading_edge_start = np.full((n_waveforms, 2), np.nan)
+    leading_edge_stop = np.full((n_waveforms, 2), np.nan)
+    retrack_point_tcog = np.full((n_waveforms, 3), np.nan)
+    retrack_flag = np.zeros((n_waveforms, 6), dtype=int)
 
-        if wf_max == 0.0:
-            if debug_flag:
-                log.debug("wf_max is 0 so skipping")
-            # set flag
-            retrack_flag[i][0] = 1
-            continue
+    # Process all included waveforms together, as rows of a (n, waveform_size) matrix
+    if include_measurements_array is not None:
+        rows = np.flatnonzero(include_measurements_array)
+    else:
+        rows = np.arange(n_waveforms)
+    log.debug("retracking %d of %d waveforms", len(rows), n_waveforms)
 
-        # normalise so that max amplitude is 1
-        wfnorm = waveform / wf_max
+    # compute max amplitude
+    wf_max = np.max(wfs[rows], axis=1) if rows.size > 0 else np.zeros(0, dtype=wfs.dtype)
+    if debug_flag:
+        print("maximum amplitude=", wf_max)
 
-        # ---------
-        # smooth waveform
-        # ---------
+    # set flag where wf_max is 0, and skip
+    retrack_flag[rows[wf_max == 0.0], 0] = 1
+    rows = rows[wf_max != 0.0]
+    wf_max = wf_max[wf_max != 0.0]
 
-        if savitsky_golay_smoothing:
-            # Apply 1-d Savitsky-Golay filter to smooth waveform
-            wfnorm_sm = savgol_filter(wfnorm, sm_width, sm_polynomial_order)
-        else:
-            # apply (sliding-average) boxcar smooth; the edges are smoothed with
-            # progressively smaller smooths the closer to the end.
-            wfnorm_sm = fastsmooth(wfnorm, sm_width)
-
-        if plot_flag:
-            # Plot echo and smoothed echo for debugging
-            plt.plot(wfnorm)
-            plt.plot(wfnorm_sm)
-            plt.ylim(0, 1)
-            plt.show()
-
-        # switch end values from 0 to nan
-        wfnorm_sm[wfnorm_sm == 0] = np.nan  # COMMENT : sets any 0 to Nan, not just end points?
-
-        # ---------------------
-        # compute thermal noise
-        # ---------------------
-        if noise_definition == "first_bins":
-            # estimate noise based on first samples of waveform
-            wf_noise_mean = np.mean(wfnorm[0:noise_sample_limit])
-
-        elif noise_definition == "min_power":
-            # alternatively sort power values of unsmoothed waveform in ascending order
-            wfsort = sorted(wfnorm)
-
-            if debug_flag:
-                print("lowest six samples of normalised waveform are ", wfsort[0:6])
-
-            # estimate noise based on lowest 6 samples
-            wf_noise_mean = np.mean(wfsort[0:6])
-        else:
-            raise ValueError(f"noise definition {noise_definition} unsupported")
+    # normalise so that max amplitude is 1
+    wfnorm = wfs[rows] / wf_max[:, None]
+
+    # ---------
+    # smooth waveforms
+    # ---------
+
+    if savitsky_golay_smoothing:
+        # Apply 1-d Savitsky-Golay filter to smooth each waveform
+        wfnorm_sm = savgol_filter(wfnorm, sm_width, sm_polynomial_order, axis=1)
+    else:
+        # apply (sliding-average) boxcar smooth; the edges are smoothed with
+        # progressively smaller smooths the closer to the end.
+        wfnorm_sm = fastsmooth(wfnorm, sm_width)
+
+    # switch end values from 0 to nan
+    wfnorm_sm[wfnorm_sm == 0] = np.nan  # COMMENT : sets any 0 to Nan, not just end points?
+
+    # ---------------------
+    # compute thermal noise
+    # ---------------------
+    if noise_definition == "first_bins":
+        # estimate noise based on first samples of waveform
+        wf_noise_mean = np.mean(wfnorm[:, 0:noise_sample_limit], axis=1)
+
+    elif noise_definition == "min_power":
+        # alternatively find the lowest 6 power values of the unsmoothed waveform, in
+        # ascending order
+        wfsort = np.sort(np.partition(wfnorm, 5, axis=1)[:, 0:6], axis=1)
 
         if debug_flag:
-            print("wf_noise_mean=", wf_noise_mean)
-
-        # ------------------------------------------------------------
-        # quality check 1 - if mean noise above a predefined threshold
-        # ------------------------------------------------------------
-
-        if (wf_noise_mean > noise_threshold) or np.isnan(wf_noise_mean):
-            # set flag
-            retrack_flag[i][0] = 1
-            log.debug("%d : mean noise above a predefined threshold", i)
-            # do not attempt retracking and leave as nan
-
-        else:  # continue with retracking
-            # ------------------------
-            # Over Sample the waveform
-            # ------------------------
-            wf_bin_num = np.linspace(0, waveform_size - 1, waveform_size)
-            #  LRM: array([  0.,1.,..,127.]), size=128
-
-            # create oversampled waveform bin indices
-            wf_bin_numi = np.linspace(0, waveform_size - 1, waveform_size * wf_oversampling_factor)
-            # LRM: array([  0.,1.,..,127.]), size=12800
-
-            # Oversample normalised waveform
-            wfi = np.interp(wf_bin_numi, wf_bin_num, wfnorm)
-
-            # Oversample smoothed normalised waveform
-            wfi_sm = np.interp(wf_bin_numi, wf_bin_num, wfnorm_sm)
-
-            # ------------------
-            # compute derivative
-            # ------------------
-
-            # compute first derivative of smoothed waveform using central difference
-            # which is calculated between i-1:i+1
-            d_wf_sm = np.gradient(wfi_sm, (1 / wf_oversampling_factor))
-
-            # ------------------------------------
-            # initiate leading edge identification
-            # ------------------------------------
-
-            # initiate parameters for iteratively finding leading edge with amplitude
-            # above predefined threshold
-            previous_le_ind = 0
-            le_dp = 0
-            count = 1
-            # -------------------------------------------------------------------
-            # loop through leading edges until minimum amplitude requirement met
-            # or the end of the waveform is reached
-            # --------------------------------------------------------------------
-
-            # searches for leading edge greater than the amplitude threshold
-            while le_dp < le_dp_threshold:
-                # Find the first index of the waveform wfi_sm that satifies the criteria:
-                #    > (wf_noise_mean + le_id_threshold)
-                #    d_wf_sm > 0
-                #    index > previous_le_ind
-
-                le_index = np.where((wfi_sm > (wf_noise_mean + le_id_threshold)) & (d_wf_sm > 0))[0]
-
-                if le_index.size > 0:
-                    le_index = le_index[le_index > (previous_le_ind + wf_oversampling_factor)]
-
-                # ----------------------------------------------------------------------
-                # quality check 2 - if no samples are sufficiently above the noise floor
-                # ----------------------------------------------------------------------
-
-                if le_index.size == 0:
-                    # set flag
-                    retrack_flag[i][1] = 1
-                    # exit search for leading edge
-                    log.debug("%d no samples above noise floor", i)
-                    break
-
-                # Select the first leading edge index found
-                le_index = le_index[0]
-
-                # ----------------------------------------------------------
-                # leading edge exists so find position and amplitude of peak
-                # ----------------------------------------------------------
-
-                # find where the gradient first becomes negative after the power threshold
-                # is exceeded
-                first_peak_indices = np.where(
-                    (d_wf_sm <= 0) & (wf_bin_numi > wf_bin_numi[le_index])
-                )[0]
-                # Select the first one
-                if first_peak_indices.size > 0:
-                    first_peak_ind = int(first_peak_indices[0])
-
-                    # calculate the amplitude of the peak above the identified start point
-                    # of the leading edge
-                    le_dp = wfi_sm[first_peak_ind] - wfi_sm[le_index]
-
-                    # update previously identified peak to the current one in case the while
-                    # loop continues
-                    previous_le_ind = first_peak_ind
-
-                    # if reached end of waveform
-                    if previous_le_ind > (wf_bin_numi.size - wf_oversampling_factor - 1):
-                        # set flag
-                        retrack_flag[i][3] = 1
-                        # exit search for leading edge
-                        log.debug("%d: reached end of waveform", i)
-                        break
-                else:
-                    # -------------------------------------------------------------------
-                    # quality check 3 - if no waveform peak can be identified after the
-                    # leading edge starts
-                    # -------------------------------------------------------------------
-                    # first_peak_ind array is empty so set flag
-                    retrack_flag[i][2] = 1
-                    log.debug(
-                        "no waveform peak can be identified after the \
-                                leading edge starts"
-                    )
-                    # exit search for leading edge
-                    break
-
-                # update count of how many iterations through loop
-                count = count + 1
-
-            # ----------------------
-            # find retracking point
-            # ----------------------
-
-            # only compute retracking points if no flags set
-
-            if np.sum(retrack_flag[i]) > 0:
-                log.debug("Retracker flags set, so not finding retracker point")
-            else:
-                # --------------------------
-                # find tcog retracking point
-                # --------------------------
-
-                retrack_ind_tcog = None
-
-                # compute ocog amplitude
-                tcog_amp = sqrt(sum(wfnorm**4) / sum(wfnorm**2))
-
-                log.debug("ocog amplitude, tcog_amp=%f", tcog_amp)
-
-                # switch to handle mode specific retracking thresholds
-                if lrm_mode:
-                    # compute retracking threshold as proportion of tcog amplitude
-                    retrack_wf_threshold_tcog = retrack_threshold_lrm * tcog_amp
-                else:  # SIN mode
-                    # compute retracking threshold as proportion of tcog amplitude
-                    retrack_wf_threshold_tcog = retrack_threshold_sin * tcog_amp
-
-                log.debug("retrack_wf_threshold_tcog=%f", retrack_wf_threshold_tcog)
-
-                # select whether to retrack smoothed or original waveform  - default is non
-                # smoothed to keep precision
-                if retrack_smooth_wf:
-                    # find first wf sample above threshold apply to oversampled waveform to
-                    # improve precision,
-                    samples_above_threshold = np.where((wfi_sm > retrack_wf_threshold_tcog))[0]
-                    n_samples_above_threshold = len(samples_above_threshold)
-                    log.debug("n_samples_above_threhold=%d", n_samples_above_threshold)
-
-                    if n_samples_above_threshold > 0:
-                        retrack_ind_tcog = samples_above_threshold[0]
-                    else:
-                        log.debug("TCOG retracking point could not be found")
-                        retrack_flag[i][5] = 1
-
-                else:
-                    # find first leading edge value above the retracking threshold for
-                    # unsmoothed waveform
-                    samples_above_threshold = np.where(
-                        (wfi > retrack_wf_threshold_tcog) & (wf_bin_numi > wf_bin_numi[le_index])
-                    )[0]
-
-                    if plot_flag:
-                        # Plot echo and smoothed echo for debugging
-                        plt.plot(wfi)
-                        # plt.ylim(0, 1)
-                        plt.show()
-                    log.debug("retrack_wf_threshold_tcog %f", retrack_wf_threshold_tcog)
-
-                    n_samples_above_threshold = len(samples_above_threshold)
-                    log.debug("n_samples_above_threshold=%d", n_samples_above_threshold)
-                    if n_samples_above_threshold > 0:
-                        retrack_ind_tcog = samples_above_threshold[0]
-                    else:
-                        log.debug("TCOG retracking point could not be found")
-                        retrack_flag[i][5] = 1
-
-                if retrack_flag[i][5]:
-                    log.debug("TCOG retracker failed, so skipping")
-                    continue
-
-                if plot_flag:
-                    print("TCOG : ", wf_bin_numi[retrack_ind_tcog], retrack_ind_tcog)
-
-                    # Plot echo with retracking points
-                    fig = plt.figure(figsize=(15, 6))
-                    this_gridspec = gridspec.GridSpec(1, 2, width_ratios=[2.5, 1])
-                    ax1 = plt.subplot(this_gridspec[0])
-                    ax2 = plt.subplot(this_gridspec[1])
-
-                    ax1.plot(
-                        wf_bin_numi,
-                        wfi,
-                        color="green",
-                        marker=".",
-                        label="oversampled waveform",
-                    )
-                    ax1.plot(
-                        wf_bin_numi,
-                        wfi_sm,
-                        color="blue",
-                        marker=".",
-                        label="oversampled smoothed waveform",
-                    )
-                    ax1.plot(wf_bin_numi, d_wf_sm, color="lightgray", label="gradient")
-                    ax1.set_xlabel("Waveform bin number")
-                    ax1.set_ylabel("Normalised power")
-                    ax1.set_title(f"{mode_str} Waveform Retracking for Measurement Number : {i}")
-                    ax1.xaxis.grid()
-                    ax1.yaxis.grid()
-                    ax1.axvline(
-                        x=wf_bin_numi[first_peak_ind],
-                        color="grey",
-                        linestyle="-.",
-                        label="1st peak index",
-                    )
-                    ax1.axvline(
-                        x=float(wf_bin_numi[le_index]),
-                        color="grey",
-                        linestyle="--",
-                        label="LE index",
-                    )
-
-                    if retrack_ind_tcog:
-                        ax1.axvline(
-                            x=wf_bin_numi[retrack_ind_tcog],
-                            color="red",
-                            linestyle="-",
-                            label="TCOG Retracking point",
-                        )
-                    ax1.axhline(
-                        y=wf_noise_mean,
-                        color="yellow",
-                        linestyle="--",
-                        label="Mean Noise in noise gates",
-                        linewidth=2,
-                    )
-
-                    ax1.legend()
-
-                    # Create 2nd subplot,and display waveform around the leading edge
-                    # find indices around leading edge
-                    plot_start_index = int(le_index - int(wf_bin_numi.size / 80))
-                    plot_start_index = max(plot_start_index, 0)
-
-                    plot_end_index = first_peak_ind + int(wf_bin_numi.size / 80)
-                    if plot_end_index > (wf_bin_numi.size - 1):
-                        plot_end_index = wf_bin_numi.size - 1
-
-                    ax2.plot(
-                        wf_bin_numi[plot_start_index:plot_end_index],
-                        wfi[plot_start_index:plot_end_index],
-                        color="green",
-                        marker=".",
-                        label="oversampled waveform",
-                    )
-                    ax2.plot(
-                        wf_bin_numi[plot_start_index:plot_end_index],
-                        wfi_sm[plot_start_index:plot_end_index],
-                        color="blue",
-                        marker=".",
-                        label="oversampled smoothed waveform",
-                    )
-                    ax2.axvline(
-                        x=wf_bin_numi[first_peak_ind],
-                        color="grey",
-                        linestyle="-.",
-                        linewidth=4,
-                        label="1st peak index",
-                    )
-                    ax2.axvline(
-                        x=float(wf_bin_numi[le_index]),
-                        color="grey",
-                        linestyle="--",
-                        label="LE index",
-                    )
-
-                    if retrack_ind_tcog:
-                        ax2.axvline(
-                            x=wf_bin_numi[retrack_ind_tcog],
-                            color="red",
-                            linestyle="-",
-                            label="TCOG Retracking point",
-                        )
-                    ax2.axhline(
-                        y=wf_noise_mean,
-                        color="yellow",
-                        linestyle="--",
-                        label="Mean Noise in noise gates",
-                        linewidth=2,
-                    )
-
-                    ax2.set_ylim(ymin=0.0, ymax=1.0)
-                    ax2.set_title("Around Leading Edge")
-                    fig.tight_layout()
-                    plt.show(block=True)
-
-                # ------------------------------
-                # store leading edge coordinates
-                # ------------------------------
-
-                # columns give bin number, normalised amplitude value, original amplitude value
-                leading_edge_start[i][0] = wf_bin_numi[
-                    le_index
-                ].item()  # LRM: array([  0.,..,127.]), size=12800
-                leading_edge_start[i][1] = wfi_sm[
-                    le_index
-                ].item()  # Oversampled smoothed normalised waveform
-                leading_edge_stop[i][0] = wf_bin_numi[first_peak_ind]
-                leading_edge_stop[i][1] = wfi_sm[first_peak_ind]
-
-                # ----------------------------
-                # store retracking coordinates
-                # ----------------------------
-
-                if not retrack_flag[i][5]:
-                    if retrack_smooth_wf:
-                        retrack_point_tcog[i][0] = wf_bin_numi[retrack_ind_tcog].item()
-                        retrack_point_tcog[i][1] = wfi_sm[retrack_ind_tcog].item()
-                        retrack_point_tcog[i][2] = wfi_sm[retrack_ind_tcog] * wf_max
-                    else:
-                        retrack_point_tcog[i][0] = wf_bin_numi[retrack_ind_tcog].item()
-                        retrack_point_tcog[i][1] = wfi[retrack_ind_tcog].item()
-                        retrack_point_tcog[i][2] = wfi[retrack_ind_tcog] * wf_max
-
-                    if retrack_point_tcog[i][2] == 0:
-                        retrack_point_tcog[i][0] = np.nan
-                        retrack_point_tcog[i][1] = np.nan
-                        retrack_point_tcog[i][2] = np.nan
-
-                        log.debug("TCOG : zero power found at retracking point")
-                        retrack_flag[i][5] = 1
-
-                else:
-                    log.debug("No retracking point retrieved for TCOG")
-
-    # Completed retracking loop over waveforms
+            print("lowest six samples of normalised waveform are ", wfsort)
+
+        # estimate noise based on lowest 6 samples
+        wf_noise_mean = np.mean(wfsort, axis=1)
+    else:
+        raise ValueError(f"noise definition {noise_definition} unsupported")
+
+    if debug_flag:
+        print("wf_noise_mean=", wf_noise_mean)
+
+    # ------------------------------------------------------------
+    # quality check 1 - if mean noise above a predefined threshold
+    # ------------------------------------------------------------
+
+    noisy = (wf_noise_mean > noise_threshold) | np.isnan(wf_noise_mean)
+    # set flag, do not attempt retracking and leave as nan
+    retrack_flag[rows[noisy], 0] = 1
+    log.debug("%d : mean noise above a predefined threshold", np.count_nonzero(noisy))
+
+    # continue with retracking
+    rows = rows[~noisy]
+    wf_max = wf_max[~noisy]
+    wfnorm = wfnorm[~noisy]
+    wfnorm_sm = wfnorm_sm[~noisy]
+    wf_noise_mean = wf_noise_mean[~noisy]
+
+    # --------------------------------------------------------------------------------
+    # Over Sample the waveforms, and compute first derivative of smoothed waveforms using
+    # central difference. The oversampled waveforms are searched without being stored.
+    # With analytic_crossings, the waveforms are searched as interpolated linearly between
+    # bins instead.
+    # --------------------------------------------------------------------------------
+
+    wfi: LinearWaveforms | OversampledWaveforms
+    wfi_sm: LinearWaveforms | OversampledWaveforms
+    if analytic_crossings:
+        wfi = LinearWaveforms(wfnorm)
+        wfi_sm = LinearWaveforms(wfnorm_sm)
+    else:
+        wfi = OversampledWaveforms(wfnorm, wf_oversampling_factor)
+        wfi_sm = OversampledWaveforms(wfnorm_sm, wf_oversampling_factor)
+        wf_bin_numi = wfi.positions  # LRM: array([  0.,1.,..,127.]), size=12800
+
+    # -------------------------------------------------------------------
+    # loop through leading edges until minimum amplitude requirement met
+    # or the end of the waveform is reached
+    # --------------------------------------------------------------------
+
+    if isinstance(wfi_sm, LinearWaveforms):
+        le_index, first_peak_ind, _, le_flags = find_leading_edges_linear(
+            wfi_sm, wf_noise_mean, le_id_threshold, le_dp_threshold
+        )
+    else:
+        le_index, first_peak_ind, _, le_flags = find_leading_edges(
+            wfi_sm, wf_noise_mean, le_id_threshold, le_dp_threshold
+        )
+    retrack_flag[rows, 1:4] = le_flags
+    log.debug(
+        "no samples above noise floor: %d, no waveform peak can be identified after the "
+        "leading edge starts: %d, reached end of waveform: %d",
+        *np.count_nonzero(le_flags, axis=0),
+    )
+
+    # ----------------------
+    # find retracking point
+    # ----------------------
+
+    # only compute retracking points if no flags set
+    ok = ~le_flags.any(axis=1)
+    rows = rows[ok]
+    retracking = np.flatnonzero(ok)
+    le_index = le_index[ok]
+    first_peak_ind = first_peak_ind[ok]
+
+    # --------------------------
+    # find tcog retracking point
+    # --------------------------
+
+    # compute ocog amplitude (sequential sums along each waveform)
+    wfnorm_ok = wfnorm[ok]
+    tcog_amp = np.sqrt(
+        np.cumsum(wfnorm_ok**4, axis=1)[:, -1] / np.cumsum(wfnorm_ok**2, axis=1)[:, -1]
+    )
+
+    log.debug("ocog amplitude, tcog_amp=%s", tcog_amp)
+
+    # switch to handle mode specific retracking thresholds
+    if lrm_mode:
+        # compute retracking threshold as proportion of tcog amplitude
+        retrack_wf_threshold_tcog = retrack_threshold_lrm * tcog_amp
+    else:  # SIN mode
+        # compute retracking threshold as proportion of tcog amplitude
+        retrack_wf_threshold_tcog = retrack_threshold_sin * tcog_amp
+
+    log.debug("retrack_wf_threshold_tcog=%s", retrack_wf_threshold_tcog)
+
+    # select whether to retrack smoothed or original waveform  - default is non
+    # smoothed to keep precision
+    if retrack_smooth_wf:
+        # find first wf sample above threshold apply to oversampled waveform to
+        # improve precision
+        retracked_wfi = wfi_sm
+        search_start = np.zeros(len(rows), dtype=int)
+    else:
+        # find first leading edge value above the retracking threshold for
+        # unsmoothed waveform
+        retracked_wfi = wfi
+        search_start = le_index if analytic_crossings else le_index + 1
+
+    if isinstance(retracked_wfi, LinearWaveforms):
+        retrack_ind_tcog = retracked_wfi.first_above(
+            retracking, search_start, retrack_wf_threshold_tcog
+        )
+        not_found = np.isnan(retrack_ind_tcog)
+    else:
+        threshold = np.zeros(wfi.values.shape[0])
+        threshold[retracking] = retrack_wf_threshold_tcog
+        retrack_ind_tcog = retracked_wfi.first_sample(
+            retracking,
+            search_start,
+            retracked_wfi.intervals_above(threshold),
+            lambda rows, samples: retracked_wfi.values_at(rows, samples) > threshold[rows, None],
+        )
+        not_found = retrack_ind_tcog < 0
+
+    # TCOG retracking point could not be found
+    log.debug("TCOG retracking point could not be found: %d", np.count_nonzero(not_found))
+    retrack_flag[rows[not_found], 5] = 1
+
+    rows = rows[~not_found]
+    retracking = retracking[~not_found]
+    le_index = le_index[~not_found]
+    first_peak_ind = first_peak_ind[~not_found]
+    retrack_ind_tcog = retrack_ind_tcog[~not_found]
+
+    if plot_flag:
+        if analytic_crossings:
+            # plot at the nearest oversampled samples
+            plot_indices = np.rint(
+                np.array([le_index, first_peak_ind, retrack_ind_tcog])
+                * (waveform_size * wf_oversampling_factor - 1)
+                / (waveform_size - 1)
+            ).astype(int)
+        else:
+            plot_indices = np.array([le_index, first_peak_ind, retrack_ind_tcog])
+        for i, row, (le_ind, peak_ind, retrack_ind) in zip(rows, retracking, plot_indices.T):
+            plot_tcog_retracking(
+                f"{mode_str} Waveform Retracking for Measurement Number : {i}",
+                wfnorm[row],
+                wfnorm_sm[row],
+                wf_oversampling_factor,
+                le_ind,
+                peak_ind,
+                retrack_ind,
+                wf_noise_mean[row],
+            )
+
+    # ------------------------------
+    # store leading edge coordinates
+    # ------------------------------
+
+    # columns give bin number, normalised amplitude value, original amplitude value
+    if analytic_crossings:
+        leading_edge_start[rows, 0] = le_index
+        leading_edge_stop[rows, 0] = first_peak_ind
+        retrack_point_tcog[rows, 0] = retrack_ind_tcog
+    else:
+        leading_edge_start[rows, 0] = wf_bin_numi[le_index]
+        leading_edge_stop[rows, 0] = wf_bin_numi[first_peak_ind]
+        retrack_point_tcog[rows, 0] = wf_bin_numi[retrack_ind_tcog]
+    leading_edge_start[rows, 1] = wfi_sm.values_at(retracking, le_index[:, None])[:, 0]
+    leading_edge_stop[rows, 1] = wfi_sm.values_at(retracking, first_peak_ind[:, None])[:, 0]
+
+    # ----------------------------
+    # store retracking coordinates
+    # ----------------------------
+
+    retrack_point_tcog[rows, 1] = retracked_wfi.values_at(retracking, retrack_ind_tcog[:, None])[
+        :, 0
+    ]
+    retrack_point_tcog[rows, 2] = retrack_point_tcog[rows, 1] * wf_max[ok][~not_found]
+
+    zero_power = retrack_point_tcog[:, 2] == 0
+    retrack_point_tcog[zero_power] = np.nan
+    log.debug("TCOG : zero power found at retracking point: %d", np.count_nonzero(zero_power))
+    retrack_flag[zero_power, 5] = 1
+
+    # Completed retracking of waveforms
 
     # --------------------------------------------
     # compute retracker offsets for all waveforms
@@ -719,7 +542,7 @@ def retrack_tcog_waveforms_cs2(
     # switch to handle different mode reference bin
     if lrm_mode:
         # compute range offsets from reference to retracked bins
-        dr_bin_tcog = np.array(retrack_point_tcog)[:, 0] - ref_bin_ind_lrm
+        dr_bin_tcog = retrack_point_tcog[:, 0] - ref_bin_ind_lrm
         log.debug("dr_bin_tcog %s", dr_bin_tcog)
 
         # convert offsets to meters
@@ -727,29 +550,16 @@ def retrack_tcog_waveforms_cs2(
 
     else:  # SIN mode
         # compute range offsets from reference to retracked bins
-        dr_bin_tcog = np.array(retrack_point_tcog)[:, 0] - ref_bin_ind_sin
+        dr_bin_tcog = retrack_point_tcog[:, 0] - ref_bin_ind_sin
 
         # convert offsets to meters
         dr_meters_tcog = dr_bin_tcog * rbin_size_sin
 
     # Store power in counts at retracking point (used for backscatter calculation)
 
-    pwr_at_rtrk_point_tcog = np.array(retrack_point_tcog)[:, 2]
-
-    n_retracker_failures = 0
+    pwr_at_rtrk_point_tcog = retrack_point_tcog[:, 2]
 
-    for i in range(n_waveforms):
-        if measurement_index is not None:
-            if i != measurement_index:
-                continue
-        if (
-            retrack_flag[i][5]
-            or retrack_flag[i][3]
-            or retrack_flag[i][2]
-            or retrack_flag[i][1]
-            or retrack_flag[i][0]
-        ):
-            n_retracker_failures += 1
+    n_retracker_failures = int(np.count_nonzero(retrack_flag[:, [0, 1, 2, 3, 5]].any(axis=1)))
 
     log.debug("Number of waveforms : %d", n_waveforms)
     if include_measurements_array is not None:
@@ -768,3 +578,152 @@ def retrack_tcog_waveforms_cs2(
         n_retracker_failures,
         retrack_flag,
     )
+
+
+def plot_tcog_retracking(
+    title: str,
+    wfnorm: np.ndarray,
+    wfnorm_sm: np.ndarray,
+    wf_oversampling_factor: int,
+    le_index: int,
+    first_peak_ind: int,
+    retrack_ind_tcog: int,
+    wf_noise_mean: float,
+):
+    """plot a waveform with its leading edge and TCOG retracking point, for testing
+
+    Args:
+        title (str): plot title
+        wfnorm (np.ndarray): normalised waveform
+        wfnorm_sm (np.ndarray): smoothed normalised waveform
+        wf_oversampling_factor (int): waveform oversampling factor
+        le_index (int): oversampled index of leading edge start
+        first_peak_ind (int): oversampled index of leading edge stop
+        retrack_ind_tcog (int): oversampled index of retracking point
+        wf_noise_mean (float): mean noise of normalised waveform
+    """
+    waveform_size = len(wfnorm)
+
+    # Plot echo and smoothed echo for debugging
+    plt.plot(wfnorm)
+    plt.plot(wfnorm_sm)
+    plt.ylim(0, 1)
+    plt.show()
+
+    # Over Sample the waveform
+    wf_bin_num = np.linspace(0, waveform_size - 1, waveform_size)
+    wf_bin_numi = np.linspace(0, waveform_size - 1, waveform_size * wf_oversampling_factor)
+    wfi = np.interp(wf_bin_numi, wf_bin_num, wfnorm)
+    wfi_sm = np.interp(wf_bin_numi, wf_bin_num, wfnorm_sm)
+    d_wf_sm = np.gradient(wfi_sm, (1 / wf_oversampling_factor))
+
+    print("TCOG : ", wf_bin_numi[retrack_ind_tcog], retrack_ind_tcog)
+
+    # Plot echo with retracking points
+    fig = plt.figure(figsize=(15, 6))
+    this_gridspec = gridspec.GridSpec(1, 2, width_ratios=[2.5, 1])
+    ax1 = plt.subplot(this_gridspec[0])
+    ax2 = plt.subplot(this_gridspec[1])
+
+    ax1.plot(
+        wf_bin_numi,
+        wfi,
+        color="green",
+        marker=".",
+        label="oversampled waveform",
+    )
+    ax1.plot(
+        wf_bin_numi,
+        wfi_sm,
+        color="blue",
+        marker=".",
+        label="oversampled smoothed waveform",
+    )
+    ax1.plot(wf_bin_numi, d_wf_sm, color="lightgray", label="gradient")
+    ax1.set_xlabel("Waveform bin number")
+    ax1.set_ylabel("Normalised power")
+    ax1.set_title(title)
+    ax1.xaxis.grid()
+    ax1.yaxis.grid()
+    ax1.axvline(
+        x=wf_bin_numi[first_peak_ind],
+        color="grey",
+        linestyle="-.",
+        label="1st peak index",
+    )
+    ax1.axvline(
+        x=float(wf_bin_numi[le_index]),
+        color="grey",
+        linestyle="--",
+        label="LE index",
+    )
+    ax1.axvline(
+        x=wf_bin_numi[retrack_ind_tcog],
+        color="red",
+        linestyle="-",
+        label="TCOG Retracking point",
+    )
+    ax1.axhline(
+        y=wf_noise_mean,
+        color="yellow",
+        linestyle="--",
+        label="Mean Noise in noise gates",
+        linewidth=2,
+    )
+
+    ax1.legend()
+
+    # Create 2nd subplot,and display waveform around the leading edge
+    # find indices around leading edge
+    plot_start_index = int(le_index - int(wf_bin_numi.size / 80))
+    plot_start_index = max(plot_start_index, 0)
+
+    plot_end_index = first_peak_ind + int(wf_bin_numi.size / 80)
+    if plot_end_index > (wf_bin_numi.size - 1):
+        plot_end_index = wf_bin_numi.size - 1
+
+    ax2.plot(
+        wf_bin_numi[plot_start_index:plot_end_index],
+        wfi[plot_start_index:plot_end_index],
+        color="green",
+        marker=".",
+        label="oversampled waveform",
+    )
+    ax2.plot(
+        wf_bin_numi[plot_start_index:plot_end_index],
+        wfi_sm[plot_start_index:plot_end_index],
+        color="blue",
+        marker=".",
+        label="oversampled smoothed waveform",
+    )
+    ax2.axvline(
+        x=wf_bin_numi[first_peak_ind],
+        color="grey",
+        linestyle="-.",
+        linewidth=4,
+        label="1st peak index",
+    )
+    ax2.axvline(
+        x=float(wf_bin_numi[le_index]),
+        color="grey",
+        linestyle="--",
+        label="LE index",
+    )
+    ax2.axvline(
+        x=wf_bin_numi[retrack_ind_tcog],
+        color="red",
+        linestyle="-",
+        label="TCOG Retracking point",
+    )
+    ax2.axhline(
+        y=wf_noise_mean,
+        color="yellow",
+        linestyle="--",
+        label="Mean Noise in noise gates",
+        linewidth=2,
+    )
+
+    ax2.set_ylim(ymin=0.0, ymax=1.0)
+    ax2.set_title("Around Leading Edge")
+    fig.tight_layout()
+    plt.show(block=True)
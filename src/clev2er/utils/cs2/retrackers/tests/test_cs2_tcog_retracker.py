@@ -190,3 +190,25 @@ def test_retrack_tcog_waveforms_cs2_at_index(
         assert np.isnan(dr_bin_tcog[measurement_index])
         # Leadinge Edge start bin should be Nan
         assert np.isnan(leading_edge_start[measurement_index][0])
+
+
+# Test the TCOG retracker with analytic threshold crossings gives the same flags, and
+# retracking points within 0.05 bins, as the oversampled waveform search
+def test_retrack_tcog_waveforms_cs2_analytic_crossings(
+    lrm_file,
+):  # pylint: disable=redefined-outer-name
+    """test of retrack_tcog_waveforms_cs2 with analytic_crossings
+
+    Args:
+        lrm_file (str): L1b LRM file path
+    """
+    oversampled = retrack_tcog_waveforms_cs2(lrm_file)
+    analytic = retrack_tcog_waveforms_cs2(lrm_file, analytic_crossings=True)
+
+    # retrack flags
+    np.testing.assert_array_equal(oversampled[6], analytic[6])
+    # retracking points in bins
+    np.testing.assert_allclose(oversampled[0], analytic[0], atol=0.05)
+    # leading edge start and stop bins
+    np.testing.assert_allclose(oversampled[2][:, 0], analytic[2][:, 0], atol=0.05)
+    np.testing.assert_allclose(oversampled[3][:, 0], analytic[3][:, 0], atol=0.05)
@@ -0,0 +1,27 @@
+"""pytest tests of clev2er.utils.cs2.retrackers.fastsmooth"""
+
+import numpy as np
+import pytest
+
+from clev2er.utils.cs2.retrackers.fastsmooth import fastsmooth
+
+
+@pytest.mark.parametrize("smoothwidth", [3, 11])
+def test_fastsmooth_along_last_axis(smoothwidth):
+    """test smoothing an array of waveforms smooths each as a 1-d array
+
+    Args:
+        smoothwidth (int): smoothing width
+    """
+    rng = np.random.default_rng(0)
+    waveforms = rng.uniform(size=(10, 128))
+
+    smoothed = fastsmooth(waveforms, smoothwidth)
+
+    assert smoothed.shape == waveforms.shape
+    for waveform, smoothed_waveform in zip(waveforms, smoothed):
+        np.testing.assert_array_equal(fastsmooth(waveform, smoothwidth), smoothed_waveform)
+    # interior values are the boxcar mean
+    np.testing.assert_allclose(
+        smoothed[:, 20], waveforms[:, 20 - smoothwidth // 2 : 21 + smoothwidth // 2].mean(axis=1)
+    )
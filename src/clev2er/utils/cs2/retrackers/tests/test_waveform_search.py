@@ -0,0 +1,222 @@
+"""pytest tests of clev2er.utils.cs2.retrackers.waveform_search"""
+
+import numpy as np
+import pytest
+
+from clev2er.utils.cs2.retrackers.waveform_search import (
+    LinearWaveforms,
+    OversampledWaveforms,
+    find_leading_edges,
+    find_leading_edges_linear,
+)
+
+
+def make_waveforms(num_waveforms: int, waveform_size: int, seed: int) -> np.ndarray:
+    """make normalised test waveforms, of noise and one or two peaks
+
+    Args:
+        num_waveforms (int): number of waveforms
+        waveform_size (int): number of bins
+        seed (int): random seed
+
+    Returns:
+        np.ndarray: waveforms, shape (num_waveforms, waveform_size)
+    """
+    rng = np.random.default_rng(seed)
+    bins = np.arange(waveform_size)
+    waveforms = 0.05 * rng.uniform(size=(num_waveforms, waveform_size))
+    for _ in range(2):
+        centres = rng.uniform(0, waveform_size, (num_waveforms, 1))
+        widths = rng.uniform(1, waveform_size / 10, (num_waveforms, 1))
+        with np.errstate(under="ignore"):
+            waveforms += rng.uniform(size=(num_waveforms, 1)) * np.exp(
+                -(((bins - centres) / widths) ** 2)
+            )
+    return waveforms / waveforms.max(axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("oversampling_factor", [1, 7, 100])
+def test_values_and_gradients(oversampling_factor):
+    """test oversampled values and gradients are as np.interp() and np.gradient()
+
+    Args:
+        oversampling_factor (int): waveform oversampling factor
+    """
+    waveform_size = 128
+    waveforms = make_waveforms(20, waveform_size, 0)
+    waveforms[0, [0, 5, 6, 50, 127]] = np.nan
+    waveforms[1, 20:30] = 0.5
+
+    oversampled = OversampledWaveforms(waveforms, oversampling_factor)
+    rows = np.arange(len(waveforms))
+    samples = np.broadcast_to(
+        np.arange(oversampled.num_samples), (len(rows), oversampled.num_samples)
+    )
+    values = oversampled.values_at(rows, samples)
+    gradients = oversampled.gradient_at(rows, samples)
+
+    wf_bin_num = np.linspace(0, waveform_size - 1, waveform_size)
+    for i, waveform in enumerate(waveforms):
+        wfi = np.interp(oversampled.positions, wf_bin_num, waveform)
+        np.testing.assert_array_equal(values[i], wfi)
+        np.testing.assert_array_equal(gradients[i], np.gradient(wfi, 1 / oversampling_factor))
+
+
+def test_first_sample():
+    """test the first sample above thresholds is as found from the oversampled waveforms"""
+    waveforms = make_waveforms(50, 128, 1)
+    oversampled = OversampledWaveforms(waveforms, 100)
+    thresholds = np.linspace(0.2, 1.1, len(waveforms))
+    rows = np.arange(len(waveforms))
+    start = np.arange(len(waveforms)) * 200
+
+    found = oversampled.first_sample(
+        rows,
+        start,
+        oversampled.intervals_above(thresholds),
+        lambda rows, samples: oversampled.values_at(rows, samples) > thresholds[rows, None],
+    )
+
+    for i, waveform in enumerate(waveforms):
+        wfi = np.interp(oversampled.positions, np.arange(128), waveform)
+        above = np.flatnonzero((wfi > thresholds[i]) & (np.arange(len(wfi)) >= start[i]))
+        assert found[i] == (above[0] if above.size > 0 else -1)
+
+
+@pytest.mark.parametrize("waveform_size,le_dp_threshold", [(128, 0.2), (128, 0.6), (1024, 0.2)])
+def test_find_leading_edges(waveform_size, le_dp_threshold):  # pylint: disable=too-many-locals
+    """test leading edges are as searched for in each oversampled waveform
+
+    Args:
+        waveform_size (int): number of bins
+        le_dp_threshold (float): minimum leading edge amplitude
+    """
+    oversampling_factor = 100
+    le_id_threshold = 0.05
+    waveforms = make_waveforms(30, waveform_size, 2)
+    noise = np.sort(waveforms, axis=1)[:, :6].mean(axis=1)
+
+    le_index, first_peak_index, le_dp, flags = find_leading_edges(
+        OversampledWaveforms(waveforms, oversampling_factor),
+        noise,
+        le_id_threshold,
+        le_dp_threshold,
+    )
+
+    wf_bin_numi = np.linspace(0, waveform_size - 1, waveform_size * oversampling_factor)
+    for i, waveform in enumerate(waveforms):
+        wfi = np.interp(wf_bin_numi, np.arange(waveform_size), waveform)
+        d_wfi = np.gradient(wfi, 1 / oversampling_factor)
+        expected_flags = [0, 0, 0]
+        previous_le_ind = 0
+        expected_le_dp = 0.0
+        while expected_le_dp < le_dp_threshold:
+            le_indices = np.flatnonzero((wfi > noise[i] + le_id_threshold) & (d_wfi > 0))
+            le_indices = le_indices[le_indices > previous_le_ind + oversampling_factor]
+            if le_indices.size == 0:
+                expected_flags[0] = 1
+                break
+            peak_indices = np.flatnonzero((d_wfi <= 0) & (wf_bin_numi > wf_bin_numi[le_indices[0]]))
+            if peak_indices.size == 0:
+                expected_flags[1] = 1
+                break
+            expected_le_dp = wfi[peak_indices[0]] - wfi[le_indices[0]]
+            previous_le_ind = peak_indices[0]
+            if previous_le_ind > wf_bin_numi.size - oversampling_factor - 1:
+                expected_flags[2] = 1
+                break
+
+        assert list(flags[i]) == expected_flags
+        if not any(expected_flags):
+            assert le_index[i] == le_indices[0]
+            assert first_peak_index[i] == peak_indices[0]
+            assert le_dp[i] == expected_le_dp
+
+
+def test_rounded_bins():
+    """test the rounded bins of samples above thresholds between first and last samples are as
+    found from the oversampled waveforms"""
+    waveforms = make_waveforms(50, 128, 3)
+    oversampled = OversampledWaveforms(waveforms, 100)
+    thresholds = np.linspace(0.2, 1.1, len(waveforms))
+    rows = np.arange(len(waveforms))
+    first = np.arange(len(waveforms)) * 200
+    last = first + np.arange(len(waveforms)) * 50
+
+    bins = oversampled.rounded_bins(
+        rows,
+        first,
+        last,
+        lambda rows, samples: oversampled.values_at(rows, samples) > thresholds[rows, None],
+    )
+
+    for i, waveform in enumerate(waveforms):
+        wfi = np.interp(oversampled.positions, np.arange(128), waveform)
+        above = np.flatnonzero(wfi > thresholds[i])
+        above = above[(above >= first[i]) & (above <= last[i])]
+        expected = np.unique(np.rint(oversampled.positions[above]).astype(int))
+        np.testing.assert_array_equal(np.flatnonzero(bins[i]), expected)
+
+
+def test_linear_first_above():
+    """test analytic threshold crossings are at the first sample above the thresholds of
+    finely oversampled waveforms, to within the sample spacing"""
+    waveforms = make_waveforms(50, 128, 4)
+    oversampled = OversampledWaveforms(waveforms, 1000)
+    linear = LinearWaveforms(waveforms)
+    thresholds = np.linspace(0.2, 1.1, len(waveforms))
+    rows = np.arange(len(waveforms))
+    start = np.arange(len(waveforms)) * 2
+
+    found = linear.first_above(rows, start, thresholds)
+    found_sample = oversampled.first_sample(
+        rows,
+        np.searchsorted(oversampled.positions, start),
+        oversampled.intervals_above(thresholds),
+        lambda rows, samples: oversampled.values_at(rows, samples) > thresholds[rows, None],
+    )
+
+    np.testing.assert_array_equal(np.isnan(found), found_sample < 0)
+    spacing = oversampled.positions[1]
+    np.testing.assert_allclose(
+        found[found_sample >= 0],
+        oversampled.positions[found_sample[found_sample >= 0]],
+        atol=spacing,
+    )
+    np.testing.assert_allclose(
+        linear.values_at(rows[~np.isnan(found)], found[~np.isnan(found), None])[:, 0],
+        np.maximum(thresholds, waveforms[rows, np.floor(start).astype(int)])[~np.isnan(found)],
+        atol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("le_dp_threshold", [0.2, 0.6])
+def test_find_leading_edges_linear(le_dp_threshold):
+    """test analytic leading edges are as found in finely oversampled waveforms, to within
+    0.01 bins (the oversampled search restarts slightly less than 1 bin after each peak),
+    except where the leading edge amplitude is within rounding of the le_dp_threshold
+
+    Args:
+        le_dp_threshold (float): minimum leading edge amplitude
+    """
+    waveforms = make_waveforms(100, 128, 5)
+    noise = np.sort(waveforms, axis=1)[:, :6].mean(axis=1)
+    oversampled = OversampledWaveforms(waveforms, 1000)
+
+    le_index, first_peak_index, _, flags = find_leading_edges(
+        oversampled, noise, 0.05, le_dp_threshold
+    )
+    le_position, first_peak_position, le_dp, linear_flags = find_leading_edges_linear(
+        LinearWaveforms(waveforms), noise, 0.05, le_dp_threshold
+    )
+
+    borderline = np.abs(le_dp - le_dp_threshold) < 1e-3
+    np.testing.assert_array_equal(flags[~borderline], linear_flags[~borderline])
+    found = ~flags.any(axis=1) & ~borderline
+    assert found.sum() > 50
+    np.testing.assert_allclose(
+        le_position[found], oversampled.positions[le_index[found]], atol=0.01
+    )
+    np.testing.assert_allclose(
+        first_peak_position[found], oversampled.positions[first_peak_index[found]], atol=0.01
+    )
@@ -0,0 +1,567 @@
+"""clev2er.utils.cs2.retrackers.waveform_search
+
+Search of a batch of CS2 waveforms, oversampled by linear interpolation, for leading edges and
+threshold crossings, without building the oversampled waveforms.
+
+The retrackers search each waveform oversampled by a factor (typically 100) as
+
+    wf_bin_numi = np.linspace(0, waveform_size - 1, waveform_size * wf_oversampling_factor)
+    wfi = np.interp(wf_bin_numi, np.linspace(0, waveform_size - 1, waveform_size), waveform)
+    d_wfi = np.gradient(wfi, 1 / wf_oversampling_factor)
+
+for the first samples meeting conditions on wfi and d_wfi. The OversampledWaveforms class
+evaluates wfi and d_wfi only at the samples searched, with the same arithmetic as np.interp()
+and np.gradient(), so the samples found are the same. Only the intervals between waveform bins
+where a condition may be met (from the bin values either side) are searched.
+
+Example:
+
+    oversampled = OversampledWaveforms(wfnorm_sm, wf_oversampling_factor)
+    le_index, first_peak_index, le_dp, flags = find_leading_edges(
+        oversampled, wf_noise_mean, le_id_threshold, le_dp_threshold
+    )
+"""
+
+from typing import Callable
+
+import numpy as np
+
+# Tolerance of the tests of which intervals between waveform bins may contain samples meeting a
+# condition. Much larger than the rounding errors of the interpolation, so no interval is missed.
+INTERVAL_TEST_TOLERANCE = 1e-6
+
+# Maximum number of intervals of each waveform searched together
+MAX_BLOCK_INTERVALS = 16
+
+
+class OversampledWaveforms:  # pylint: disable=too-many-instance-attributes
+    """class providing the values and gradients of a batch of waveforms, oversampled by linear
+    interpolation, at any of their oversampled sample indices
+    """
+
+    def __init__(self, waveforms: np.ndarray, oversampling_factor: int) -> None:
+        """class initialization
+
+        Args:
+            waveforms (np.ndarray): waveforms, shape (n_waveforms, waveform_size)
+            oversampling_factor (int): number of oversampled samples per waveform bin
+        """
+        self.values = np.ascontiguousarray(waveforms, dtype=np.float64)
+        num_waveforms, self.waveform_size = self.values.shape
+        self.oversampling_factor = oversampling_factor
+
+        # bin number of each oversampled sample (wf_bin_numi), shared by all waveforms
+        self.positions = np.linspace(
+            0, self.waveform_size - 1, self.waveform_size * oversampling_factor
+        )
+        self.num_samples = len(self.positions)
+
+        # first sample of each interval between bins j and j+1, and the end of the last
+        # interval (which includes the sample at the last bin)
+        self.interval_starts = np.append(
+            np.searchsorted(self.positions, np.arange(self.waveform_size - 1)),
+            self.num_samples,
+        )
+        self.max_interval_samples = int(np.diff(self.interval_starts).max())
+
+        # bin before each sample (the last sample is at the last bin), the sample's offset
+        # from it as np.interp() computes it, and whether the sample is at the bin
+        self.sample_bins = np.repeat(
+            np.arange(self.waveform_size - 1), np.diff(self.interval_starts)
+        )
+        self.sample_bins[-1] = self.waveform_size - 1
+        self.sample_offsets = self.positions - self.sample_bins
+        self.sample_at_bin = self.sample_offsets == 0
+
+        # slope of each interval, as np.interp(), with a zero slope after the last bin
+        bins = np.linspace(0, self.waveform_size - 1, self.waveform_size)
+        self.slopes = np.zeros((num_waveforms, self.waveform_size))
+        self.slopes[:, :-1] = (self.values[:, 1:] - self.values[:, :-1]) / (bins[1:] - bins[:-1])
+
+    def interval_of(self, samples: np.ndarray) -> np.ndarray:
+        """find the interval between bins containing each sample
+
+        Args:
+            samples (np.ndarray): oversampled sample indices
+
+        Returns:
+            np.ndarray: interval (index of bin before the sample)
+        """
+        return np.minimum(self.sample_bins[samples], self.waveform_size - 2)
+
+    def values_at(self, rows: np.ndarray, samples: np.ndarray) -> np.ndarray:
+        """oversampled waveform values at sample indices, as np.interp() (wfi[samples])
+
+        Args:
+            rows (np.ndarray): waveform indices, shape (r,)
+            samples (np.ndarray): sample indices of each waveform, shape (r, w)
+
+        Returns:
+            np.ndarray: values, shape (r, w)
+        """
+        # index of the bin before each sample in the flattened waveforms
+        flat_bins = self.sample_bins[samples] + (rows * self.waveform_size)[:, None]
+        left = np.take(self.values, flat_bins)
+        values = np.take(self.slopes, flat_bins) * self.sample_offsets[samples] + left
+
+        # where Nan, np.interp() takes the value at a bin, or the interpolation from the
+        # bin after, or a flat interval's value
+        retry = np.isnan(values)
+        if np.any(retry):
+            right = np.take(self.values, flat_bins + 1, mode="clip")
+            slope = np.take(self.slopes, flat_bins)
+            values[retry] = (slope * (self.sample_offsets[samples] - 1) + right)[retry]
+            flat = np.isnan(values) & (left == right)
+            values[flat] = left[flat]
+            at_bin = self.sample_at_bin[samples]
+            values[at_bin] = left[at_bin]
+        return values
+
+    def gradient_at(self, rows: np.ndarray, samples: np.ndarray) -> np.ndarray:
+        """gradient of the oversampled waveforms at sample indices, as np.gradient() of the
+        oversampled waveform, with spacing 1/oversampling_factor (d_wfi[samples])
+
+        Args:
+            rows (np.ndarray): waveform indices, shape (r,)
+            samples (np.ndarray): sample indices of each waveform, shape (r, w)
+
+        Returns:
+            np.ndarray: gradients, shape (r, w)
+        """
+        spacing = 1 / self.oversampling_factor
+        difference = self.values_at(rows, np.minimum(samples + 1, self.num_samples - 1))
+        difference -= self.values_at(rows, np.maximum(samples - 1, 0))
+        # central differences, except one sided at the ends
+        interior = (samples > 0) & (samples < self.num_samples - 1)
+        return np.where(interior, difference / (2.0 * spacing), difference / spacing)
+
+    def intervals_above(self, threshold: np.ndarray) -> np.ndarray:
+        """find the intervals which may contain samples with values above a threshold
+
+        Args:
+            threshold (np.ndarray): threshold of each waveform, shape (n_waveforms,)
+
+        Returns:
+            np.ndarray: boolean, shape (n_waveforms, waveform_size - 1)
+        """
+        upper = np.fmax(self.values[:, :-1], self.values[:, 1:])
+        return ~(upper <= np.asarray(threshold)[:, None] - INTERVAL_TEST_TOLERANCE)
+
+    def intervals_with_gradient(self, positive: bool) -> np.ndarray:
+        """find the intervals which may contain samples with a positive gradient, or if not
+        positive, a zero or negative gradient. The gradient at a sample depends on the
+        intervals either side of the one containing it.
+
+        Args:
+            positive (bool): True for positive gradients, False for zero or negative
+
+        Returns:
+            np.ndarray: boolean, shape (n_waveforms, waveform_size - 1)
+        """
+        slopes = self.slopes[:, :-1]
+        if positive:
+            possible = ~(slopes <= -INTERVAL_TEST_TOLERANCE)
+        else:
+            possible = ~(slopes >= INTERVAL_TEST_TOLERANCE)
+        intervals = possible.copy()
+        intervals[:, 1:] |= possible[:, :-1]
+        intervals[:, :-1] |= possible[:, 1:]
+        return intervals
+
+    def first_sample(  # pylint: disable=too-many-locals
+        self,
+        rows: np.ndarray,
+        start: np.ndarray,
+        candidate_intervals: np.ndarray,
+        condition: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    ) -> np.ndarray:
+        """find the first sample of each waveform, from a start sample, which meets a condition
+
+        Args:
+            rows (np.ndarray): waveform indices to search, shape (r,)
+            start (np.ndarray): first sample index to search of each waveform, shape (r,)
+            candidate_intervals (np.ndarray): intervals which may contain samples meeting the
+                                              condition, shape (n_waveforms, waveform_size - 1).
+                                              Other intervals are not searched.
+            condition (Callable): condition(rows, samples) returning True where the samples
+                                  (shape (r, w)) of waveforms rows (shape (r,)) meet the
+                                  condition
+
+        Returns:
+            np.ndarray: index of first sample meeting the condition, or -1 if none, shape (r,)
+        """
+        rows = np.asarray(rows)
+        start = np.asarray(start)
+        found = np.full(len(rows), -1)
+        interval = self.interval_of(np.minimum(start, self.num_samples - 1))
+        interval_numbers = np.arange(self.waveform_size - 1)
+        interval_samples = np.arange(self.max_interval_samples)
+        # intervals of a block are padded with an empty interval at the end of the waveform
+        padding = self.waveform_size - 1
+        interval_starts = np.append(self.interval_starts, self.num_samples)
+
+        # Search the next candidate interval of each waveform, then blocks of candidate
+        # intervals of increasing size for the waveforms still searching
+        block_size = 1
+        searching = np.flatnonzero(start < self.num_samples)
+        while searching.size > 0:
+            candidates = candidate_intervals[rows[searching]] & (
+                interval_numbers >= interval[searching, None]
+            )
+            num_candidates = np.cumsum(candidates, axis=1)
+            has_candidate = num_candidates[:, -1] > 0
+            searching = searching[has_candidate]
+            if searching.size == 0:
+                break
+            num_candidates = num_candidates[has_candidate]
+            candidates = candidates[has_candidate] & (num_candidates <= block_size)
+
+            # the intervals of the block, in order
+            block_rows, block_intervals = np.nonzero(candidates)
+            block = np.full((searching.size, block_size), padding)
+            block[block_rows, num_candidates[candidates] - 1] = block_intervals
+
+            # test the samples of the block's intervals
+            samples = (interval_starts[block][:, :, None] + interval_samples).reshape(
+                searching.size, -1
+            )
+            in_search = (
+                samples < np.repeat(interval_starts[block + 1], interval_samples.size, axis=1)
+            ) & (samples >= start[searching, None])
+            samples = np.minimum(samples, self.num_samples - 1)
+            met = condition(rows[searching], samples) & in_search
+
+            has_met = met.any(axis=1)
+            found[searching[has_met]] = samples[has_met, np.argmax(met[has_met], axis=1)]
+            interval[searching] = np.max(np.where(block < padding, block, -1), axis=1) + 1
+            searching = searching[~has_met]
+            block_size = min(2 * block_size, MAX_BLOCK_INTERVALS)
+        return found
+
+    def rounded_bins(
+        self,
+        rows: np.ndarray,
+        first: np.ndarray,
+        last: np.ndarray,
+        condition: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    ) -> np.ndarray:
+        """find the bins nearest to (np.rint() of the bin numbers of) the samples between first
+        and last (inclusive) of each waveform which meet a condition
+
+        Args:
+            rows (np.ndarray): waveform indices to search, shape (r,)
+            first (np.ndarray): first sample index to search of each waveform, shape (r,)
+            last (np.ndarray): last sample index to search of each waveform, shape (r,)
+            condition (Callable): condition(rows, samples) returning True where the samples
+                                  (shape (r, w)) of waveforms rows (shape (r,)) meet the
+                                  condition
+
+        Returns:
+            np.ndarray: boolean, shape (r, waveform_size), True at the bins found
+        """
+        rows = np.asarray(rows)
+        last = np.asarray(last)
+        bins = np.zeros((len(rows), self.waveform_size), dtype=bool)
+        window_samples = np.arange(MAX_BLOCK_INTERVALS * self.max_interval_samples)
+
+        # search windows of samples until the last sample of each waveform
+        window_start = np.array(first)
+        searching = np.flatnonzero(window_start <= last)
+        while searching.size > 0:
+            samples = window_start[searching, None] + window_samples
+            in_search = samples <= last[searching, None]
+            samples = np.minimum(samples, last[searching, None])
+            met = condition(rows[searching], samples) & in_search
+
+            met_rows, met_columns = np.nonzero(met)
+            bins[
+                searching[met_rows],
+                np.rint(self.positions[samples[met_rows, met_columns]]).astype(int),
+            ] = True
+            window_start[searching] += window_samples.size
+            searching = searching[window_start[searching] <= last[searching]]
+        return bins
+
+
+def find_leading_edges(  # pylint: disable=too-many-locals
+    waveforms: OversampledWaveforms,
+    noise: np.ndarray,
+    le_id_threshold: float,
+    le_dp_threshold: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """find the leading edge of each of a batch of smoothed waveforms
+
+    The leading edge starts at the first sample above the noise + le_id_threshold with a
+    positive gradient, and stops at the next sample with a zero or negative gradient (the
+    first peak). The search is repeated from each peak (+1 bin) until the amplitude of the
+    leading edge is at least le_dp_threshold.
+
+    Args:
+        waveforms (OversampledWaveforms): smoothed normalised waveforms
+        noise (np.ndarray): mean noise of each waveform (normalised), shape (n_waveforms,)
+        le_id_threshold (float): power must exceed thermal noise by this amount to be
+                                 identified as a leading edge
+        le_dp_threshold (float): threshold on normalised amplitude change which is required
+                                 to be accepted as lead edge
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray, np.ndarray): le_index, first_peak_index (oversampled
+        sample indices of leading edge start and stop), le_dp (leading edge amplitude), flags
+        (shape (n_waveforms, 3), 1 where: no samples are sufficiently above the noise floor,
+        no waveform peak can be identified after the leading edge starts, the leading edge
+        reached the end of the waveform)
+    """
+    num_waveforms = waveforms.values.shape[0]
+    le_threshold = np.asarray(noise) + le_id_threshold
+    le_candidates = waveforms.intervals_above(le_threshold) & waveforms.intervals_with_gradient(
+        positive=True
+    )
+    peak_candidates = waveforms.intervals_with_gradient(positive=False)
+
+    def is_leading_edge(rows: np.ndarray, samples: np.ndarray) -> np.ndarray:
+        return (waveforms.values_at(rows, samples) > le_threshold[rows, None]) & (
+            waveforms.gradient_at(rows, samples) > 0
+        )
+
+    def is_peak(rows: np.ndarray, samples: np.ndarray) -> np.ndarray:
+        return waveforms.gradient_at(rows, samples) <= 0
+
+    le_index = np.full(num_waveforms, -1)
+    first_peak_index = np.full(num_waveforms, -1)
+    le_dp = np.zeros(num_waveforms)
+    flags = np.zeros((num_waveforms, 3), dtype=int)
+
+    # loop through leading edges until minimum amplitude requirement met or the end of the
+    # waveform is reached
+    searching = np.arange(num_waveforms)
+    while searching.size > 0:
+        previous_le_ind = np.maximum(first_peak_index[searching], 0)
+        found = waveforms.first_sample(
+            searching,
+            previous_le_ind + waveforms.oversampling_factor + 1,
+            le_candidates,
+            is_leading_edge,
+        )
+        flags[searching[found < 0], 0] = 1
+        searching = searching[found >= 0]
+        le_index[searching] = found[found >= 0]
+
+        found = waveforms.first_sample(searching, le_index[searching] + 1, peak_candidates, is_peak)
+        flags[searching[found < 0], 1] = 1
+        searching = searching[found >= 0]
+        first_peak_index[searching] = found[found >= 0]
+
+        le_dp[searching] = (
+            waveforms.values_at(searching, first_peak_index[searching, None])
+            - waveforms.values_at(searching, le_index[searching, None])
+        )[:, 0]
+
+        at_end = first_peak_index[searching] > (
+            waveforms.num_samples - waveforms.oversampling_factor - 1
+        )
+        flags[searching[at_end], 2] = 1
+        searching = searching[~at_end & (le_dp[searching] < le_dp_threshold)]
+
+    return le_index, first_peak_index, le_dp, flags
+
+
+class LinearWaveforms:
+    """class providing analytic threshold crossings and peaks of a batch of waveforms,
+    interpolated linearly between bins (the limit of the oversampled waveforms as the
+    oversampling factor increases). Positions are in (fractional) bin numbers.
+
+    The gradient of the waveform at a position is the slope of the interval between bins
+    containing it, so the first peak after a position is at the start of the next interval
+    with a zero or negative slope, and threshold crossings are interpolated between the two
+    bins either side of them.
+    """
+
+    def __init__(self, waveforms: np.ndarray) -> None:
+        """class initialization
+
+        Args:
+            waveforms (np.ndarray): waveforms, shape (n_waveforms, waveform_size)
+        """
+        self.values = np.ascontiguousarray(waveforms, dtype=np.float64)
+        self.waveform_size = self.values.shape[1]
+        self.slopes = self.values[:, 1:] - self.values[:, :-1]
+        self.intervals = np.arange(self.waveform_size - 1)
+
+    def values_at(self, rows: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """waveform values at positions, interpolated linearly between bins
+
+        Args:
+            rows (np.ndarray): waveform indices, shape (r,)
+            positions (np.ndarray): positions (bin numbers) of each waveform, shape (r, w)
+
+        Returns:
+            np.ndarray: values, shape (r, w)
+        """
+        rows = np.asarray(rows)[:, None]
+        interval = np.clip(np.floor(positions).astype(int), 0, self.waveform_size - 2)
+        values = self.values[rows, interval]
+        at_bin = positions == interval
+        values[~at_bin] += (self.slopes[rows, interval] * (positions - interval))[~at_bin]
+        return values
+
+    def first_above(
+        self,
+        rows: np.ndarray,
+        start: np.ndarray,
+        threshold: np.ndarray,
+        rising: bool = False,
+    ) -> np.ndarray:
+        """find the first position of each waveform, from a start position, where the waveform
+        is above a threshold
+
+        Args:
+            rows (np.ndarray): waveform indices to search, shape (r,)
+            start (np.ndarray): first position to search of each waveform, shape (r,)
+            threshold (np.ndarray): threshold of each waveform, shape (r,)
+            rising (bool, optional): only search intervals with a positive slope.
+                                     Defaults to False.
+
+        Returns:
+            np.ndarray: first position above the threshold, or Nan if none, shape (r,)
+        """
+        rows = np.asarray(rows)
+        start = np.asarray(start, dtype=np.float64)[:, None]
+        threshold = np.asarray(threshold)[:, None]
+        values = self.values[rows]
+        slopes = self.slopes[rows]
+
+        # the part of each interval from the start, and the value at its beginning
+        begin = np.maximum(self.intervals, start)
+        begin_values = values[:, :-1] + slopes * (begin - self.intervals)
+
+        # the interval is above the threshold from its beginning, or crosses it
+        above = begin_values > threshold
+        crossing = ~above & (values[:, 1:] > threshold)
+        positions = np.full(begin.shape, np.nan)
+        positions[above] = begin[above]
+        positions[crossing] = (
+            self.intervals + (threshold - values[:, :-1]) / np.where(crossing, slopes, 1.0)
+        )[crossing]
+
+        searched = self.intervals + 1 > start
+        if rising:
+            searched &= slopes > 0
+        positions[~searched] = np.nan
+
+        found = ~np.isnan(positions)
+        first = np.argmax(found, axis=1)
+        return np.where(found.any(axis=1), positions[np.arange(len(rows)), first], np.nan)
+
+    def first_peak(self, rows: np.ndarray, start: np.ndarray) -> np.ndarray:
+        """find the first peak of each waveform after a start position: the first bin after it
+        followed by a zero or negative slope
+
+        Args:
+            rows (np.ndarray): waveform indices to search, shape (r,)
+            start (np.ndarray): position after which to search each waveform, shape (r,)
+
+        Returns:
+            np.ndarray: bin number of the first peak, or Nan if none, shape (r,)
+        """
+        rows = np.asarray(rows)
+        peaks = (self.slopes[rows] <= 0) & (self.intervals > np.asarray(start)[:, None])
+        first = np.argmax(peaks, axis=1)
+        return np.where(peaks.any(axis=1), first.astype(np.float64), np.nan)
+
+    def rounded_bins(
+        self,
+        rows: np.ndarray,
+        first: np.ndarray,
+        last: np.ndarray,
+        level: np.ndarray,
+    ) -> np.ndarray:
+        """find the bins nearest to the positions between first and last (inclusive) of each
+        waveform where the waveform is above a level
+
+        Args:
+            rows (np.ndarray): waveform indices to search, shape (r,)
+            first (np.ndarray): first position to search of each waveform, shape (r,)
+            last (np.ndarray): last position to search of each waveform, shape (r,)
+            level (np.ndarray): level of each waveform, shape (r,)
+
+        Returns:
+            np.ndarray: boolean, shape (r, waveform_size), True at the bins found
+        """
+        rows = np.asarray(rows)
+        first = np.asarray(first)[:, None]
+        last = np.asarray(last)[:, None]
+        level = np.asarray(level)[:, None]
+        bins = np.arange(self.waveform_size)
+
+        # the maximum of the waveform between the positions nearest each bin is at the ends
+        # of the range, or at the bin
+        low = np.maximum(bins - 0.5, first)
+        high = np.minimum(bins + 0.5, last)
+        nearest = np.broadcast_to(bins, low.shape)
+        at_bin = (nearest >= first) & (nearest <= last)
+        above = (self.values_at(rows, low) > level) | (self.values_at(rows, high) > level)
+        above |= at_bin & (self.values[rows] > level)
+        return above & (low <= high)
+
+
+def find_leading_edges_linear(
+    waveforms: LinearWaveforms,
+    noise: np.ndarray,
+    le_id_threshold: float,
+    le_dp_threshold: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """find the leading edge of each of a batch of smoothed waveforms, as find_leading_edges(),
+    but with analytic crossings of the waveforms interpolated linearly between bins instead of
+    searching oversampled waveforms
+
+    Args:
+        waveforms (LinearWaveforms): smoothed normalised waveforms
+        noise (np.ndarray): mean noise of each waveform (normalised), shape (n_waveforms,)
+        le_id_threshold (float): power must exceed thermal noise by this amount to be
+                                 identified as a leading edge
+        le_dp_threshold (float): threshold on normalised amplitude change which is required
+                                 to be accepted as lead edge
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray, np.ndarray): le_position, first_peak_position
+        (bin numbers of leading edge start and stop), le_dp (leading edge amplitude), flags
+        (shape (n_waveforms, 3), as find_leading_edges())
+    """
+    num_waveforms = waveforms.values.shape[0]
+    le_threshold = np.asarray(noise) + le_id_threshold
+
+    le_position = np.full(num_waveforms, np.nan)
+    first_peak_position = np.zeros(num_waveforms)
+    le_dp = np.zeros(num_waveforms)
+    flags = np.zeros((num_waveforms, 3), dtype=int)
+
+    # loop through leading edges until minimum amplitude requirement met or the end of the
+    # waveform is reached. Each search starts 1 bin after the previous peak.
+    searching = np.arange(num_waveforms)
+    while searching.size > 0:
+        found = waveforms.first_above(
+            searching,
+            first_peak_position[searching] + 1,
+            le_threshold[searching],
+            rising=True,
+        )
+        flags[searching[np.isnan(found)], 0] = 1
+        searching = searching[~np.isnan(found)]
+        le_position[searching] = found[~np.isnan(found)]
+
+        found = waveforms.first_peak(searching, le_position[searching])
+        flags[searching[np.isnan(found)], 1] = 1
+        searching = searching[~np.isnan(found)]
+        first_peak_position[searching] = found[~np.isnan(found)]
+
+        le_dp[searching] = (
+            waveforms.values_at(searching, first_peak_position[searching, None])
+            - waveforms.values_at(searching, le_position[searching, None])
+        )[:, 0]
+
+        at_end = first_peak_position[searching] > waveforms.waveform_size - 2
+        flags[searching[at_end], 2] = 1
+        searching = searching[~at_end & (le_dp[searching] < le_dp_threshold)]
+
+    first_peak_position[np.isnan(le_position)] = np.nan
+    return le_position, first_peak_position, le_dp, flags
@@ -2,12 +2,13 @@
 
 DEM class to read and interpolate DEMs
 """
+
 from __future__ import annotations
 
+import copy
 import logging
 import os
-from multiprocessing.shared_memory import SharedMemory
-from typing import Any
+import warnings
 
 import numpy as np
 import rasterio  # to extract GeoTIFF extents
@@ -15,13 +16,31 @@ from pyproj import CRS  # coordinate reference system
 from pyproj import Transformer  # transforms
 from rasterio.errors import RasterioIOError
 from scipy.interpolate import interpn
-from scipy.ndimage import gaussian_filter
+from scipy.ndimage import gaussian_filter, median_filter
 from tifffile import imread  # to support large TIFF files
 
+from clev2er.utils.dems.tiled_grid import (
+    DEFAULT_TILE_CACHE_MB,
+    DEFAULT_TILE_SIZE,
+    TiledGrid,
+)
+from clev2er.utils.grid_cache.grid_cache import (
+    grid_cache_path,
+    read_grid_cache,
+    write_grid_cache,
+)
+from clev2er.utils.projections.projection_cache import transform_lonlat
+from clev2er.utils.shared_resources.shared_resources import (
+    release_array,
+    share_array,
+)
+
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-statements
 # pylint: disable=too-many-branches
+# pylint: disable=too-many-locals
 # pylint: disable=R0801
+# pylint: disable=too-many-lines
 
 log = logging.getLogger(__name__)
 
@@ -43,6 +62,213 @@ dem_list = [
 ]
 
 
+def axis_cells(axis: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """find the grid cell along an axis containing each value, as interpn() does
+
+    The cell is found on the ascending order of the axis, so that a value on a grid line
+    is in the cell above it (and the last value in the last cell) whether the axis is
+    stored ascending or descending.
+
+    Args:
+        axis (np.ndarray): grid axis values, ascending or descending, at least 2
+        values (np.ndarray): values within the range of axis
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): (index of the cell's lower value, index of its
+        upper value, weight of the upper value), where indices are into axis as stored
+    """
+    num = len(axis)
+    descending = axis[-1] < axis[0]
+    ascending_axis = axis[::-1] if descending else axis
+    lower = np.clip(np.searchsorted(ascending_axis, values, side="right") - 1, 0, num - 2)
+    upper = lower + 1
+    weight = (values - ascending_axis[lower]) / (ascending_axis[upper] - ascending_axis[lower])
+    if descending:
+        return num - 1 - lower, num - 1 - upper, weight
+    return lower, upper, weight
+
+
+def interp_regular_grid(
+    xgrid: np.ndarray,
+    ygrid: np.ndarray,
+    zgrid: np.ndarray | TiledGrid,
+    x,
+    y,
+    method: str = "linear",
+) -> np.ndarray:
+    """Interpolate a regular grid at x,y without copying or re-ordering the grid
+
+    The grid axes may be ascending or descending (as DEM rows usually are, top row first).
+    The grid cells containing each point are found by a binary search of the grid axes, and
+    only those cells of zgrid are read, so the cost depends on the number of points, not
+    the size of the grid. zgrid may be in shared memory, a memory mapped file or a
+    TiledGrid.
+
+    Results are the same as scipy.interpolate.interpn((ygrid, xgrid), zgrid, (y, x),
+    method=method, bounds_error=False, fill_value=np.nan) on the equivalent ascending grid,
+    including which cell is used (and so whether a Nan grid value is used) for a point on
+    a grid line.
+
+    Args:
+        xgrid (np.ndarray): x values of grid columns, regularly spaced
+        ygrid (np.ndarray): y values of grid rows, regularly spaced
+        zgrid (np.ndarray): grid values, shape (len(ygrid), len(xgrid))
+        x (np.ndarray): x coordinates of points
+        y (np.ndarray): y coordinates of points
+        method (str, optional): linear or nearest. Defaults to "linear".
+
+    Returns:
+        np.ndarray: interpolated values, np.nan where points are outside the grid
+
+    Raises:
+        ValueError: if method is not supported
+    """
+    if method not in ("linear", "nearest"):
+        raise ValueError(f"interpolation method {method} not supported")
+
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    values = np.full(x.shape, np.nan)
+    if len(xgrid) < 2 or len(ygrid) < 2:
+        return values
+
+    # NaN points are also outside
+    inside = (
+        (x >= min(xgrid[0], xgrid[-1]))
+        & (x <= max(xgrid[0], xgrid[-1]))
+        & (y >= min(ygrid[0], ygrid[-1]))
+        & (y <= max(ygrid[0], ygrid[-1]))
+    )
+    col0, col1, wcol = axis_cells(xgrid, x[inside])
+    row0, row1, wrow = axis_cells(ygrid, y[inside])
+
+    if method == "nearest":
+        # ties are resolved to the lower value, as interpn does
+        values[inside] = zgrid[np.where(wrow <= 0.5, row0, row1), np.where(wcol <= 0.5, col0, col1)]
+        return values
+
+    values[inside] = (
+        zgrid[row0, col0] * ((1.0 - wrow) * (1.0 - wcol))
+        + zgrid[row0, col1] * ((1.0 - wrow) * wcol)
+        + zgrid[row1, col0] * (wrow * (1.0 - wcol))
+        + zgrid[row1, col1] * (wrow * wcol)
+    )
+    return values
+
+
+def interp_regular_grid_lattice(
+    xgrid: np.ndarray,
+    ygrid: np.ndarray,
+    zgrid: np.ndarray | TiledGrid,
+    x: np.ndarray,
+    y: np.ndarray,
+) -> np.ndarray:
+    """Linearly interpolate a regular grid on a batch of lattices of points, each lattice
+       being all the combinations of a set of x values and a set of y values
+
+    Each lattice is interpolated along x on the grid rows it spans, and then along y, so
+    the grid is only read once for each lattice row and column, rather than for each point.
+    Values are the same as interp_regular_grid() at each point (to rounding).
+
+    Args:
+        xgrid (np.ndarray): x values of grid columns, regularly spaced
+        ygrid (np.ndarray): y values of grid rows, regularly spaced
+        zgrid (np.ndarray): grid values, shape (len(ygrid), len(xgrid))
+        x (np.ndarray): x values of each lattice, shape (lattices, nx)
+        y (np.ndarray): y values of each lattice, shape (lattices, ny)
+
+    Returns:
+        np.ndarray: interpolated values, shape (lattices, ny, nx), np.nan where points are
+        outside the grid
+    """
+    x = np.atleast_2d(np.asarray(x, dtype=np.float64))
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    num_lattices = x.shape[0]
+    if len(xgrid) < 2 or len(ygrid) < 2 or x.size == 0 or y.size == 0:
+        return np.full((num_lattices, y.shape[1], x.shape[1]), np.nan)
+
+    x_min, x_max = min(xgrid[0], xgrid[-1]), max(xgrid[0], xgrid[-1])
+    y_min, y_max = min(ygrid[0], ygrid[-1]), max(ygrid[0], ygrid[-1])
+    inside = ((y >= y_min) & (y <= y_max))[:, :, None] & ((x >= x_min) & (x <= x_max))[:, None, :]
+    col0, col1, wcol = axis_cells(xgrid, np.clip(np.nan_to_num(x), x_min, x_max))
+    row0, row1, wrow = axis_cells(ygrid, np.clip(np.nan_to_num(y), y_min, y_max))
+
+    # the grid rows spanned by each lattice
+    first_row = np.minimum(row0, row1).min(axis=1)
+    num_rows = int((np.maximum(row0, row1).max(axis=1) - first_row).max()) + 1
+    rows = np.minimum(first_row[:, None] + np.arange(num_rows), len(ygrid) - 1)[:, :, None]
+
+    # interpolate along x on each spanned row, then along y
+    along_x = zgrid[rows, col0[:, None, :]] * (1.0 - wcol[:, None, :]) + zgrid[
+        rows, col1[:, None, :]
+    ] * (wcol[:, None, :])
+    lattices = np.arange(num_lattices)[:, None]
+    values = along_x[lattices, row0 - first_row[:, None]] * (1.0 - wrow[:, :, None]) + along_x[
+        lattices, row1 - first_row[:, None]
+    ] * (wrow[:, :, None])
+    values[~inside] = np.nan
+    return values
+
+
+def nearest_axis_index(axis: np.ndarray, values) -> np.ndarray:
+    """find the index of the nearest value in a regularly spaced grid axis to each value
+
+    Equivalent to np.absolute(value - axis).argmin() for each value, but calculated from
+    the first axis value and the axis spacing, so independent of the axis length.
+
+    Args:
+        axis (np.ndarray): regularly spaced, ascending or descending axis values
+        values (np.ndarray|float): values to find
+
+    Returns:
+        np.ndarray: indices, in range 0..len(axis)-1. 0 for NaN values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    index = np.rint((values - axis[0]) * ((len(axis) - 1) / (axis[-1] - axis[0])))
+    index = np.where(np.isfinite(index), index, 0.0)
+    return np.clip(index, 0, len(axis) - 1).astype(np.intp)
+
+
+def downsample_grid(zgrid: np.ndarray, factor: int) -> np.ndarray:
+    """downsample a grid by averaging (ignoring Nan) blocks of factor x factor cells
+
+    Rows and columns beyond the last whole block are dropped.
+
+    Args:
+        zgrid (np.ndarray): 2d grid
+        factor (int): number of cells in each direction of a block
+
+    Returns:
+        np.ndarray: downsampled grid, shape (rows // factor, cols // factor). zgrid if
+        factor is 1.
+    """
+    if factor == 1:
+        return zgrid
+    nrows = zgrid.shape[0] // factor
+    ncols = zgrid.shape[1] // factor
+    blocks = np.asarray(zgrid)[: nrows * factor, : ncols * factor].reshape(
+        nrows, factor, ncols, factor
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # blocks which are all Nan
+        return np.nanmean(blocks, axis=(1, 3)).astype(zgrid.dtype, copy=False)
+
+
+def downsample_axis(axis: np.ndarray, factor: int) -> np.ndarray:
+    """downsample a grid axis to the centres of the blocks of downsample_grid()
+
+    Args:
+        axis (np.ndarray): grid cell x or y values
+        factor (int): number of cells in each direction of a block
+
+    Returns:
+        np.ndarray: mean of each block of factor values. axis if factor is 1.
+    """
+    if factor == 1:
+        return axis
+    num = len(axis) // factor
+    return axis[: num * factor].reshape(num, factor).mean(axis=1)
+
+
 class Dem:
     """class to load and interpolate Polar DEMs"""
 
@@ -56,6 +282,7 @@ class Dem:
         dem_dir: str | None = None,
         store_in_shared_memory: bool = False,
         thislog: logging.Logger | None = None,
+        tiled: bool | None = None,
     ):
         """class initialization function
 
@@ -64,8 +291,15 @@ class Dem:
             filled (bool, optional): Use filled version of DEM if True. Defaults to True.
             config (dict, optional): configuration dictionary, defaults to None
             dem_dir (str, optional): path of directory containing DEM. Defaults to None
-            store_in_shared_memory (bool, optional): stores/accesses zdem array in SharedMemory
+            store_in_shared_memory (bool, optional): get the zdem array from the run's shared
+                                resources (see clev2er.utils.shared_resources), so that
+                                it is loaded once and shared by all processes. Loaded
+                                normally if shared resources are not in use.
             thislog (logging.Logger|None, optional): attach to a different log instance
+            tiled (bool|None, optional): read a GeoTIFF DEM in tiles, only where it is used,
+                                instead of loading it all (see TiledGrid). Tile size and
+                                cache memory limit are set by config["dem_tiles"]. Defaults
+                                to None: use config["dem_tiles"]["enabled"], or False.
         Raises:
             ValueError: when name not in global dem_list
         """
@@ -78,22 +312,25 @@ class Dem:
         self.reference_year = 0  # YYYY, the year the DEM's elevations are referenced to
         self.xdem = np.array([])
         self.ydem = np.array([])
-        self.zdem = np.array([])
+        self.zdem: np.ndarray | TiledGrid = np.array([])
         self.mindemx = None
         self.mindemy = None
         self.binsize = 0
         self.store_in_shared_memory = store_in_shared_memory
         self.shape = ()
         self.dtype = np.float32
-        self.shared_mem: Any = None
-        self.shared_mem_child = False  # set to True if a child process
+        self.shared_array_name = ""  # name of zdem in shared resources, if shared
         self.npz_type = False  # set to True when using .npz DEM file
-
-        # is accessing the Dem's shared memory
-        # default is False (parent process which allocates
-        # the shared memory). Necessary for tracking who
-        # unlinks (parent) or closes (child) the shared
-        # memory at the end
+        self.source_file = ""  # path of DEM file
+        self.grid_cache_file = ""  # path of grid cache, if DEM loaded from its cache
+        self.level_suffix = ""  # _median<size>_x<factor> if a level of a DEM (see get_level)
+        self.levels: dict[tuple[int, int], Dem | None] = {}  # levels, by get_level() args
+
+        # Optional tiled mode, where zdem is a TiledGrid
+        dem_tiles = (config or {}).get("dem_tiles") or {}
+        self.tiled = bool(dem_tiles.get("enabled", False)) if tiled is None else tiled
+        self.tile_size = int(dem_tiles.get("tile_size", DEFAULT_TILE_SIZE))
+        self.tile_cache_mb = float(dem_tiles.get("cache_mb", DEFAULT_TILE_CACHE_MB))
         if thislog is not None:
             self.log = thislog  # optionally attach to a different log instance
         else:
@@ -189,23 +426,161 @@ class Dem:
 
         return this_path
 
+    def get_grid_cache_name(self) -> str:
+        """get the name of the DEM's grid cache
+
+        Returns:
+            str: dem_<name>_<DEM file name without extension>[<level suffix>]
+        """
+        return (
+            f"dem_{self.name}_{os.path.splitext(os.path.basename(self.source_file))[0]}"
+            f"{self.level_suffix}"
+        )
+
+    def load_grid_cache(self) -> bool:
+        """memory map the DEM from its grid cache (see clev2er.utils.grid_cache), if
+           CLEV2ER_GRID_CACHE_DIR is set and the cache is up to date with the DEM file
+
+        The memory mapped zdem is read-only and its pages are shared between processes by
+        the OS, so it is not also copied to SharedMemory.
+
+        Returns:
+            bool: True if the DEM was loaded from its cache
+        """
+        cache_path = grid_cache_path(self.get_grid_cache_name())
+        if not cache_path:
+            return False
+        cache = read_grid_cache(cache_path, self.source_file, self.log)
+        if cache is None:
+            return False
+        arrays, attributes = cache
+
+        self.zdem = arrays["zdem"]
+        self.xdem = arrays["xdem"]
+        self.ydem = arrays["ydem"]
+        self.mindemx = attributes["mindemx"]
+        self.mindemy = attributes["mindemy"]
+        self.binsize = attributes["binsize"]
+
+        self.store_in_shared_memory = False
+        self.grid_cache_file = cache_path
+        return True
+
+    def write_grid_cache(self) -> str:
+        """write the loaded DEM to its grid cache in CLEV2ER_GRID_CACHE_DIR
+
+        Returns:
+            str: path of cache, without extension
+
+        Raises:
+            ValueError: if CLEV2ER_GRID_CACHE_DIR is not set
+        """
+        cache_path = grid_cache_path(self.get_grid_cache_name())
+        if not cache_path:
+            raise ValueError("CLEV2ER_GRID_CACHE_DIR is not set")
+        write_grid_cache(
+            cache_path,
+            {"zdem": np.asarray(self.zdem), "xdem": self.xdem, "ydem": self.ydem},
+            {
+                "mindemx": np.asarray(self.mindemx).item(),
+                "mindemy": np.asarray(self.mindemy).item(),
+                "binsize": np.asarray(self.binsize).item(),
+            },
+            self.source_file,
+        )
+        return cache_path
+
     def clean_up(self):
-        """Free up, close or release any shared memory or other resources associated
+        """Release the DEM's shared zdem array (if shared), or other resources associated
         with DEM
         """
-        if self.store_in_shared_memory:
-            try:
-                if self.shared_mem is not None:
-                    if self.shared_mem_child:
-                        self.shared_mem.close()
-                        self.log.info("closed shared memory for %s", self.name)
-                    else:
-                        self.shared_mem.close()
-                        self.shared_mem.unlink()
-                        self.log.info("unlinked shared memory for %s", self.name)
-
-            except Exception as exc:  # pylint: disable=broad-exception-caught
-                self.log.error("Shared memory for %s could not be closed %s", self.name, exc)
+        for level in self.levels.values():
+            if level is not None:
+                level.clean_up()
+        self.levels = {}
+        if isinstance(self.zdem, TiledGrid):
+            self.zdem.close()
+        if self.shared_array_name:
+            self.zdem = np.array([])
+            release_array(self.shared_array_name)
+            self.log.info("released shared memory for %s", self.name)
+            self.shared_array_name = ""
+
+    def get_level(
+        self, median_filter_size: int = 0, downsample_factor: int = 1, cached_only: bool = False
+    ) -> Dem | None:
+        """get a level of the DEM's pyramid: the DEM median filtered and/or downsampled
+
+        Levels are precomputed for the whole DEM and written to the grid cache by
+        tools/build_grid_cache.py --dem_levels, and memory mapped from there, so that
+        (for example) the DEM segment about each record of a track can be taken from a
+        median filtered level, instead of median filtering each segment. A level is only
+        looked up or made once per DEM object.
+
+        Note that at the edges of a segment, a level's median filtered values are from the
+        DEM values either side of the edge, not from the segment reflected at its edge
+        (as median_filter(segment) would be).
+
+        Args:
+            median_filter_size (int, optional): width in grid cells of the median filter
+                                                (scipy.ndimage.median_filter). Defaults to 0:
+                                                not filtered.
+            downsample_factor (int, optional): number of grid cells in each direction
+                                               averaged (ignoring Nan) to each cell of the
+                                               level, after median filtering. Defaults to
+                                               1: not downsampled.
+            cached_only (bool, optional): only load the level from the grid cache, rather
+                                          than computing it from the whole DEM if it is not
+                                          cached. Defaults to False.
+
+        Returns:
+            Dem|None: the level, a Dem with the same name, projection and reference year,
+            or None if cached_only and the level is not in the grid cache
+
+        Raises:
+            ValueError: if the DEM is in tiled mode, or the parameters are not valid
+        """
+        if median_filter_size < 0 or downsample_factor < 1:
+            raise ValueError(
+                f"invalid DEM level: median_filter_size {median_filter_size}, "
+                f"downsample_factor {downsample_factor}"
+            )
+        key = (median_filter_size if median_filter_size > 1 else 0, downsample_factor)
+        if key == (0, 1):
+            return self
+        if self.levels.get(key) is not None or (key in self.levels and cached_only):
+            return self.levels[key]
+        if self.tiled:
+            raise ValueError(f"DEM levels are not supported for tiled DEM {self.name}")
+
+        level = copy.copy(self)
+        level.level_suffix = self.level_suffix
+        if key[0]:
+            level.level_suffix += f"_median{key[0]}"
+        if key[1] > 1:
+            level.level_suffix += f"_x{key[1]}"
+        level.levels = {}
+        level.shared_array_name = ""
+        level.grid_cache_file = ""
+
+        if not level.load_grid_cache():
+            if cached_only:
+                self.log.info("DEM level %s%s is not cached", self.name, level.level_suffix)
+                self.levels[key] = None
+                return None
+            zdem = np.asarray(self.zdem)
+            if key[0]:
+                zdem = median_filter(zdem, size=key[0])
+            level.zdem = downsample_grid(zdem, key[1])
+            level.xdem = downsample_axis(self.xdem, key[1])
+            level.ydem = downsample_axis(self.ydem, key[1])
+            level.mindemx = level.xdem.min()
+            level.mindemy = level.ydem.min()
+            level.binsize = self.binsize * key[1]
+            self.log.info("made DEM level %s%s", self.name, level.level_suffix)
+
+        self.levels[key] = level
+        return level
 
     def load_npz(self, npz_file: str):
         """Load DEM from npz format file
@@ -237,45 +612,35 @@ class Dem:
             binsize,
         ) = self.get_geotiff_extent(demfile)
 
-        if self.store_in_shared_memory:
-            # First try attaching to an existing shared memory buffer if it
-            # exists with the DEMs name. If that is unavailable, create the shared memory
-            try:
-                self.shared_mem = SharedMemory(name=self.name, create=False)
-                self.zdem = np.ndarray(
-                    shape=(nrows, ncols), dtype=self.dtype, buffer=self.shared_mem.buf
-                )
-                self.shared_mem_child = True
-
-                self.log.info("attached to existing shared memory for %s ", self.name)
-
-            except FileNotFoundError as exc:
-                zdem = imread(demfile)
-
-                if not isinstance(zdem, np.ndarray):
-                    raise TypeError(f"DEM image type not supported : {type(zdem)}") from exc
-
-                # Create the shared memory with the appropriate size
-                self.shared_mem = SharedMemory(name=self.name, create=True, size=zdem.nbytes)
-
-                # Link the shared memory to the zdem data
-                self.zdem = np.ndarray(zdem.shape, dtype=zdem.dtype, buffer=self.shared_mem.buf)
-
-                # Copy the data from zdem to the shared_np_array
-                self.zdem[:] = zdem[:]
-
-                self.log.info("created shared memory for %s", self.name)
-        else:
+        def read_zdem() -> np.ndarray:
             zdem = imread(demfile)
             if not isinstance(zdem, np.ndarray):
                 raise TypeError(f"DEM image type not supported : {type(zdem)}")
-            self.zdem = zdem
-
-        # Set void data to Nan
-        if self.void_value:
-            void_data = np.where(self.zdem == self.void_value)
-            if np.any(void_data):
-                self.zdem[void_data] = np.nan
+            # Set void data to Nan
+            if self.void_value:
+                zdem[zdem == self.void_value] = np.nan
+            return zdem
+
+        if self.tiled:
+            # tiles are read when used, by each process, so not shared
+            self.zdem = TiledGrid(
+                demfile,
+                tile_size=self.tile_size,
+                cache_mb=self.tile_cache_mb,
+                void_value=self.void_value or None,
+                thislog=self.log,
+            )
+            self.store_in_shared_memory = False
+            self.log.info(
+                "%s opened in tiled mode, tile cache limit %.0f MB", self.name, self.tile_cache_mb
+            )
+        elif self.store_in_shared_memory:
+            # loaded once by the run's shared resources owner, and attached to by
+            # the other processes. The shared zdem is read-only.
+            self.shared_array_name = self.get_grid_cache_name()
+            self.zdem = share_array(self.shared_array_name, read_zdem, self.log)
+        else:
+            self.zdem = read_zdem()
 
         self.xdem = np.linspace(top_l[0], top_r[0], ncols, endpoint=True)
         self.ydem = np.linspace(bottom_l[1], top_l[1], nrows, endpoint=True)
@@ -552,10 +917,12 @@ class Dem:
             self.log.error("Could not form dem path for %s : %s", self.name, exc)
             return False
 
-        if self.npz_type:
-            self.load_npz(demfile)
-        else:
-            self.load_geotiff(demfile)
+        self.source_file = demfile
+        if not self.load_grid_cache():
+            if self.npz_type:
+                self.load_npz(demfile)
+            else:
+                self.load_geotiff(demfile)
 
         # Setup the Transforms
         self.xy_to_lonlat_transformer = Transformer.from_proj(
@@ -567,36 +934,59 @@ class Dem:
 
         return True
 
-    def get_segment(
-        self, segment_bounds: list, grid_xy: bool = True, flatten: bool = False
+    def get_segment_indices(self, x_min, x_max, y_min, y_max) -> np.ndarray:
+        """return the grid index ranges of rectangular segments of the DEM
+
+        The bounds may be arrays (for example, a segment about each record of a track), to
+        find the index ranges of all the segments at once.
+
+        Args:
+            x_min (np.ndarray|float): minimum x of segment(s) in m
+            x_max (np.ndarray|float): maximum x of segment(s) in m
+            y_min (np.ndarray|float): minimum y of segment(s) in m
+            y_max (np.ndarray|float): maximum y of segment(s) in m
+
+        Returns:
+            np.ndarray: [row_start, row_end, col_start, col_end] of each segment, such that a
+                        segment is zdem[row_start:row_end, col_start:col_end]. Shape (4,)
+                        for a single segment, or (n, 4) for n segments
+        """
+        # DEM rows are stored from the maximum y (top row) down
+        return np.stack(
+            (
+                nearest_axis_index(self.ydem, y_max),
+                nearest_axis_index(self.ydem, y_min),
+                nearest_axis_index(self.xdem, x_min),
+                nearest_axis_index(self.xdem, x_max),
+            ),
+            axis=-1,
+        )
+
+    def get_segment_by_indices(
+        self, segment_indices: np.ndarray, grid_xy: bool = True, flatten: bool = False
     ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """return a cropped segment of the DEM, flattened or as a grid
+        """return a cropped segment of the DEM from its grid index ranges, flattened or as
+           a grid
 
         Args:
-            segment_bounds (List): [(minx,maxx),(miny,maxy)]
+            segment_indices (np.ndarray): [row_start, row_end, col_start, col_end] of
+                                          segment, from get_segment_indices()
             grid_xy (bool, optional): return segment as a grid. Defaults to True.
             flatten (bool, optional): return segment as flattened list. Defaults to False.
 
         Returns:
-            Tuple[np.ndarray, np.ndarray, np.ndarray]: (xdem,ydem,zdem)
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (xdem,ydem,zdem). zdem is a view of
+            the DEM unless flattened.
         """
-
-        # ----------------------------------------------------------------------
-        # Get coord bounds as index bounds
-        # ----------------------------------------------------------------------
-
-        minx_ind = (np.absolute(segment_bounds[0][0] - self.xdem)).argmin()
-        maxx_ind = (np.absolute(segment_bounds[0][1] - self.xdem)).argmin()
-        miny_ind = (np.absolute(segment_bounds[1][0] - self.ydem)).argmin()
-        maxy_ind = (np.absolute(segment_bounds[1][1] - self.ydem)).argmin()
+        row_start, row_end, col_start, col_end = (int(index) for index in segment_indices)
 
         # ----------------------------------------------------------------------
         # Crop full dem coords to segment bounds
         # ----------------------------------------------------------------------
 
-        zdem = self.zdem[maxy_ind:miny_ind, minx_ind:maxx_ind]
-        xdem = self.xdem[minx_ind:maxx_ind]
-        ydem = self.ydem[maxy_ind:miny_ind]
+        zdem = self.zdem[row_start:row_end, col_start:col_end]
+        xdem = self.xdem[col_start:col_end]
+        ydem = self.ydem[row_start:row_end]
 
         if grid_xy is True:
             xdem, ydem = np.meshgrid(xdem, ydem)
@@ -615,6 +1005,65 @@ class Dem:
 
         return (xdem.flatten(), ydem.flatten(), zdem.flatten())
 
+    def get_segments_by_indices(
+        self, segment_indices: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """return several segments of the DEM from their grid index ranges, stacked as grids
+
+        Each segment is as returned by get_segment_by_indices(segment_indices[i],
+        grid_xy=True), padded with Nan to the size of the largest segment (segments may be
+        smaller where they are clipped at the edge of the DEM).
+
+        Args:
+            segment_indices (np.ndarray): [row_start, row_end, col_start, col_end] of each
+                                          segment, shape (n, 4), from get_segment_indices()
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (xdem,ydem,zdem), each of shape
+            (n, rows, cols). x,y are Nan where z is Nan or padding.
+        """
+        segment_indices = np.asarray(segment_indices, dtype=np.intp).reshape(-1, 4)
+        nrows = np.maximum(segment_indices[:, 1] - segment_indices[:, 0], 0)
+        ncols = np.maximum(segment_indices[:, 3] - segment_indices[:, 2], 0)
+        max_rows = int(nrows.max(initial=0))
+        max_cols = int(ncols.max(initial=0))
+
+        in_rows = np.arange(max_rows) < nrows[:, None]
+        in_cols = np.arange(max_cols) < ncols[:, None]
+        rows = np.where(in_rows, segment_indices[:, 0, None] + np.arange(max_rows), 0)
+        cols = np.where(in_cols, segment_indices[:, 2, None] + np.arange(max_cols), 0)
+        in_segment = in_rows[:, :, None] & in_cols[:, None, :]
+
+        zdem = np.asarray(self.zdem[rows[:, :, None], cols[:, None, :]])
+        if zdem.dtype.kind != "f":
+            zdem = zdem.astype(np.float64)
+        zdem[~in_segment] = np.nan
+
+        has_z = ~np.isnan(zdem)
+        xdem = np.where(has_z, self.xdem[cols][:, None, :], np.nan)
+        ydem = np.where(has_z, self.ydem[rows][:, :, None], np.nan)
+        return (xdem, ydem, zdem)
+
+    def get_segment(
+        self, segment_bounds: list, grid_xy: bool = True, flatten: bool = False
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """return a cropped segment of the DEM, flattened or as a grid
+
+        Args:
+            segment_bounds (List): [(minx,maxx),(miny,maxy)]
+            grid_xy (bool, optional): return segment as a grid. Defaults to True.
+            flatten (bool, optional): return segment as flattened list. Defaults to False.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (xdem,ydem,zdem)
+        """
+        (x_min, x_max), (y_min, y_max) = segment_bounds
+        return self.get_segment_by_indices(
+            self.get_segment_indices(x_min, x_max, y_min, y_max),
+            grid_xy=grid_xy,
+            flatten=flatten,
+        )
+
     # ----------------------------------------------------------------------------------------------
     # Interpolate DEM, input x,y can be arrays or single, units m, in projection (epsg:3031")
     # returns the interpolated elevation(s) at x,y
@@ -624,6 +1073,8 @@ class Dem:
     #
     # method: string containing the interpolation method. Default is 'linear'. Options are
     # “linear” and “nearest”, and “splinef2d” (see scipy.interpolate.interpn docs).
+    # linear and nearest are evaluated directly on the stored grid (see interp_regular_grid),
+    # without copying it.
     #
     # Where your input points are outside the DEM area, then np.nan values will be returned
     # ----------------------------------------------------------------------------------------------
@@ -643,9 +1094,11 @@ class Dem:
         """
         # Transform to x,y if inputs are lat,lon
         if xy_is_latlon:
-            x, y = self.lonlat_to_xy_transformer.transform(  # pylint: disable=E0633
-                y, x
-            )  # transform lon,lat -> x,y
+            x, y = transform_lonlat(self.lonlat_to_xy_transformer, y, x)  # lon,lat -> x,y
+        if method in ("linear", "nearest"):
+            return interp_regular_grid(self.xdem, self.ydem, self.zdem, x, y, method=method)
+
+        # splinef2d needs an ascending grid, so a flipped copy
         myydem = np.flip(self.ydem.copy())
         myzdem = np.flip(self.zdem.copy(), 0)
         return interpn(
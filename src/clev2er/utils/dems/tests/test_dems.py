@@ -4,8 +4,15 @@ import logging
 
 import numpy as np
 import pytest
+from scipy.interpolate import interpn
+from scipy.ndimage import median_filter
 
-from clev2er.utils.dems.dems import Dem
+from clev2er.utils.dems.dems import (
+    Dem,
+    interp_regular_grid,
+    interp_regular_grid_lattice,
+    nearest_axis_index,
+)
 
 log = logging.getLogger(__name__)
 
@@ -71,3 +78,146 @@ def test_dems(dem_name, lats, lons, elevs):
     if len(lats) > 0:
         dem_elevs = thisdem.interp_dem(lats, lons, xy_is_latlon=True)
         np.testing.assert_allclose(elevs, dem_elevs, atol=1.0)
+
+
+@pytest.mark.parametrize("method", ["linear", "nearest"])
+def test_interp_regular_grid(method):
+    """test interpolation of a grid with descending rows (as stored in a DEM) against
+    scipy interpn of the equivalent ascending grid
+    """
+    rng = np.random.default_rng(0)
+    xgrid = np.linspace(-1000.0, 1000.0, 21)
+    ygrid = np.linspace(500.0, -500.0, 11)  # descending, top row first
+    zgrid = rng.uniform(0.0, 100.0, size=(len(ygrid), len(xgrid))).astype(np.float32)
+    zgrid[3, 4] = np.nan
+
+    # points inside, on the edges and outside the grid
+    x = np.concatenate((rng.uniform(-1100.0, 1100.0, 500), [-1000.0, 1000.0, 0.0, np.nan]))
+    y = np.concatenate((rng.uniform(-550.0, 550.0, 500), [500.0, -500.0, 600.0, 0.0]))
+
+    expected = interpn(
+        (np.flip(ygrid), xgrid),
+        np.flip(zgrid, 0),
+        (y, x),
+        method=method,
+        bounds_error=False,
+        fill_value=np.nan,
+    )
+    np.testing.assert_allclose(interp_regular_grid(xgrid, ygrid, zgrid, x, y, method), expected)
+
+
+def test_interp_regular_grid_lattice():
+    """test interpolation of lattices of points (including points on grid lines next to
+    Nan values, and outside the grid) against interp_regular_grid() at each point
+    """
+    rng = np.random.default_rng(0)
+    xgrid = np.linspace(-1000.0, 1000.0, 21)
+    ygrid = np.linspace(500.0, -500.0, 11)
+    zgrid = rng.uniform(0.0, 100.0, size=(len(ygrid), len(xgrid))).astype(np.float32)
+    zgrid[3, 4] = np.nan
+
+    x = np.stack([np.linspace(-1050.0, 500.0, 32), np.linspace(-600.0, -500.0, 32)])
+    y = np.stack([np.linspace(-300.0, 560.0, 9), np.linspace(200.0, 100.0, 9)])
+    values = interp_regular_grid_lattice(xgrid, ygrid, zgrid, x, y)
+    assert values.shape == (2, 9, 32)
+    for i in range(2):
+        xpoints, ypoints = np.meshgrid(x[i], y[i])
+        np.testing.assert_allclose(
+            values[i],
+            interp_regular_grid(xgrid, ygrid, zgrid, xpoints, ypoints),
+            rtol=1e-6,
+        )
+
+
+def test_get_segment():  # pylint: disable=too-many-locals
+    """test that DEM segments found by index arithmetic match those found by a search
+    of the DEM's x,y axes for the nearest values to the segment bounds
+    """
+    rng = np.random.default_rng(0)
+    # a DEM grid in memory, with rows stored top (maximum y) first
+    thisdem = Dem.__new__(Dem)
+    thisdem.xdem = np.linspace(-50000.0, 50000.0, 101)
+    thisdem.ydem = np.linspace(20000.0, -20000.0, 41)
+    thisdem.zdem = rng.uniform(0.0, 100.0, size=(41, 101))
+
+    for axis in (thisdem.xdem, thisdem.ydem):
+        values = np.concatenate((rng.uniform(-60000.0, 60000.0, 200), [np.nan]))
+        np.testing.assert_array_equal(
+            nearest_axis_index(axis, values),
+            [np.absolute(value - axis).argmin() for value in values],
+        )
+
+    # segments about points of a track, including one partly outside the DEM
+    track_x = np.array([-1234.5, 20333.3, 48000.0])
+    track_y = np.array([5678.9, -10101.0, 19000.0])
+    half_width = 7500.0
+    segment_indices = thisdem.get_segment_indices(
+        track_x - half_width, track_x + half_width, track_y - half_width, track_y + half_width
+    )
+    for i, (x, y) in enumerate(zip(track_x, track_y)):
+        segment = [(x - half_width, x + half_width), (y - half_width, y + half_width)]
+        minx_ind = np.absolute(segment[0][0] - thisdem.xdem).argmin()
+        maxx_ind = np.absolute(segment[0][1] - thisdem.xdem).argmin()
+        miny_ind = np.absolute(segment[1][0] - thisdem.ydem).argmin()
+        maxy_ind = np.absolute(segment[1][1] - thisdem.ydem).argmin()
+        expected_zdem = thisdem.zdem[maxy_ind:miny_ind, minx_ind:maxx_ind]
+
+        _, _, zdem = thisdem.get_segment(segment, grid_xy=False)
+        np.testing.assert_array_equal(zdem, expected_zdem)
+        assert np.shares_memory(zdem, thisdem.zdem)
+
+        xdem, ydem, zdem = thisdem.get_segment_by_indices(segment_indices[i])
+        np.testing.assert_array_equal(zdem, expected_zdem)
+        assert xdem.shape == ydem.shape == expected_zdem.shape
+
+    # the same segments stacked, padded with Nan where clipped at the edge of the DEM
+    xdems, ydems, zdems = thisdem.get_segments_by_indices(segment_indices)
+    for i, indices in enumerate(segment_indices):
+        xdem, ydem, zdem = thisdem.get_segment_by_indices(indices)
+        nrows, ncols = zdem.shape
+        np.testing.assert_array_equal(zdems[i, :nrows, :ncols], zdem)
+        np.testing.assert_array_equal(xdems[i, :nrows, :ncols], xdem)
+        np.testing.assert_array_equal(ydems[i, :nrows, :ncols], ydem)
+        assert np.isnan(zdems[i, nrows:]).all() and np.isnan(zdems[i, :, ncols:]).all()
+
+
+def test_dem_levels(synthetic_awi_ant_dem):
+    """test that median filtered and downsampled levels of a DEM match filtering the DEM
+    segments, and are only used from the grid cache when cached_only is set"""
+    config, zdem = synthetic_awi_ant_dem(61, 41)
+
+    thisdem = Dem("awi_ant_1km_grounded", config=config)
+    assert thisdem.get_level() is thisdem
+    assert thisdem.get_level(median_filter_size=7, cached_only=True) is None
+
+    level = thisdem.get_level(median_filter_size=7)
+    assert level is not None
+    assert level.get_grid_cache_name().endswith("_median7")
+    np.testing.assert_array_equal(level.zdem, median_filter(zdem, size=7))
+
+    # away from the segment edges, segments of the level are the same as filtered segments
+    segment_indices = thisdem.get_segment_indices(-7500.0, 7500.0, -7500.0, 7500.0)
+    _, _, segment = thisdem.get_segment_by_indices(segment_indices)
+    _, _, level_segment = level.get_segment_by_indices(segment_indices)
+    np.testing.assert_array_equal(
+        level_segment[3:-3, 3:-3], median_filter(segment, size=7)[3:-3, 3:-3]
+    )
+
+    # a downsampled level averages blocks of cells
+    coarse = thisdem.get_level(downsample_factor=2)
+    assert coarse is not None
+    assert coarse.zdem.shape == (20, 30)
+    assert coarse.binsize == 2000
+    assert coarse.zdem[1, 2] == pytest.approx(zdem[2:4, 4:6].mean())
+    assert coarse.xdem[0] == pytest.approx(-29500.0)
+    assert coarse.ydem[0] == pytest.approx(19500.0)
+
+    # once cached, a level is memory mapped by other Dem objects
+    level.write_grid_cache()
+    cached_level = Dem("awi_ant_1km_grounded", config=config).get_level(7, cached_only=True)
+    assert cached_level is not None
+    assert isinstance(cached_level.zdem, np.memmap)
+    np.testing.assert_array_equal(cached_level.zdem, level.zdem)
+
+    with pytest.raises(ValueError):
+        thisdem.get_level(downsample_factor=0)
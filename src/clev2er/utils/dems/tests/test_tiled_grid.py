@@ -0,0 +1,93 @@
+"""pytest tests of clev2er.utils.dems.tiled_grid
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+import tifffile
+
+from clev2er.utils.dems.dems import interp_regular_grid
+from clev2er.utils.dems.tiled_grid import TiledGrid
+
+pytestmark = pytest.mark.filterwarnings("ignore::rasterio.errors.NotGeoreferencedWarning")
+
+
+@pytest.fixture(name="grid_file")
+def fixture_grid_file(tmp_path):
+    """GeoTIFF with 64x64 internal tiles, and void values"""
+    grid = np.random.default_rng(1).uniform(0.0, 3000.0, size=(150, 230)).astype(np.float32)
+    grid[10:20, 30:40] = -9999.0
+    grid_file = tmp_path / "dem.tif"
+    tifffile.imwrite(grid_file, grid, tile=(64, 64))
+    grid[grid == -9999.0] = np.nan
+    return str(grid_file), grid
+
+
+def test_tiled_grid_indexing(grid_file):
+    """test that segments and points read from tiles match the whole grid"""
+    filename, grid = grid_file
+    tiled = TiledGrid(filename, tile_size=100, void_value=-9999)
+
+    assert tiled.shape == grid.shape
+    assert tiled.dtype == np.float32
+    assert (tiled.tile_rows, tiled.tile_cols) == (128, 128)  # rounded up to whole blocks
+
+    np.testing.assert_array_equal(tiled[5:140, 100:229], grid[5:140, 100:229])
+    np.testing.assert_array_equal(tiled[120:, :20], grid[120:, :20])
+    assert tiled[50:50, 0:10].shape == (0, 10)
+
+    rng = np.random.default_rng(2)
+    rows = rng.integers(-150, 150, size=500)
+    cols = rng.integers(0, 230, size=500)
+    np.testing.assert_array_equal(tiled[rows, cols], grid[rows, cols])
+    assert tiled[149, 229] == grid[149, 229]
+    with pytest.raises(IndexError):
+        _ = tiled[np.array([150]), np.array([0])]
+
+    # other indexing reads the whole grid
+    np.testing.assert_array_equal(tiled[::-1, 3], grid[::-1, 3])
+    np.testing.assert_array_equal(np.flip(tiled, 0), np.flip(grid, 0))
+
+    # the tile reader can be pickled (ie for multi-processing) without its cache
+    unpickled = pickle.loads(pickle.dumps(tiled))
+    assert unpickled.cache_info()["tiles"] == 0
+    np.testing.assert_array_equal(unpickled[0:10, 0:10], grid[0:10, 0:10])
+
+
+def test_tiled_grid_cache(grid_file):
+    """test that tiles are only read once while cached, and the cache size is limited"""
+    filename, grid = grid_file
+    tile_mb = 64 * 64 * 4 / (1024 * 1024)
+    tiled = TiledGrid(filename, tile_size=64, cache_mb=2.5 * tile_mb)
+
+    _ = tiled[0:10, 0:10]
+    _ = tiled[20:30, 5:15]
+    assert tiled.cache_info() == {"hits": 1, "misses": 1, "tiles": 1, "bytes": 64 * 64 * 4}
+
+    _ = tiled[0:10, 0:200]  # 4 tiles, of which the last 2 are kept
+    info = tiled.cache_info()
+    assert info["tiles"] == 2
+    assert info["bytes"] <= 2.5 * tile_mb * 1024 * 1024
+
+    tiled.close()
+    assert tiled.cache_info()["tiles"] == 0
+    assert tiled[149, 0] == grid[149, 0]
+
+
+def test_tiled_grid_interp(grid_file):
+    """test that interpolating a tiled grid matches interpolating the whole grid"""
+    filename, grid = grid_file
+    tiled = TiledGrid(filename, tile_size=64, void_value=-9999)
+
+    xgrid = np.linspace(-115000.0, 114000.0, grid.shape[1])
+    ygrid = np.linspace(75000.0, -74000.0, grid.shape[0])
+    rng = np.random.default_rng(3)
+    x = rng.uniform(-120000.0, 120000.0, size=1000)
+    y = rng.uniform(-80000.0, 80000.0, size=1000)
+
+    for method in ("linear", "nearest"):
+        np.testing.assert_array_equal(
+            interp_regular_grid(xgrid, ygrid, tiled, x, y, method=method),
+            interp_regular_grid(xgrid, ygrid, grid, x, y, method=method),
+        )
@@ -0,0 +1,281 @@
+"""clev2er.utils.dems.tiled_grid
+
+TiledGrid class: read-only, array-like view of a large GeoTIFF band which is read on demand in
+fixed-size tiles, with a least recently used (LRU) cache of tiles limited in size.
+
+Used by the Dem class (in tiled mode) so that only the tiles of a DEM mosaic which are near a
+track are read into memory, instead of the whole grid.
+
+Example:
+
+    zdem = TiledGrid("REMA_100m_dem.tif", tile_size=1024, cache_mb=1024, void_value=-9999)
+    segment = zdem[2000:2100, 5000:5100]  # reads the tiles containing the segment
+    values = zdem[rows, cols]  # rows, cols: integer index arrays
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+log = logging.getLogger(__name__)
+
+# default number of rows and columns in each tile
+DEFAULT_TILE_SIZE = 1024
+
+# default maximum size of the tile cache (MB)
+DEFAULT_TILE_CACHE_MB = 1024.0
+
+
+class TiledGrid:
+    """class providing numpy style indexing of a GeoTIFF band, reading only the tiles used"""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        filename: str,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        cache_mb: float = DEFAULT_TILE_CACHE_MB,
+        void_value: float | None = None,
+        thislog: logging.Logger | None = None,
+    ) -> None:
+        """class initialization. Reads the size and block layout of the GeoTIFF, but no data
+
+        Args:
+            filename (str): path of GeoTIFF file
+            tile_size (int, optional): number of rows and columns in each tile. Rounded up to
+                                       a whole number of the GeoTIFF's internal blocks, where
+                                       these are smaller. Defaults to DEFAULT_TILE_SIZE.
+            cache_mb (float, optional): maximum memory used by cached tiles (MB). The most
+                                        recently used tile is always kept, even if larger.
+                                        Defaults to DEFAULT_TILE_CACHE_MB.
+            void_value (float|None, optional): grid value to replace with np.nan.
+                                               Defaults to None.
+            thislog (logging.Logger|None, optional): log instance to use. Defaults to None.
+        """
+        self.filename = filename
+        self.void_value = void_value
+        self.cache_bytes = int(cache_mb * 1024 * 1024)
+        self.log = thislog if thislog is not None else log
+
+        self._dataset: Any = None
+        with rasterio.open(filename) as dataset:
+            self.shape = (dataset.height, dataset.width)
+            file_dtype = np.dtype(dataset.dtypes[0])
+            block_rows, block_cols = dataset.block_shapes[0]
+
+        # void values are replaced with np.nan, so the grid must be floating point
+        self.dtype = (
+            np.result_type(file_dtype, np.float32) if void_value is not None else file_dtype
+        )
+
+        def tile_length(block_length: int) -> int:
+            if block_length > tile_size:  # ie strips the full width of the grid
+                return tile_size
+            return -(-tile_size // block_length) * block_length
+
+        self.tile_rows = tile_length(block_rows)
+        self.tile_cols = tile_length(block_cols)
+        self.num_tile_cols = -(-self.shape[1] // self.tile_cols)
+
+        self._tiles: OrderedDict[tuple[int, int], np.ndarray] = OrderedDict()
+        self._tile_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ndim(self) -> int:
+        """number of dimensions (2)"""
+        return 2
+
+    @property
+    def size(self) -> int:
+        """number of grid values"""
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """size of the whole grid in bytes (not the memory used)"""
+        return self.size * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getstate__(self) -> dict:
+        """pickle without the open dataset or cached tiles"""
+        state = self.__dict__.copy()
+        state["_dataset"] = None
+        state["_tiles"] = OrderedDict()
+        state["_tile_bytes"] = 0
+        return state
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:  # pylint: disable=W0613
+        """read the whole grid, ie for np.asarray(grid)"""
+        self.log.warning("reading whole of tiled grid %s", self.filename)
+        array = self.read_window(0, self.shape[0], 0, self.shape[1])
+        return array if dtype is None else array.astype(dtype)
+
+    def copy(self) -> np.ndarray:
+        """read the whole grid
+
+        Returns:
+            np.ndarray: grid
+        """
+        return np.asarray(self)
+
+    def __getitem__(self, key) -> np.ndarray:
+        """index the grid. Supported without reading the whole grid are:
+
+            grid[row_start:row_end, col_start:col_end] : segment of the grid
+            grid[rows, cols] : values at integer row and column indices (arrays or scalars)
+
+        Other indexing reads the whole grid.
+        """
+        if isinstance(key, tuple) and len(key) == 2:
+            rows, cols = key
+            if (
+                isinstance(rows, slice)
+                and isinstance(cols, slice)
+                and rows.step in (None, 1)
+                and cols.step in (None, 1)
+            ):
+                row_start, row_end, _ = rows.indices(self.shape[0])
+                col_start, col_end, _ = cols.indices(self.shape[1])
+                return self.read_window(row_start, row_end, col_start, col_end)
+            if not isinstance(rows, slice) and not isinstance(cols, slice):
+                rows = np.asarray(rows)
+                cols = np.asarray(cols)
+                if rows.dtype.kind in "iu" and cols.dtype.kind in "iu":
+                    return self.read_points(rows, cols)
+        return np.asarray(self)[key]
+
+    def read_window(self, row_start: int, row_end: int, col_start: int, col_end: int) -> np.ndarray:
+        """read a rectangular segment of the grid from its tiles
+
+        Args:
+            row_start (int): first row
+            row_end (int): row after last row
+            col_start (int): first column
+            col_end (int): column after last column
+
+        Returns:
+            np.ndarray: grid[row_start:row_end, col_start:col_end]
+        """
+        segment = np.empty((max(row_end - row_start, 0), max(col_end - col_start, 0)), self.dtype)
+        if segment.size == 0:
+            return segment
+        for tile_row in range(row_start // self.tile_rows, (row_end - 1) // self.tile_rows + 1):
+            tile_row0 = tile_row * self.tile_rows
+            row0 = max(row_start, tile_row0)
+            row1 = min(row_end, tile_row0 + self.tile_rows)
+            for tile_col in range(col_start // self.tile_cols, (col_end - 1) // self.tile_cols + 1):
+                tile_col0 = tile_col * self.tile_cols
+                col0 = max(col_start, tile_col0)
+                col1 = min(col_end, tile_col0 + self.tile_cols)
+                segment[
+                    row0 - row_start : row1 - row_start, col0 - col_start : col1 - col_start
+                ] = self.get_tile(tile_row, tile_col)[
+                    row0 - tile_row0 : row1 - tile_row0, col0 - tile_col0 : col1 - tile_col0
+                ]
+        return segment
+
+    def read_points(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """read the grid values at integer row and column indices, one tile at a time
+
+        Args:
+            rows (np.ndarray): row indices (negative indices count from the end)
+            cols (np.ndarray): column indices
+
+        Returns:
+            np.ndarray: grid values, shape of rows and cols broadcast together
+
+        Raises:
+            IndexError: if an index is outside the grid
+        """
+        rows, cols = np.broadcast_arrays(rows, cols)
+        rows = np.where(rows < 0, rows + self.shape[0], rows)
+        cols = np.where(cols < 0, cols + self.shape[1], cols)
+        if rows.size and (
+            rows.min() < 0
+            or rows.max() >= self.shape[0]
+            or cols.min() < 0
+            or cols.max() >= self.shape[1]
+        ):
+            raise IndexError(f"index outside tiled grid of shape {self.shape}")
+
+        values = np.empty(rows.shape, dtype=self.dtype)
+        tile_ids = (rows // self.tile_rows) * self.num_tile_cols + cols // self.tile_cols
+        for tile_id in np.unique(tile_ids):
+            in_tile = tile_ids == tile_id
+            tile_row, tile_col = divmod(int(tile_id), self.num_tile_cols)
+            values[in_tile] = self.get_tile(tile_row, tile_col)[
+                rows[in_tile] - tile_row * self.tile_rows,
+                cols[in_tile] - tile_col * self.tile_cols,
+            ]
+        return values[()] if values.ndim == 0 else values
+
+    def get_tile(self, tile_row: int, tile_col: int) -> np.ndarray:
+        """get a tile from the cache, or read it from the GeoTIFF
+
+        Args:
+            tile_row (int): row number of tile
+            tile_col (int): column number of tile
+
+        Returns:
+            np.ndarray: tile (smaller than tile_rows x tile_cols at the bottom and right edges)
+        """
+        key = (tile_row, tile_col)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+        self.misses += 1
+        if self._dataset is None:
+            self._dataset = rasterio.open(self.filename)
+        row0 = tile_row * self.tile_rows
+        col0 = tile_col * self.tile_cols
+        tile = self._dataset.read(
+            1,
+            window=Window(
+                col0,
+                row0,
+                min(self.tile_cols, self.shape[1] - col0),
+                min(self.tile_rows, self.shape[0] - row0),
+            ),
+        ).astype(self.dtype, copy=False)
+        if self.void_value is not None:
+            tile[tile == self.void_value] = np.nan
+
+        self._tiles[key] = tile
+        self._tile_bytes += tile.nbytes
+        while self._tile_bytes > self.cache_bytes and len(self._tiles) > 1:
+            _, oldest_tile = self._tiles.popitem(last=False)
+            self._tile_bytes -= oldest_tile.nbytes
+        return tile
+
+    def cache_info(self) -> dict[str, int]:
+        """get the tile cache statistics
+
+        Returns:
+            dict[str, int]: {'hits','misses','tiles' (number cached),'bytes' (memory used)}
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "tiles": len(self._tiles),
+            "bytes": self._tile_bytes,
+        }
+
+    def close(self) -> None:
+        """close the GeoTIFF and empty the tile cache"""
+        if self._dataset is not None:
+            self._dataset.close()
+            self._dataset = None
+        self._tiles.clear()
+        self._tile_bytes = 0
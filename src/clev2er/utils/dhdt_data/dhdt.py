@@ -15,6 +15,8 @@ from scipy.interpolate import interpn
 from scipy.ndimage import median_filter
 from tifffile import imread  # to support large TIFF files
 
+from clev2er.utils.projections.projection_cache import transform_lonlat
+
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=too-many-locals
 
@@ -260,9 +262,7 @@ class Dhdt:
         """
         # Transform to x,y if inputs are lat,lon
         if xy_is_latlon:
-            x, y = self.lonlat_to_xy_transformer.transform(  # pylint: disable=E0633
-                y, x
-            )  # transform lon,lat -> x,y
+            x, y = transform_lonlat(self.lonlat_to_xy_transformer, y, x)  # lon,lat -> x,y
         # myydem = np.flip(self.ydem.copy())
         myydem = self.ydem
         myzdem = np.flip(self.dhdt.copy(), 0)
@@ -0,0 +1,17 @@
+"""
+# Grid Cache
+
+Memory mapped cache of the large grids loaded by the Dem, Mask and Slopes classes.
+
+Each grid is written once (by `clev2er.tools.build_grid_cache`) to a raw binary file,
+`<cache_dir>/<name>.bin`, with each array aligned to a page boundary, and a small JSON
+sidecar file `<name>.json` describing the arrays, the scalar attributes of the grid and
+the size and modification time of the source file it was made from.
+
+When the environment variable `CLEV2ER_GRID_CACHE_DIR` is set, the Dem, Mask and Slopes
+classes first look for a cache of their grid in that directory, and open it read-only
+with `np.memmap` instead of decoding the source file. This makes loading almost instant,
+all the processes on a host share the grid's pages through the OS page cache (so
+SharedMemory is not needed), and only the parts of a grid that are used are read from
+disk. A cache is ignored if its source file has changed since it was made.
+"""
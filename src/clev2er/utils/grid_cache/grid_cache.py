@@ -0,0 +1,170 @@
+"""clev2er.utils.grid_cache.grid_cache.py
+
+Functions to write and memory map a cache of a resource's grid arrays:
+
+- <cache_dir>/<name>.bin : the arrays' raw data, each starting on a page boundary
+- <cache_dir>/<name>.json : sidecar containing the offset, dtype and shape of each array,
+  the grid's scalar attributes, and the path, size and modification time of the source
+  file the grid was loaded from
+
+Example:
+
+    cache_path = grid_cache_path("dem_rema_ant_1km")
+    if cache_path:
+        cache = read_grid_cache(cache_path, demfile)
+        if cache is not None:
+            arrays, attributes = cache
+            zdem = arrays["zdem"]  # read-only np.memmap
+"""
+
+import json
+import logging
+import mmap
+import os
+from typing import Any, Optional
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# environment variable containing the cache directory
+GRID_CACHE_DIR_ENV = "CLEV2ER_GRID_CACHE_DIR"
+
+GRID_CACHE_FORMAT_VERSION = 1
+
+# arrays are aligned to this, so that each can be memory mapped separately
+PAGE_SIZE = mmap.ALLOCATIONGRANULARITY
+
+
+def grid_cache_path(name: str) -> str:
+    """get the path (without extension) of a resource's grid cache
+
+    Args:
+        name (str): cache name of resource, ie dem_<dem name>
+
+    Returns:
+        str: <$CLEV2ER_GRID_CACHE_DIR>/<name>, or '' if CLEV2ER_GRID_CACHE_DIR is not set
+    """
+    cache_dir = os.environ.get(GRID_CACHE_DIR_ENV, "")
+    if not cache_dir:
+        return ""
+    return os.path.join(cache_dir, name)
+
+
+def source_signature(source_file: str) -> dict[str, Any]:
+    """identify the version of a grid's source file
+
+    Args:
+        source_file (str): path of source file
+
+    Returns:
+        dict[str, Any]: absolute path, size and modification time of file
+    """
+    stat = os.stat(source_file)
+    return {
+        "path": os.path.abspath(source_file),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+
+
+def write_grid_cache(
+    cache_path: str,
+    arrays: dict[str, np.ndarray],
+    attributes: dict[str, Any],
+    source_file: str,
+) -> None:
+    """write arrays to a grid cache
+
+    The .bin file is written before the .json sidecar, each to a temporary file which is
+    then renamed, so that a cache is never read while it is incomplete.
+
+    Args:
+        cache_path (str): path of cache, without extension
+        arrays (dict[str, np.ndarray]): arrays to cache, keyed by name
+        attributes (dict[str, Any]): scalar attributes of the grid (must be JSON
+                                     serializable)
+        source_file (str): path of the file the arrays were loaded from
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+
+    array_info = {}
+    offset = 0
+    with open(f"{cache_path}.bin.tmp", "wb") as bin_file:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            offset = -(-offset // PAGE_SIZE) * PAGE_SIZE  # round up to next page
+            bin_file.seek(offset)
+            bin_file.write(array.tobytes())
+            array_info[name] = {
+                "offset": offset,
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+            }
+            offset += array.nbytes
+    os.replace(f"{cache_path}.bin.tmp", f"{cache_path}.bin")
+
+    with open(f"{cache_path}.json.tmp", "w", encoding="utf-8") as json_file:
+        json.dump(
+            {
+                "format_version": GRID_CACHE_FORMAT_VERSION,
+                "source": source_signature(source_file),
+                "attributes": attributes,
+                "arrays": array_info,
+            },
+            json_file,
+            indent=2,
+        )
+    os.replace(f"{cache_path}.json.tmp", f"{cache_path}.json")
+
+
+def read_grid_cache(
+    cache_path: str, source_file: str, thislog: logging.Logger | None = None
+) -> Optional[tuple[dict[str, np.ndarray], dict[str, Any]]]:
+    """memory map the arrays of a grid cache, read-only
+
+    Args:
+        cache_path (str): path of cache, without extension
+        source_file (str): path of the file the grid would otherwise be loaded from
+        thislog (logging.Logger|None, optional): log instance to use. Defaults to None.
+
+    Returns:
+        tuple[dict[str, np.ndarray], dict[str, Any]] | None: (arrays keyed by name,
+        attributes), or None if there is no cache, or it was made from a different
+        version of source_file
+    """
+    thislog = thislog if thislog is not None else log
+    try:
+        with open(f"{cache_path}.json", encoding="utf-8") as json_file:
+            sidecar = json.load(json_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        thislog.warning("grid cache %s.json could not be read : %s", cache_path, exc)
+        return None
+
+    try:
+        signature = source_signature(source_file)
+    except OSError:
+        signature = {}
+    if sidecar.get("format_version") != GRID_CACHE_FORMAT_VERSION or (
+        sidecar["source"] != signature
+    ):
+        thislog.warning("grid cache %s is out of date with %s, not used", cache_path, source_file)
+        return None
+
+    arrays: dict[str, np.ndarray] = {}
+    for name, info in sidecar["arrays"].items():
+        shape = tuple(info["shape"])
+        if 0 in shape:  # np.memmap can not map an empty array
+            arrays[name] = np.empty(shape, dtype=info["dtype"])
+            continue
+        arrays[name] = np.memmap(
+            f"{cache_path}.bin",
+            dtype=np.dtype(info["dtype"]),
+            mode="r",
+            offset=info["offset"],
+            shape=shape,
+        )
+    thislog.info("memory mapped grid cache %s", cache_path)
+    return arrays, sidecar["attributes"]
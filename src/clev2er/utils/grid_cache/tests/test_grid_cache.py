@@ -0,0 +1,73 @@
+"""pytest tests of clev2er.utils.grid_cache.grid_cache
+"""
+
+import os
+
+import numpy as np
+
+from clev2er.utils.dems.dems import Dem
+from clev2er.utils.grid_cache.grid_cache import (
+    GRID_CACHE_DIR_ENV,
+    PAGE_SIZE,
+    grid_cache_path,
+    read_grid_cache,
+    write_grid_cache,
+)
+
+
+def test_grid_cache(tmp_path, monkeypatch):
+    """test writing, memory mapping and invalidating a grid cache"""
+    source_file = tmp_path / "grid.tif"
+    source_file.write_bytes(b"source")
+
+    monkeypatch.delenv(GRID_CACHE_DIR_ENV, raising=False)
+    assert grid_cache_path("dem_test") == ""
+    monkeypatch.setenv(GRID_CACHE_DIR_ENV, str(tmp_path / "cache"))
+    cache_path = grid_cache_path("dem_test")
+    assert cache_path == str(tmp_path / "cache" / "dem_test")
+
+    assert read_grid_cache(cache_path, str(source_file)) is None  # no cache yet
+
+    zdem = np.arange(12, dtype=np.float32).reshape(3, 4)
+    xdem = np.linspace(0.0, 3.0, 4)
+    mask_grid = np.ones((2, 5), dtype=np.uint8)
+    write_grid_cache(
+        cache_path,
+        {"zdem": zdem, "xdem": xdem, "mask_grid": mask_grid},
+        {"binsize": 1000},
+        str(source_file),
+    )
+
+    cache = read_grid_cache(cache_path, str(source_file))
+    assert cache is not None
+    arrays, attributes = cache
+    assert attributes == {"binsize": 1000}
+    for name, array in (("zdem", zdem), ("xdem", xdem), ("mask_grid", mask_grid)):
+        assert isinstance(arrays[name], np.memmap)
+        assert arrays[name].offset % PAGE_SIZE == 0
+        assert not arrays[name].flags.writeable
+        np.testing.assert_array_equal(arrays[name], array)
+        assert arrays[name].dtype == array.dtype
+
+    # cache is not used once its source file has changed
+    source_file.write_bytes(b"new source")
+    assert read_grid_cache(cache_path, str(source_file)) is None
+
+
+def test_dem_grid_cache(synthetic_awi_ant_dem):
+    """test that a Dem loaded from its grid cache is the same as one loaded from its file"""
+    config, _ = synthetic_awi_ant_dem(11, 7)
+
+    thisdem = Dem("awi_ant_1km_grounded", config=config)
+    assert thisdem.grid_cache_file == ""  # no cache yet
+    cache_path = thisdem.write_grid_cache()
+    assert os.path.isfile(f"{cache_path}.bin")
+
+    cached_dem = Dem("awi_ant_1km_grounded", config=config)
+    assert cached_dem.grid_cache_file == cache_path
+    assert isinstance(cached_dem.zdem, np.memmap)
+    assert cached_dem.binsize == 1000
+
+    x = np.array([-4321.0, 0.0, 1234.5])
+    y = np.array([2500.0, 0.0, -1234.5])
+    np.testing.assert_array_equal(cached_dem.interp_dem(x, y), thisdem.interp_dem(x, y))
@@ -0,0 +1,21 @@
+"""
+# Run Journal
+
+Append-only journal of the L1b files completed by run_chain.py, so that an interrupted
+run can be restarted with the `--resume` command line option without reprocessing the
+files it had already completed.
+
+Each completed L1b file is recorded as one JSON line containing the file's path,
+modification time, status (processed, skipped or error), output product path and a hash
+of the chain configuration and algorithm list used. A file is only treated as completed
+on resume if its latest entry has a processed or skipped status, and its modification
+time and the configuration hash are unchanged. Files which failed are always reprocessed.
+
+The journal file is `<log dir>/<chain>_journal.jsonl` by default, or set with the
+run_chain.py `--journal <path>` command line option.
+
+`processing_key.py` forms a key of the inputs a product is made from (L1b file modification
+time and size, chain configuration and algorithm source code), which is stored in each
+product's global attributes. With the run_chain.py `--incremental` option, L1b files whose
+product already exists with the same key are skipped.
+"""
@@ -0,0 +1,77 @@
+"""clev2er.utils.journal.processing_key.py
+
+Functions to form the processing key of an L1b file, which identifies the inputs that a
+chain's product was made from:
+
+- the L1b file name, modification time and size
+- the chain configuration (a run_journal.config_hash() of the config and algorithm list)
+- the source code of the chain's algorithms and of the clev2er utility modules
+
+The key is written to the global attributes of each product, so that a later run can
+skip L1b files whose product already exists with the same key
+(see clev2er.algorithms.cryotempo.alg_skip_up_to_date_product).
+"""
+
+import hashlib
+import json
+import os
+
+
+def code_hash(chain_name: str) -> str:
+    """calculate a hash of the source code of a chain's algorithms and the clev2er
+       utility modules
+
+       These are the .py files (excluding tests) in the clev2er/algorithms/<chain_name>,
+       clev2er/algorithms/base and clev2er/utils directories. All files are included
+       (rather than only those imported), so that the hash is the same in every process.
+
+    Args:
+        chain_name (str): name of chain
+
+    Returns:
+        str: hex digest of hash
+    """
+    clev2er_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sha = hashlib.sha256()
+    for sub_dir in (f"algorithms/{chain_name}", "algorithms/base", "utils"):
+        source_files: list[str] = []
+        for dirpath, dirnames, filenames in os.walk(os.path.join(clev2er_dir, sub_dir)):
+            dirnames[:] = [dirname for dirname in dirnames if dirname != "tests"]
+            source_files.extend(
+                os.path.join(dirpath, filename)
+                for filename in filenames
+                if filename.endswith(".py")
+            )
+        for source_file in sorted(source_files):
+            sha.update(os.path.relpath(source_file, clev2er_dir).encode("utf-8"))
+            with open(source_file, "rb") as file:
+                sha.update(file.read())
+    return sha.hexdigest()[:16]
+
+
+def processing_key(l1b_file: str, run_config_hash: str, run_code_hash: str) -> str:
+    """form the processing key of an L1b file
+
+    Args:
+        l1b_file (str): path of L1b file
+        run_config_hash (str): config_hash() of the chain configuration
+        run_code_hash (str): code_hash() of the chain
+
+    Returns:
+        str: processing key, or '' if the L1b file can not be accessed
+    """
+    try:
+        stat = os.stat(l1b_file)
+    except OSError:
+        return ""
+    key = json.dumps(
+        {
+            "l1b_file": os.path.basename(l1b_file),
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "config": run_config_hash,
+            "code": run_code_hash,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
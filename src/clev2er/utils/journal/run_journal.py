@@ -0,0 +1,181 @@
+"""clev2er.utils.journal.run_journal.py
+
+class RunJournal: append-only journal of completed L1b files, used to resume an
+interrupted run_chain.py run
+
+Each line of the journal file is a JSON object:
+
+    {"l1b_file": path, "mtime": L1b file modification time, "config_hash": str,
+     "status": "processed"|"skipped"|"error", "product_filename": str,
+     "wall_time": s, "completed": ISO UTC time}
+
+Lines are flushed as they are written, so the journal is complete up to the last file
+finished before a run is killed. A partly written last line is ignored when reading.
+
+Example:
+
+    with RunJournal("/path/to/chain_journal.jsonl", config_hash(config, alg_list)) as journal:
+        l1b_file_list = journal.filter_completed(l1b_file_list)
+        ...
+        journal.record(file_result)  # for each file result returned by the chain
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+log = logging.getLogger(__name__)
+
+# config sections which control how a run is performed, but not its output
+RUN_CONTROL_CONFIG_KEYS = ("chain", "log_files", "breakpoint_files")
+
+# file status values which count as completed on resume
+COMPLETED_STATUSES = ("processed", "skipped")
+
+
+def config_hash(config: dict, algorithm_list: list[str]) -> str:
+    """calculate a hash of the chain configuration and algorithm list which affect the
+       chain's outputs
+
+       The run control sections (RUN_CONTROL_CONFIG_KEYS) and the environment variables
+       merged into the config are excluded, so that the hash does not change with
+       multi-processing settings, log file names or the shell environment.
+
+    Args:
+        config (dict): chain configuration dictionary
+        algorithm_list (list[str]): list of algorithm names in the chain
+
+    Returns:
+        str: hex digest of hash
+    """
+    hashed_config = {
+        key: value
+        for key, value in config.items()
+        if key not in RUN_CONTROL_CONFIG_KEYS
+        and not (isinstance(value, str) and os.environ.get(key) == value)
+    }
+    hashed = json.dumps(
+        {"config": hashed_config, "algorithms": algorithm_list}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(hashed.encode("utf-8")).hexdigest()[:16]
+
+
+class RunJournal:
+    """class to record completed L1b files in an append-only journal file, and to find
+    the files already completed by previous runs"""
+
+    def __init__(
+        self, journal_file: str, run_config_hash: str, thislog: logging.Logger | None = None
+    ) -> None:
+        """class initialization. Opens (or creates) the journal file for appending
+
+        Args:
+            journal_file (str): path of journal file
+            run_config_hash (str): config_hash() of this run
+            thislog (logging.Logger|None, optional): log instance to use. Defaults to None.
+        """
+        self.journal_file = journal_file
+        self.config_hash = run_config_hash
+        self.log = thislog if thislog is not None else log
+
+        journal_dir = os.path.dirname(journal_file)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+        self.file = open(journal_file, "a", encoding="utf-8")  # pylint: disable=R1732
+
+        # terminate any partly written last line left by a killed run, so that it does
+        # not corrupt the first entry written by this run
+        if self.file.tell() > 0:
+            with open(journal_file, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    self.file.write("\n")
+
+    def __enter__(self) -> "RunJournal":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """close the journal file"""
+        self.file.close()
+
+    def read_entries(self) -> dict[str, dict]:
+        """read the latest journal entry of each L1b file
+
+        Returns:
+            dict[str, dict]: latest entry, keyed by L1b file path
+        """
+        entries = {}
+        with open(self.journal_file, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                    entries[entry["l1b_file"]] = entry
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue  # ie a partly written last line
+        return entries
+
+    def filter_completed(self, l1b_file_list: list[str]) -> list[str]:
+        """remove the L1b files already completed in the journal from a list
+
+        A file is completed if its latest entry has a COMPLETED_STATUSES status, the same
+        config hash as this run, and the file's modification time is unchanged.
+
+        Args:
+            l1b_file_list (list[str]): list of L1b file paths
+
+        Returns:
+            list[str]: L1b files still to process, in their original order
+        """
+        entries = self.read_entries()
+
+        remaining_files = []
+        for l1b_file in l1b_file_list:
+            entry = entries.get(l1b_file)
+            if (
+                entry is not None
+                and entry.get("status") in COMPLETED_STATUSES
+                and entry.get("config_hash") == self.config_hash
+            ):
+                try:
+                    if os.path.getmtime(l1b_file) == entry.get("mtime"):
+                        continue
+                except OSError:
+                    pass
+            remaining_files.append(l1b_file)
+
+        self.log.info(
+            "Resume: %d of %d L1b files already completed in journal %s",
+            len(l1b_file_list) - len(remaining_files),
+            len(l1b_file_list),
+            self.journal_file,
+        )
+        return remaining_files
+
+    def record(self, file_result: dict) -> None:
+        """append a completed L1b file to the journal
+
+        Args:
+            file_result (dict): file result, containing at least l1b_file and status, and
+                optionally product_filename and wall_time
+                (see clev2er.tools.run_chain.run_chain_on_single_file())
+        """
+        try:
+            mtime = os.path.getmtime(file_result["l1b_file"])
+        except OSError:
+            mtime = None
+        entry = {
+            "l1b_file": file_result["l1b_file"],
+            "mtime": mtime,
+            "config_hash": self.config_hash,
+            "status": file_result["status"],
+            "product_filename": file_result.get("product_filename", ""),
+            "wall_time": round(file_result.get("wall_time", 0.0), 3),
+            "completed": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
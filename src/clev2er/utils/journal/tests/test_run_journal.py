@@ -0,0 +1,52 @@
+"""pytest tests of clev2er.utils.journal.run_journal
+"""
+
+import os
+
+from clev2er.utils.journal.run_journal import RunJournal, config_hash
+
+
+def test_config_hash(monkeypatch):
+    """test that the config hash ignores run control settings and the environment"""
+    config = {"chain": {"use_multi_processing": False}, "tcog_retracker": {"threshold": 0.1}}
+    algorithm_list = ["alg_a", "alg_b"]
+    chash = config_hash(config, algorithm_list)
+
+    monkeypatch.setenv("SOME_ENV_VAR", "x")
+    other_config = config | {"chain": {"use_multi_processing": True}, "SOME_ENV_VAR": "x"}
+    assert config_hash(other_config, algorithm_list) == chash
+
+    assert config_hash(config | {"tcog_retracker": {"threshold": 0.2}}, algorithm_list) != chash
+    assert config_hash(config, ["alg_a"]) != chash
+
+
+def test_run_journal_resume(tmp_path):
+    """test that only unchanged, successfully completed files are skipped on resume"""
+    l1b_files = []
+    for filenum in range(5):
+        l1b_file = tmp_path / f"l1b_{filenum}.nc"
+        l1b_file.write_bytes(b"\0")
+        l1b_files.append(str(l1b_file))
+    journal_file = str(tmp_path / "journal" / "chain_journal.jsonl")
+
+    with RunJournal(journal_file, "hash1") as journal:
+        journal.record({"l1b_file": l1b_files[0], "status": "processed", "wall_time": 1.0})
+        journal.record({"l1b_file": l1b_files[1], "status": "skipped"})
+        journal.record({"l1b_file": l1b_files[2], "status": "error"})
+        journal.record({"l1b_file": l1b_files[3], "status": "processed"})
+    # simulate a run killed while writing a line
+    with open(journal_file, "a", encoding="utf-8") as file:
+        file.write('{"l1b_file": "')
+
+    # l1b_files[3] has been modified since it was processed
+    os.utime(l1b_files[3], (0, 0))
+
+    with RunJournal(journal_file, "hash1") as journal:
+        assert journal.filter_completed(l1b_files) == [l1b_files[i] for i in (2, 3, 4)]
+        # a later error result replaces an earlier completed result
+        journal.record({"l1b_file": l1b_files[0], "status": "error"})
+        assert journal.filter_completed(l1b_files) == [l1b_files[i] for i in (0, 2, 3, 4)]
+
+    # a changed configuration reprocesses all files
+    with RunJournal(journal_file, "hash2") as journal:
+        assert journal.filter_completed(l1b_files) == l1b_files
@@ -1,18 +1,27 @@
 """Class for area masking
 """
 
-import hashlib
 import logging
-from multiprocessing.shared_memory import SharedMemory
 from os import environ
 from os.path import isfile
-from typing import Any, Optional
+from typing import Callable, Optional
 
 import numpy as np
 from netCDF4 import Dataset  # pylint: disable=E0611
 from pyproj import CRS  # CRS definitions
 from pyproj import Transformer  # for transforming between projections
 
+from clev2er.utils.grid_cache.grid_cache import (
+    grid_cache_path,
+    read_grid_cache,
+    write_grid_cache,
+)
+from clev2er.utils.projections.projection_cache import transform_lonlat
+from clev2er.utils.shared_resources.shared_resources import (
+    release_array,
+    share_array,
+)
+
 # pylint: disable=R0801
 
 log = logging.getLogger(__name__)
@@ -62,7 +71,10 @@ class Mask:
             basin_numbers (list[int], optional): list of grid values to select from grid masks
                                                  def=None
             mask_path (str, optional): override default path of mask data file
-            store_in_shared_memory (bool, optional): stores/access mask array in SharedMemory
+            store_in_shared_memory (bool, optional): get the grid mask array from the run's
+                                shared resources, so that it is loaded once and shared by
+                                all processes. Loaded normally if shared resources are not
+                                in use.
             thislog (logging.Logger|None, optional): attach to a different log instance
         """
         self.nomask = False
@@ -72,10 +84,11 @@ class Mask:
         self.mask_name = mask_name
         self.mask_long_name = ""
         self.mask_grid: np.ndarray = np.array([])
+        self.source_file = ""  # path of grid mask file
+        self.grid_cache_file = ""  # path of grid cache, if mask loaded from its cache
         self.basin_numbers = basin_numbers
         self.store_in_shared_memory = store_in_shared_memory
-        self.shared_mem: Any = None
-        self.shared_mem_child = False  # set to True if a child process
+        self.shared_array_name = ""  # name of mask_grid in shared resources, if shared
         self.polygons = None
         self.polygons_lon = np.array([])
         self.polygons_lat = np.array([])
@@ -530,52 +543,18 @@ class Mask:
             flip (bool, optional): _description_. Defaults to True.
             nc_mask_var (str): variable name in netcdf file containing mask data, def='mask'
         """
-        if self.store_in_shared_memory:
-            # Create a unique 8 char name hashed mask name
-            # this is required because shared memory doesn't like long names
-            hash_name = hashlib.md5(self.mask_name.encode()).hexdigest()[:8]
-            try:  # Attaching to existing shared memory with this mask name
-                self.shared_mem = SharedMemory(name=hash_name, create=False)
-                self.mask_grid = np.ndarray(
-                    shape=(self.num_y, self.num_x),
-                    dtype=self.dtype,
-                    buffer=self.shared_mem.buf,
-                )
-                self.shared_mem_child = True
-
-                self.log.info(
-                    "child: attached to existing shared memory for mask %s ",
-                    self.mask_name,
-                )
-
-            except FileNotFoundError:  # Create shared memory with this mask name
-                # first, load the mask array from the netcdf file
-                with Dataset(mask_file) as nc:
-                    mask_grid = np.array(nc.variables[nc_mask_var][:]).astype(self.dtype)
-                    if flip:
-                        mask_grid = np.flipud(mask_grid)  # flip each column in the up/down dirn
-
-                # Create the shared memory with the appropriate size
-                self.shared_mem = SharedMemory(name=hash_name, create=True, size=mask_grid.nbytes)
-
-                # Create an ndarray of the correct size linked to the shared mem
-                self.mask_grid = np.ndarray(
-                    mask_grid.shape,
-                    dtype=mask_grid.dtype,
-                    buffer=self.shared_mem.buf,
-                )
-
-                # Copy the data from mask_grid to the shared_np_array
-                self.mask_grid[:] = mask_grid[:]
-
-                self.log.info("created shared memory for mask %s", self.mask_name)
+        self.source_file = mask_file
+        if self.load_grid_cache():
+            return
 
-        else:  # load normally without using shared memory
-            # read netcdf file
+        def read_mask_grid() -> np.ndarray:
             with Dataset(mask_file) as nc:
-                self.mask_grid = np.array(nc.variables[nc_mask_var][:]).astype(self.dtype)
-                if flip:
-                    self.mask_grid = np.flipud(self.mask_grid)
+                mask_grid = np.array(nc.variables[nc_mask_var][:]).astype(self.dtype)
+            if flip:
+                mask_grid = np.flipud(mask_grid)  # flip each column in the up/down dirn
+            return mask_grid
+
+        self.load_mask_grid(read_mask_grid)
 
     def load_npz_mask(self, mask_file: str):
         """load mask array from npz grid masks
@@ -583,51 +562,67 @@ class Mask:
         Args:
             mask_file (str) : path of npz mask file
         """
+        self.source_file = mask_file
+        if self.load_grid_cache():
+            return
+
+        self.load_mask_grid(
+            lambda: np.load(mask_file, allow_pickle=True).get("mask_grid").astype(self.dtype)
+        )
+
+    def load_mask_grid(self, loader: Callable[[], np.ndarray]):
+        """load the mask array, from the run's shared resources if store_in_shared_memory
+           is set (see clev2er.utils.shared_resources), where it is loaded once and shared
+           by all processes. The shared mask array is read-only.
+
+        Args:
+            loader (Callable[[], np.ndarray]): function to load the mask array from its file
+        """
         if self.store_in_shared_memory:
-            # Create a unique 8 char name hashed mask name
-            # this is required because shared memory doesn't like long names
-            hash_name = hashlib.md5(self.mask_name.encode()).hexdigest()[:8]
-
-            try:  # Attaching to existing shared memory with this mask name
-                self.shared_mem = SharedMemory(name=hash_name, create=False)
-                self.mask_grid = np.ndarray(
-                    shape=(self.num_y, self.num_x),
-                    dtype=self.dtype,
-                    buffer=self.shared_mem.buf,
-                )
-                self.shared_mem_child = True
+            self.shared_array_name = f"mask_{self.mask_name}"
+            self.mask_grid = share_array(self.shared_array_name, loader, self.log)
+        else:  # load normally without using shared memory
+            self.mask_grid = loader()
 
-                self.log.info(
-                    "child: attached to existing shared memory for mask %s ",
-                    self.mask_name,
-                )
+    def load_grid_cache(self) -> bool:
+        """memory map the mask grid from its grid cache (see clev2er.utils.grid_cache), if
+           CLEV2ER_GRID_CACHE_DIR is set and the cache is up to date with the mask file
 
-            except FileNotFoundError:  # Create shared memory with this mask name
-                # first, load the mask array from the npz file
-                mask_grid = (
-                    np.load(mask_file, allow_pickle=True).get("mask_grid").astype(self.dtype)
-                )
+        The memory mapped mask_grid is read-only and its pages are shared between processes
+        by the OS, so it is not also copied to SharedMemory.
+
+        Returns:
+            bool: True if the mask grid was loaded from its cache
+        """
+        cache_path = grid_cache_path(f"mask_{self.mask_name}")
+        if not cache_path:
+            return False
+        cache = read_grid_cache(cache_path, self.source_file, self.log)
+        if cache is None:
+            return False
 
-                # Create the shared memory with the appropriate size
-                self.shared_mem = SharedMemory(name=hash_name, create=True, size=mask_grid.nbytes)
+        self.mask_grid = cache[0]["mask_grid"]
 
-                # Create an ndarray of the correct size linked to the shared mem
-                self.mask_grid = np.ndarray(
-                    mask_grid.shape,
-                    dtype=mask_grid.dtype,
-                    buffer=self.shared_mem.buf,
-                )
+        self.store_in_shared_memory = False
+        self.grid_cache_file = cache_path
+        return True
 
-                # Copy the data from mask_grid to the shared_np_array
-                self.mask_grid[:] = mask_grid[:]
+    def write_grid_cache(self) -> str:
+        """write the loaded mask grid to its grid cache in CLEV2ER_GRID_CACHE_DIR
 
-                self.log.info("created shared memory for mask %s", self.mask_name)
+        Returns:
+            str: path of cache, without extension
 
-        else:  # load normally without using shared memory
-            # read npz file
-            self.mask_grid = (
-                np.load(mask_file, allow_pickle=True).get("mask_grid").astype(self.dtype)
-            )
+        Raises:
+            ValueError: if CLEV2ER_GRID_CACHE_DIR is not set, or the mask is not a grid mask
+        """
+        if self.mask_type != "grid":
+            raise ValueError(f"{self.mask_name} is not a grid mask")
+        cache_path = grid_cache_path(f"mask_{self.mask_name}")
+        if not cache_path:
+            raise ValueError("CLEV2ER_GRID_CACHE_DIR is not set")
+        write_grid_cache(cache_path, {"mask_grid": self.mask_grid}, {}, self.source_file)
+        return cache_path
 
     def points_inside(
         self,
@@ -680,47 +675,61 @@ class Mask:
         else:
             x, y = self.latlon_to_xy(lats, lons)  # pylint: disable=E0633
 
-        inmask = np.zeros(lats.size, np.bool_)
+        x = np.asarray(x).ravel()
+        y = np.asarray(y).ravel()
 
-        n_inside = 0
         # ---------------------------------------------------------
         # Find points inside a x,y rectangular limits mask
         # ---------------------------------------------------------
 
         if self.mask_type == "xylimits":
-            for i in range(x.size):
-                if (x[i] >= self.xlimits[0] and x[i] <= self.xlimits[1]) and (
-                    y[i] >= self.ylimits[0] and y[i] <= self.ylimits[1]
-                ):
-                    inmask[i] = True
-                    n_inside += 1
-            return inmask, n_inside
+            inmask = (
+                (x >= self.xlimits[0])
+                & (x <= self.xlimits[1])
+                & (y >= self.ylimits[0])
+                & (y <= self.ylimits[1])
+            )
+            return inmask, int(np.count_nonzero(inmask))
+
+        inmask = np.zeros(lats.size, np.bool_)
 
         if self.mask_type == "grid":
-            for i in range(x.size):
-                # calculate equivalent (ii,jj) in mask array
-                ii = int(np.around((x[i] - self.minxm) / self.binsize))
-                jj = int(np.around((y[i] - self.minym) / self.binsize))
-
-                # Check bounds of Basin Mask array
-                if ii < 0 or ii >= self.num_x:
-                    continue
-                if jj < 0 or jj >= self.num_y:
-                    continue
-
-                if basin_numbers:
-                    for basin in basin_numbers:
-                        if self.mask_grid[jj, ii] == basin:
-                            inmask[i] = True
-                            n_inside += 1
-                else:
-                    if self.mask_grid[jj, ii] > 0:
-                        inmask[i] = True
-                        n_inside += 1
+            jj, ii, in_grid = self.grid_indices(x, y)
+            grid_values = self.mask_grid[jj[in_grid], ii[in_grid]]
+            if basin_numbers:
+                inmask[in_grid] = np.isin(grid_values, basin_numbers)
+            else:
+                inmask[in_grid] = grid_values > 0
         else:
             return inmask, 0
 
-        return inmask, n_inside
+        return inmask, int(np.count_nonzero(inmask))
+
+    def grid_indices(
+        self, x: np.ndarray, y: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """find the nearest grid mask cell (jj,ii) to each x,y point
+
+        Args:
+            x (np.ndarray): x values (m) in mask coordinate system
+            y (np.ndarray): y values (m) in mask coordinate system
+
+        Returns:
+            (np.ndarray, np.ndarray, np.ndarray): jj (row), ii (column) indices of each point,
+            and boolean array which is True where the point is inside the grid. jj, ii are 0
+            where the point is outside the grid or x,y is NaN.
+        """
+        # calculate equivalent (ii,jj) in mask array
+        ii = np.around((np.asarray(x, dtype=np.float64) - self.minxm) / self.binsize)
+        jj = np.around((np.asarray(y, dtype=np.float64) - self.minym) / self.binsize)
+
+        # Check bounds of mask array (NaN values are also out of bounds)
+        in_grid = (ii >= 0) & (ii < self.num_x) & (jj >= 0) & (jj < self.num_y)
+
+        ii = np.where(in_grid, ii, 0).astype(np.intp)
+        jj = np.where(in_grid, jj, 0).astype(np.intp)
+
+        return jj, ii, in_grid
 
     def grid_mask_values(
         self,
@@ -763,26 +772,13 @@ class Mask:
         if inputs_are_xy:
             x, y = lats, lons
         else:
-            (x, y) = self.latlon_to_xy(lats, lons)  # pylint: disable=E0633
+            x, y = self.latlon_to_xy(lats, lons)  # pylint: disable=E0633
 
         mask_values = np.full(lats.size, unknown_value, dtype=np.uint8)
 
-        for i in range(0, lats.size):
-            # check that x,y is not Nan
-            if not np.isfinite(x[i]):
-                continue
-
-            # calculate equivalent (ii,jj) in mask array
-            ii = int(np.around((x[i] - self.minxm) / self.binsize))
-            jj = int(np.around((y[i] - self.minym) / self.binsize))
+        jj, ii, in_grid = self.grid_indices(np.ravel(x), np.ravel(y))
+        mask_values[in_grid] = self.mask_grid[jj[in_grid], ii[in_grid]]
 
-            # Check bounds of Basin Mask array
-            if ii < 0 or ii >= self.num_x:
-                continue
-            if jj < 0 or jj >= self.num_y:
-                continue
-
-            mask_values[i] = self.mask_grid[jj, ii]
         return mask_values
 
     def latlon_to_xy(self, lats: np.ndarray, lons: np.ndarray) -> tuple:
@@ -791,32 +787,16 @@ class Mask:
         :param lons: longitude points in degrees E
         :return: x,y in polar stereo projection of mask
         """
-        return self.lonlat_to_xy_transformer.transform(lons, lats)
+        return transform_lonlat(self.lonlat_to_xy_transformer, lons, lats)
 
     def clean_up(self):
-        """Free up, close or release any shared memory or other resources associated
+        """Release the mask's shared mask array (if shared), or other resources associated
         with mask
         """
-        if self.store_in_shared_memory:
-            try:
-                if self.shared_mem is not None:
-                    if self.shared_mem_child:
-                        self.shared_mem.close()
-                        self.log.info(
-                            "closed shared memory for %s in child process",
-                            self.mask_name,
-                        )
-                        self.log.info("closing in child for mask %s", self.mask_name)
-                    else:
-                        self.shared_mem.close()
-                        self.shared_mem.unlink()
-                        self.log.info(
-                            "unlinked shared memory for %s",
-                            self.mask_name,
-                        )
-
-            except Exception as exc:  # pylint: disable=broad-exception-caught
-                self.log.error("Shared memory for %s could not be closed %s", self.mask_name, exc)
-                raise IOError(
-                    f'Shared memory for {self.mask_name} could not be closed {exc}"'
-                ) from exc
+        if self.nomask:
+            return
+        if self.shared_array_name:
+            self.mask_grid = np.array([])
+            release_array(self.shared_array_name)
+            self.log.info("released shared memory for %s", self.mask_name)
+            self.shared_array_name = ""
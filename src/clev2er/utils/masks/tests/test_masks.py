@@ -145,3 +145,43 @@ def test_mask_loading():
                 thismask.clean_up()
         except IOError:  # pylint: disable=bare-except
             pass
+
+
+def test_mask_grid_points_vectorized():
+    """test Mask.points_inside() and Mask.grid_mask_values() of a grid mask against the
+    grid cell found for each point separately
+    """
+    rng = np.random.default_rng(0)
+    thismask = Mask.__new__(Mask)  # grid mask in memory, without loading a mask file
+    thismask.mask_name = "test_grid_mask"
+    thismask.mask_type = "grid"
+    thismask.basin_numbers = None
+    thismask.minxm = -10000
+    thismask.minym = -5000
+    thismask.binsize = 500
+    thismask.num_x = 40
+    thismask.num_y = 20
+    thismask.mask_grid = rng.integers(0, 5, size=(20, 40)).astype(np.uint8)
+
+    x = np.concatenate((rng.uniform(-11000, 11000, 1000), [-10000, -10250, 9500, 9750, np.nan]))
+    y = np.concatenate((rng.uniform(-6000, 6000, 1000), [-5000, 4500, np.nan, 0, 0]))
+
+    expected_values = np.full(x.size, 99, dtype=np.uint8)
+    for i in range(x.size):
+        if not (np.isfinite(x[i]) and np.isfinite(y[i])):
+            continue
+        ii = int(np.around((x[i] - thismask.minxm) / thismask.binsize))
+        jj = int(np.around((y[i] - thismask.minym) / thismask.binsize))
+        if 0 <= ii < thismask.num_x and 0 <= jj < thismask.num_y:
+            expected_values[i] = thismask.mask_grid[jj, ii]
+
+    mask_values = thismask.grid_mask_values(x, y, inputs_are_xy=True, unknown_value=99)
+    np.testing.assert_array_equal(mask_values, expected_values)
+
+    inmask, n_inside = thismask.points_inside(x, y, inputs_are_xy=True)
+    np.testing.assert_array_equal(inmask, (expected_values > 0) & (expected_values != 99))
+    assert n_inside == np.count_nonzero(inmask)
+
+    inmask, n_inside = thismask.points_inside(x, y, basin_numbers=[1, 3], inputs_are_xy=True)
+    np.testing.assert_array_equal(inmask, np.isin(expected_values, [1, 3]))
+    assert n_inside == np.count_nonzero(inmask)
@@ -6,6 +6,10 @@ from multiprocessing import Process
 
 from clev2er.utils.logging_funcs import get_logger
 from clev2er.utils.masks.masks import Mask
+from clev2er.utils.shared_resources.shared_resources import (
+    start_shared_resources,
+    stop_shared_resources,
+)
 
 
 # task executed in a child process
@@ -49,6 +53,8 @@ if __name__ == "__main__":
     MASK_NAME = "greenland_iceandland_dilated_10km_grid_mask"
     vals_inside = [1]
 
+    # this process loads the shared resources, and the child processes attach to them
+    start_shared_resources(log)
     thismask = Mask(MASK_NAME, store_in_shared_memory=True)
 
     lats = [-77, -60, 74.31]
@@ -86,6 +92,7 @@ if __name__ == "__main__":
     # print(data[:10])
 
     thismask.clean_up()
+    stop_shared_resources()
 
     # # close the shared memory
     # sm.close()
@@ -0,0 +1,17 @@
+"""
+# Projections
+
+Cache of lat/lon to polar stereographic (ie EPSG:3031, EPSG:3413) transforms of the
+arrays of the L1b file being processed.
+
+Most algorithms transform the same nadir latitude and longitude arrays to the projection
+of their DEM, mask, slope or dh/dt grid. The Dem, Mask, Slopes and Dhdt classes, and the
+geolocation functions, transform through `projection_cache.transform_lonlat()`, so that
+each array is projected once per CRS, and the x,y arrays are reused by every later
+algorithm in the chain. run_chain.py empties the cache at the start of each L1b file.
+
+`transformer_cache.get_transformer()` provides process wide (per thread) cached pyproj
+Transformer objects, keyed by (source CRS, destination CRS, always_xy), so that the
+geolocation functions do not construct a new Transformer (ie lat,lon,height to ECEF) on
+every call.
+"""
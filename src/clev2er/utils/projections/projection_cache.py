@@ -0,0 +1,97 @@
+"""clev2er.utils.projections.projection_cache.py
+
+Per process cache of the x,y results of lon,lat -> x,y transforms, so that an array of
+lat,lon values (ie the nadir locations of an L1b file) is transformed once to each
+projection, however many algorithms need it.
+
+Arrays are identified by their contents (shape, dtype and a hash of their data), not by
+their Python identity, as each algorithm usually gets its own copy of the L1b's lat,lon
+arrays. Transforms are identified by their PROJ definition, so the Transformer objects of
+different classes transforming to the same CRS share cached results.
+
+Example:
+
+    x, y = transform_lonlat(self.lonlat_to_xy_transformer, lons, lats)
+
+run_chain.py calls clear_projection_cache() at the start of each L1b file. The cache also
+keeps only the MAX_CACHED_TRANSFORMS most recently used results.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from pyproj import Transformer
+
+# maximum number of transform results kept
+MAX_CACHED_TRANSFORMS = 32
+
+# (transform definition, lon array key, lat array key) -> (x, y)
+_cache: OrderedDict[tuple, tuple[np.ndarray, np.ndarray]] = OrderedDict()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def array_key(array: np.ndarray) -> tuple:
+    """identify an array by its contents
+
+    Args:
+        array (np.ndarray): array
+
+    Returns:
+        tuple: (shape, dtype, blake2b digest of data)
+    """
+    digest = hashlib.blake2b(np.ascontiguousarray(array).data, digest_size=16)
+    return (array.shape, array.dtype.str, digest.digest())
+
+
+def transform_lonlat(transformer: Transformer, lons, lats) -> tuple:
+    """transform lon,lat to x,y, reusing the result of an earlier transform of the same
+       lon,lat arrays with the same transform
+
+    Args:
+        transformer (Transformer): lon,lat -> x,y transformer (always_xy=True)
+        lons (np.ndarray|float): longitude values in degrees
+        lats (np.ndarray|float): latitude values in degrees
+
+    Returns:
+        tuple: (x, y), as returned by transformer.transform(lons, lats). Arrays returned
+        are copies, so may be modified by the caller. Only numpy (not masked) array inputs
+        are cached.
+    """
+    if not (
+        isinstance(lons, np.ndarray)
+        and isinstance(lats, np.ndarray)
+        and not isinstance(lons, np.ma.MaskedArray)
+        and not isinstance(lats, np.ma.MaskedArray)
+    ):
+        return transformer.transform(lons, lats)
+
+    key = (transformer.definition, array_key(lons), array_key(lats))
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        _cache_stats["hits"] += 1
+        return cached[0].copy(), cached[1].copy()
+
+    _cache_stats["misses"] += 1
+    x, y = transformer.transform(lons, lats)  # pylint: disable=E0633
+    x = np.asarray(x)
+    y = np.asarray(y)
+    _cache[key] = (x, y)
+    if len(_cache) > MAX_CACHED_TRANSFORMS:
+        _cache.popitem(last=False)
+    return x.copy(), y.copy()
+
+
+def clear_projection_cache() -> None:
+    """empty the cache, ie at the start of each L1b file"""
+    _cache.clear()
+
+
+def projection_cache_info() -> dict[str, int]:
+    """get the cache statistics, since the process started
+
+    Returns:
+        dict[str, int]: {'hits','misses','cached' (number of results cached)}
+    """
+    return {"hits": _cache_stats["hits"], "misses": _cache_stats["misses"], "cached": len(_cache)}
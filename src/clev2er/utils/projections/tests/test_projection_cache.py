@@ -0,0 +1,54 @@
+"""pytest tests of clev2er.utils.projections.projection_cache
+"""
+
+import numpy as np
+from pyproj import CRS, Transformer
+
+from clev2er.utils.projections.projection_cache import (
+    clear_projection_cache,
+    projection_cache_info,
+    transform_lonlat,
+)
+
+
+def test_transform_lonlat():
+    """test that each lon,lat array is transformed once per CRS, shared between
+    Transformer objects of the same transform"""
+    clear_projection_cache()
+    crs_wgs = CRS("epsg:4326")
+    to_3031 = Transformer.from_proj(crs_wgs, CRS("epsg:3031"), always_xy=True)
+    to_3031_copy = Transformer.from_proj(crs_wgs, CRS("epsg:3031"), always_xy=True)
+    to_3413 = Transformer.from_proj(crs_wgs, CRS("epsg:3413"), always_xy=True)
+
+    rng = np.random.default_rng(0)
+    lons = rng.uniform(0.0, 360.0, size=1000)
+    lats = rng.uniform(-89.0, -60.0, size=1000)
+    expected_x, expected_y = to_3031.transform(lons, lats)
+
+    info = projection_cache_info()
+    x, y = transform_lonlat(to_3031, lons, lats)
+    np.testing.assert_array_equal(x, expected_x)
+    np.testing.assert_array_equal(y, expected_y)
+
+    # same values in a different array, with a different Transformer to the same CRS
+    x[:] = 0.0  # returned arrays are copies of the cached results
+    x, y = transform_lonlat(to_3031_copy, lons.copy(), lats.copy())
+    np.testing.assert_array_equal(x, expected_x)
+    np.testing.assert_array_equal(y, expected_y)
+
+    # a different CRS, or different values, are transformed again
+    transform_lonlat(to_3413, lons, lats)
+    transform_lonlat(to_3031, lons[:-1], lats[:-1])
+    new_info = projection_cache_info()
+    assert new_info["hits"] - info["hits"] == 1
+    assert new_info["misses"] - info["misses"] == 3
+    assert new_info["cached"] == 3
+
+    # scalars and masked arrays are not cached
+    x_scalar, _ = transform_lonlat(to_3031, 10.0, -70.0)
+    assert x_scalar == to_3031.transform(10.0, -70.0)[0]
+    transform_lonlat(to_3031, np.ma.masked_array(lons), np.ma.masked_array(lats))
+    assert projection_cache_info()["misses"] == new_info["misses"]
+
+    clear_projection_cache()
+    assert projection_cache_info()["cached"] == 0
@@ -0,0 +1,55 @@
+"""pytest tests of clev2er.utils.projections.transformer_cache
+"""
+
+import threading
+
+import numpy as np
+import pyproj
+from pyproj import Transformer
+
+from clev2er.utils.projections.transformer_cache import (
+    WGS84_ECEF,
+    WGS84_LLA,
+    clear_transformer_cache,
+    get_transformer,
+    transformer_cache_info,
+)
+
+
+def test_get_transformer():
+    """test that transformers are constructed once per (src, dst, always_xy) and thread, and
+    transform as Transformers constructed from the equivalent pyproj.Proj objects"""
+    clear_transformer_cache()
+    to_ecef = get_transformer(WGS84_LLA, WGS84_ECEF)
+    assert get_transformer(WGS84_LLA, WGS84_ECEF) is to_ecef
+    assert get_transformer(WGS84_LLA, WGS84_ECEF, always_xy=False) is not to_ecef
+    assert get_transformer(WGS84_ECEF, WGS84_LLA) is not to_ecef
+    assert transformer_cache_info()["cached"] == 3
+
+    ecef = pyproj.Proj(proj="geocent", ellps="WGS84", datum="WGS84")
+    lla = pyproj.Proj(proj="latlong", ellps="WGS84", datum="WGS84")
+    expected = Transformer.from_proj(lla, ecef, always_xy=True)
+    assert get_transformer(lla, ecef) is get_transformer(lla, ecef)
+
+    rng = np.random.default_rng(0)
+    lons = rng.uniform(-180.0, 180.0, 100)
+    lats = rng.uniform(-89.0, 89.0, 100)
+    alts = rng.uniform(0.0, 720000.0, 100)
+    np.testing.assert_array_equal(
+        to_ecef.transform(lons, lats, alts), expected.transform(lons, lats, alts)
+    )
+    np.testing.assert_array_equal(
+        get_transformer(lla, ecef).transform(lons, lats, alts), expected.transform(lons, lats, alts)
+    )
+
+    # other threads get their own transformers
+    other_thread_transformers = []
+    thread = threading.Thread(
+        target=lambda: other_thread_transformers.append(get_transformer(WGS84_LLA, WGS84_ECEF))
+    )
+    thread.start()
+    thread.join()
+    assert other_thread_transformers[0] is not to_ecef
+
+    clear_transformer_cache()
+    assert transformer_cache_info()["cached"] == 0
@@ -0,0 +1,82 @@
+"""clev2er.utils.projections.transformer_cache.py
+
+Per process cache of pyproj Transformer objects, so that each transform (ie lat,lon,height
+to ECEF x,y,z) is constructed once, however many times it is used. Constructing a
+Transformer costs much more than transforming a single point with it.
+
+Transformers are identified by (source CRS, destination CRS, always_xy). pyproj Transformers
+must not be shared between threads, so each thread has its own cache.
+
+Example:
+
+    trans = get_transformer(WGS84_LLA, WGS84_ECEF)
+    x, y, z = trans.transform(xx=lon, yy=lat, zz=alt, radians=False)
+"""
+
+import threading
+
+import pyproj
+from pyproj import CRS, Transformer
+
+# WGS84 geographic (lon, lat, height) and earth centred, earth fixed (x, y, z) CRS definitions
+WGS84_LLA = "+proj=latlong +ellps=WGS84 +datum=WGS84 +type=crs"
+WGS84_ECEF = "+proj=geocent +ellps=WGS84 +datum=WGS84 +type=crs"
+
+_thread_cache = threading.local()
+
+
+def crs_key(crs) -> str:
+    """identify a CRS
+
+    Args:
+        crs (str|CRS|pyproj.Proj|Any): CRS, or any input accepted by CRS.from_user_input()
+
+    Returns:
+        str: crs if it is a str, else the CRS's PROJ/WKT definition
+    """
+    if isinstance(crs, str):
+        return crs
+    if isinstance(crs, pyproj.Proj):
+        return crs.crs.srs
+    return CRS.from_user_input(crs).srs
+
+
+def get_transformer(src_crs, dst_crs, always_xy: bool = True) -> Transformer:
+    """get a Transformer from the cache, constructing it on first use (in each thread)
+
+    Args:
+        src_crs (str|CRS|pyproj.Proj|Any): source CRS
+        dst_crs (str|CRS|pyproj.Proj|Any): destination CRS
+        always_xy (bool, optional): use lon,lat (x,y) axis order. Defaults to True.
+
+    Returns:
+        Transformer: transformer from src_crs to dst_crs
+    """
+    transformers = getattr(_thread_cache, "transformers", None)
+    if transformers is None:
+        transformers = _thread_cache.transformers = {}
+
+    key = (crs_key(src_crs), crs_key(dst_crs), always_xy)
+    transformer = transformers.get(key)
+    if transformer is None:
+        if isinstance(src_crs, pyproj.Proj):
+            src_crs = src_crs.crs
+        if isinstance(dst_crs, pyproj.Proj):
+            dst_crs = dst_crs.crs
+        transformer = Transformer.from_crs(src_crs, dst_crs, always_xy=always_xy)
+        transformers[key] = transformer
+    return transformer
+
+
+def clear_transformer_cache() -> None:
+    """empty the calling thread's cache"""
+    getattr(_thread_cache, "transformers", {}).clear()
+
+
+def transformer_cache_info() -> dict[str, int]:
+    """get the number of transformers cached by the calling thread
+
+    Returns:
+        dict[str, int]: {'cached'}
+    """
+    return {"cached": len(getattr(_thread_cache, "transformers", {}))}
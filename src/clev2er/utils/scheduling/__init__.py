@@ -0,0 +1,14 @@
+"""
+# File Scheduling
+
+Ordering of the L1b file list before it is dispatched to the chain's processes.
+
+When multi-processing, files are taken from a shared queue in list order, so a few large
+files near the end of the list can run on their own after all other files are done.
+`order_files_by_cost()` estimates the processing cost of each file and sorts the list
+longest job first, so that the largest files are started first and the small files fill
+in around them.
+
+Enabled by the run_chain.py `--longest_first` command line option, or the
+`chain:order_files_by_cost` main config setting.
+"""
@@ -0,0 +1,169 @@
+"""clev2er.utils.scheduling.file_cost.py
+
+Functions to estimate the relative processing cost of L1b files, and to order a list of
+L1b files so that the most expensive files are processed first (longest job first).
+
+The cost of a file is estimated as:
+
+    file size (bytes) * cost rate of the file's instrument mode
+
+where the instrument mode (LRM, SIN, SAR) is taken from the CryoSat L1b file name, so
+that no files need to be opened. The file size is used as it is proportional to the
+number of 20Hz records in files of the same mode.
+
+If a cost history is available, any file which appears in it uses its measured wall time
+directly, and the cost rate of each mode is the median of (wall time / file size) of the
+history files of that mode. Otherwise the default relative MODE_COST_WEIGHTS are used.
+
+The cost history is the per L1b file CSV written by a previous traced run
+(run_chain.py --trace <dir>), or a directory containing these files.
+"""
+
+import csv
+import glob
+import logging
+import os
+import re
+from statistics import median
+
+log = logging.getLogger(__name__)
+
+# Default relative cost per byte of each instrument mode, used when there is no cost history.
+# SAR files are not processed by the land ice chains and are skipped at an early stage
+MODE_COST_WEIGHTS = {"LRM": 1.0, "SIN": 1.0, "SAR": 0.1}
+
+
+def get_instr_mode_from_filename(l1b_file: str) -> str:
+    """get the instrument mode from a CryoSat L1b file name
+
+    ie CS_OFFL_SIR_LRM_1B_20200930T191158_20200930T191302_D001.nc -> 'LRM'
+
+    Args:
+        l1b_file (str): L1b file name or path
+
+    Returns:
+        str: 'LRM', 'SIN', 'SAR' or '' if not found in the file name
+    """
+    match = re.search(r"_SIR_(LRM|SIN|SAR)_1B_", os.path.basename(l1b_file))
+    if match:
+        return match.group(1)
+    return ""
+
+
+def load_cost_history(history_path: str) -> dict[str, float]:
+    """load the measured wall time of previously processed L1b files
+
+    Args:
+        history_path (str): path of a per L1b file trace CSV file (containing l1b_file and
+                            wall_time columns), or of a directory containing
+                            *_files.csv trace files. Where a file appears in more than one
+                            CSV file, the time in the latest (by CSV file name) is used.
+
+    Returns:
+        dict[str, float]: wall time (s) of each L1b file, keyed by L1b file name (not path)
+    """
+    if os.path.isdir(history_path):
+        csv_files = sorted(glob.glob(os.path.join(history_path, "*_files.csv")))
+    else:
+        csv_files = [history_path]
+
+    history = {}
+    for csv_file in csv_files:
+        with open(csv_file, encoding="utf-8", newline="") as file:
+            for row in csv.DictReader(file):
+                try:
+                    history[os.path.basename(row["l1b_file"])] = float(row["wall_time"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+    return history
+
+
+def estimate_file_costs(
+    l1b_file_list: list[str], cost_history: dict[str, float] | None = None
+) -> list[float]:
+    """estimate the relative processing cost of each L1b file in a list
+
+    Args:
+        l1b_file_list (list[str]): list of L1b file paths
+        cost_history (dict[str, float] | None, optional): measured wall times of L1b files,
+            keyed by file name, as returned by load_cost_history(). Defaults to None.
+
+    Returns:
+        list[float]: estimated cost of each file in l1b_file_list. These are in seconds if
+                     a cost_history is used, or relative units otherwise
+    """
+    if cost_history is None:
+        cost_history = {}
+
+    sizes = []
+    for l1b_file in l1b_file_list:
+        try:
+            sizes.append(os.path.getsize(l1b_file))
+        except OSError:
+            sizes.append(0)
+    modes = [get_instr_mode_from_filename(l1b_file) for l1b_file in l1b_file_list]
+
+    # Cost rate (s/byte) of each mode from the history files in the list
+    mode_rates: dict[str, list[float]] = {}
+    for l1b_file, size, mode in zip(l1b_file_list, sizes, modes):
+        name = os.path.basename(l1b_file)
+        if name in cost_history and size > 0:
+            mode_rates.setdefault(mode, []).append(cost_history[name] / size)
+
+    rates = {mode: median(mode_rate) for mode, mode_rate in mode_rates.items()}
+    if len(mode_rates) > 0:
+        # modes without history are scaled from the median rate of all history files
+        default_rate = median([rate for mode_rate in mode_rates.values() for rate in mode_rate])
+    else:
+        default_rate = 1.0
+
+    costs = []
+    for l1b_file, size, mode in zip(l1b_file_list, sizes, modes):
+        name = os.path.basename(l1b_file)
+        if name in cost_history:
+            costs.append(cost_history[name])
+        elif mode in rates:
+            costs.append(size * rates[mode])
+        else:
+            costs.append(size * default_rate * MODE_COST_WEIGHTS.get(mode, 1.0))
+    return costs
+
+
+def order_files_by_cost(
+    l1b_file_list: list[str],
+    cost_history_path: str = "",
+    thislog: logging.Logger | None = None,
+) -> list[str]:
+    """order a list of L1b files by estimated processing cost, most expensive first
+
+    Files with equal estimated cost keep their original order.
+
+    Args:
+        l1b_file_list (list[str]): list of L1b file paths
+        cost_history_path (str, optional): path of cost history CSV file or directory (see
+            load_cost_history()). Defaults to "", which uses no history.
+        thislog (logging.Logger | None, optional): log instance to use. Defaults to None.
+
+    Returns:
+        list[str]: reordered list of L1b file paths
+    """
+    if thislog is None:
+        thislog = log
+
+    cost_history: dict[str, float] = {}
+    if cost_history_path:
+        try:
+            cost_history = load_cost_history(cost_history_path)
+            thislog.info(
+                "Loaded processing cost history of %d L1b files from %s",
+                len(cost_history),
+                cost_history_path,
+            )
+        except OSError as exc:
+            thislog.error("Could not load cost history from %s : %s", cost_history_path, exc)
+
+    costs = estimate_file_costs(l1b_file_list, cost_history)
+
+    order = sorted(range(len(l1b_file_list)), key=lambda i: costs[i], reverse=True)
+
+    return [l1b_file_list[i] for i in order]
@@ -0,0 +1,88 @@
+"""pytest tests of clev2er.utils.scheduling.file_cost
+"""
+
+import csv
+
+from clev2er.utils.scheduling.file_cost import (
+    estimate_file_costs,
+    get_instr_mode_from_filename,
+    load_cost_history,
+    order_files_by_cost,
+)
+
+
+def make_l1b_files(tmp_path, sizes: dict) -> list[str]:
+    """create empty test files of given sizes
+
+    Args:
+        tmp_path (Path): directory to create files in
+        sizes (dict): file size (bytes) keyed by file name
+
+    Returns:
+        list[str]: file paths, in dict order
+    """
+    paths = []
+    for name, size in sizes.items():
+        path = tmp_path / name
+        path.write_bytes(b"\0" * size)
+        paths.append(str(path))
+    return paths
+
+
+def test_get_instr_mode_from_filename():
+    """test instrument mode extraction from CryoSat L1b file names"""
+    assert (
+        get_instr_mode_from_filename(
+            "/a/b/CS_OFFL_SIR_LRM_1B_20200930T191158_20200930T191302_D001.nc"
+        )
+        == "LRM"
+    )
+    assert get_instr_mode_from_filename("CS_LTA__SIR_SIN_1B_20200930T191158_D001.nc") == "SIN"
+    assert get_instr_mode_from_filename("CS_LTA__SIR_SAR_1B_20200930T191158_D001.nc") == "SAR"
+    assert get_instr_mode_from_filename("some_other_file.nc") == ""
+
+
+def test_order_files_by_cost(tmp_path):
+    """test longest job first ordering from file size and mode, without a history"""
+    l1b_files = make_l1b_files(
+        tmp_path,
+        {
+            "CS_OFFL_SIR_LRM_1B_20200101T000000_D001.nc": 100,
+            "CS_OFFL_SIR_SIN_1B_20200101T000000_D001.nc": 300,
+            "CS_OFFL_SIR_SAR_1B_20200101T000000_D001.nc": 1000,  # SAR weight is 0.1
+            "CS_OFFL_SIR_LRM_1B_20200102T000000_D001.nc": 200,
+            "CS_OFFL_SIR_LRM_1B_20200103T000000_D001.nc": 100,
+        },
+    )
+    ordered = order_files_by_cost(l1b_files)
+    assert ordered == [l1b_files[i] for i in (1, 3, 0, 2, 4)]
+    assert sorted(ordered) == sorted(l1b_files)
+
+
+def test_order_files_by_cost_history(tmp_path):
+    """test ordering using a trace CSV cost history"""
+    l1b_files = make_l1b_files(
+        tmp_path,
+        {
+            "CS_OFFL_SIR_LRM_1B_20200101T000000_D001.nc": 100,
+            "CS_OFFL_SIR_LRM_1B_20200102T000000_D001.nc": 100,
+            "CS_OFFL_SIR_SIN_1B_20200101T000000_D001.nc": 100,
+            "CS_OFFL_SIR_SIN_1B_20200102T000000_D001.nc": 50,
+        },
+    )
+    history_csv = tmp_path / "chain_trace_20200101T000000_files.csv"
+    with open(history_csv, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["filenum", "l1b_file", "wall_time", "status"])
+        writer.writerow([0, "/other/dir/CS_OFFL_SIR_LRM_1B_20200101T000000_D001.nc", 2.0, ""])
+        writer.writerow([1, "/other/dir/CS_OFFL_SIR_SIN_1B_20200101T000000_D001.nc", 10.0, ""])
+
+    history = load_cost_history(str(tmp_path))
+    assert history["CS_OFFL_SIR_SIN_1B_20200101T000000_D001.nc"] == 10.0
+
+    # files not in the history are estimated from the measured s/byte of their mode
+    costs = estimate_file_costs(l1b_files, history)
+    assert costs == [2.0, 2.0, 10.0, 5.0]
+
+    ordered = order_files_by_cost(l1b_files, str(history_csv))
+    assert ordered == [l1b_files[i] for i in (2, 3, 0, 1)]
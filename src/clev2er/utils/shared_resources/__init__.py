@@ -0,0 +1,20 @@
+"""
+# Shared Resources
+
+Registry of the large read-only arrays (DEM and mask grids) shared between the processes
+of a multi-processing chain run, used when `use_shared_memory` is set in the chain config.
+
+run_chain.py owns the registry. Its own instances of the chain's algorithms load each named
+array exactly once into a SharedMemory segment, however many algorithms use it, and the
+worker processes attach to the segments instead of loading their own copies. All processes
+get read-only views of the arrays, which are reference counted within each process and
+released by the `clean_up()` methods of the Dem and Mask classes.
+
+The segments are named `clev2er_<run_chain pid>_<hash>`, and are unlinked by run_chain.py
+at the end of the run, or when it exits early, is interrupted (Ctrl-C) or terminated
+(SIGTERM). Segments left by a run that was killed (ie `kill -9`) are removed at the start
+of the next run with shared memory on the same host.
+
+Grids loaded from a grid cache (see `clev2er.utils.grid_cache`) are memory mapped, and so
+already shared between processes, and do not use the registry.
+"""
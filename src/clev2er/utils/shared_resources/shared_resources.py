@@ -0,0 +1,391 @@
+"""clev2er.utils.shared_resources.shared_resources.py
+
+Registry of the large read-only arrays (DEM and mask grids) shared between the processes of
+a multi-processing chain run through SharedMemory.
+
+The run_chain.py process is the owner of the registry: it loads each named array exactly
+once into a SharedMemory segment, and unlinks all of its segments when it closes the
+registry, exits, is interrupted (Ctrl-C) or is terminated (SIGTERM). The worker processes
+find the owner through the CLEV2ER_SHARED_RESOURCES environment variable, which they inherit,
+and attach to its segments. All processes receive read-only views of the arrays, and
+several objects in one process which use the same array (ie the same DEM loaded by two
+algorithms) share a single view, which is reference counted.
+
+Segments are named clev2er_<owner pid>_<hash of array name>, so that runs on the same host
+do not share or unlink each other's segments, and the segments of an owner which was
+killed (ie kill -9) can be found and removed by the next run
+(see remove_orphaned_segments()).
+
+Example:
+
+    In run_chain.py (owner):
+
+        shared_resources = start_shared_resources(log)
+        ... initialize algorithms, start worker processes ...
+        stop_shared_resources()
+
+    In a Dem or Mask (owner or worker process):
+
+        self.zdem = share_array("dem_rema_ant_1km", lambda: load_zdem(demfile))
+        ...
+        release_array("dem_rema_ant_1km")
+
+If no registry has been started, share_array() just returns the loaded array.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import signal
+import threading
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# environment variable containing the pid of the registry's owner process
+SHARED_RESOURCES_ENV = "CLEV2ER_SHARED_RESOURCES"
+
+# prefix of the SharedMemory segment names created by the registry
+SEGMENT_PREFIX = "clev2er_"
+
+# size of the header at the start of each segment, containing the array's dtype and shape
+HEADER_SIZE = 4096
+
+# directory in which SharedMemory segments are visible as files (Linux only)
+SHM_DIR = "/dev/shm"
+
+# registry of this process, created by start_shared_resources() in the owner, or on first
+# use in a worker process
+_registry: Optional["SharedResources"] = None  # pylint: disable=invalid-name
+
+
+def segment_name(owner_pid: int, name: str) -> str:
+    """get the SharedMemory segment name of an array
+
+    Args:
+        owner_pid (int): pid of the registry's owner process
+        name (str): name of array, ie dem_<dem name>
+
+    Returns:
+        str: clev2er_<owner_pid>_<12 character hash of name>. Kept short as some operating
+             systems limit the length of segment names
+    """
+    return f"{SEGMENT_PREFIX}{owner_pid}_{hashlib.md5(name.encode()).hexdigest()[:12]}"
+
+
+def process_exists(pid: int) -> bool:
+    """check if a process is running on this host
+
+    Args:
+        pid (int): process id
+
+    Returns:
+        bool: True if the process exists
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, but owned by another user
+        return True
+    return True
+
+
+def remove_orphaned_segments(thislog: logging.Logger | None = None) -> int:
+    """remove the SharedMemory segments of registry owners which are no longer running
+       (ie which were killed before they could unlink their segments)
+
+    Only supported where segments are visible in /dev/shm (Linux).
+
+    Args:
+        thislog (logging.Logger|None, optional): log instance to use. Defaults to None.
+
+    Returns:
+        int: number of segments removed
+    """
+    thislog = thislog if thislog is not None else log
+    if not os.path.isdir(SHM_DIR):
+        return 0
+    num_removed = 0
+    for filename in os.listdir(SHM_DIR):
+        if not filename.startswith(SEGMENT_PREFIX):
+            continue
+        owner_pid = filename[len(SEGMENT_PREFIX) :].split("_", maxsplit=1)[0]
+        if not owner_pid.isdigit() or process_exists(int(owner_pid)):
+            continue
+        try:
+            os.remove(os.path.join(SHM_DIR, filename))
+        except OSError as exc:
+            thislog.warning("Could not remove orphaned shared memory %s : %s", filename, exc)
+            continue
+        thislog.info("removed orphaned shared memory %s", filename)
+        num_removed += 1
+    return num_removed
+
+
+class SharedResources:
+    """class to create (owner process) or attach to (worker processes) named read-only
+    arrays in SharedMemory, with reference counting"""
+
+    def __init__(self, owner_pid: int, thislog: logging.Logger | None = None) -> None:
+        """class initialization
+
+        Args:
+            owner_pid (int): pid of the process which creates and unlinks the segments. If
+                             this is the current process, the registry is the owner.
+            thislog (logging.Logger|None, optional): log instance to use. Defaults to None.
+        """
+        self.owner_pid = owner_pid
+        self.is_owner = owner_pid == os.getpid()
+        self.log = thislog if thislog is not None else log
+        self.segments: dict[str, SharedMemory] = {}  # by array name
+        self.arrays: dict[str, np.ndarray] = {}  # read-only views, by array name
+        self.refcounts: dict[str, int] = {}  # number of users of each view
+        self.lock = threading.Lock()
+
+    def get(self, name: str, loader: Callable[[], np.ndarray]) -> np.ndarray:
+        """get a read-only view of a shared array, loading it if this is the first use
+
+        In the owner process, the first get() of a name calls loader() and copies the array
+        into a new segment. In a worker process, it attaches to the owner's segment, or if
+        the owner did not load the array, calls loader() and returns a private copy (which
+        is not reference counted).
+
+        Args:
+            name (str): name of array, unique within the run (ie dem_<dem name>)
+            loader (Callable[[], np.ndarray]): function which loads the array
+
+        Returns:
+            np.ndarray: read-only array
+        """
+        with self.lock:
+            if name in self.arrays:
+                self.refcounts[name] += 1
+                return self.arrays[name]
+
+            shm_name = segment_name(self.owner_pid, name)
+            if self.is_owner:
+                shared_mem = self._create(shm_name, loader())
+                self.log.info("created shared memory %s for %s", shm_name, name)
+            else:
+                try:
+                    shared_mem = SharedMemory(name=shm_name, create=False)
+                except FileNotFoundError:
+                    self.log.warning(
+                        "%s is not in shared memory, loading a copy in process %d",
+                        name,
+                        os.getpid(),
+                    )
+                    return loader()
+                self.log.info("attached to shared memory %s for %s", shm_name, name)
+
+            with shared_mem.buf[:HEADER_SIZE] as header_view:  # type: ignore[index]
+                header = json.loads(bytes(header_view).rstrip(b"\0"))
+            array: np.ndarray = np.ndarray(
+                tuple(header["shape"]),
+                dtype=np.dtype(header["dtype"]),
+                buffer=shared_mem.buf,
+                offset=HEADER_SIZE,
+            )
+            array.flags.writeable = False
+
+            self.segments[name] = shared_mem
+            self.arrays[name] = array
+            self.refcounts[name] = 1
+            return array
+
+    def _create(self, shm_name: str, array: np.ndarray) -> SharedMemory:
+        """create a segment containing a header and a copy of an array
+
+        Args:
+            shm_name (str): segment name
+            array (np.ndarray): array to copy
+
+        Returns:
+            SharedMemory: new segment
+        """
+        array = np.ascontiguousarray(array)
+        header = json.dumps({"dtype": array.dtype.str, "shape": list(array.shape)}).encode()
+        try:
+            shared_mem = SharedMemory(name=shm_name, create=True, size=HEADER_SIZE + array.nbytes)
+        except FileExistsError:
+            # left by an earlier process with the same pid, which was killed
+            SharedMemory(name=shm_name, create=False).unlink()
+            shared_mem = SharedMemory(name=shm_name, create=True, size=HEADER_SIZE + array.nbytes)
+        shared_mem.buf[: len(header)] = header  # type: ignore[index]
+        shared_array: np.ndarray = np.ndarray(
+            array.shape, dtype=array.dtype, buffer=shared_mem.buf, offset=HEADER_SIZE
+        )
+        shared_array[...] = array
+        del shared_array  # release the buffer, so that the segment can be closed
+        return shared_mem
+
+    def release(self, name: str) -> None:
+        """release a view returned by get(). When it has no users left, its segment is
+        closed, and unlinked if this is the owner process
+
+        Args:
+            name (str): name of array
+        """
+        with self.lock:
+            if name not in self.refcounts:  # private copy, or already released
+                return
+            self.refcounts[name] -= 1
+            if self.refcounts[name] > 0:
+                return
+            self._free(name)
+
+    def _free(self, name: str) -> None:
+        """close, and if owner unlink, the segment of an array
+
+        Args:
+            name (str): name of array
+        """
+        shared_mem = self.segments.pop(name)
+        del self.arrays[name]
+        del self.refcounts[name]
+        if self.is_owner:
+            try:
+                shared_mem.unlink()
+                self.log.info("unlinked shared memory %s for %s", shared_mem.name, name)
+            except FileNotFoundError:
+                pass
+        try:
+            shared_mem.close()
+        except BufferError:
+            # a view of the array is still referenced. The memory is unmapped when the
+            # view is deleted, or this process exits
+            self.log.debug("shared memory for %s still in use, not closed", name)
+
+    def close(self) -> None:
+        """free the segments of all arrays, whether or not they are still in use"""
+        with self.lock:
+            for name in list(self.segments):
+                self._free(name)
+
+    def status(self) -> dict[str, Any]:
+        """get the arrays in the registry and their number of users
+
+        Returns:
+            dict[str, Any]: {'owner_pid': int, 'is_owner': bool, 'refcounts': dict[str,int],
+                             'nbytes': total size of arrays}
+        """
+        with self.lock:
+            return {
+                "owner_pid": self.owner_pid,
+                "is_owner": self.is_owner,
+                "refcounts": dict(self.refcounts),
+                "nbytes": sum(array.nbytes for array in self.arrays.values()),
+            }
+
+
+def _handle_sigterm(signum: int, _frame: Any) -> None:
+    """convert SIGTERM to SystemExit, so that the owner's segments are unlinked on exit"""
+    raise SystemExit(128 + signum)
+
+
+def start_shared_resources(thislog: logging.Logger | None = None) -> SharedResources:
+    """start the registry in the current process, as its owner. Worker processes started
+    after this (which inherit the environment) attach to its arrays.
+
+    Also removes any segments left by owners which were killed, and makes sure that the
+    segments are unlinked if this process exits, is interrupted or is terminated.
+
+    Args:
+        thislog (logging.Logger|None, optional): log instance to use. Defaults to None.
+
+    Returns:
+        SharedResources: the registry
+    """
+    global _registry  # pylint: disable=global-statement
+
+    stop_shared_resources()
+    remove_orphaned_segments(thislog)
+
+    _registry = SharedResources(os.getpid(), thislog)
+    os.environ[SHARED_RESOURCES_ENV] = str(_registry.owner_pid)
+    atexit.register(stop_shared_resources)
+    if (
+        threading.current_thread() is threading.main_thread()
+        and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+    ):
+        signal.signal(signal.SIGTERM, _handle_sigterm)
+    return _registry
+
+
+def stop_shared_resources() -> None:
+    """close the registry of this process. If it is the owner, its segments are unlinked,
+    and worker processes started after this no longer use shared memory."""
+    global _registry  # pylint: disable=global-statement
+
+    if _registry is None:
+        return
+    _registry.close()
+    if _registry.is_owner:
+        os.environ.pop(SHARED_RESOURCES_ENV, None)
+        atexit.unregister(stop_shared_resources)
+        if (
+            threading.current_thread() is threading.main_thread()
+            and signal.getsignal(signal.SIGTERM) == _handle_sigterm  # pylint: disable=W0143
+        ):
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _registry = None
+
+
+def get_shared_resources() -> Optional[SharedResources]:
+    """get the registry of this process. In a worker process of a run with shared
+       resources, this is created on first use.
+
+    Returns:
+        SharedResources|None: the registry, or None if shared resources are not in use
+    """
+    global _registry  # pylint: disable=global-statement
+
+    owner_pid = os.environ.get(SHARED_RESOURCES_ENV, "")
+    if _registry is not None and str(_registry.owner_pid) == owner_pid:
+        return _registry
+    if not owner_pid.isdigit():
+        return None
+    if _registry is not None:  # started by a previous owner
+        _registry.close()
+    _registry = SharedResources(int(owner_pid))
+    if not _registry.is_owner:
+        atexit.register(_registry.close)
+    return _registry
+
+
+def share_array(
+    name: str, loader: Callable[[], np.ndarray], thislog: logging.Logger | None = None
+) -> np.ndarray:
+    """get a read-only array from the registry, or if shared resources are not in use,
+       just load it
+
+    Args:
+        name (str): name of array, unique within the run (ie dem_<dem name>)
+        loader (Callable[[], np.ndarray]): function which loads the array
+        thislog (logging.Logger|None, optional): log instance to use. Defaults to None.
+
+    Returns:
+        np.ndarray: array. Must be released with release_array(name) when no longer used
+    """
+    registry = get_shared_resources()
+    if registry is None:
+        return loader()
+    if thislog is not None:
+        registry.log = thislog
+    return registry.get(name, loader)
+
+
+def release_array(name: str) -> None:
+    """release an array returned by share_array()
+
+    Args:
+        name (str): name of array
+    """
+    if _registry is not None:
+        _registry.release(name)
@@ -0,0 +1,148 @@
+"""pytest tests of clev2er.utils.shared_resources.shared_resources
+"""
+
+import logging
+import multiprocessing as mp
+import os
+
+import numpy as np
+import pytest
+
+from clev2er.utils.masks.masks import Mask
+from clev2er.utils.shared_resources.shared_resources import (
+    SHARED_RESOURCES_ENV,
+    SHM_DIR,
+    get_shared_resources,
+    release_array,
+    remove_orphaned_segments,
+    segment_name,
+    share_array,
+    start_shared_resources,
+    stop_shared_resources,
+)
+
+pytestmark = pytest.mark.skipif(not os.path.isdir(SHM_DIR), reason="requires /dev/shm")
+
+
+def attach_and_sum(name: str, result_queue: mp.Queue) -> None:
+    """worker process: attach to a shared array and return its sum"""
+
+    def load_copy() -> np.ndarray:
+        raise RuntimeError("worker should attach, not load")
+
+    array = share_array(name, load_copy)
+    result_queue.put((float(array.sum()), array.flags.writeable))
+    release_array(name)
+
+
+def test_shared_resources_owner():
+    """test that an array is loaded once, shared read-only, and unlinked when released"""
+    num_loads = []
+
+    def loader() -> np.ndarray:
+        num_loads.append(1)
+        return np.arange(12, dtype=np.float32).reshape(3, 4)
+
+    # without a registry, arrays are just loaded
+    assert get_shared_resources() is None
+    assert share_array("dem_test", loader).flags.writeable
+
+    registry = start_shared_resources()
+    try:
+        assert os.environ[SHARED_RESOURCES_ENV] == str(os.getpid())
+        shm_file = os.path.join(SHM_DIR, segment_name(os.getpid(), "dem_test"))
+
+        array1 = share_array("dem_test", loader)
+        array2 = share_array("dem_test", loader)
+        assert array1 is array2
+        assert len(num_loads) == 2  # once above without a registry, once shared
+        assert not array1.flags.writeable
+        np.testing.assert_array_equal(array1, loader())
+        assert os.path.exists(shm_file)
+        assert registry.status()["refcounts"] == {"dem_test": 2}
+
+        del array1, array2
+        release_array("dem_test")
+        assert os.path.exists(shm_file)
+        release_array("dem_test")
+        assert not os.path.exists(shm_file)
+        assert not registry.status()["refcounts"]
+    finally:
+        stop_shared_resources()
+    assert SHARED_RESOURCES_ENV not in os.environ
+
+
+def test_shared_resources_worker():
+    """test that worker processes attach to the owner's arrays, and that the owner's
+    segments are unlinked when it stops, even if still in use"""
+    start_shared_resources()
+    try:
+        array = share_array("mask_test", lambda: np.ones((50, 40), dtype=np.uint8))
+
+        ctx = mp.get_context("spawn")
+        result_queue = ctx.Queue()
+        workers = [
+            ctx.Process(target=attach_and_sum, args=("mask_test", result_queue)) for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        results = [result_queue.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+        assert results == [(2000.0, False), (2000.0, False)]
+        assert array.sum() == 2000
+    finally:
+        stop_shared_resources()
+    assert not os.path.exists(os.path.join(SHM_DIR, segment_name(os.getpid(), "mask_test")))
+
+
+def test_mask_shared_memory():
+    """test that two Masks with the same name share one array, released by clean_up()"""
+    mask_grid = np.array([[0, 1], [2, 3]], dtype=np.uint8)
+
+    def new_mask() -> Mask:
+        thismask = Mask.__new__(Mask)
+        thismask.nomask = False
+        thismask.mask_name = "test_grid_mask"
+        thismask.store_in_shared_memory = True
+        thismask.shared_array_name = ""
+        thismask.log = logging.getLogger(__name__)
+        thismask.load_mask_grid(lambda: mask_grid)
+        return thismask
+
+    registry = start_shared_resources()
+    try:
+        mask1 = new_mask()
+        mask2 = new_mask()
+        assert mask1.mask_grid is mask2.mask_grid
+        np.testing.assert_array_equal(mask1.mask_grid, mask_grid)
+        assert registry.status()["refcounts"] == {"mask_test_grid_mask": 2}
+        mask1.clean_up()
+        mask2.clean_up()
+        assert not registry.status()["refcounts"]
+    finally:
+        stop_shared_resources()
+
+
+def test_remove_orphaned_segments():
+    """test that segments of owners which are no longer running are removed"""
+    ctx = mp.get_context("spawn")
+    process = ctx.Process(target=os.getpid)
+    process.start()
+    process.join()
+    assert process.pid is not None
+
+    orphan_file = os.path.join(SHM_DIR, segment_name(process.pid, "dem_test"))
+    live_file = os.path.join(SHM_DIR, segment_name(os.getpid(), "dem_test"))
+    for shm_file in (orphan_file, live_file):
+        with open(shm_file, "wb") as fp:
+            fp.write(b"\0" * 16)
+    try:
+        assert remove_orphaned_segments() == 1
+        assert not os.path.exists(orphan_file)
+        assert os.path.exists(live_file)
+    finally:
+        for shm_file in (orphan_file, live_file):
+            if os.path.exists(shm_file):
+                os.remove(shm_file)
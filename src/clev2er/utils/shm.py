@@ -6,6 +6,10 @@ from multiprocessing import Process
 
 from clev2er.utils.dems.dems import Dem
 from clev2er.utils.logging_funcs import get_logger
+from clev2er.utils.shared_resources.shared_resources import (
+    start_shared_resources,
+    stop_shared_resources,
+)
 
 
 # task executed in a child process
@@ -40,6 +44,8 @@ if __name__ == "__main__":
         silent=False,
     )
 
+    # this process loads the shared resources, and the child processes attach to them
+    start_shared_resources(log)
     thisdem = Dem("rema_ant_1km", store_in_shared_memory=True)
 
     # define the size of the numpy array
@@ -69,6 +75,7 @@ if __name__ == "__main__":
     # print(data[:10])
 
     thisdem.clean_up()
+    stop_shared_resources()
 
     # # close the shared memory
     # sm.close()
@@ -20,6 +20,7 @@ from __future__ import annotations
 
 import logging
 import os
+from functools import cached_property
 
 import numpy as np
 from netCDF4 import Dataset  # pylint: disable=no-name-in-module
@@ -27,6 +28,13 @@ from pyproj import CRS, Transformer  # converter, co-ord definitions
 from scipy.interpolate import interpn  # interpolation functions
 from tifffile import imread  # required to read 64-bit tif file for slope data
 
+from clev2er.utils.grid_cache.grid_cache import (
+    grid_cache_path,
+    read_grid_cache,
+    write_grid_cache,
+)
+from clev2er.utils.projections.projection_cache import transform_lonlat
+
 # pylint: disable=too-many-statements
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=unpacking-non-sequence
@@ -54,6 +62,9 @@ class Slopes:
         """
         self.name = name
         self.config = config
+        self.source_file = ""  # path of slope file
+        self.grid_cache_file = ""  # path of grid cache, if slopes loaded from its cache
+        self.slopes: np.ndarray = np.array([])  # slope grid, loaded below
 
         if name not in all_slope_scenarios:
             raise ValueError(f"{name} not a valid slope scenario")
@@ -84,19 +95,21 @@ class Slopes:
                 log.error("%s not found", slope_file)
                 raise FileNotFoundError(f"{slope_file} not found")
 
-            image = imread(slope_file, key=0)
+            self.source_file = slope_file
+            if not self.load_grid_cache():
+                image = imread(slope_file, key=0)
+
+                # Ensure that 'image' is an ndarray
+                if not isinstance(image, np.ndarray):
+                    log.error("Unexpected image data type: %s", type(image).__name__)
+                    raise TypeError("Unexpected image data type")
 
-            # Ensure that 'image' is an ndarray
-            if not isinstance(image, np.ndarray):
-                log.error("Unexpected image data type: %s", type(image).__name__)
-                raise TypeError("Unexpected image data type")
+                self.slopes = image.reshape((image.shape[0], image.shape[1]))
+                self.slopes = np.flip(self.slopes, 0)
 
-            nrows = image.shape[0]
-            ncols = image.shape[1]
+            nrows = self.slopes.shape[0]
+            ncols = self.slopes.shape[1]
 
-            self.slopes = image
-            self.slopes = image.reshape((nrows, ncols))
-            self.slopes = np.flip(self.slopes, 0)
             self.minx = -2819500.0
             self.maxx = 2819500.0
             self.miny = -2419500.0
@@ -104,7 +117,6 @@ class Slopes:
 
             self.x = np.linspace(self.minx, self.maxx, ncols, endpoint=True)
             self.y = np.linspace(self.miny, self.maxy, nrows, endpoint=True)
-            self.xmesh, self.ymesh = np.meshgrid(self.x, self.y)
 
             self.coordinate_reference_system = CRS(
                 "epsg:3031"
@@ -122,19 +134,21 @@ class Slopes:
                     "Greenland_Cryosat2_1km_DEMv1.0_slope.unpacked.tif"
                 )
 
-            image = imread(slope_file, key=0)
+            self.source_file = slope_file
+            if not self.load_grid_cache():
+                image = imread(slope_file, key=0)
 
-            # Ensure that 'image' is an ndarray
-            if not isinstance(image, np.ndarray):
-                log.error("Unexpected image data type: %s", type(image).__name__)
-                raise TypeError("Unexpected image data type")
+                # Ensure that 'image' is an ndarray
+                if not isinstance(image, np.ndarray):
+                    log.error("Unexpected image data type: %s", type(image).__name__)
+                    raise TypeError("Unexpected image data type")
 
-            nrows = image.shape[0]
-            ncols = image.shape[1]
+                self.slopes = image.reshape((image.shape[0], image.shape[1]))
+                self.slopes = np.flip(self.slopes, 0)
+
+            nrows = self.slopes.shape[0]
+            ncols = self.slopes.shape[1]
 
-            self.slopes = image
-            self.slopes = image.reshape((nrows, ncols))
-            self.slopes = np.flip(self.slopes, 0)
             self.minx = -999500.0
             self.maxx = 999500.0
             self.miny = -3499500.0
@@ -142,7 +156,6 @@ class Slopes:
 
             self.x = np.linspace(self.minx, self.maxx, ncols, endpoint=True)
             self.y = np.linspace(self.miny, self.maxy, nrows, endpoint=True)
-            self.xmesh, self.ymesh = np.meshgrid(self.x, self.y)
 
             self.coordinate_reference_system = CRS(
                 "epsg:3413"
@@ -152,13 +165,15 @@ class Slopes:
         # Load AWI Greenland DEM 1km (Helm 2013)
         elif name == "awi_grn_2013_1km_slopes":
             if not slope_file:  # get from default path instead of config dict
-                slopefile = (
+                slope_file = (
                     os.environ["CPDATA_DIR"]
                     + "/SATS/RA/DEMS/grn_awi_2013_dem/grn_awi_2013_dem_slope.nc"
                 )
-            nc_dem = Dataset(slopefile)
 
-            self.slopes = nc_dem.variables["slope"][:]
+            self.source_file = slope_file
+            if not self.load_grid_cache():
+                with Dataset(slope_file) as nc_dem:
+                    self.slopes = nc_dem.variables["slope"][:]
 
             nrows = self.slopes.shape[0]
             ncols = self.slopes.shape[1]
@@ -170,7 +185,6 @@ class Slopes:
 
             self.x = np.linspace(self.minx, self.maxx, ncols, endpoint=True)
             self.y = np.linspace(self.miny, self.maxy, nrows, endpoint=True)
-            self.xmesh, self.ymesh = np.meshgrid(self.x, self.y)
 
             self.coordinate_reference_system = CRS(
                 "epsg:3413"
@@ -188,6 +202,61 @@ class Slopes:
             self.crs_wgs, self.crs_bng, always_xy=True
         )
 
+    @cached_property
+    def xmesh(self) -> np.ndarray:
+        """x values (m) of each grid cell, made when first used"""
+        return np.meshgrid(self.x, self.y)[0]
+
+    @cached_property
+    def ymesh(self) -> np.ndarray:
+        """y values (m) of each grid cell, made when first used"""
+        return np.meshgrid(self.x, self.y)[1]
+
+    def load_grid_cache(self) -> bool:
+        """memory map the slope grid from its grid cache (see clev2er.utils.grid_cache), if
+           CLEV2ER_GRID_CACHE_DIR is set and the cache is up to date with the slope file
+
+        Returns:
+            bool: True if the slopes were loaded from their cache
+        """
+        cache_path = grid_cache_path(f"slopes_{self.name}")
+        if not cache_path:
+            return False
+        cache = read_grid_cache(cache_path, self.source_file, log)
+        if cache is None:
+            return False
+        arrays = cache[0]
+
+        if "slopes_mask" in arrays:  # slopes were read from netcdf as a masked array
+            self.slopes = np.ma.MaskedArray(arrays["slopes"], mask=arrays["slopes_mask"])
+        else:
+            self.slopes = arrays["slopes"]
+
+        self.grid_cache_file = cache_path
+        return True
+
+    def write_grid_cache(self) -> str:
+        """write the loaded slope grid to its grid cache in CLEV2ER_GRID_CACHE_DIR
+
+        Returns:
+            str: path of cache, without extension
+
+        Raises:
+            ValueError: if CLEV2ER_GRID_CACHE_DIR is not set
+        """
+        cache_path = grid_cache_path(f"slopes_{self.name}")
+        if not cache_path:
+            raise ValueError("CLEV2ER_GRID_CACHE_DIR is not set")
+        if isinstance(self.slopes, np.ma.MaskedArray):
+            arrays = {
+                "slopes": np.ma.getdata(self.slopes),
+                "slopes_mask": np.ma.getmaskarray(self.slopes),
+            }
+        else:
+            arrays = {"slopes": self.slopes}
+        write_grid_cache(cache_path, arrays, {}, self.source_file)
+        return cache_path
+
     # Revised interp_slope method to address the mypy error
 
     def interp_slope(self, x, y, method="linear", xy_is_lonlat=False):
@@ -210,7 +279,7 @@ class Slopes:
 
         # Transform to x, y if inputs are lon, lat
         if xy_is_lonlat:
-            x, y = self.lonlat_to_xy_transformer.transform(x, y)  # transform lon, lat -> x, y
+            x, y = transform_lonlat(self.lonlat_to_xy_transformer, x, y)  # lon, lat -> x, y
 
         # Identify out-of-bounds values in x and y, replacing them with boundary values
         x = np.clip(x, self.minx, self.maxx)
@@ -249,7 +318,7 @@ class Slopes:
         (
             thisx,
             thisy,
-        ) = self.lonlat_to_xy_transformer.transform(lon, lat)
+        ) = transform_lonlat(self.lonlat_to_xy_transformer, lon, lat)
 
         slope_data = self.interp_slope(thisx, thisy, method=method)
 
@@ -0,0 +1,17 @@
+"""
+# Chain Processing Trace
+
+Optional timeline of a run_chain() run, enabled with the run_chain.py `--trace <dir>`
+command line option.
+
+Records the wall time of each Algorithm.init(), Algorithm.process() and
+Algorithm.finalize() call, and of the opening and closing of each L1b file, in every
+process used by the run. At the end of the run two files are written to the trace
+directory:
+
+- `<chain>_trace_<YYYYMMDDTHHMMSS>.json` : Chrome trace-event format, which can be viewed
+  in chrome://tracing or https://ui.perfetto.dev, with one row per worker process
+- `<chain>_trace_<YYYYMMDDTHHMMSS>_files.csv` : one row per L1b file, with the file's total
+  wall time, status, worker process and the time spent in each algorithm
+
+"""
@@ -0,0 +1,290 @@
+"""clev2er.utils.trace.chain_trace.py
+
+class ChainTrace: records a timeline of the chain's processing steps (algorithm init,
+process, finalize and L1b file open/close) and writes it as a Chrome trace-event JSON file
+and a per L1b file CSV summary.
+
+Each process (the main process and each multi-processing worker) has its own ChainTrace.
+Workers return their recorded events to the main process with each file's results, where
+they are merged with ChainTrace.extend() before writing.
+
+Example:
+
+    trace = ChainTrace()
+    with trace.span("alg_surface_type", "process", filenum=0):
+        alg_obj.process(l1b, shared_dict)
+    trace.write_chrome_trace("/tmp/trace.json")
+"""
+
+import csv
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from multiprocessing import current_process
+from typing import Any, Iterator
+
+# Event categories recorded by run_chain
+TRACE_CATEGORIES = ("file", "open", "close", "init", "process", "finalize")
+
+
+class ChainTrace:
+    """Class to record a timeline of chain processing events in a single process
+
+    Events are stored as Chrome Trace Event Format dicts, using complete ('X') events
+    with wall clock times in microseconds since the epoch, so that events recorded in
+    different processes share the same time base.
+    """
+
+    def __init__(self, enabled: bool = True, process_name: str = "") -> None:
+        """class initialization
+
+        Args:
+            enabled (bool, optional): if False, no events are recorded. Defaults to True.
+            process_name (str, optional): name to label this process's events with in the
+                trace viewer. Defaults to the multiprocessing process name
+                (ie MainProcess, Process-1,..)
+        """
+        self.enabled = enabled
+        self.pid = os.getpid()
+        self.process_name = process_name if process_name else current_process().name
+        self.events: list[dict] = []
+        if self.enabled:
+            # metadata event naming the process's row in the trace viewer
+            self.events.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": self.pid,
+                    "tid": 0,
+                    "args": {"name": self.process_name},
+                }
+            )
+
+    def add_event(
+        self,
+        name: str,
+        category: str,
+        start_ns: int,
+        duration_ns: int,
+        args: dict | None = None,
+    ) -> None:
+        """add a completed event to the trace
+
+        Args:
+            name (str): event name, ie algorithm name or L1b file name
+            category (str): event category, one of TRACE_CATEGORIES
+            start_ns (int): start time of event in ns since the epoch (from time.time_ns())
+            duration_ns (int): duration of event in ns
+            args (dict|None, optional): additional event values (filenum, status,..)
+        """
+        if not self.enabled:
+            return
+        self.events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start_ns / 1000.0,
+                "dur": duration_ns / 1000.0,
+                "pid": self.pid,
+                "tid": 0,
+                "args": args if args is not None else {},
+            }
+        )
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[dict]:
+        """context manager that records the wall time of the enclosed block as an event
+
+        The yielded args dict may be updated within the block to add values to the event
+        (for example a status which is only known at the end).
+
+        Args:
+            name (str): event name
+            category (str): event category, one of TRACE_CATEGORIES
+            **args: additional event values, ie filenum=1
+
+        Yields:
+            dict: the event's args dict
+        """
+        if not self.enabled:
+            yield args
+            return
+        start_ns = time.time_ns()
+        try:
+            yield args
+        finally:
+            self.add_event(name, category, start_ns, time.time_ns() - start_ns, args)
+
+    def pop_events(self) -> list[dict]:
+        """return all recorded events and clear them from this trace
+
+        Used by multi-processing workers to pass the events for each file back to the
+        main process.
+
+        Returns:
+            list[dict]: recorded events
+        """
+        events = self.events
+        self.events = []
+        return events
+
+    def extend(self, events: list[dict]) -> None:
+        """add events recorded in another process to this trace
+
+        Args:
+            events (list[dict]): events from another ChainTrace.pop_events()
+        """
+        if self.enabled:
+            self.events.extend(events)
+
+    def file_summaries(self) -> list[dict]:
+        """summarize the recorded events for each L1b file
+
+        Returns:
+            list[dict]: one dict per L1b file, sorted by filenum, containing
+            filenum, l1b_file, process, instr_mode, start_time, wall_time, status, open,
+            close, init (s) and the process() time (s) of each algorithm,
+            keyed by algorithm name
+        """
+        # process names by pid, from the metadata events
+        process_names = {
+            event["pid"]: event["args"]["name"] for event in self.events if event["ph"] == "M"
+        }
+
+        summaries: dict[int, dict] = {}
+        # per file: algorithm process() times, and open, close, init times
+        alg_times: dict[int, dict] = defaultdict(lambda: defaultdict(float))
+        step_times: dict[int, dict] = defaultdict(lambda: defaultdict(float))
+        for event in self.events:
+            if event["ph"] != "X" or "filenum" not in event["args"]:
+                continue
+            filenum = event["args"]["filenum"]
+            if event["cat"] == "file":
+                summaries[filenum] = {
+                    "filenum": filenum,
+                    "l1b_file": event["args"].get("l1b_file", event["name"]),
+                    "process": process_names.get(event["pid"], str(event["pid"])),
+                    "instr_mode": event["args"].get("instr_mode", ""),
+                    "start_time": datetime.fromtimestamp(
+                        event["ts"] / 1e6, tz=timezone.utc
+                    ).isoformat(timespec="milliseconds"),
+                    "wall_time": event["dur"] / 1e6,
+                    "status": event["args"].get("status", ""),
+                }
+            elif event["cat"] == "process":
+                alg_times[filenum][event["name"]] += event["dur"] / 1e6
+            elif event["cat"] in ("open", "close", "init"):
+                step_times[filenum][event["cat"]] += event["dur"] / 1e6
+
+        for filenum, summary in summaries.items():
+            summary["open"] = step_times[filenum]["open"]
+            summary["close"] = step_times[filenum]["close"]
+            summary["init"] = step_times[filenum]["init"]
+            summary["algorithms"] = dict(alg_times[filenum])
+
+        return [summaries[filenum] for filenum in sorted(summaries)]
+
+    def write_chrome_trace(self, path: str) -> None:
+        """write the recorded events as a Chrome trace-event JSON file
+
+        Args:
+            path (str): path of output .json file
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+
+    def write_file_csv(self, path: str) -> None:
+        """write a CSV file with one row per L1b file processed
+
+        Columns are filenum, l1b_file, process, instr_mode, start_time, wall_time (s),
+        status, open (s), close (s), init (s), slowest_algorithm, followed by one column per
+        algorithm containing its process() time (s) for that file (empty if the
+        algorithm was not run for the file).
+
+        Args:
+            path (str): path of output .csv file
+        """
+        summaries = self.file_summaries()
+
+        alg_names: list[str] = []  # in order of first use
+        for summary in summaries:
+            for alg_name in summary["algorithms"]:
+                if alg_name not in alg_names:
+                    alg_names.append(alg_name)
+
+        columns = [
+            "filenum",
+            "l1b_file",
+            "process",
+            "instr_mode",
+            "start_time",
+            "wall_time",
+            "status",
+            "open",
+            "close",
+            "init",
+            "slowest_algorithm",
+        ]
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(columns + alg_names)
+            for summary in summaries:
+                alg_times = summary["algorithms"]
+                slowest = max(alg_times, key=alg_times.get) if alg_times else ""
+                writer.writerow(
+                    [
+                        (
+                            f"{summary[column]:.6f}"
+                            if isinstance(summary[column], float)
+                            else summary[column]
+                        )
+                        for column in columns[:-1]
+                    ]
+                    + [slowest]
+                    + [
+                        f"{alg_times[alg_name]:.6f}" if alg_name in alg_times else ""
+                        for alg_name in alg_names
+                    ]
+                )
+
+    def log_summary(self, log: logging.Logger, num_files: int = 5) -> None:
+        """log the slowest L1b files and the slowest algorithm for each instrument mode
+
+        Args:
+            log (logging.Logger): log instance to use
+            num_files (int, optional): number of slowest files to log. Defaults to 5.
+        """
+        summaries = self.file_summaries()
+        if len(summaries) == 0:
+            return
+
+        log.info("Slowest L1b files:")
+        for summary in sorted(summaries, key=lambda s: s["wall_time"], reverse=True)[:num_files]:
+            log.info(
+                "  f%d %.3f s (%s) %s",
+                summary["filenum"],
+                summary["wall_time"],
+                summary["status"],
+                summary["l1b_file"],
+            )
+
+        # mean process() time of each algorithm, per instrument mode
+        mode_alg_times: dict[str, dict] = defaultdict(lambda: defaultdict(list))
+        for summary in summaries:
+            for alg_name, alg_time in summary["algorithms"].items():
+                mode_alg_times[summary["instr_mode"]][alg_name].append(alg_time)
+
+        for instr_mode, alg_times in sorted(mode_alg_times.items()):
+            mean_times = {alg_name: sum(t) / len(t) for alg_name, t in alg_times.items()}
+            slowest = max(mean_times, key=mean_times.get)  # type: ignore[arg-type]
+            log.info(
+                "Slowest algorithm for %s files: %s (mean %.3f s per file)",
+                instr_mode if instr_mode else "all",
+                slowest,
+                mean_times[slowest],
+            )
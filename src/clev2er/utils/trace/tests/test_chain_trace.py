@@ -0,0 +1,73 @@
+"""pytest tests of clev2er.utils.trace.chain_trace
+"""
+
+import csv
+import json
+import logging
+import time
+
+from clev2er.utils.trace.chain_trace import ChainTrace
+
+log = logging.getLogger(__name__)
+
+
+def test_chain_trace_disabled():
+    """test that a disabled ChainTrace records no events"""
+    trace = ChainTrace(enabled=False)
+    with trace.span("alg_a", "process", filenum=0) as args:
+        args["status"] = "processed"
+    assert len(trace.pop_events()) == 0
+
+
+def test_chain_trace_files(tmp_path):
+    """test recording, merging and writing of trace events from two processes"""
+
+    trace = ChainTrace(process_name="main")
+
+    # simulate events recorded in a worker process, and returned to the main process
+    worker_trace = ChainTrace(process_name="worker")
+    worker_trace.pid += 1
+    worker_trace.events[0]["pid"] = worker_trace.pid
+    for filenum in (0, 1):
+        with worker_trace.span(
+            "l1b.nc", "file", filenum=filenum, l1b_file=f"/dir/l1b_{filenum}.nc"
+        ) as file_trace:
+            with worker_trace.span("l1b.nc", "open", filenum=filenum):
+                pass
+            with worker_trace.span("alg_a", "process", filenum=filenum):
+                time.sleep(0.01 * (filenum + 1))
+            if filenum == 0:
+                with worker_trace.span("alg_b", "process", filenum=filenum):
+                    pass
+            file_trace["status"] = "processed" if filenum == 0 else "skipped"
+            file_trace["instr_mode"] = "LRM"
+        trace.extend(worker_trace.pop_events())
+
+    with trace.span("alg_a", "finalize"):
+        pass
+
+    summaries = trace.file_summaries()
+    assert [summary["filenum"] for summary in summaries] == [0, 1]
+    assert summaries[0]["process"] == "worker"
+    assert summaries[1]["status"] == "skipped"
+    assert summaries[1]["algorithms"]["alg_a"] >= 0.02
+    assert summaries[1]["wall_time"] >= summaries[1]["algorithms"]["alg_a"]
+    assert "alg_b" not in summaries[1]["algorithms"]
+
+    trace.write_chrome_trace(str(tmp_path / "trace.json"))
+    with open(tmp_path / "trace.json", encoding="utf-8") as file:
+        events = json.load(file)["traceEvents"]
+    assert len([event for event in events if event["ph"] == "M"]) == 2
+    assert len([event for event in events if event.get("cat") == "process"]) == 3
+    assert all(event["dur"] >= 0 for event in events if event["ph"] == "X")
+
+    trace.write_file_csv(str(tmp_path / "files.csv"))
+    with open(tmp_path / "files.csv", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 2
+    assert rows[0]["l1b_file"] == "/dir/l1b_0.nc"
+    assert rows[0]["alg_b"] != ""
+    assert rows[1]["alg_b"] == ""
+    assert rows[1]["slowest_algorithm"] == "alg_a"
+
+    trace.log_summary(log)
@@ -0,0 +1,16 @@
+"""
+# Shared Work Queue
+
+SQLite work queue of L1b files on shared storage, used to run a chain on several hosts at
+once without an external service. Every `run_chain.py --work_queue <path>` run adds its L1b
+file list to the queue (files already in the queue are not added again), and each of its
+(worker) processes then claims the next pending file from the queue until none remain.
+Runs can be started on any number of hosts, at any time.
+
+The queue records the status, host process and wall time of each file, and the file counts
+and cumulative algorithm times of each run. `clev2er.tools.work_queue_report` merges these
+into a combined report, and can return failed or abandoned files to the queue.
+
+SQLite uses file locks, so the queue must be on a shared filesystem with working POSIX
+locks (ie Lustre, GPFS or NFSv4 with locking enabled).
+"""
@@ -0,0 +1,75 @@
+"""pytest tests of clev2er.utils.work_queue.work_queue
+"""
+
+import time
+
+from clev2er.utils.work_queue.work_queue import WorkQueue
+
+
+def test_work_queue_claim(tmp_path):
+    """test that files are added once, claimed in order by one worker each, and completed"""
+    queue_file = str(tmp_path / "queue.sqlite")
+    l1b_files = [f"/l1b/file_{filenum}.nc" for filenum in range(4)]
+
+    with WorkQueue(queue_file) as queue:
+        assert queue.add_files(l1b_files[:3]) == 3
+        # a second host adding the same file list only adds the new files
+        assert queue.add_files(l1b_files) == 1
+        assert queue.num_pending() == 4
+
+    # two workers sharing the queue through separate connections
+    with WorkQueue(queue_file) as queue1, WorkQueue(queue_file) as queue2:
+        job1 = queue1.claim("host1:1")
+        job2 = queue2.claim("host2:2")
+        assert job1 is not None and job2 is not None
+        assert job1[1] == l1b_files[0]
+        assert job2[1] == l1b_files[1]
+
+        queue1.complete({"filenum": job1[0], "status": "processed", "wall_time": 2.0}, "host1:1")
+        queue2.complete({"filenum": job2[0], "status": "error", "error_str": "bad"}, "host2:2")
+
+        # file claimed by an interrupted run is returned to the queue
+        job3 = queue1.claim("host1:1")
+        assert job3 is not None
+        queue1.release([job3[0]])
+
+        assert queue2.status_counts() == {"processed": 1, "error": 1, "pending": 2}
+        assert [job[1] for job in iter(lambda: queue2.claim("host2:2"), None)] == l1b_files[2:]
+        assert queue1.claim("host1:1") is None
+
+        error_files = queue1.files(status="error")
+        assert len(error_files) == 1
+        assert error_files[0]["l1b_file"] == l1b_files[1]
+        assert error_files[0]["error_str"] == "bad"
+
+
+def test_work_queue_requeue(tmp_path):
+    """test that failed and abandoned files can be returned to the queue"""
+    with WorkQueue(str(tmp_path / "queue.sqlite")) as queue:
+        queue.add_files(["a.nc", "b.nc", "c.nc"])
+        for _ in range(3):
+            queue.claim("host1:1")
+        queue.complete({"filenum": 1, "status": "error"}, "host1:1")
+        queue.complete({"filenum": 2, "status": "processed"}, "host1:1")
+
+        assert queue.requeue(stale_hours=1.0) == 0  # file 3 claimed just now
+        assert queue.requeue(errors=True) == 1
+        time.sleep(0.01)
+        assert queue.requeue(stale_hours=0.0) == 1
+        assert queue.status_counts() == {"pending": 2, "processed": 1}
+
+
+def test_work_queue_runs(tmp_path):
+    """test recording the run summaries"""
+    with WorkQueue(str(tmp_path / "queue.sqlite")) as queue:
+        started = time.time()
+        queue.record_run(
+            "host1:1", {"processed": 2, "skipped": 1, "errors": 0}, {"alg_a": 1.5}, started
+        )
+        queue.record_run("host2:2", {"processed": 1}, {}, started + 1.0)
+
+        runs = queue.runs()
+        assert [run["host"] for run in runs] == ["host1", "host2"]
+        assert runs[0]["processed"] == 2
+        assert runs[0]["timers"] == {"alg_a": 1.5}
+        assert runs[1]["errors"] == 0
@@ -0,0 +1,277 @@
+"""clev2er.utils.work_queue.work_queue.py
+
+class WorkQueue: SQLite queue of L1b files shared by run_chain runs on several hosts
+
+Tables:
+
+- files: one row per L1b file, with its filenum (unique within the queue), status
+  ('pending', 'running', 'processed', 'skipped' or 'error'), the worker that claimed it
+  ('<host>:<pid>'), claim and finish times, wall time, error string and product path
+- runs: one row per run_chain run, with its host, start and finish times, file counts
+  and the cumulative process() time of each algorithm (JSON)
+
+Example:
+
+    with WorkQueue("/shared/cryotempo_2020.sqlite") as queue:
+        queue.add_files(l1b_file_list)
+        while (job := queue.claim(worker_id)) is not None:
+            filenum, l1b_file = job
+            ...
+            queue.complete(file_result, worker_id)
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from typing import Any, Optional
+
+log = logging.getLogger(__name__)
+
+# file status values
+PENDING = "pending"
+RUNNING = "running"
+FINISHED_STATUSES = ("processed", "skipped", "error")
+
+
+def get_worker_id() -> str:
+    """get the id of this process in the work queue
+
+    Returns:
+        str: '<hostname>:<pid>'
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """class to add, claim and complete L1b files in a SQLite work queue shared between
+    processes and hosts"""
+
+    def __init__(self, queue_file: str, thislog: logging.Logger | None = None) -> None:
+        """class initialization. Opens (or creates) the queue file
+
+        Args:
+            queue_file (str): path of SQLite queue file, on storage shared by all hosts
+            thislog (logging.Logger|None, optional): log instance to use. Defaults to None.
+        """
+        self.queue_file = queue_file
+        self.log = thislog if thislog is not None else log
+
+        # autocommit mode, so that claim() can hold an exclusive (IMMEDIATE) transaction.
+        # The long timeout allows for many processes waiting for the lock
+        self.conn = sqlite3.connect(queue_file, timeout=300.0, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "filenum INTEGER PRIMARY KEY, l1b_file TEXT UNIQUE NOT NULL, "
+            "status TEXT NOT NULL, worker TEXT, claimed REAL, finished REAL, "
+            "wall_time REAL, error_str TEXT, product_filename TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_status ON files (status, filenum)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "worker TEXT PRIMARY KEY, host TEXT, started REAL, finished REAL, "
+            "processed INTEGER, skipped INTEGER, errors INTEGER, timers TEXT)"
+        )
+        self.conn.execute("COMMIT")
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """close the queue file"""
+        self.conn.close()
+
+    def add_files(self, l1b_files: list[str]) -> int:
+        """add L1b files to the queue as pending, in list order. Files already in the queue
+        (with any status) are not added again
+
+        Args:
+            l1b_files (list[str]): L1b file paths
+
+        Returns:
+            int: number of files added
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        num_before = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO files (l1b_file, status) VALUES (?, ?)",
+            ((l1b_file, PENDING) for l1b_file in l1b_files),
+        )
+        num_after = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        self.conn.execute("COMMIT")
+        return num_after - num_before
+
+    def claim(self, worker: str) -> Optional[tuple[int, str]]:
+        """claim the next pending file in the queue
+
+        Args:
+            worker (str): id of claiming process, from get_worker_id()
+
+        Returns:
+            tuple[int, str] | None: (filenum, l1b_file), or None if no files are pending
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT filenum, l1b_file FROM files WHERE status = ? ORDER BY filenum LIMIT 1",
+                (PENDING,),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE files SET status = ?, worker = ?, claimed = ? WHERE filenum = ?",
+                    (RUNNING, worker, time.time(), row["filenum"]),
+                )
+        finally:
+            self.conn.execute("COMMIT")
+        if row is None:
+            return None
+        return (row["filenum"], row["l1b_file"])
+
+    def complete(self, file_result: dict, worker: str) -> None:
+        """record the result of a claimed file
+
+        Args:
+            file_result (dict): file result, containing filenum, status and optionally
+                wall_time, error_str and product_filename
+                (see clev2er.tools.run_chain.run_chain_on_single_file())
+            worker (str): id of process which processed the file
+        """
+        self.conn.execute(
+            "UPDATE files SET status = ?, worker = ?, finished = ?, wall_time = ?, "
+            "error_str = ?, product_filename = ? WHERE filenum = ?",
+            (
+                file_result["status"],
+                worker,
+                time.time(),
+                file_result.get("wall_time"),
+                file_result.get("error_str", ""),
+                file_result.get("product_filename", ""),
+                file_result["filenum"],
+            ),
+        )
+
+    def release(self, filenums: list[int]) -> None:
+        """return claimed files which will not be completed to the queue
+
+        Args:
+            filenums (list[int]): filenums of claimed files
+        """
+        self.conn.executemany(
+            "UPDATE files SET status = ?, worker = NULL, claimed = NULL "
+            "WHERE filenum = ? AND status = ?",
+            ((PENDING, filenum, RUNNING) for filenum in filenums),
+        )
+
+    def requeue(self, errors: bool = False, stale_hours: Optional[float] = None) -> int:
+        """return failed or abandoned files to the queue, to be processed again
+
+        Args:
+            errors (bool, optional): requeue files with error status. Defaults to False.
+            stale_hours (float, optional): requeue files claimed more than this number of
+                hours ago and not completed, ie by a run which was killed. Defaults to None.
+
+        Returns:
+            int: number of files requeued
+        """
+        num_requeued = 0
+        self.conn.execute("BEGIN IMMEDIATE")
+        if errors:
+            num_requeued += self.conn.execute(
+                "UPDATE files SET status = ?, worker = NULL, claimed = NULL WHERE status = ?",
+                (PENDING, "error"),
+            ).rowcount
+        if stale_hours is not None:
+            num_requeued += self.conn.execute(
+                "UPDATE files SET status = ?, worker = NULL, claimed = NULL "
+                "WHERE status = ? AND claimed < ?",
+                (PENDING, RUNNING, time.time() - stale_hours * 3600.0),
+            ).rowcount
+        self.conn.execute("COMMIT")
+        return num_requeued
+
+    def num_pending(self, include_running: bool = False) -> int:
+        """count the files waiting to be claimed
+
+        Args:
+            include_running (bool, optional): also count files claimed and not yet completed.
+                                              Defaults to False.
+
+        Returns:
+            int: number of pending (and running) files
+        """
+        statuses = (PENDING, RUNNING) if include_running else (PENDING, PENDING)
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM files WHERE status IN (?, ?)", statuses
+        ).fetchone()[0]
+
+    def status_counts(self) -> dict[str, int]:
+        """count the files of each status in the queue
+
+        Returns:
+            dict[str, int]: number of files, keyed by status
+        """
+        return dict(
+            self.conn.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall()
+        )
+
+    def files(self, status: str = "") -> list[dict[str, Any]]:
+        """get the queue's file records
+
+        Args:
+            status (str, optional): only files with this status. Defaults to "" (all).
+
+        Returns:
+            list[dict[str, Any]]: file records, in filenum order
+        """
+        if status:
+            rows = self.conn.execute(
+                "SELECT * FROM files WHERE status = ? ORDER BY filenum", (status,)
+            )
+        else:
+            rows = self.conn.execute("SELECT * FROM files ORDER BY filenum")
+        return [dict(row) for row in rows]
+
+    def record_run(
+        self, worker: str, counts: dict[str, int], timers: dict[str, float], started: float
+    ) -> None:
+        """record the summary of a run_chain run which took files from the queue
+
+        Args:
+            worker (str): id of run_chain process, from get_worker_id()
+            counts (dict[str, int]): number of files processed, skipped, errors
+            timers (dict[str, float]): cumulative process() time of each algorithm (s)
+            started (float): time.time() at start of run
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                worker,
+                worker.rsplit(":", maxsplit=1)[0],
+                started,
+                time.time(),
+                counts.get("processed", 0),
+                counts.get("skipped", 0),
+                counts.get("errors", 0),
+                json.dumps(timers),
+            ),
+        )
+
+    def runs(self) -> list[dict[str, Any]]:
+        """get the summaries of the runs recorded by record_run()
+
+        Returns:
+            list[dict[str, Any]]: run summaries, in start time order, with timers decoded
+        """
+        runs = []
+        for row in self.conn.execute("SELECT * FROM runs ORDER BY started"):
+            run = dict(row)
+            run["timers"] = json.loads(run["timers"]) if run["timers"] else {}
+            runs.append(run)
+        return runs